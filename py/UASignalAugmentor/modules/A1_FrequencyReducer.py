@@ -0,0 +1,363 @@
+"""
+频率预算缩减模块
+
+A1后处理阶段：将 Analy_freq_all.pkl 中的全局频率列表按容差聚类，
+得到数量受控的代表频率列表，以减少A3生成的环境文件数（每个频率一次BELLHOP计算）。
+
+功能：
+- 按最大数量 / 相对容差 / 绝对容差三种方式合并频率
+- 输出代表频率列表及 原始频率 → 代表频率 的映射（供信号合成查找对应的到达结构）
+- 输出聚类引入的近似误差报告
+"""
+# 自带包
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field
+import time
+# 第三方包
+import numpy as np
+# 本地包
+from utils.io_utils import save_pickle, load_pickle
+from utils.freq_bins import freq_to_bins
+
+
+REDUCE_MODES = ('count', 'abs', 'rel')
+
+
+@dataclass
+class FrequencyReduction:
+    """频率缩减结果"""
+    representatives: np.ndarray                 # 代表频率（升序）
+    original: np.ndarray                        # 原始频率（升序）
+    rep_index: np.ndarray                       # 每个原始频率对应的代表频率序号
+    freq_precision: int                         # 频率精度（小数位数）
+    report: Dict[str, Any] = field(default_factory=dict)  # 误差报告
+
+    def lookup(self, freq: np.ndarray) -> np.ndarray:
+        """
+        查找频率对应的代表频率
+
+        Args:
+            freq: 待查频率（应为原始频率列表中的值）
+
+        Returns:
+            代表频率数组
+
+        Raises:
+            KeyError: 存在不在原始频率列表中的频率
+        """
+        query = freq_to_bins(np.atleast_1d(freq), self.freq_precision)
+        orig_bins = freq_to_bins(self.original, self.freq_precision)
+        pos = np.searchsorted(orig_bins, query)
+        pos_c = np.minimum(pos, len(orig_bins) - 1)
+        missing = (pos >= len(orig_bins)) | (orig_bins[pos_c] != query)
+        if np.any(missing):
+            raise KeyError(f"Frequencies not in original list: {np.atleast_1d(freq)[missing][:10]}")
+        return self.representatives[self.rep_index[pos_c]]
+
+
+class FrequencyReducer:
+    """
+    频率预算缩减器
+
+    对一维有序频率做区间覆盖聚类：每个簇的跨度不超过2倍容差，代表频率取簇的中心，
+    保证簇内每个频率到代表频率的误差不超过容差。自左向右的贪心扫描得到的簇数最少；
+    按最大数量缩减时对容差做二分查找，得到满足数量预算的最小容差；
+    频率间隔相同时簇数随容差成批跳变，簇数不足预算时再拆分跨度最大的簇补足（拆分不增大误差）。
+
+    - abs模式：容差单位为Hz，代表频率取簇两端的算术中点
+    - rel模式：容差为相对误差，在对数频率上聚类，代表频率取簇两端的几何中点
+    - count模式：在rel（默认）或abs尺度上搜索满足max_count的最小容差
+
+    代表频率按freq_precision取整，误差上界相应增加半个精度步长，实际误差见报告。
+
+    Attributes:
+        config: 配置字典
+        logger: 日志记录器
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        初始化频率缩减器
+
+        Args:
+            config: 配置字典，应包含：
+                - input_file: A1输出的全局频率文件（Analy_freq_all.pkl）
+                - output_file: 缩减结果输出文件，默认与输入同目录的 Analy_freq_reduced.pkl
+                - mode: 缩减方式 'count' | 'abs' | 'rel'，默认'count'
+                - max_count: count模式下的最大代表频率数
+                - abs_tol: abs模式下的绝对容差 (Hz)
+                - rel_tol: rel模式下的相对容差（如0.01表示1%）
+                - count_scale: count模式的搜索尺度 'rel' | 'abs'，默认'rel'
+                - freq_precision: 代表频率的取整精度（小数位数），默认1
+        """
+        self.config = config
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.input_file = Path(config['input_file'])
+        self.output_file = Path(config.get('output_file', self.input_file.parent / 'Analy_freq_reduced.pkl'))
+        self.mode = config.get('mode', 'count')
+        self.max_count = config.get('max_count')
+        self.abs_tol = config.get('abs_tol')
+        self.rel_tol = config.get('rel_tol')
+        self.count_scale = config.get('count_scale', 'rel')
+        self.freq_precision = config.get('freq_precision', 1)
+
+        if self.mode not in REDUCE_MODES:
+            raise ValueError(f"Unknown mode: {self.mode}, expected one of {REDUCE_MODES}")
+        required = {'count': 'max_count', 'abs': 'abs_tol', 'rel': 'rel_tol'}[self.mode]
+        if config.get(required) is None:
+            raise ValueError(f"mode '{self.mode}' requires '{required}'")
+
+        self.logger.info(f"FrequencyReducer initialized with config: {config}")
+
+    def process(self) -> Dict[str, Any]:
+        """
+        读取全局频率列表，执行缩减并保存结果
+
+        Returns:
+            结果字典：
+            {
+                'output_file': Path,                  # 输出文件
+                'num_original': int,                  # 原始频率数
+                'num_representatives': int,           # 代表频率数
+                'report': dict,                       # 误差报告
+                'elapsed_time': float                 # 处理耗时（秒）
+            }
+        """
+        start_time = time.time()
+
+        freq_data = load_pickle(self.input_file)
+        frequencies = freq_data['frequencies'] if isinstance(freq_data, dict) else freq_data
+
+        reduction = self.reduce(np.asarray(frequencies, dtype=np.float64))
+        self._save_reduction(reduction)
+
+        elapsed_time = time.time() - start_time
+        self.logger.info(
+            f"Reduced {len(reduction.original)} frequencies to {len(reduction.representatives)} "
+            f"(max abs error {reduction.report['max_abs_error']:.3f} Hz, "
+            f"max rel error {reduction.report['max_rel_error']:.4%}) in {elapsed_time:.2f}s"
+        )
+
+        return {
+            'output_file': self.output_file,
+            'num_original': len(reduction.original),
+            'num_representatives': len(reduction.representatives),
+            'report': reduction.report,
+            'elapsed_time': elapsed_time
+        }
+
+    def reduce(self, frequencies: np.ndarray) -> FrequencyReduction:
+        """
+        按配置缩减频率列表
+
+        Args:
+            frequencies: 频率数组
+
+        Returns:
+            FrequencyReduction对象
+        """
+        original = np.unique(frequencies)
+
+        if self.mode == 'abs':
+            scale, tol = 'abs', float(self.abs_tol)
+        elif self.mode == 'rel':
+            scale, tol = 'rel', float(self.rel_tol)
+        else:
+            scale = self.count_scale
+            tol = self._tol_for_count(original, scale, int(self.max_count))
+
+        values = _to_scale(original, scale)
+        starts = _cover_starts(values, _width(tol, scale))
+        if self.mode == 'count':
+            starts = _split_to_count(values, starts, int(self.max_count))
+        representatives, rep_index = self._representatives(original, starts, scale)
+
+        reduction = FrequencyReduction(
+            representatives=representatives,
+            original=original,
+            rep_index=rep_index,
+            freq_precision=self.freq_precision
+        )
+        reduction.report = self._error_report(reduction, scale, tol)
+        return reduction
+
+    def _tol_for_count(self, original: np.ndarray, scale: str, max_count: int) -> float:
+        """
+        二分查找使簇数不超过max_count的最小容差
+
+        簇数随容差单调不增，贪心覆盖在给定容差下簇数最少，因此结果即该预算下的最小最大误差
+        """
+        if max_count < 1:
+            raise ValueError(f"max_count must be >= 1, got {max_count}")
+        if len(original) <= max_count:
+            return 0.0
+
+        values = _to_scale(original, scale)
+        lo, hi = 0.0, float(values[-1] - values[0]) / 2
+        if scale == 'rel':
+            hi = float(np.expm1(hi))
+        # 容差的相对精度达到1e-9即可
+        for _ in range(100):
+            mid = (lo + hi) / 2
+            if len(_cover_starts(values, _width(mid, scale))) <= max_count:
+                hi = mid
+            else:
+                lo = mid
+            if hi - lo <= 1e-9 * max(hi, 1e-12):
+                break
+        return hi
+
+    def _representatives(self, original: np.ndarray, starts: np.ndarray,
+                         scale: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        由簇起点计算代表频率及映射
+
+        Returns:
+            (representatives, rep_index)
+        """
+        ends = np.append(starts[1:], len(original)) - 1
+        lo_f, hi_f = original[starts], original[ends]
+        if scale == 'rel':
+            centers = np.sqrt(lo_f * hi_f)
+        else:
+            centers = (lo_f + hi_f) / 2
+        centers = np.round(centers, self.freq_precision)
+
+        cluster_id = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(original))))
+        # 取整可能使相邻簇的代表频率重合，合并之
+        representatives, inverse = np.unique(centers, return_inverse=True)
+        return representatives, inverse[cluster_id]
+
+    def _error_report(self, reduction: FrequencyReduction, scale: str, tol: float) -> Dict[str, Any]:
+        """计算缩减引入的近似误差统计"""
+        original = reduction.original
+        n_orig = len(original)
+        if n_orig == 0:
+            return {'scale': scale, 'tolerance': tol, 'num_original': 0, 'num_representatives': 0,
+                    'reduction_ratio': 0.0, 'max_abs_error': 0.0, 'mean_abs_error': 0.0,
+                    'max_rel_error': 0.0, 'mean_rel_error': 0.0, 'max_cluster_size': 0}
+
+        mapped = reduction.representatives[reduction.rep_index]
+        abs_err = np.abs(mapped - original)
+        rel_err = abs_err / np.abs(original)
+        cluster_sizes = np.bincount(reduction.rep_index)
+
+        return {
+            'scale': scale,
+            'tolerance': tol,
+            'num_original': n_orig,
+            'num_representatives': len(reduction.representatives),
+            'reduction_ratio': n_orig / len(reduction.representatives),
+            'max_abs_error': float(abs_err.max()),
+            'mean_abs_error': float(abs_err.mean()),
+            'max_rel_error': float(rel_err.max()),
+            'mean_rel_error': float(rel_err.mean()),
+            'max_cluster_size': int(cluster_sizes.max()),
+        }
+
+    def _save_reduction(self, reduction: FrequencyReduction) -> None:
+        """
+        保存缩减结果
+
+        'frequencies' 键保存代表频率，格式与 Analy_freq_all.pkl 一致，可直接作为A3的频率列表
+        """
+        data = {
+            'frequencies': reduction.representatives,
+            'original': reduction.original,
+            'rep_index': reduction.rep_index,
+            'freq_precision': reduction.freq_precision,
+            'report': reduction.report
+        }
+        save_pickle(data, self.output_file)
+        self.logger.info(f"Saved reduced frequencies to: {self.output_file}")
+
+
+def _to_scale(freq: np.ndarray, scale: str) -> np.ndarray:
+    """将频率变换到聚类尺度（rel为对数尺度）"""
+    if scale == 'rel':
+        if np.any(freq <= 0):
+            raise ValueError("Relative tolerance requires strictly positive frequencies")
+        return np.log(freq)
+    return freq
+
+
+def _width(tol: float, scale: str) -> float:
+    """容差 → 聚类尺度上的最大簇跨度"""
+    if scale == 'rel':
+        return 2 * float(np.log1p(tol))
+    return 2 * tol
+
+
+def _cover_starts(values: np.ndarray, width: float) -> np.ndarray:
+    """
+    贪心区间覆盖：返回各簇在有序values中的起点下标
+
+    每次从当前起点跳到第一个超出 起点值+width 的位置，迭代次数等于簇数
+    """
+    n = len(values)
+    starts = []
+    i = 0
+    while i < n:
+        starts.append(i)
+        i = int(np.searchsorted(values, values[i] + width, side='right'))
+    return np.array(starts, dtype=np.int64)
+
+
+def _split_to_count(values: np.ndarray, starts: np.ndarray, count: int) -> np.ndarray:
+    """
+    拆分簇直到簇数达到count（不超过values长度）
+
+    每次在跨度最大的簇的最大间隙处拆分，簇跨度只减不增
+    """
+    starts = [int(i) for i in starts]
+    n = len(values)
+    while len(starts) < min(count, n):
+        ends = np.append(starts[1:], n) - 1
+        k = int(np.argmax(values[ends] - values[starts]))
+        lo, hi = starts[k], ends[k]
+        starts.insert(k + 1, lo + 1 + int(np.argmax(np.diff(values[lo:hi + 1]))))
+    return np.array(starts, dtype=np.int64)
+
+
+def load_frequency_reduction(file_path: str) -> FrequencyReduction:
+    """
+    读取频率缩减结果
+
+    Args:
+        file_path: FrequencyReducer输出文件
+
+    Returns:
+        FrequencyReduction对象
+    """
+    data = load_pickle(file_path)
+    return FrequencyReduction(
+        representatives=data['frequencies'],
+        original=data['original'],
+        rep_index=data['rep_index'],
+        freq_precision=data['freq_precision'],
+        report=data['report']
+    )
+
+
+# 便捷函数
+def reduce_frequencies(input_file: str, output_file: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+    """
+    便捷函数：缩减全局频率列表
+
+    Args:
+        input_file: Analy_freq_all.pkl 路径
+        output_file: 输出文件路径
+        **kwargs: 其他配置参数（mode, max_count, abs_tol, rel_tol, ...）
+
+    Returns:
+        结果字典
+    """
+    config = {'input_file': input_file, **kwargs}
+    if output_file is not None:
+        config['output_file'] = output_file
+
+    reducer = FrequencyReducer(config)
+    return reducer.process()
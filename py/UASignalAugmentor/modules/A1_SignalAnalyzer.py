@@ -11,8 +11,12 @@
 """
 # 自带包
 import logging
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Executor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 from dataclasses import dataclass, field
 import time
 # 第三方包
@@ -21,6 +25,19 @@ import soundfile as sf
 from tqdm import tqdm
 # 本地包
 from utils.io_utils import save_pickle, ensure_dir
+from utils.result_cache import ResultCache
+from utils.freq_bins import BinUnion, freq_to_bins, bins_to_freq
+from utils.columnar_store import ColumnarShard, ColumnarShardWriter, pack_record, SHARD_SUFFIX
+from utils.freq_index import FreqIndexWriter, build_postings, INDEX_DIRNAME
+
+
+FFT_MODES = ('batched', 'rfft', 'loop')
+ANALYSIS_MODES = ('threshold', 'peaks')
+# 谐波族筛选在未设置peak_top_k时考察的每段最大峰数
+HARMONIC_MAX_PEAKS = 64
+OUTPUT_FORMATS = ('pickle', 'columnar')
+FRAME_MODES = ('segment', 'stft')
+WINDOWS = ('rect', 'hann', 'hamming', 'blackman')
 
 
 @dataclass
@@ -42,6 +59,17 @@ class AudioAnalysisResult:
     ship_class: str                            # 船舶类别
 
 
+@dataclass
+class FileOutcome:
+    """单个文件的处理结果（在串行/并行/缓存路径之间传递）"""
+    analy_freq: Optional[np.ndarray] = None    # 该文件所有频率的并集
+    output_file: Optional[Path] = None         # pickle格式：单文件结果路径
+    record: Optional[Dict[str, Any]] = None    # columnar格式：打包后的扁平记录
+    postings: Optional[Dict[str, np.ndarray]] = None  # build_freq_index时：倒排索引记录
+    error: Optional[str] = None                # 失败时的错误信息
+    cache_key: Optional[str] = None            # 写出结果后需登记到结果缓存的键
+
+
 class FrequencyAnalyzer:
     """
     音频频率分析器
@@ -73,6 +101,35 @@ class FrequencyAnalyzer:
                 - threshold: 幅值阈值，默认0.05
                 - freq_range: 频率范围 [min_hz, max_hz]，默认[10, 5000]
                 - freq_precision: 频率精度（小数位数），默认1
+                - fft_mode: FFT计算方式，默认'batched'
+                    'batched': 分段二维视图上一次批量复数FFT（与逐段结果逐位一致）
+                    'rfft': 批量实数FFT（计算量减半，与逐段结果仅在浮点舍入级别有差异）
+                    'loop': 逐段FFT（参考实现，用于测试对比）
+                - fft_batch_size: 批量FFT每批处理的段数，默认256（限制峰值内存）
+                - frame_mode: 分帧方式，默认'segment'
+                    'segment': 按segment_length不重叠分段，矩形窗（与MATLAB实现一致）
+                    'stft': 短时傅里叶变换，帧长segment_length、帧移hop_length，可加窗
+                - window: stft模式的窗函数 'rect' | 'hann' | 'hamming' | 'blackman'，默认'hann'
+                - hop_length: stft模式的帧移（秒），默认（或为None时）segment_length/2
+                - streaming: 是否使用流式读取（有界内存，适合长录音），默认False
+                  （总是按块批量计算FFT，不使用fft_mode='loop'的逐段实现）
+                - stream_block_segments: 流式读取时每块包含的段数，默认8
+                - workers: 并行处理文件的进程数，默认1（串行）；0表示使用全部CPU核
+                - analysis_mode: 频率分量筛选方式，默认'threshold'
+                    'threshold': 保留幅值不低于 threshold*全局最大幅值 的所有频点
+                    'peaks': 在阈值基础上只保留谱峰（局部极大值）
+                - peak_top_k: peaks模式下每段最多保留的峰数，默认None（不限制）
+                - harmonic_grouping: peaks模式下是否只保留谐波族中的峰，默认False
+                - harmonic_min_count: 谐波族最少成员数（含基频），默认3
+                - harmonic_tol: 谐波匹配的相对容差，默认0.01
+                - output_format: 单文件结果存储格式，默认'pickle'
+                    'pickle': 每个文件一个.pkl（兼容格式）
+                    'columnar': 每个类别一个列式分片目录，可内存映射读取（见load_columnar_results）
+                - build_freq_index: 是否同时生成频率倒排索引（频点 → 文件/段/幅值），默认False
+                    索引写入 output_path/Analy_freq_index，用utils.freq_index.FrequencyIndex查询
+                - cache_dir: 结果缓存目录，默认None（不使用缓存）
+                - cache_invalidate: 运行前清空结果缓存，默认False
+                - cache_gc: 运行后回收本次未用到的缓存条目，默认False
         """
         self.config = config
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -86,6 +143,49 @@ class FrequencyAnalyzer:
         self.threshold = config.get('threshold', 0.05)
         self.freq_min, self.freq_max = config.get('freq_range', [10, 5000])
         self.freq_precision = config.get('freq_precision', 1)
+        self.fft_mode = config.get('fft_mode', 'batched')
+        self.fft_batch_size = int(config.get('fft_batch_size', 256))
+        self.frame_mode = config.get('frame_mode', 'segment')
+        self.window = config.get('window', 'hann') if self.frame_mode == 'stft' else 'rect'
+        self.hop_length = config.get('hop_length')
+        if self.hop_length is None:
+            self.hop_length = self.segment_length / 2
+        self.streaming = config.get('streaming', False)
+        self.stream_block_segments = int(config.get('stream_block_segments', 8))
+        self.workers = int(config.get('workers', 1)) or (os.cpu_count() or 1)
+        self.analysis_mode = config.get('analysis_mode', 'threshold')
+        self.peak_top_k = config.get('peak_top_k')
+        self.harmonic_grouping = config.get('harmonic_grouping', False)
+        self.harmonic_min_count = config.get('harmonic_min_count', 3)
+        self.harmonic_tol = config.get('harmonic_tol', 0.01)
+        self.output_format = config.get('output_format', 'pickle')
+        self.build_freq_index = config.get('build_freq_index', False)
+        self.cache_dir = config.get('cache_dir')
+        self.cache_invalidate = config.get('cache_invalidate', False)
+        self.cache_gc = config.get('cache_gc', False)
+        
+        if self.fft_mode not in FFT_MODES:
+            raise ValueError(f"Unknown fft_mode: {self.fft_mode}, expected one of {FFT_MODES}")
+        if self.frame_mode not in FRAME_MODES:
+            raise ValueError(f"Unknown frame_mode: {self.frame_mode}, expected one of {FRAME_MODES}")
+        if self.window not in WINDOWS:
+            raise ValueError(f"Unknown window: {self.window}, expected one of {WINDOWS}")
+        if self.frame_mode == 'stft' and self.hop_length <= 0:
+            raise ValueError(f"hop_length must be > 0, got {self.hop_length}")
+        if self.analysis_mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis_mode: {self.analysis_mode}, expected one of {ANALYSIS_MODES}")
+        if self.peak_top_k is not None and self.peak_top_k < 1:
+            raise ValueError(f"peak_top_k must be >= 1, got {self.peak_top_k}")
+        if self.streaming and self.fft_mode == 'loop':
+            self.logger.warning("fft_mode 'loop' is not used in streaming mode; "
+                                "segments are transformed in batches (identical results)")
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output_format: {self.output_format}, expected one of {OUTPUT_FORMATS}")
+        
+        # 各帧长对应的窗函数缓存
+        self._windows: Dict[int, np.ndarray] = {}
+        # 并行处理文件的进程池（仅在process()执行期间存在）
+        self._executor: Optional[Executor] = None
         
         # 确保输出目录存在
         ensure_dir(self.output_path)
@@ -106,6 +206,8 @@ class FrequencyAnalyzer:
                 'global_frequencies': np.ndarray,     # 全局频率列表
                 'results_by_class': dict,             # 按类别统计
                 'output_files': list,                 # 输出文件列表
+                'cache_hits': int,                    # 命中结果缓存的文件数
+                'freq_index': Path or None,           # 频率倒排索引目录（未生成时为None）
                 'elapsed_time': float                 # 处理耗时（秒）
             }
         """
@@ -114,50 +216,112 @@ class FrequencyAnalyzer:
         
         self.logger.info(f"Starting frequency analysis from: {input_path}")
         
-        # 全局频率集合
-        global_frequencies = set()
+        # 全局频率并集（按freq_precision量化的整数频点）
+        global_bins = self._new_bin_union()
         results_by_class = {}
         output_files = []
         total_files = 0
         
-        # 遍历每个船舶类别
-        for ship_class in self.ship_classes:
-            class_path = input_path / ship_class
-            
-            if not class_path.exists():
-                self.logger.warning(f"Class directory not found: {class_path}")
-                continue
-            
-            # 获取该类别下的所有WAV文件
-            audio_files = list(class_path.glob('*.wav'))
-            if not audio_files:
-                self.logger.warning(f"No WAV files found in: {class_path}")
-                continue
-            
-            self.logger.info(f"Processing {len(audio_files)} files in {ship_class}")
-            results_by_class[ship_class] = {'count': len(audio_files), 'files': []}
-            
-            # 处理每个音频文件
-            for audio_file in tqdm(audio_files, desc=f"{ship_class}"):
+        # 频率倒排索引（所有类别共用一个索引）
+        # 倒排记录分段写出到输出目录下的临时目录，write()时归并
+        index_writer = None
+        if self.build_freq_index:
+            index_writer = FreqIndexWriter(self.freq_precision, spill_dir=self.output_path / INDEX_DIRNAME)
+        index_dir = None
+        
+        # 结果缓存：未变化的文件直接复用上次的频率集合
+        cache = self._open_cache()
+        live_keys = set()
+        cache_hits = 0
+        
+        # workers > 1 时所有类别共用一个进程池（工作进程崩溃后由_map_files_parallel重建）
+        self._executor = self._create_executor()
+        
+        try:
+            # 遍历每个船舶类别
+            for ship_class in self.ship_classes:
+                class_path = input_path / ship_class
+                
+                if not class_path.exists():
+                    self.logger.warning(f"Class directory not found: {class_path}")
+                    continue
+                
+                # 获取该类别下的所有WAV文件
+                audio_files = list(class_path.glob('*.wav'))
+                if not audio_files:
+                    self.logger.warning(f"No WAV files found in: {class_path}")
+                    continue
+                
+                self.logger.info(f"Processing {len(audio_files)} files in {ship_class}")
+                results_by_class[ship_class] = {'count': len(audio_files), 'files': []}
+                
+                # columnar格式：边处理边追加写出分片，缓存命中的文件从旧分片中读取记录
+                shard_dir = self.output_path / f"{ship_class}{SHARD_SUFFIX}"
+                shard_writer = None
+                if self.output_format == 'columnar':
+                    shard_writer = ColumnarShardWriter(shard_dir, ship_class)
+                
+                # 处理每个音频文件（结果按文件顺序返回）
+                if cache is None:
+                    outcomes = self._map_files(audio_files, ship_class)
+                else:
+                    previous_shard = self._open_previous_shard(shard_dir) if shard_writer is not None else None
+                    outcomes = self._map_files_cached(cache, audio_files, ship_class, live_keys, previous_shard)
                 try:
-                    result = self._process_single_file(audio_file, ship_class)
-                    
-                    # 更新全局频率集合
-                    global_frequencies.update(result.analy_freq)
-                    
-                    # 保存单个文件的结果
-                    output_file = self._save_result(result, ship_class)
-                    output_files.append(output_file)
-                    results_by_class[ship_class]['files'].append(str(audio_file.name))
-                    
-                    total_files += 1
+                    for audio_file, outcome in tqdm(
+                            zip(audio_files, outcomes), total=len(audio_files), desc=f"{ship_class}"):
+                        if outcome.error is not None:
+                            self.logger.error(f"Error processing {audio_file}: {outcome.error}")
+                            continue
+                        
+                        # 更新全局频率并集
+                        global_bins.add(freq_to_bins(outcome.analy_freq, self.freq_precision))
+                        
+                        shard_row = None
+                        if shard_writer is not None:
+                            shard_row = shard_writer.add(outcome.record)
+                            output_name = shard_dir.name
+                        else:
+                            output_files.append(outcome.output_file)
+                            output_name = outcome.output_file.name
+                        if outcome.cache_key is not None:
+                            cache.put(outcome.cache_key, self._cache_entry(outcome, audio_file, shard_writer, shard_row))
+                        if index_writer is not None:
+                            index_writer.add(str(audio_file), ship_class, output_name, outcome.postings)
+                        results_by_class[ship_class]['files'].append(str(audio_file.name))
+                        
+                        total_files += 1
                     
-                except Exception as e:
-                    self.logger.error(f"Error processing {audio_file}: {e}", exc_info=True)
-                    continue
+                    if shard_writer is not None:
+                        # 先释放对旧分片的引用（迭代器持有），再用新分片替换
+                        outcomes.close()
+                        previous_shard = None
+                        output_files.append(shard_writer.close())
+                        shard_writer = None
+                finally:
+                    if shard_writer is not None:
+                        shard_writer.discard()
+        except BaseException:
+            if index_writer is not None:
+                index_writer.discard()
+            raise
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+        
+        if cache is not None:
+            cache_hits = cache.hits
+            if self.cache_gc:
+                cache.gc(live_keys)
+            cache.save()
+            self.logger.info(f"Result cache: {cache_hits} hits, {total_files - cache_hits} analyzed")
+        
+        if index_writer is not None:
+            index_dir = index_writer.write(self.output_path / INDEX_DIRNAME)
         
-        # 转换为排序的numpy数组
-        global_frequencies_array = np.array(sorted(global_frequencies))
+        # 转换为排序的频率数组（与按float集合汇总的结果逐位一致）
+        global_frequencies_array = bins_to_freq(global_bins.bins(), self.freq_precision)
         
         # 保存全局频率列表
         global_freq_file = self.output_path / 'Analy_freq_all.pkl'
@@ -172,12 +336,265 @@ class FrequencyAnalyzer:
             'num_unique_frequencies': len(global_frequencies_array),
             'results_by_class': results_by_class,
             'output_files': output_files,
+            'cache_hits': cache_hits,
+            'freq_index': index_dir,
             'elapsed_time': elapsed_time
         }
         
         self.logger.info(f"Analysis completed in {elapsed_time:.2f}s. Processed {total_files} files.")
         return summary
     
+    def _create_executor(self) -> Optional[Executor]:
+        """
+        按workers配置创建进程池（串行模式返回None）
+        
+        每个工作进程在初始化时构造一个本地FrequencyAnalyzer，避免逐文件传递配置
+        """
+        if self.workers <= 1:
+            return None
+        self.logger.info(f"Using process pool with {self.workers} workers")
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=({**self.config, 'workers': 1},)
+        )
+    
+    def _map_files(self, audio_files: List[Path], ship_class: str) -> Iterator[FileOutcome]:
+        """
+        逐个或并行分析文件（self._executor为None时串行），按输入顺序产出结果
+        
+        Args:
+            audio_files: 音频文件列表
+            ship_class: 船舶类别
+            
+        Returns:
+            FileOutcome迭代器
+        """
+        if self._executor is None:
+            return (self._analyze_file_safe(audio_file, ship_class) for audio_file in audio_files)
+        return self._map_files_parallel(audio_files, ship_class)
+    
+    def _map_files_parallel(self, audio_files: List[Path], ship_class: str) -> Iterator[FileOutcome]:
+        """
+        在进程池中分析文件，按输入顺序产出结果
+        
+        工作进程崩溃（如解码库段错误、被OOM终止）会使整个进程池失效（BrokenProcessPool）。
+        此时重建进程池，崩溃前已完成的结果照常产出，其余文件逐个单独重新提交：
+        单独运行时仍使进程崩溃的文件记为失败，其他文件不受影响。
+        
+        Args:
+            audio_files: 音频文件列表
+            ship_class: 船舶类别
+            
+        Returns:
+            FileOutcome迭代器
+        """
+        futures = [self._executor.submit(_analyze_file_worker, audio_file, ship_class)
+                   for audio_file in audio_files]
+        isolated = False
+        for audio_file, future in zip(audio_files, futures):
+            if not isolated:
+                try:
+                    yield future.result()
+                    continue
+                except BrokenProcessPool:
+                    self.logger.warning("Worker process crashed, retrying unfinished files one at a time")
+                    self._restart_executor()
+                    isolated = True
+            # 进程池失效时未完成的任务都以BrokenProcessPool结束
+            if future.exception() is None:
+                yield future.result()
+            else:
+                yield self._analyze_file_isolated(audio_file, ship_class)
+    
+    def _analyze_file_isolated(self, audio_file: Path, ship_class: str) -> FileOutcome:
+        """在（重建的）进程池中单独分析一个文件，进程再次崩溃时记为失败"""
+        future = self._executor.submit(_analyze_file_worker, audio_file, ship_class)
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self._restart_executor()
+            return FileOutcome(error="worker process crashed while analyzing this file")
+        except Exception as e:
+            return FileOutcome(error=f"{e}\n{traceback.format_exc()}")
+    
+    def _restart_executor(self) -> None:
+        """关闭失效的进程池并新建一个"""
+        self._executor.shutdown(wait=True)
+        self._executor = self._create_executor()
+    
+    def _cache_params(self) -> Dict[str, Any]:
+        """返回决定分析结果的参数（参与缓存键计算）"""
+        params = {
+            'segment_length': self.segment_length,
+            'threshold': self.threshold,
+            'freq_range': [self.freq_min, self.freq_max],
+            'freq_precision': self.freq_precision,
+            # batched与loop结果逐位一致，只有rfft会改变结果
+            'fft': 'rfft' if self.fft_mode == 'rfft' else 'fft',
+        }
+        if self.frame_mode == 'stft':
+            params['stft'] = {'window': self.window, 'hop_length': self.hop_length}
+        if self.analysis_mode == 'peaks':
+            params['peaks'] = {
+                'top_k': self.peak_top_k,
+                'harmonic_grouping': self.harmonic_grouping,
+                'harmonic_min_count': self.harmonic_min_count,
+                'harmonic_tol': self.harmonic_tol,
+            }
+        return params
+    
+    def _open_cache(self) -> Optional[ResultCache]:
+        """按配置打开结果缓存（未配置cache_dir时返回None）"""
+        if self.cache_dir is None:
+            return None
+        cache = ResultCache(self.cache_dir, self._cache_params())
+        if self.cache_invalidate:
+            cache.clear()
+        return cache
+    
+    def _map_files_cached(self, cache: ResultCache, audio_files: List[Path], ship_class: str,
+                          live_keys: set, previous_shard: Optional[ColumnarShard] = None) -> Iterator[FileOutcome]:
+        """
+        带结果缓存的_map_files：命中的文件直接返回缓存的频率集合，其余文件照常分析
+        
+        需要登记到缓存的结果带有cache_key，由调用方在写出结果后登记
+        （columnar格式下命中的文件在新分片中的行号也会变化，同样需要重新登记）
+        
+        Args:
+            cache: 结果缓存
+            audio_files: 音频文件列表
+            ship_class: 船舶类别
+            live_keys: 收集本次运行用到的缓存键（用于gc）
+            previous_shard: columnar格式：上次运行写出的该类别分片（不存在时为None）
+            
+        Returns:
+            FileOutcome迭代器，顺序与audio_files一致
+        """
+        keys = self._cache_keys(cache, audio_files)
+        
+        cached = {}
+        for i, key in enumerate(keys):
+            if key is None:
+                continue
+            live_keys.add(key)
+            entry = cache.get(key)
+            if entry is not None and self._cache_entry_usable(entry, audio_files[i], previous_shard):
+                cached[i] = entry
+        
+        misses = [f for i, f in enumerate(audio_files) if i not in cached]
+        miss_outcomes = self._map_files(misses, ship_class)
+        
+        for i in range(len(audio_files)):
+            if i in cached:
+                cache.hits += 1
+                entry = cached[i]
+                if self.output_format == 'columnar':
+                    yield FileOutcome(analy_freq=entry['analy_freq'],
+                                      record=previous_shard.record(entry['shard_row']),
+                                      postings=entry.get('postings'), cache_key=keys[i])
+                else:
+                    yield FileOutcome(analy_freq=entry['analy_freq'],
+                                      output_file=self.output_path / entry['output_name'],
+                                      postings=entry.get('postings'))
+                continue
+            
+            outcome = next(miss_outcomes)
+            outcome.cache_key = keys[i]
+            yield outcome
+    
+    def _cache_entry(self, outcome: FileOutcome, audio_file: Path,
+                     shard_writer: Optional[ColumnarShardWriter], shard_row: Optional[int]) -> Dict[str, Any]:
+        """
+        构造缓存条目
+        
+        条目只保存频率集合、倒排记录和结果位置：pickle格式为单文件结果名，
+        columnar格式为 (分片标识, 行号)，分析结果本身留在输出目录中
+        """
+        return {
+            'output_name': outcome.output_file.name if outcome.output_file else None,
+            'shard_id': shard_writer.shard_id if shard_writer is not None else None,
+            'shard_row': shard_row,
+            'analy_freq': outcome.analy_freq,
+            'postings': outcome.postings,
+            'source_file': str(audio_file),
+        }
+    
+    def _open_previous_shard(self, shard_dir: Path) -> Optional[ColumnarShard]:
+        """打开上次运行写出的分片，供缓存命中时读取记录（不存在或无法读取时返回None）"""
+        if not shard_dir.exists():
+            return None
+        try:
+            return ColumnarShard(shard_dir)
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable shard {shard_dir}: {e}")
+            return None
+    
+    def _cache_entry_usable(self, entry: Dict[str, Any], audio_file: Path,
+                            previous_shard: Optional[ColumnarShard]) -> bool:
+        """
+        判断缓存条目能否用于当前输出格式
+        
+        pickle格式要求对应的单文件结果仍在输出目录中；columnar格式要求条目指向的分片
+        就是当前输出目录中的分片（分片标识一致），且该行仍是同一源文件；
+        生成倒排索引时还要求条目中带有倒排记录
+        """
+        if self.build_freq_index and entry.get('postings') is None:
+            return False
+        if self.output_format == 'columnar':
+            row = entry.get('shard_row')
+            return (previous_shard is not None and row is not None
+                    and entry.get('shard_id') == previous_shard.shard_id
+                    and 0 <= row < len(previous_shard)
+                    and previous_shard.source_file[row] == str(audio_file))
+        return entry.get('output_name') is not None and (self.output_path / entry['output_name']).exists()
+    
+    def _cache_keys(self, cache: ResultCache, audio_files: List[Path]) -> List[Optional[str]]:
+        """
+        计算文件的缓存键（workers > 1 时用线程池并行读取哈希）
+        
+        无法读取的文件返回None，由后续分析流程报告错误
+        """
+        def safe_key(audio_file: Path) -> Optional[str]:
+            try:
+                return cache.file_key(audio_file)
+            except OSError as e:
+                self.logger.warning(f"Cannot hash {audio_file}: {e}")
+                return None
+        
+        if self.workers <= 1:
+            return [safe_key(f) for f in audio_files]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(safe_key, audio_files))
+    
+    def _analyze_file_safe(self, audio_path: Path, ship_class: str) -> FileOutcome:
+        """
+        分析并保存单个文件，异常被捕获并以字符串返回（单文件错误隔离）
+        
+        pickle格式直接写出单文件结果；columnar格式返回打包记录，由主进程汇总写入分片；
+        生成倒排索引时同时返回该文件的倒排记录
+        
+        Args:
+            audio_path: 音频文件路径
+            ship_class: 船舶类别
+            
+        Returns:
+            FileOutcome对象
+        """
+        try:
+            result = self._process_single_file(audio_path, ship_class)
+            postings = None
+            if self.build_freq_index:
+                postings = build_postings([(seg.freq, seg.amp) for seg in result.analyze_record],
+                                          self.freq_precision)
+            if self.output_format == 'columnar':
+                return FileOutcome(analy_freq=result.analy_freq, record=self._pack_result(result),
+                                   postings=postings)
+            output_file = self._save_result(result, ship_class)
+            return FileOutcome(analy_freq=result.analy_freq, output_file=output_file, postings=postings)
+        except Exception as e:
+            return FileOutcome(error=f"{e}\n{traceback.format_exc()}")
+    
     def _process_single_file(self, audio_path: Path, ship_class: str) -> AudioAnalysisResult:
         """
         处理单个音频文件
@@ -189,6 +606,9 @@ class FrequencyAnalyzer:
         Returns:
             AudioAnalysisResult对象
         """
+        if self.streaming:
+            return self._process_single_file_streaming(audio_path, ship_class)
+        
         # 读取音频文件
         signal, fs = sf.read(audio_path)
         
@@ -196,78 +616,453 @@ class FrequencyAnalyzer:
         if signal.ndim > 1:
             signal = np.mean(signal, axis=1)
         
-        # 计算信号参数
-        L = len(signal)
-        T = L / fs
-        
         # 分段参数
+        cut_length, hop, N = self._segment_params(len(signal), fs, audio_path)
+        
+        # 计算各段的时延
+        n_delay = self._segment_delays(N, hop, fs)
+        
+        # 对每一段进行FFT分析（不做分段阈值筛选）
+        if self.fft_mode == 'loop':
+            analyze_record = self._analyze_segments_loop(signal, fs, cut_length, N, hop)
+        else:
+            analyze_record = self._analyze_segments_batched(signal, fs, cut_length, N, hop)
+        
+        # 合并A2逻辑：基于文件内全局最大幅值做单次阈值筛选
+        max_amp_global = 0.0
+        for seg in analyze_record:
+            if seg.amp.size > 0:
+                max_amp_global = max(max_amp_global, float(np.max(seg.amp)))
+        
+        #print(f"[DEBUG] 文件: {audio_path.name}, 全局最大幅值: {max_amp_global:.6f}")
+        
+        filtered_record = self._filter_record(analyze_record, max_amp_global)
+        
+        return AudioAnalysisResult(
+            fs=fs,
+            n_delay=n_delay,
+            analyze_record=filtered_record,
+            analy_freq=self._collect_frequencies(filtered_record),
+            source_file=str(audio_path),
+            ship_class=ship_class
+        )
+    
+    def _process_single_file_streaming(self, audio_path: Path, ship_class: str) -> AudioAnalysisResult:
+        """
+        流式处理单个音频文件（有界内存）
+        
+        按块读取音频并直接送入批量FFT，每段只计算一次频谱：
+        全局最大幅值只能在读完文件后确定，但最终能通过阈值的分量必然不低于
+        threshold × 读到当前块为止的最大幅值，因此每块只保留这部分候选分量
+        （peaks模式下还须是局部极大值，它只取决于本段频谱），读完后再按最终的全局最大值
+        筛选候选（peaks模式下随后做Top-K和谐波族筛选）。
+        最大幅值每增大一倍就按新的门限清理一次已保留的候选，
+        候选总量约为最终结果的同一量级；频谱本身的峰值内存约为 stream_block_segments 个段，
+        与文件时长无关。结果与非流式处理一致。
+        
+        流式模式总是按块批量计算FFT，fft_mode为'loop'时同样按批量计算（结果与逐段一致）。
+        
+        Args:
+            audio_path: 音频文件路径
+            ship_class: 船舶类别
+            
+        Returns:
+            AudioAnalysisResult对象
+        """
+        info = sf.info(str(audio_path))
+        fs = info.samplerate
+        cut_length, hop, N = self._segment_params(info.frames, fs, audio_path)
+        n_delay = self._segment_delays(N, hop, fs)
+        
+        max_amp_global = 0.0
+        pruned_at = 0.0     # 上次清理候选时的最大幅值
+        candidates: List[SegmentAnalysis] = []
+        for amp, freq, phase in self._iter_stream_spectra(audio_path, fs, cut_length, N, hop):
+            if amp.size > 0:
+                max_amp_global = max(max_amp_global, float(np.max(amp)))
+            
+            mask = amp >= self.threshold * max_amp_global
+            if self.threshold > 0:
+                # 最终门限为正，幅值为0的分量不可能通过
+                mask &= amp > 0
+            if self.analysis_mode == 'peaks':
+                mask &= _local_maxima(amp)
+            candidates.extend(SegmentAnalysis(amp=amp[i][mask[i]], freq=freq[mask[i]], phase=phase[i][mask[i]])
+                              for i in range(amp.shape[0]))
+            
+            if max_amp_global >= 2 * pruned_at:
+                candidates = [_mask_segment(seg, seg.amp >= self.threshold * max_amp_global)
+                              for seg in candidates]
+                pruned_at = max_amp_global
+        
+        filtered_record = [self._finalize_candidates(seg, max_amp_global) for seg in candidates]
+        
+        return AudioAnalysisResult(
+            fs=fs,
+            n_delay=n_delay,
+            analyze_record=filtered_record,
+            analy_freq=self._collect_frequencies(filtered_record),
+            source_file=str(audio_path),
+            ship_class=ship_class
+        )
+    
+    def _segment_params(self, L: int, fs: int, audio_path: Path) -> Tuple[int, int, int]:
+        """
+        计算分段参数
+        
+        segment模式下帧移等于段长度；stft模式下帧数为能完整放入信号的帧数
+        
+        Args:
+            L: 信号长度（采样点数）
+            fs: 采样率
+            audio_path: 音频文件路径（用于日志）
+            
+        Returns:
+            (cut_length, hop, N): 段长度、帧移（采样点数）和段数
+        """
+        T = L / fs
         cut_length = int(self.segment_length * fs)
-        N = int(np.floor(T / self.segment_length))
+        if self.frame_mode == 'stft':
+            hop = max(1, int(round(self.hop_length * fs)))
+            N = (L - cut_length) // hop + 1 if L >= cut_length else 0
+        else:
+            hop = cut_length
+            N = int(np.floor(T / self.segment_length))
         
         if N == 0:
             self.logger.warning(f"Audio too short ({T:.2f}s): {audio_path}")
             N = 1
             cut_length = L
+            hop = L
         
-        # 计算各段的时延
-        n_delay = np.array([(i - 1) * self.segment_length for i in range(1, N + 1)])
+        return cut_length, hop, N
+    
+    def _segment_delays(self, N: int, hop: int, fs: int) -> np.ndarray:
+        """
+        计算各段（帧）起点的时延（秒）
         
-        # 存储所有段的分析结果
-        analyze_record = []
-        file_frequencies = set()
+        Args:
+            N: 段数
+            hop: 帧移（采样点数）
+            fs: 采样率
+            
+        Returns:
+            时延数组
+        """
+        if self.frame_mode == 'stft':
+            return np.arange(N) * hop / fs
+        return np.array([(i - 1) * self.segment_length for i in range(1, N + 1)])
+    
+    def _get_window(self, cut_length: int) -> Optional[np.ndarray]:
+        """
+        返回帧长对应的窗函数（周期型），矩形窗返回None
         
-        # 对每一段进行FFT分析
+        Args:
+            cut_length: 帧长（采样点数）
+            
+        Returns:
+            窗函数数组或None
+        """
+        if self.window == 'rect':
+            return None
+        window = self._windows.get(cut_length)
+        if window is None:
+            window = _make_window(self.window, cut_length)
+            self._windows[cut_length] = window
+        return window
+    
+    def _iter_stream_spectra(self, audio_path: Path, fs: int, cut_length: int,
+                             N: int, hop: int) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        按块流式读取音频并产出各段频谱
+        
+        每块包含 stream_block_segments 帧；帧间重叠（hop < cut_length）时各块按帧起点定位读取，
+        块间重叠部分会被重复读取。
+        
+        Args:
+            audio_path: 音频文件路径
+            fs: 采样率
+            cut_length: 段长度（采样点数）
+            N: 段数
+            hop: 帧移（采样点数）
+            
+        Returns:
+            (amp, freq, phase) 迭代器，amp/phase 形状为 (n_segments_in_block, n_bins)
+        """
+        with sf.SoundFile(str(audio_path)) as f:
+            n_full = _num_full_frames(f.frames, cut_length, hop, N)
+            
+            if hop == cut_length:
+                blocksize = self.stream_block_segments * cut_length
+                for block in f.blocks(blocksize=blocksize, frames=n_full * cut_length,
+                                      dtype='float64', always_2d=True):
+                    mono = _to_mono(block)
+                    n_seg = len(mono) // cut_length
+                    if n_seg > 0:
+                        yield self._segment_spectra(_frame_view(mono, cut_length, cut_length, n_seg), fs, cut_length)
+            else:
+                for start in range(0, n_full, self.stream_block_segments):
+                    n_seg = min(self.stream_block_segments, n_full - start)
+                    f.seek(start * hop)
+                    mono = _to_mono(f.read((n_seg - 1) * hop + cut_length, dtype='float64', always_2d=True))
+                    yield self._segment_spectra(_frame_view(mono, cut_length, hop, n_seg), fs, cut_length)
+            
+            # 不足一段的尾部（若存在）按逐段实现处理
+            for i in range(n_full, N):
+                f.seek(i * hop)
+                segment = _to_mono(f.read(cut_length, dtype='float64', always_2d=True))
+                if len(segment) >= cut_length // 2:
+                    seg = self._analyze_segment(segment, fs, cut_length)
+                    yield seg.amp[np.newaxis, :], seg.freq, seg.phase[np.newaxis, :]
+    
+    def _filter_record(self, analyze_record: List[SegmentAnalysis],
+                       max_amp_global: float) -> List[SegmentAnalysis]:
+        """
+        对整个文件的段结果做分量筛选
+        
+        peaks模式下各段频率轴相同时堆叠为二维数组一次完成筛选（局部极大值、Top-K等按行向量化）；
+        threshold模式只是逐元素比较，堆叠没有收益，反而要多复制一份整个文件的频谱，因此逐段处理
+        
+        Args:
+            analyze_record: 未筛选的各段结果
+            max_amp_global: 文件内全局最大幅值
+            
+        Returns:
+            筛选后的各段结果
+        """
+        if not analyze_record:
+            return []
+        if self.analysis_mode == 'peaks' and len({seg.amp.size for seg in analyze_record}) == 1:
+            amp = np.stack([seg.amp for seg in analyze_record])
+            phase = np.stack([seg.phase for seg in analyze_record])
+            return self._select_components(amp, analyze_record[0].freq, phase, max_amp_global)
+        
+        filtered_record = []
+        for seg in analyze_record:
+            filtered_record.extend(self._select_components(
+                seg.amp[np.newaxis, :], seg.freq, seg.phase[np.newaxis, :], max_amp_global))
+        return filtered_record
+    
+    def _select_components(self, amp: np.ndarray, freq: np.ndarray, phase: np.ndarray,
+                           max_amp_global: float) -> List[SegmentAnalysis]:
+        """
+        向量化筛选一批段的频率分量
+        
+        threshold模式：保留幅值不低于 threshold * max_amp_global 的所有频点；
+        peaks模式：在阈值基础上只保留局部极大值，可选每段Top-K限制和谐波族筛选。
+        
+        Args:
+            amp: 幅值 (n_segments, n_bins)
+            freq: 频率轴 (n_bins,)
+            phase: 相位 (n_segments, n_bins)
+            max_amp_global: 文件内全局最大幅值
+            
+        Returns:
+            筛选后的SegmentAnalysis列表（无有效幅值时为空段）
+        """
+        if max_amp_global <= 0 or amp.size == 0:
+            return [SegmentAnalysis(amp=np.asarray([]), freq=np.asarray([]), phase=np.asarray([]))
+                    for _ in range(amp.shape[0])]
+        
+        mask = amp >= (self.threshold * max_amp_global)
+        if self.analysis_mode == 'peaks':
+            mask &= _local_maxima(amp)
+            mask = self._limit_peaks(amp, freq, mask)
+        
+        return [SegmentAnalysis(amp=amp[i][mask[i]], freq=freq[mask[i]], phase=phase[i][mask[i]])
+                for i in range(amp.shape[0])]
+    
+    def _limit_peaks(self, amp: np.ndarray, freq: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        peaks模式下在候选峰掩码上依次做每段Top-K限制和谐波族筛选
+        
+        两步都只用到掩码内的幅值和频率，因此也可直接作用于只含候选分量的数组
+        """
+        if self.peak_top_k is not None:
+            mask = _top_k_mask(amp, mask, self.peak_top_k)
+        if self.harmonic_grouping:
+            mask = self._harmonic_mask(amp, freq, mask)
+        return mask
+    
+    def _finalize_candidates(self, seg: SegmentAnalysis, max_amp_global: float) -> SegmentAnalysis:
+        """
+        流式处理：按文件内全局最大幅值筛选一段的候选分量
+        
+        Args:
+            seg: 该段的候选分量（已是局部极大值，peaks模式）
+            max_amp_global: 文件内全局最大幅值
+            
+        Returns:
+            筛选后的段结果
+        """
+        if max_amp_global <= 0:
+            return SegmentAnalysis(amp=np.asarray([]), freq=np.asarray([]), phase=np.asarray([]))
+        mask = seg.amp >= (self.threshold * max_amp_global)
+        if self.analysis_mode == 'peaks' and mask.any():
+            mask = self._limit_peaks(seg.amp[np.newaxis, :], seg.freq, mask[np.newaxis, :])[0]
+        return _mask_segment(seg, mask)
+    
+    def _harmonic_mask(self, amp: np.ndarray, freq: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        谐波族筛选：只保留属于谐波族的峰值
+        
+        在每段最强的K个候选峰（K = peak_top_k，未设置时为HARMONIC_MAX_PEAKS）内，
+        若峰j满足 |f_j / (n·f_i) - 1| <= harmonic_tol (n>=2为整数)，则j属于以i为基频的族；
+        成员数（含基频）不少于harmonic_min_count的族中的所有峰被保留。
+        所有段以 (n_segments, K, K) 的频率比张量一次计算。
+        
+        Args:
+            amp: 幅值 (n_segments, n_bins)
+            freq: 频率轴 (n_bins,)
+            mask: 候选峰掩码 (n_segments, n_bins)
+            
+        Returns:
+            筛选后的掩码
+        """
+        k = min(self.peak_top_k or HARMONIC_MAX_PEAKS, amp.shape[1])
+        cand_amp = np.where(mask, amp, -np.inf)
+        idx = np.argpartition(-cand_amp, k - 1, axis=1)[:, :k]
+        valid = np.isfinite(np.take_along_axis(cand_amp, idx, axis=1))
+        
+        f = np.where(valid, freq[idx], np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = f[:, np.newaxis, :] / f[:, :, np.newaxis]    # [s, i, j] = f_j / f_i
+            order = np.rint(ratio)
+            harmonic = (order >= 2) & (np.abs(ratio / order - 1) <= self.harmonic_tol)
+        
+        family_size = 1 + harmonic.sum(axis=2)
+        is_fundamental = valid & (family_size >= self.harmonic_min_count)
+        keep = is_fundamental | np.any(harmonic & is_fundamental[:, :, np.newaxis], axis=1)
+        
+        out = np.zeros_like(mask)
+        rows = np.broadcast_to(np.arange(amp.shape[0])[:, np.newaxis], idx.shape)
+        out[rows[keep], idx[keep]] = True
+        return out
+    
+    def _collect_frequencies(self, filtered_record: List[SegmentAnalysis]) -> np.ndarray:
+        """
+        汇总文件内所有段的频率并集
+        
+        Args:
+            filtered_record: 筛选后的各段结果
+            
+        Returns:
+            排序后的频率数组
+        """
+        if not filtered_record:
+            return np.zeros(0)
+        
+        # 在整数频点上向量化去重，再还原为频率
+        all_freq = np.concatenate([seg.freq for seg in filtered_record])
+        return bins_to_freq(np.unique(freq_to_bins(all_freq, self.freq_precision)), self.freq_precision)
+    
+    def _new_bin_union(self) -> BinUnion:
+        """创建覆盖freq_range的频点并集（位图范围两端各留一个频点余量以容纳取整）"""
+        lo, hi = freq_to_bins(np.array([self.freq_min, self.freq_max]), self.freq_precision)
+        return BinUnion(int(lo) - 1, int(hi) + 1)
+    
+    def _analyze_segments_loop(self, signal: np.ndarray, fs: int, cut_length: int,
+                               N: int, hop: int) -> List[SegmentAnalysis]:
+        """
+        逐段FFT分析（参考实现）
+        
+        Args:
+            signal: 单声道信号
+            fs: 采样率
+            cut_length: 段长度（采样点数）
+            N: 段数
+            hop: 帧移（采样点数）
+            
+        Returns:
+            各段的SegmentAnalysis列表
+        """
+        L = len(signal)
+        analyze_record = []
         for i in range(N):
-            start_idx = i * cut_length
-            end_idx = min((i + 1) * cut_length, L)
+            start_idx = i * hop
+            end_idx = min(start_idx + cut_length, L)
             segment = signal[start_idx:end_idx]
             
             # 如果段长度不足，跳过
             if len(segment) < cut_length // 2:
                 continue
             
-            # 分析该段（不做分段阈值筛选）
-            seg_result = self._analyze_segment(segment, fs, cut_length)
-            analyze_record.append(seg_result)
+            analyze_record.append(self._analyze_segment(segment, fs, cut_length))
+        return analyze_record
+    
+    def _analyze_segments_batched(self, signal: np.ndarray, fs: int, cut_length: int,
+                                  N: int, hop: int) -> List[SegmentAnalysis]:
+        """
+        批量FFT分析
         
-        # 合并A2逻辑：基于文件内全局最大幅值做单次阈值筛选
-        file_frequencies = set()
-        max_amp_global = 0.0
-        for seg in analyze_record:
-            if seg.amp.size > 0:
-                max_amp_global = max(max_amp_global, float(np.max(seg.amp)))
+        将信号无拷贝地视为 (N, cut_length) 的二维分帧数组（帧移hop，stft模式下帧间重叠），
+        按批对所有行做一次FFT，加窗、单边谱缩放、频率范围掩码和频率取整均以向量化方式完成。
         
-        #print(f"[DEBUG] 文件: {audio_path.name}, 全局最大幅值: {max_amp_global:.6f}")
+        Args:
+            signal: 单声道信号
+            fs: 采样率
+            cut_length: 段长度（采样点数）
+            N: 段数
+            hop: 帧移（采样点数）
+            
+        Returns:
+            各段的SegmentAnalysis列表（与逐段实现结果一致）
+        """
+        # 完整段走批量路径；不足一段的尾部（若存在）按逐段实现处理
+        n_full = _num_full_frames(len(signal), cut_length, hop, N)
+        frames = _frame_view(signal, cut_length, hop, n_full)
         
-        filtered_record: List[SegmentAnalysis] = []
-        if max_amp_global > 0:
-            for seg in analyze_record:
-                if seg.amp.size == 0:
-                    filtered_record.append(SegmentAnalysis(amp=np.asarray([]), freq=np.asarray([]), phase=np.asarray([])))
-                    continue
-                valid_idx = seg.amp >= (self.threshold * max_amp_global)
-                amp_f = seg.amp[valid_idx]
-                freq_f = seg.freq[valid_idx]
-                phase_f = seg.phase[valid_idx]
-                filtered_record.append(SegmentAnalysis(amp=amp_f, freq=freq_f, phase=phase_f))
-                for f in np.unique(freq_f):
-                    file_frequencies.add(float(f))
+        analyze_record = []
+        for start in range(0, n_full, self.fft_batch_size):
+            block = frames[start:start + self.fft_batch_size]
+            amp, freq, phase = self._segment_spectra(block, fs, cut_length)
+            for i in range(block.shape[0]):
+                analyze_record.append(SegmentAnalysis(amp=amp[i], freq=freq.copy(), phase=phase[i]))
+        
+        for i in range(n_full, N):
+            segment = signal[i * hop:i * hop + cut_length]
+            if len(segment) >= cut_length // 2:
+                analyze_record.append(self._analyze_segment(segment, fs, cut_length))
+        return analyze_record
+    
+    def _segment_spectra(self, frames: np.ndarray, fs: int,
+                         cut_length: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        对二维分段数组计算单边幅值谱和相位谱（向量化版本的_analyze_segment）
+        
+        Args:
+            frames: 分段数组 (n_segments, cut_length)
+            fs: 采样率
+            cut_length: 段长度(用于频率计算和归一化)
+            
+        Returns:
+            (amp, freq, phase):
+            - amp: 幅值 (n_segments, n_bins)
+            - freq: 频率范围内的频率轴 (n_bins,)，已取整
+            - phase: 相位 (n_segments, n_bins)
+        """
+        half_len = cut_length // 2 + 1
+        window = self._get_window(cut_length)
+        if window is not None:
+            frames = frames * window
+        if self.fft_mode == 'rfft':
+            signal_f_half = np.fft.rfft(frames, n=cut_length, axis=1)
         else:
-            # 无有效幅值，全部置空
-            for _ in analyze_record:
-                filtered_record.append(SegmentAnalysis(amp=np.asarray([]), freq=np.asarray([]), phase=np.asarray([])))
+            # 复数FFT保证与逐段np.fft.fft逐位一致
+            signal_f_half = np.fft.fft(frames, n=cut_length, axis=1)[:, :half_len]
         
-        # 转换为排序的数组
-        analy_freq = np.array(sorted(file_frequencies))
+        # 频率轴与掩码对所有段相同，先按列裁剪再计算幅值/相位
+        freq_axis = np.arange(half_len) / cut_length * fs
+        freq_mask = (freq_axis >= self.freq_min) & (freq_axis <= self.freq_max)
         
-        return AudioAnalysisResult(
-            fs=fs,
-            n_delay=n_delay,
-            analyze_record=filtered_record,
-            analy_freq=analy_freq,
-            source_file=str(audio_path),
-            ship_class=ship_class
-        )
+        # 加窗时按窗函数的相干增益归一化，使正弦分量的幅值估计与矩形窗一致
+        signal_amp = np.abs(signal_f_half) / (cut_length if window is None else window.sum())
+        signal_amp[:, 1:-1] *= 2
+        
+        amp = signal_amp[:, freq_mask]
+        phase = np.angle(signal_f_half[:, freq_mask])
+        freq = np.round(freq_axis[freq_mask], self.freq_precision)
+        return amp, freq, phase
     
     def _analyze_segment(self, segment: np.ndarray, fs: int, cut_length: int) -> SegmentAnalysis:
         """
@@ -288,7 +1083,10 @@ class FrequencyAnalyzer:
         Returns:
             SegmentAnalysis对象
         """
-        # FFT变换
+        # FFT变换（stft模式下先加窗）
+        window = self._get_window(cut_length)
+        if window is not None:
+            segment = segment * window[:len(segment)]
         signal_f = np.fft.fft(segment)
         
         # 取单边谱：MATLAB用 signal_f(1:cut_length/2+1)
@@ -296,8 +1094,8 @@ class FrequencyAnalyzer:
         half_len = cut_length // 2 + 1
         signal_f_half = signal_f[:half_len]
         
-        # 计算幅值谱：MATLAB用 abs(signal_f_2)/cut_length
-        signal_amp = np.abs(signal_f_half) / cut_length
+        # 计算幅值谱：MATLAB用 abs(signal_f_2)/cut_length（加窗时除以窗函数之和）
+        signal_amp = np.abs(signal_f_half) / (cut_length if window is None else window.sum())
         
         # 单边谱需要乘2：MATLAB的 signal_f_3(2:end-1) = 2*signal_f_3(2:end-1)
         # Python索引：[1:-1] 对应 MATLAB的 (2:end-1)
@@ -369,6 +1167,125 @@ class FrequencyAnalyzer:
         
         save_pickle(data, output_path)
         return output_path
+    
+    def _pack_result(self, result: AudioAnalysisResult) -> Dict[str, Any]:
+        """
+        将分析结果打包为列式记录（各段分量拼接为扁平数组）
+        
+        Args:
+            result: 分析结果
+            
+        Returns:
+            打包后的记录字典
+        """
+        return pack_record(
+            fs=result.fs,
+            n_delay=result.n_delay,
+            segments=[(seg.amp, seg.freq, seg.phase) for seg in result.analyze_record],
+            analy_freq=result.analy_freq,
+            source_file=result.source_file
+        )
+
+
+# 工作进程内的分析器实例（由_init_worker创建）
+_worker_analyzer: Optional[FrequencyAnalyzer] = None
+
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    """进程池初始化函数：在工作进程中构造分析器"""
+    global _worker_analyzer
+    _worker_analyzer = FrequencyAnalyzer(config)
+
+
+def _analyze_file_worker(audio_path: Path, ship_class: str) -> FileOutcome:
+    """进程池任务：分析并保存单个文件"""
+    return _worker_analyzer._analyze_file_safe(audio_path, ship_class)
+
+
+def _to_mono(block: np.ndarray) -> np.ndarray:
+    """将 (frames, channels) 的音频块转为单声道（多声道取平均）"""
+    if block.shape[1] > 1:
+        return np.mean(block, axis=1)
+    return block[:, 0]
+
+
+def _num_full_frames(L: int, frame_length: int, hop: int, N: int) -> int:
+    """长度为L的信号中能完整取出的帧数（不超过N）"""
+    if L < frame_length:
+        return 0
+    return min(N, (L - frame_length) // hop + 1)
+
+
+def _make_window(name: str, n: int) -> np.ndarray:
+    """
+    生成周期型窗函数（用于频谱分析，与scipy.signal.get_window(name, n)一致）
+    
+    Args:
+        name: 窗函数名 'hann' | 'hamming' | 'blackman'
+        n: 窗长（采样点数）
+        
+    Returns:
+        窗函数数组
+    """
+    phase = 2 * np.pi * np.arange(n) / n
+    if name == 'hann':
+        return 0.5 - 0.5 * np.cos(phase)
+    if name == 'hamming':
+        return 0.54 - 0.46 * np.cos(phase)
+    if name == 'blackman':
+        return 0.42 - 0.5 * np.cos(phase) + 0.08 * np.cos(2 * phase)
+    raise ValueError(f"Unknown window: {name}, expected one of {WINDOWS}")
+
+
+def _mask_segment(seg: SegmentAnalysis, mask: np.ndarray) -> SegmentAnalysis:
+    """只保留段结果中mask为True的分量"""
+    return SegmentAnalysis(amp=seg.amp[mask], freq=seg.freq[mask], phase=seg.phase[mask])
+
+
+def _local_maxima(amp: np.ndarray) -> np.ndarray:
+    """
+    逐行局部极大值掩码
+    
+    频点大于左邻且不小于右邻即为峰（平顶只取最左一点），两端点只与单侧相邻点比较
+    """
+    mask = np.ones(amp.shape, dtype=bool)
+    mask[:, 1:] &= amp[:, 1:] > amp[:, :-1]
+    mask[:, :-1] &= amp[:, :-1] >= amp[:, 1:]
+    return mask
+
+
+def _top_k_mask(amp: np.ndarray, mask: np.ndarray, k: int) -> np.ndarray:
+    """在mask内逐行只保留幅值最大的k个频点"""
+    if k >= amp.shape[1]:
+        return mask
+    cand_amp = np.where(mask, amp, -np.inf)
+    idx = np.argpartition(-cand_amp, k - 1, axis=1)[:, :k]
+    keep = np.isfinite(np.take_along_axis(cand_amp, idx, axis=1))
+    
+    out = np.zeros_like(mask)
+    rows = np.broadcast_to(np.arange(amp.shape[0])[:, np.newaxis], idx.shape)
+    out[rows[keep], idx[keep]] = True
+    return out
+
+
+def _frame_view(signal: np.ndarray, frame_length: int, hop: int, n_frames: int) -> np.ndarray:
+    """
+    将一维信号无拷贝地视为 (n_frames, frame_length) 的只读二维分帧数组
+    
+    Args:
+        signal: 一维信号
+        frame_length: 帧长（采样点数）
+        hop: 帧移（采样点数）
+        n_frames: 帧数，需满足 (n_frames-1)*hop + frame_length <= len(signal)
+        
+    Returns:
+        分帧视图
+    """
+    signal = np.ascontiguousarray(signal)
+    stride = signal.strides[0]
+    return np.lib.stride_tricks.as_strided(
+        signal, shape=(n_frames, frame_length), strides=(hop * stride, stride), writeable=False
+    )
 
 
 # 便捷函数
@@ -399,3 +1316,31 @@ def analyze_audio_frequencies(
     
     analyzer = FrequencyAnalyzer(config)
     return analyzer.process()
+
+
+def load_columnar_results(shard_dir: str, mmap: bool = True) -> List[AudioAnalysisResult]:
+    """
+    读取列式分片，返回与pickle格式等价的分析结果
+    
+    各段的amp/freq/phase均为内存映射数组上的视图，不发生拷贝
+    
+    Args:
+        shard_dir: 分片目录（如 output_path/'Class A.shard'）
+        mmap: 是否内存映射加载，默认True
+        
+    Returns:
+        AudioAnalysisResult列表，顺序与写入时一致
+    """
+    shard = ColumnarShard(shard_dir, mmap=mmap)
+    return [
+        AudioAnalysisResult(
+            fs=shard.fs[i],
+            n_delay=shard.n_delay_of(i),
+            analyze_record=[SegmentAnalysis(amp=amp, freq=freq, phase=phase)
+                            for amp, freq, phase in shard.segments(i)],
+            analy_freq=shard.analy_freq_of(i),
+            source_file=shard.source_file[i],
+            ship_class=shard.ship_class
+        )
+        for i in range(len(shard))
+    ]
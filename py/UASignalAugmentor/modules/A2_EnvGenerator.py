@@ -10,24 +10,38 @@ A2_EnvGenerator - 环境文件生成器
 - A3envfilmade.m
 """
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
+import os
 import shutil
 import logging
 from tqdm import tqdm
 
 from utils.env_processor import (
-    load_env_data, coord_proc, get_env, sound_speed
+    load_env_data, radial_tracks, get_bathm, get_env_batch, sound_speed
 )
 from utils.bellhop_writer import (
-    write_env, write_bty, write_ssp, write_trc, write_brc
+    write_env, write_bty, write_ssp, write_trc, write_brc, write_reflection_files
 )
-from utils.io_utils import load_json, load_pickle, ensure_dir
+from utils.blob_store import BlobStore, format_report
+from utils.env_cache import EnvSectionCache, data_source_signature
+from utils.env_data import region_bbox, materialize_woa23
+from utils.env_archive import archive_path, pack_folder, unpack_archive
+from utils.env_manifest import ENV_LIST_NAME, frequency_line, env_name, save_freq_list, write_manifest
+from utils.io_utils import load_json, save_json, load_pickle, ensure_dir
+from utils.shared_data import share_nested, attach_nested, release_shared
 
 
 logger = logging.getLogger(__name__)
 
+REPLICATE_MODES = ('copy', 'virtual')
+OUTPUT_BACKENDS = ('files', 'archive')
+
+# 模板生成时记录在每个envfilefolder中的反射系数参数，A3据此生成逐频率的.trc/.brc
+REFLECTION_PARAMS_NAME = 'reflection_params.json'
+
 
 class EnvGenerator:
     """
@@ -36,13 +50,35 @@ class EnvGenerator:
     对应MATLAB: A22origin_ENVmake.m + A3envfilmade.m
     
     配置参数：
-    - env_data_config: 环境数据配置（ETOPO/WOA23路径）
+    - env_data_config: 环境数据配置（ETOPO/WOA23路径，可选section_cache_dir持久化环境剖面缓存，
+      lazy_load/crop_margin控制延迟加载与按坐标组范围裁剪）
     - coordinate_groups: 经纬度组配置
-    - acoustic_config: 声场计算配置
+    - acoustic_config: 声场计算配置（可选workers：模板生成的并行进程数）
+    
+    azimuth为单个数值时每个坐标组生成一条测线（目录结构不变）；为方位角列表或
+    {'start', 'stop', 'step'} 范围时按方位角扫描，每个方位角输出一棵目录树 output_path/Az<方位角>/...
+    
+    woa23.time_index为列表时按季节批量生成：测线与海深只计算一次，每个时间索引输出到
+    output_path/T<两位时间索引>/...（如T01、T13），只重新生成随季节变化的声速剖面及.env/.ssp/.trc/.brc，
+    .bty由第一个时间索引写出后硬链接到其他季节目录
+    
+    配置aux_store后，.bty/.ssp/.trc/.brc（同一测线上各Rr目录、各复制频率内容相同）
+    存入内容寻址存储，各文件名以硬链接/符号链接指向存储中的blob，
+    生成与复制结果的统计信息中附带节省的字节数与inode数
+    
+    replicate_mode为'virtual'时，A3不再逐频率写出文件，每个envfilefolder只写一份清单，
+    由声场计算任务在派发时渲染对应频率的.env（见utils.env_manifest）
+    
+    output_backend为'archive'时，A3处理完的每个envfilefolder打包为同级的envfilefolder.zip
+    （不压缩，带偏移索引，见utils.env_archive），目录树中只保留一个文件
+    
+    reflection_per_frequency为True时，A3为每个频率生成各自的海面/海底反射系数文件
+    （所有频率一次批量计算），而不是复制模板频率下的.trc/.brc；
+    默认为False（与原有输出一致），开启后.trc/.brc的内容随频率变化
     """
     
     def __init__(self, env_data_config: Dict, coordinate_groups: List[Dict], 
-                 acoustic_config: Dict):
+                 acoustic_config: Dict, env_data: Optional[Tuple[Dict, Dict]] = None):
         """
         初始化环境文件生成器
         
@@ -50,23 +86,72 @@ class EnvGenerator:
             env_data_config: 环境数据配置字典
             coordinate_groups: 经纬度组列表
             acoustic_config: 声场计算配置字典
+            env_data: 已加载的 (etopo, woa23)，为None时按env_data_config加载
         """
         self.env_data_config = env_data_config
         self.coordinate_groups = coordinate_groups
         self.acoustic_config = acoustic_config
         
-        # 加载环境数据
-        logger.info("正在加载环境数据...")
-        self.etopo, self.woa23 = load_env_data(env_data_config)
-        logger.info("环境数据加载完成")
+        # 加载环境数据（默认为延迟加载句柄，首次访问时才读取）
+        if env_data is None:
+            logger.info("正在加载环境数据...")
+            self.etopo, self.woa23 = load_env_data(env_data_config, bbox=self._data_bbox())
+            logger.info("环境数据加载完成")
+        else:
+            self.etopo, self.woa23 = env_data
         
         # 解析配置
         self.output_path = Path(acoustic_config['output_path'])
         self.source_depth = acoustic_config['source']['depth']
         self.source_range = acoustic_config['source']['range']
-        self.azimuth = acoustic_config['azimuth']
+        self.azimuth_sweep = not np.isscalar(acoustic_config['azimuth'])
+        self.azimuths = _parse_azimuths(acoustic_config['azimuth'])
+        self.azimuth = self.azimuths[0]
         self.bellhop_params = acoustic_config['bellhop_params']
-        self.time_idx = env_data_config['woa23']['time_index']
+        self.season_mode = not np.isscalar(env_data_config['woa23']['time_index'])
+        self.time_indices = _parse_time_indices(env_data_config['woa23']['time_index'])
+        self.time_idx = self.time_indices[0]
+        self.workers = int(acoustic_config.get('workers', 1)) or (os.cpu_count() or 1)
+        self.replicate_mode = acoustic_config.get('replicate_mode', 'copy')
+        self.output_backend = acoustic_config.get('output_backend', 'files')
+        if self.output_backend not in OUTPUT_BACKENDS:
+            raise ValueError(f"Unknown output_backend: {self.output_backend}, expected one of {OUTPUT_BACKENDS}")
+        self.reflection_per_frequency = acoustic_config.get('reflection_per_frequency', False)
+        # A3复制为I/O密集型，用线程池；0表示使用ThreadPoolExecutor的默认线程数
+        self.replicate_workers = int(acoustic_config.get('replicate_workers', 1)) or min(32, (os.cpu_count() or 1) + 4)
+        if self.replicate_mode not in REPLICATE_MODES:
+            raise ValueError(f"Unknown replicate_mode: {self.replicate_mode}, expected one of {REPLICATE_MODES}")
+        
+        # 环境剖面缓存：同一测线的海深/声速剖面只插值一次（裁剪范围计入数据源签名）
+        self.section_cache = EnvSectionCache(
+            env_data_config.get('section_cache_dir'),
+            data_source_signature(env_data_config, getattr(self.woa23, 'bbox', None))
+        )
+        # 测线海深（与时间索引无关），多季节生成时同一坐标组的各季节共用，坐标组处理完即清空
+        self._track_depths: Dict[Tuple, np.ndarray] = {}
+        
+        # 辅助文件的内容寻址存储（None表示各文件独立写出）
+        self.aux_store = None
+        if acoustic_config.get('aux_store'):
+            self.aux_store = BlobStore(
+                acoustic_config.get('aux_store_dir') or self.output_path / '.aux_store',
+                acoustic_config['aux_store']
+            )
+    
+    def _data_bbox(self) -> Optional[Tuple[float, float, float, float]]:
+        """
+        环境数据的裁剪范围：覆盖所有坐标组测线的经纬度范围外扩crop_margin度
+        
+        未配置crop_margin或没有坐标组时返回None（不裁剪）
+        """
+        margin = self.env_data_config.get('crop_margin')
+        if margin is None or not self.coordinate_groups:
+            return None
+        bbox = region_bbox(
+            [(g['lat'], g['lon'], max(g['receive_ranges'])) for g in self.coordinate_groups], margin
+        )
+        logger.info(f"环境数据裁剪范围: 纬度[{bbox[0]:.2f}, {bbox[1]:.2f}], 经度[{bbox[2]:.2f}, {bbox[3]:.2f}]")
+        return bbox
     
     def generate_template_envs(self) -> Dict:
         """
@@ -74,6 +159,8 @@ class EnvGenerator:
         
         对应MATLAB: A22origin_ENVmake.m
         
+        workers > 1 时各坐标组分发到进程池并行生成，环境数据只在共享内存中存放一份
+        
         Returns:
             统计信息字典
         """
@@ -88,19 +175,13 @@ class EnvGenerator:
             'failed': 0
         }
         
-        # 遍历每个坐标组
-        for coord_group in tqdm(self.coordinate_groups, desc="处理坐标组"):
-            group_id = coord_group['group_id']
-            logger.info(f"\n处理坐标组: {group_id}")
-            
-            try:
-                self._generate_group_env(coord_group)
-                stats['success'] += len(coord_group['receive_ranges'])
-                stats['total_files'] += len(coord_group['receive_ranges'])
-            except Exception as e:
-                logger.error(f"处理坐标组 {group_id} 失败: {e}")
-                stats['failed'] += len(coord_group['receive_ranges'])
-                stats['total_files'] += len(coord_group['receive_ranges'])
+        if self.workers > 1 and len(self.coordinate_groups) > 1:
+            self._generate_groups_parallel(stats)
+        else:
+            # 遍历每个坐标组
+            for coord_group in tqdm(self.coordinate_groups, desc="处理坐标组"):
+                logger.info(f"\n处理坐标组: {coord_group['group_id']}")
+                self._update_group_stats(stats, coord_group, self._generate_group_env_safe(coord_group))
         
         logger.info("\n" + "=" * 60)
         logger.info("环境文件模板生成完成")
@@ -108,10 +189,151 @@ class EnvGenerator:
         logger.info(f"总文件数: {stats['total_files']}")
         logger.info(f"成功: {stats['success']}")
         logger.info(f"失败: {stats['failed']}")
+        logger.info(f"环境剖面缓存: 命中 {self.section_cache.hits}, 插值 {self.section_cache.misses}")
+        self._report_aux_store(stats)
         logger.info("=" * 60)
         
         return stats
     
+    def _generate_group_env_safe(self, coord_group: Dict) -> Optional[str]:
+        """
+        生成单个坐标组的环境文件，异常被捕获并以字符串返回（单组错误隔离）
+        
+        Returns:
+            失败时的错误信息，成功时为None
+        """
+        try:
+            self._generate_group_env(coord_group)
+            return None
+        except Exception as e:
+            return str(e)
+    
+    def _report_aux_store(self, stats: Dict) -> None:
+        """将辅助文件存储的去重报告加入统计信息并清零计数（未启用时不做任何事）"""
+        if self.aux_store is None:
+            return
+        stats['aux_store'] = self.aux_store.report()
+        logger.info(f"辅助文件去重: {format_report(stats['aux_store'])}")
+        self.aux_store.take_counts()
+    
+    def _update_group_stats(self, stats: Dict, coord_group: Dict, error: Optional[str]) -> None:
+        """按单个坐标组的处理结果更新统计信息"""
+        n_files = len(coord_group['receive_ranges']) * len(self.azimuths) * len(self.time_indices)
+        if error is None:
+            stats['success'] += n_files
+        else:
+            logger.error(f"处理坐标组 {coord_group['group_id']} 失败: {error}")
+            stats['failed'] += n_files
+        stats['total_files'] += n_files
+    
+    def _generate_groups_parallel(self, stats: Dict) -> None:
+        """
+        用进程池并行生成各坐标组的环境文件
+        
+        ETOPO/WOA23数组只拷贝一次到共享内存，工作进程通过共享内存视图访问，
+        任务参数只包含坐标组配置，不随任务pickle数据集。
+        
+        Args:
+            stats: 统计信息字典（原地更新）
+        """
+        # 延迟加载句柄在此处读取，WOA23只共享当前时间索引用到的数据
+        block, spec = share_nested({
+            'etopo': dict(self.etopo),
+            'woa23': materialize_woa23(self.woa23, self.time_indices)
+        })
+        logger.info(f"并行生成: {self.workers} 个进程")
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(spec, self.env_data_config, self.acoustic_config)
+            ) as executor:
+                chunksize = max(1, len(self.coordinate_groups) // (self.workers * 4))
+                results = executor.map(_generate_group_worker, self.coordinate_groups, chunksize=chunksize)
+                for coord_group, (error, hits, misses, store_counts) in tqdm(
+                        zip(self.coordinate_groups, results), total=len(self.coordinate_groups), desc="处理坐标组"):
+                    self._update_group_stats(stats, coord_group, error)
+                    self.section_cache.hits += hits
+                    self.section_cache.misses += misses
+                    if store_counts is not None:
+                        self.aux_store.merge_counts(store_counts)
+        finally:
+            release_shared(block)
+    
+    def _get_env_sections(self, coord_s: Dict, max_range: float,
+                          time_idx: int) -> List[Tuple[np.ndarray, np.ndarray, Dict]]:
+        """
+        提取各方位角测线上的环境剖面（带缓存）
+        
+        测线只由起点、方位角和最大距离决定，同一坐标组的各接收距离共用一条测线；
+        未命中缓存的方位角合并为一次批量插值
+        
+        Args:
+            coord_s: 起点坐标 {'lat': 纬度, 'lon': 经度}
+            max_range: 测线最大距离 (km)
+            time_idx: WOA23时间索引
+            
+        Returns:
+            与self.azimuths对应的 (sea_depth, ssp_raw, SSProf) 列表，同get_env
+        """
+        # 测线采样点数
+        N = max(int(max_range) + 1, 2)
+        keys = [self.section_cache.key(coord_s['lat'], coord_s['lon'], azi, max_range, N, time_idx)
+                for azi in self.azimuths]
+        sections = [self.section_cache.get(key) for key in keys]
+        missing = [i for i, section in enumerate(sections) if section is None]
+        if len(missing) < len(sections):
+            logger.info(f"  复用缓存的环境剖面 {len(sections) - len(missing)} 条 (最大距离={max_range}km)")
+        if not missing:
+            return sections
+        
+        # 构造所有待提取测线上的经纬度数组 (Nradials, N)
+        azimuths = [self.azimuths[i] for i in missing]
+        lat_arr, lon_arr = radial_tracks(coord_s, max_range, azimuths, N)
+        sea_depth = self._get_track_depths(coord_s, max_range, azimuths, lat_arr, lon_arr)
+        
+        # 提取环境数据（所有测线一次批量插值）
+        computed = get_env_batch(self.etopo, self.woa23, lat_arr, lon_arr, time_idx, sea_depth=sea_depth)
+        for i, section in zip(missing, computed):
+            self.section_cache.put(keys[i], *section)
+            sections[i] = section
+        return sections
+    
+    def _get_track_depths(self, coord_s: Dict, max_range: float, azimuths: List[float],
+                          lat_arr: np.ndarray, lon_arr: np.ndarray) -> np.ndarray:
+        """
+        各测线采样点的海深（按测线记忆，各时间索引共用，只做一次ETOPO插值）
+        
+        Returns:
+            海深数组 (len(azimuths), N)
+        """
+        N = lat_arr.shape[1]
+        keys = [(coord_s['lat'], coord_s['lon'], azi, max_range, N) for azi in azimuths]
+        missing = [i for i, key in enumerate(keys) if key not in self._track_depths]
+        if missing:
+            depths = get_bathm(self.etopo, lat_arr[missing].ravel(), lon_arr[missing].ravel())
+            for i, row in zip(missing, depths.reshape(len(missing), N)):
+                self._track_depths[keys[i]] = row
+        return np.stack([self._track_depths[key] for key in keys])
+    
+    def _tree_root(self, azimuth: float, time_idx: int) -> Path:
+        """方位角/时间索引对应的输出根目录（非扫描、非多季节模式即output_path）"""
+        root = self.output_path
+        if self.season_mode:
+            root = root / f"T{time_idx:02d}"
+        if self.azimuth_sweep:
+            root = root / f"Az{azimuth:g}"
+        return root
+    
+    def _output_roots(self) -> List[Path]:
+        """输出根目录列表：output_path 及其下各季节/方位角目录树"""
+        if not self.output_path.exists():
+            return [self.output_path]
+        # 季节目录固定为T加两位时间索引（见_tree_root），不匹配其他以T开头的目录
+        patterns = ('T[0-9][0-9]', 'Az*', 'T[0-9][0-9]/Az*')
+        subtrees = [p for pattern in patterns for p in self.output_path.glob(pattern)]
+        return [self.output_path] + sorted(p for p in subtrees if p.is_dir())
+    
     def _generate_group_env(self, coord_group: Dict) -> None:
         """
         为单个坐标组生成环境文件
@@ -124,8 +346,67 @@ class EnvGenerator:
         receive_ranges = coord_group['receive_ranges']
         receive_depths = coord_group['receive_depths']
         
-        # 创建输出目录
-        group_folder = self.output_path / coord_group['zone_type'] / group_id
+        # 测线只取决于最大接收距离，环境剖面对所有接收距离只提取一次
+        max_range = max(receive_ranges)
+        # 已写出的.bty（与季节无关），多季节时后续季节直接链接
+        bty_files: Dict[Tuple[float, int], Path] = {}
+        
+        try:
+            for time_idx in self.time_indices:
+                if self.season_mode:
+                    logger.info(f"  时间索引 {time_idx}")
+                sections = self._get_env_sections(coord_s, max_range, time_idx)
+                
+                for azimuth, section in zip(self.azimuths, sections):
+                    if self.azimuth_sweep:
+                        logger.info(f"  方位角 {azimuth:g}°")
+                    # 创建输出目录
+                    group_folder = self._tree_root(azimuth, time_idx) / coord_group['zone_type'] / group_id
+                    self._write_group_files(group_id, group_folder, receive_ranges, receive_depths,
+                                            max_range, section, azimuth, bty_files)
+        finally:
+            # 测线海深只在同一坐标组的各季节间复用，不随坐标组数累积
+            self._track_depths.clear()
+    
+    def _write_group_files(self, group_id: str, group_folder: Path, receive_ranges: List[float],
+                           receive_depths: List[float], max_range: float,
+                           section: Tuple[np.ndarray, np.ndarray, Dict], azimuth: float,
+                           bty_files: Dict[Tuple[float, int], Path]) -> None:
+        """
+        按一条测线的环境剖面为坐标组的各接收距离写出BELLHOP文件
+        
+        Args:
+            group_id: 坐标组ID
+            group_folder: 坐标组输出目录
+            receive_ranges: 接收距离列表 (km)
+            receive_depths: 接收深度列表 (m)
+            max_range: 测线最大距离 (km)
+            section: 测线环境剖面 (sea_depth, ssp_raw, SSProf)
+            azimuth: 测线方位角
+            bty_files: (方位角, 接收距离序号) → 已写出的.bty路径，已有时链接而不重新写出
+        """
+        sea_depth, ssp_raw, SSProf = section
+        N = len(sea_depth)
+        
+        # 计算海深地形
+        bathm = {
+            'r': np.linspace(0, max_range, N) - self.source_range,
+            'd': sea_depth
+        }
+        
+        # 构造BELLHOP参数
+        Zmax = int(np.ceil(np.max(sea_depth)))
+        ssp_top = ssp_raw[0, 1]  # 表层声速
+        ssp_bot = ssp_raw[-1, 1]  # 底层声速
+        
+        # 构造SSP结构
+        ssp = self._build_ssp_struct(ssp_raw, Zmax)
+        
+        # 构造边界条件
+        bdry = self._build_boundary(ssp_top, ssp_bot)
+        
+        # 构造波束参数
+        beam = self._build_beam(Zmax, max_range)
         
         # 遍历每个接收距离
         for j, rr in enumerate(receive_ranges, start=1):
@@ -135,37 +416,6 @@ class EnvGenerator:
             rr_folder = group_folder / f"Rr{j}" / "envfilefolder"
             ensure_dir(rr_folder)
             
-            # 坐标转换
-            max_range = max(receive_ranges)
-            coord_e_lat, coord_e_lon = coord_proc(coord_s, [max_range], self.azimuth)
-            
-            # 构造测线上的经纬度数组
-            N = max(int(max_range) + 1, 2)
-            lat_arr = np.linspace(coord_s['lat'], coord_e_lat[0], N)
-            lon_arr = np.linspace(coord_s['lon'], coord_e_lon[0], N)
-            
-            # 提取环境数据
-            sea_depth, ssp_raw, SSProf = get_env(
-                self.etopo, self.woa23, lat_arr, lon_arr, self.time_idx
-            )
-            
-            # 计算海深地形
-            bathm = {
-                'r': np.linspace(0, max_range, N) - self.source_range,
-                'd': sea_depth
-            }
-            
-            # 构造BELLHOP参数
-            Zmax = int(np.ceil(np.max(sea_depth)))
-            ssp_top = ssp_raw[0, 1]  # 表层声速
-            ssp_bot = ssp_raw[-1, 1]  # 底层声速
-            
-            # 构造SSP结构
-            ssp = self._build_ssp_struct(ssp_raw, Zmax)
-            
-            # 构造边界条件
-            bdry = self._build_boundary(ssp_top, ssp_bot)
-            
             # 构造位置参数
             pos = {
                 's': {'z': [self.source_depth]},
@@ -175,9 +425,6 @@ class EnvGenerator:
                 }
             }
             
-            # 构造波束参数
-            beam = self._build_beam(Zmax, max_range)
-            
             # 生成文件名
             envfil = rr_folder / f"ENV_{group_id}_Rr{rr}Km"
             
@@ -189,19 +436,51 @@ class EnvGenerator:
                 str(envfil), 'BELLHOP', title, freq,
                 ssp, bdry, pos, beam, max_range
             )
-            write_bty(str(envfil), "'LS'", bathm)
-            write_ssp(str(envfil), bathm['r'], SSProf['c'])
+            bty_file = bty_files.get((azimuth, j))
+            if bty_file is None or self.aux_store is not None:
+                write_bty(str(envfil), "'LS'", bathm, store=self.aux_store)
+                bty_files[(azimuth, j)] = envfil.with_name(envfil.name + '.bty')
+            else:
+                _link_or_copy(bty_file, envfil.with_name(envfil.name + '.bty'))
+            write_ssp(str(envfil), bathm['r'], SSProf['c'], store=self.aux_store)
             
             # 生成反射系数文件
             freqvec = [freq]  # 暂时用单频
-            write_trc(freqvec, ssp_top, self.bellhop_params['sea_state_level'], str(envfil))
+            write_trc(freqvec, ssp_top, self.bellhop_params['sea_state_level'], str(envfil),
+                      store=self.aux_store)
             write_brc(
                 self.bellhop_params['base_type'], str(envfil), 
-                freqvec, ssp_bot, self.bellhop_params['alpha_b']
+                freqvec, ssp_bot, self.bellhop_params['alpha_b'], store=self.aux_store
             )
+            save_json(self._reflection_params(ssp_top, ssp_bot), rr_folder / REFLECTION_PARAMS_NAME)
             
             logger.info(f"    已生成环境文件: {envfil.name}")
     
+    def _reflection_params(self, ssp_top: float, ssp_bot: float) -> Dict:
+        """反射系数文件的生成参数（write_reflection_files的关键字参数）"""
+        return {
+            'c_surface': float(ssp_top),
+            'sea_state_level': self.bellhop_params['sea_state_level'],
+            'base_type': self.bellhop_params['base_type'],
+            'ssp_end': float(ssp_bot),
+            'alpha_b': self.bellhop_params['alpha_b'],
+        }
+    
+    def _load_reflection_params(self, folder: Path) -> Optional[Dict]:
+        """
+        读取文件夹的反射系数参数
+        
+        Returns:
+            参数字典；未启用逐频率反射系数或模板由旧版本生成（无参数文件）时为None，沿用模板的.trc/.brc
+        """
+        if not self.reflection_per_frequency:
+            return None
+        params_file = folder / REFLECTION_PARAMS_NAME
+        if not params_file.exists():
+            logger.warning(f"未找到反射系数参数，复制模板.trc/.brc: {folder}")
+            return None
+        return load_json(params_file)
+    
     def _build_ssp_struct(self, ssp_raw: np.ndarray, Zmax: int) -> Dict:
         """
         构造声速剖面结构
@@ -291,7 +570,7 @@ class EnvGenerator:
         对应MATLAB: A3envfilmade.m
         
         Args:
-            freq_list_path: A1输出的频率列表文件路径（Analy_freq_all.pkl）
+            freq_list_path: A1输出的频率列表文件路径（Analy_freq_all.pkl 或 Analy_freq_reduced.pkl）
             
         Returns:
             统计信息字典
@@ -302,10 +581,18 @@ class EnvGenerator:
         
         # 读取频率列表
         freq_data = load_pickle(freq_list_path)
-        freq_list = freq_data  # 假设直接是频率数组
+        # A1及FrequencyReducer输出均为 {'frequencies': 数组, ...}，也兼容直接保存的频率数组
+        freq_list = freq_data['frequencies'] if isinstance(freq_data, dict) else freq_data
         
         logger.info(f"频率列表: {len(freq_list)} 个频率")
         
+        # 虚拟复制：频率列表在输出根目录只保存一份，各文件夹只写清单
+        freq_list_file = None
+        if self.replicate_mode == 'virtual':
+            ensure_dir(self.output_path)
+            freq_list_file = save_freq_list(freq_list, self.output_path)
+            logger.info(f"虚拟复制模式，频率列表: {freq_list_file}")
+        
         stats = {
             'total_folders': 0,
             'total_files': 0,
@@ -313,33 +600,47 @@ class EnvGenerator:
             'failed': 0
         }
         
-        # 遍历所有zone类型
-        for zone_type in ['Shallow', 'Transition', 'Deep']:
-            zone_path = self.output_path / zone_type
-            
-            if not zone_path.exists():
-                continue
-            
-            # 遍历每个ENV文件夹
-            for env_folder in zone_path.glob('ENV*'):
-                # 遍历每个Rr文件夹
-                for rr_folder in env_folder.glob('Rr*'):
-                    env_file_folder = rr_folder / 'envfilefolder'
-                    
-                    if not env_file_folder.exists():
-                        continue
-                    
-                    logger.info(f"处理: {env_file_folder.relative_to(self.output_path)}")
-                    stats['total_folders'] += 1
-                    
-                    try:
-                        self._replicate_folder(env_file_folder, freq_list)
-                        stats['success'] += len(freq_list)
-                        stats['total_files'] += len(freq_list)
-                    except Exception as e:
-                        logger.error(f"复制失败: {e}")
-                        stats['failed'] += len(freq_list)
-                        stats['total_files'] += len(freq_list)
+        folders = self._replicate_folders()
+        stats['total_folders'] = len(folders)
+        
+        def replicate(folder: Path) -> Optional[str]:
+            try:
+                # 已打包的文件夹先还原，复制后按output_backend重新输出；
+                # 文件夹与归档同时存在（如模板重新生成后）时合并还原，文件夹中的文件优先
+                archive = archive_path(folder)
+                if archive.exists():
+                    unpack_archive(archive, overwrite=False)
+                if freq_list_file is not None:
+                    self._write_folder_manifest(folder, freq_list_file, len(freq_list))
+                else:
+                    self._replicate_folder(folder, freq_list)
+                if self.output_backend == 'archive':
+                    pack_folder(folder)
+                return None
+            except Exception as e:
+                return str(e)
+        
+        def update(folder: Path, error: Optional[str]) -> None:
+            if error is None:
+                stats['success'] += len(freq_list)
+            else:
+                logger.error(f"复制失败 {folder.relative_to(self.output_path)}: {error}")
+                stats['failed'] += len(freq_list)
+            stats['total_files'] += len(freq_list)
+        
+        if self.replicate_workers > 1 and len(folders) > 1:
+            # 各文件夹相互独立，线程池并行复制，按完成顺序更新进度
+            logger.info(f"并行复制: {self.replicate_workers} 个线程")
+            with ThreadPoolExecutor(max_workers=self.replicate_workers) as executor:
+                futures = {executor.submit(replicate, folder): folder for folder in folders}
+                for future in tqdm(as_completed(futures), total=len(futures), desc="复制文件夹"):
+                    folder = futures[future]
+                    update(folder, future.result())
+                    logger.info(f"完成: {folder.relative_to(self.output_path)}")
+        else:
+            for folder in tqdm(folders, desc="复制文件夹"):
+                logger.info(f"处理: {folder.relative_to(self.output_path)}")
+                update(folder, replicate(folder))
         
         logger.info("\n" + "=" * 60)
         logger.info("批量复制完成")
@@ -347,10 +648,33 @@ class EnvGenerator:
         logger.info(f"生成文件: {stats['total_files']}")
         logger.info(f"成功: {stats['success']}")
         logger.info(f"失败: {stats['failed']}")
+        self._report_aux_store(stats)
         logger.info("=" * 60)
         
         return stats
     
+    def _replicate_folders(self) -> List[Path]:
+        """
+        待复制的环境文件文件夹列表
+        
+        遍历所有zone类型下的 ENV* → Rr* → envfilefolder（方位角扫描/多季节时遍历每棵目录树），
+        已打包为envfilefolder.zip的文件夹也包括在内
+        """
+        folders = []
+        for root in self._output_roots():
+            for zone_type in ['Shallow', 'Transition', 'Deep']:
+                zone_path = root / zone_type
+                
+                if not zone_path.exists():
+                    continue
+                
+                for env_folder in zone_path.glob('ENV*'):
+                    for rr_folder in env_folder.glob('Rr*'):
+                        env_file_folder = rr_folder / 'envfilefolder'
+                        if env_file_folder.exists() or archive_path(env_file_folder).exists():
+                            folders.append(env_file_folder)
+        return folders
+    
     def _replicate_folder(self, folder: Path, freq_list: List[float]) -> None:
         """
         为单个文件夹复制环境文件
@@ -373,16 +697,27 @@ class EnvGenerator:
         with open(template_env, 'r', encoding='utf-8') as f:
             baselines = f.readlines()
         
+        # 逐频率反射系数时.trc/.brc按频率生成，否则与.bty/.ssp一样复制模板
+        reflection = self._load_reflection_params(folder)
+        aux_exts = ['.bty', '.ssp'] if reflection is not None else ['.trc', '.bty', '.brc', '.ssp']
+        
+        # 辅助文件内容只读取一次，启用存储时各频率的文件链接到同一blob
+        aux_sources = {}
+        for ext in aux_exts:
+            src = folder / f'{template_base}{ext}'
+            if src.exists():
+                aux_sources[ext] = self.aux_store.put_file(src) if self.aux_store is not None else src
+        
         # 为每个频率生成文件
         file_list = []
         
         for i, freq in enumerate(freq_list, start=1):
-            new_name = f'test_{i}'
+            new_name = env_name(i)
             file_list.append(new_name)
             
             # 修改第2行（频率行）
             lines = baselines.copy()
-            lines[1] = f"  {freq}  \t\t\t ! Frequency (Hz) \n"
+            lines[1] = frequency_line(freq)
             
             # 写入新.env文件
             new_env = folder / f'{new_name}.env'
@@ -390,19 +725,130 @@ class EnvGenerator:
                 f.writelines(lines)
             
             # 复制辅助文件
-            for ext in ['.trc', '.bty', '.brc', '.ssp']:
-                src = folder / f'{template_base}{ext}'
-                if src.exists():
-                    dst = folder / f'{new_name}{ext}'
+            for ext, src in aux_sources.items():
+                dst = folder / f'{new_name}{ext}'
+                if self.aux_store is not None:
+                    self.aux_store.materialize(src, dst)
+                else:
                     shutil.copy2(src, dst)
         
+        if reflection is not None:
+            write_reflection_files([str(folder / name) for name in file_list], freq_list,
+                                   **reflection, store=self.aux_store)
+        
         # 生成文件列表
-        list_file = folder / 'env_files_list.txt'
+        list_file = folder / ENV_LIST_NAME
         with open(list_file, 'w', encoding='utf-8') as f:
             for name in file_list:
                 f.write(f'{name}\n')
         
         logger.info(f"  生成 {len(file_list)} 个环境文件")
+    
+    def _write_folder_manifest(self, folder: Path, freq_list_file: Path, num_frequencies: int) -> None:
+        """
+        为单个文件夹写出虚拟复制清单（不写出逐频率文件）
+        
+        Args:
+            folder: 环境文件文件夹
+            freq_list_file: 共享频率列表文件
+            num_frequencies: 频率数
+        """
+        env_files = list(folder.glob('ENV_*.env'))
+        
+        if not env_files:
+            logger.warning(f"未找到模板.env文件: {folder}")
+            return
+        
+        write_manifest(folder, env_files[0].stem, freq_list_file, num_frequencies,
+                       reflection=self._load_reflection_params(folder))
+        logger.info(f"  记录 {num_frequencies} 个虚拟环境文件")
+
+
+def _parse_azimuths(azimuth: Any) -> List[float]:
+    """
+    解析方位角配置
+    
+    Args:
+        azimuth: 单个方位角、方位角列表，或 {'start', 'stop', 'step'} 范围（不含stop）
+        
+    Returns:
+        方位角列表 (度)
+    """
+    if isinstance(azimuth, dict):
+        start, stop, step = azimuth['start'], azimuth['stop'], azimuth.get('step', 1)
+        if step <= 0:
+            raise ValueError(f"azimuth step must be > 0, got {step}")
+        n = int(np.ceil((stop - start) / step - 1e-9))
+        if n <= 0:
+            raise ValueError(f"azimuth range is empty: start={start}, stop={stop}")
+        return [float(np.round(start + k * step, 9)) for k in range(n)]
+    if np.isscalar(azimuth):
+        return [azimuth]
+    azimuths = list(azimuth)
+    if not azimuths:
+        raise ValueError("azimuth list is empty")
+    return azimuths
+
+
+def _parse_time_indices(time_index: Any) -> List[int]:
+    """
+    解析WOA23时间索引配置
+    
+    Args:
+        time_index: 单个时间索引或时间索引列表 (1-17)
+        
+    Returns:
+        时间索引列表
+    """
+    indices = [time_index] if np.isscalar(time_index) else list(time_index)
+    if not indices:
+        raise ValueError("time_index list is empty")
+    for t in indices:
+        if not 1 <= int(t) <= 17:
+            raise ValueError(f"time_index must be in 1-17, got {t}")
+    return [int(t) for t in indices]
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """创建硬链接，文件系统不支持时退化为复制"""
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+# ==================== 并行工作进程 ====================
+
+# 工作进程内的生成器实例及其共享内存块（由_init_worker创建）
+_worker_generator: Optional[EnvGenerator] = None
+_worker_block = None
+
+
+def _init_worker(spec: Dict[str, Any], env_data_config: Dict, acoustic_config: Dict) -> None:
+    """进程池初始化函数：挂接共享内存中的环境数据并构造生成器"""
+    global _worker_generator, _worker_block
+    data, _worker_block = attach_nested(spec)
+    _worker_generator = EnvGenerator(
+        env_data_config, [], {**acoustic_config, 'workers': 1},
+        env_data=(data['etopo'], data['woa23'])
+    )
+
+
+def _generate_group_worker(coord_group: Dict) -> Tuple[Optional[str], int, int, Optional[Dict]]:
+    """
+    进程池任务：生成单个坐标组的环境文件
+    
+    Returns:
+        (错误信息或None, 环境剖面缓存命中数, 未命中数, 辅助文件存储计数或None)
+    """
+    cache = _worker_generator.section_cache
+    hits, misses = cache.hits, cache.misses
+    error = _worker_generator._generate_group_env_safe(coord_group)
+    store = _worker_generator.aux_store
+    store_counts = store.take_counts() if store is not None else None
+    return error, cache.hits - hits, cache.misses - misses, store_counts
 
 
 # ==================== 便捷函数 ====================
@@ -0,0 +1,466 @@
+"""
+BELLHOP批量计算模块
+
+对应MATLAB: CallBell/BellParallel*.cpp（A3之后、A4之前的声场并行计算）
+
+功能：
+- 在环境文件根目录下发现所有任务：env_files_list.txt 中的每个 test_i（含复制模式打包的归档），
+  以及虚拟复制清单（env_manifest.json，含打包归档）中的每个频率
+- 以有上限的并发数调用声场计算程序，每个任务有独立超时
+- 完成情况追加写入日志（journal），中断后重新运行只计算未完成的任务
+- 报告任务吞吐量（jobs/sec）
+- 到达结构复用（arrival_reuse）：每个文件夹只以最低频率计算一次，
+  其他频率的.arr由反射系数表和体积衰减解析推出（见utils.arrival_reuse）
+- 镜像法引擎（image_engine）：平坦海底、近似等声速的文件夹不调用计算程序，
+  所有频率的.arr由镜像法一次算出（见utils.image_arrivals）；其他文件夹仍按上述方式计算
+"""
+# 自带包
+import json
+import logging
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
+# 第三方包
+from tqdm import tqdm
+# 本地包
+from utils.arrival_reuse import derive_arrivals, parse_reflection_table, read_env_medium
+from utils.arrivals import read_arrivals, write_arrivals_asc
+from utils.env_manifest import (ENV_LIST_NAME, PackedEnvSet, VirtualEnvSet,
+                                find_packed_folders, find_virtual_folders)
+from utils.image_arrivals import flat_isovelocity_environment, image_arrivals
+from utils.io_utils import ensure_dir
+
+
+JOURNAL_NAME = 'bellhop_journal.jsonl'
+
+
+@dataclass
+class BellhopJob:
+    """单个声场计算任务"""
+    job_id: str                                 # 任务标识（相对根目录的文件夹/文件名）
+    folder: Path                                # 环境文件文件夹（输出也写到这里）
+    name: str                                   # 环境文件名（不含扩展名）
+    virtual: Optional[Union[VirtualEnvSet, PackedEnvSet]] = None  # 虚拟复制/已打包时的环境文件集合
+    index: int = 0                              # 虚拟复制/已打包时的频率序号（从1开始）
+
+
+@dataclass
+class JobResult:
+    """单个任务的执行结果"""
+    job_id: str
+    status: str                                 # 'ok' | 'failed' | 'timeout'
+    elapsed: float                              # 耗时（秒）
+    returncode: Optional[int] = None
+    error: str = ''
+    method: str = 'bellhop'                     # 'bellhop' | 'reuse'（由参考频率推出） | 'image'（镜像法）
+
+
+class BellhopRunner:
+    """
+    BELLHOP批量计算调度器
+
+    每个任务在环境文件所在目录（虚拟复制或已打包时为临时目录）中执行 `<executable> <test_i>`，
+    与BellParallel相同。计算程序本身是独立进程，调度只负责等待，
+    因此用线程池维持workers个并发的计算进程即可占满所有核。
+
+    任务成功的判据：返回码为0且生成了输出文件（默认 <test_i>.arr）。
+
+    Attributes:
+        config: 配置字典
+        logger: 日志记录器
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        初始化调度器
+
+        Args:
+            config: 配置字典，应包含：
+                - env_root: 环境文件根目录（A2/A3的output_path）
+                - executable: 声场计算程序路径，或命令列表（如 ["python", "fake_bellhop.py"]）
+                - workers: 并发任务数，默认0（使用全部CPU核）
+                - timeout: 单个任务超时（秒），默认None（不限）
+                - journal_file: 完成日志路径，默认 env_root/bellhop_journal.jsonl
+                - retry_failed: 是否重新计算日志中失败/超时的任务，默认True
+                - output_ext: 判定任务完成的输出文件扩展名，默认'.arr'
+                - scratch_dir: 虚拟复制/已打包任务渲染或取出.env的临时目录，默认 env_root/.scratch
+                - arrival_reuse: 是否启用到达结构复用，默认False
+                  （要求output_ext为'.arr'，推出的文件为ASCII格式）
+                - image_engine: 是否对适用的文件夹使用镜像法引擎，默认False（同样要求output_ext为'.arr'）
+                - image_orders: 镜像阶数（每阶4条声线），默认30
+                - image_max_depth_variation: 适用镜像法的最大海深相对变化，默认0.02
+                - image_max_speed_variation: 适用镜像法的最大声速变化 (m/s)，默认5.0
+        """
+        self.config = config
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.env_root = Path(config['env_root'])
+        executable = config['executable']
+        self.command = [executable] if isinstance(executable, str) else list(executable)
+        self.workers = int(config.get('workers', 0)) or (os.cpu_count() or 1)
+        self.timeout = config.get('timeout')
+        self.journal_file = Path(config.get('journal_file') or self.env_root / JOURNAL_NAME)
+        self.retry_failed = config.get('retry_failed', True)
+        self.output_ext = config.get('output_ext', '.arr')
+        self.scratch_dir = Path(config.get('scratch_dir') or self.env_root / '.scratch')
+        self.arrival_reuse = config.get('arrival_reuse', False)
+        self.image_engine = config.get('image_engine', False)
+        self.image_orders = int(config.get('image_orders', 30))
+        self.image_max_depth_variation = config.get('image_max_depth_variation', 0.02)
+        self.image_max_speed_variation = config.get('image_max_speed_variation', 5.0)
+        for key in ('arrival_reuse', 'image_engine'):
+            if getattr(self, key) and self.output_ext != '.arr':
+                raise ValueError(f"{key} requires output_ext '.arr', got {self.output_ext!r}")
+
+        self.logger.info(f"BellhopRunner initialized with config: {config}")
+
+    def process(self) -> Dict[str, Any]:
+        """
+        发现并执行所有未完成的任务
+
+        Returns:
+            统计信息字典：
+            {
+                'total_jobs': int,          # 发现的任务数
+                'skipped': int,             # 日志中已完成而跳过的任务数
+                'success': int,
+                'failed': int,
+                'timeout': int,
+                'derived': int,             # 成功任务中由到达结构复用推出的任务数
+                'image': int,               # 成功任务中由镜像法计算的任务数
+                'elapsed_time': float,      # 总耗时（秒）
+                'jobs_per_sec': float       # 本次执行任务的吞吐量
+            }
+        """
+        start_time = time.time()
+
+        jobs = self.discover_jobs()
+        done = self._load_journal()
+        pending = [job for job in jobs if job.job_id not in done]
+
+        stats = {
+            'total_jobs': len(jobs),
+            'skipped': len(jobs) - len(pending),
+            'success': 0,
+            'failed': 0,
+            'timeout': 0,
+            'derived': 0,
+            'image': 0,
+        }
+        self.logger.info(f"Found {len(jobs)} jobs, {stats['skipped']} already done, "
+                         f"running {len(pending)} with {self.workers} workers"
+                         + (" (arrival reuse)" if self.arrival_reuse else "")
+                         + (" (image engine)" if self.image_engine else ""))
+
+        run_start = time.time()
+        if pending:
+            with self._open_journal() as journal, tqdm(total=len(pending), desc="BELLHOP jobs") as pbar:
+                executor = ThreadPoolExecutor(max_workers=self.workers)
+                try:
+                    futures = []
+                    for group in self._group_jobs(jobs, done):
+                        geometry = self._image_geometry(group) if self.image_engine else None
+                        if geometry is not None:
+                            futures.append(executor.submit(self._image_group, group, done, geometry))
+                        elif self.arrival_reuse:
+                            futures.append(executor.submit(self._run_group, group, done))
+                        else:
+                            futures.extend(executor.submit(lambda job: [self._run_job(job)], job)
+                                           for job in group if job.job_id not in done)
+                    for future in as_completed(futures):
+                        for result in future.result():
+                            self._record(result, stats, journal)
+                            pbar.update(1)
+                finally:
+                    # 中断（如Ctrl+C）时取消尚未开始的任务，只等待正在执行的任务
+                    executor.shutdown(wait=True, cancel_futures=True)
+        run_time = time.time() - run_start
+
+        stats['elapsed_time'] = time.time() - start_time
+        stats['jobs_per_sec'] = len(pending) / run_time if run_time > 0 else 0.0
+        self.logger.info(
+            f"Ran {len(pending)} jobs in {run_time:.2f}s ({stats['jobs_per_sec']:.2f} jobs/sec): "
+            f"{stats['success']} ok ({stats['derived']} derived, {stats['image']} image), {stats['failed']} failed, "
+            f"{stats['timeout']} timed out"
+        )
+        return stats
+
+    def _record(self, result: JobResult, stats: Dict[str, Any], journal) -> None:
+        """统计任务结果并写入完成日志"""
+        stats['success' if result.status == 'ok' else result.status] += 1
+        if result.status == 'ok' and result.method != 'bellhop':
+            stats['derived' if result.method == 'reuse' else result.method] += 1
+        if result.status != 'ok':
+            self.logger.error(f"Job {result.job_id} {result.status}: {result.error}")
+        entry = {
+            'job': result.job_id, 'status': result.status,
+            'elapsed': round(result.elapsed, 3), 'returncode': result.returncode,
+        }
+        if result.method != 'bellhop':
+            entry['method'] = result.method
+        # 每个任务完成即写入并刷新，被中断时最多丢失正在执行的任务
+        journal.write(json.dumps(entry) + '\n')
+        journal.flush()
+
+    def discover_jobs(self) -> List[BellhopJob]:
+        """
+        发现根目录下的所有任务
+
+        Returns:
+            任务列表（按文件夹路径、列表顺序排列）
+        """
+        jobs = []
+        for list_file in sorted(self.env_root.rglob(ENV_LIST_NAME)):
+            folder = list_file.parent
+            rel = folder.relative_to(self.env_root).as_posix()
+            with open(list_file, 'r', encoding='utf-8') as f:
+                names = [line.strip() for line in f if line.strip()]
+            jobs.extend(BellhopJob(f"{rel}/{name}", folder, name) for name in names)
+
+        # 虚拟复制的文件夹及打包后的复制模式文件夹：任务从清单渲染/从归档取出输入
+        env_sets = [VirtualEnvSet(path) for path in find_virtual_folders(self.env_root)]
+        env_sets += [PackedEnvSet(path) for path in find_packed_folders(self.env_root)]
+        for env_set in env_sets:
+            rel = env_set.folder.relative_to(self.env_root).as_posix()
+            jobs.extend(BellhopJob(f"{rel}/{name}", env_set.folder, name, env_set, i)
+                        for i, name in enumerate(env_set.names(), start=1))
+        return jobs
+
+    def _group_jobs(self, jobs: List[BellhopJob], done: Set[str]) -> List[List[BellhopJob]]:
+        """按环境文件文件夹分组，只保留含未完成任务的组"""
+        groups: Dict[Path, List[BellhopJob]] = {}
+        for job in jobs:
+            groups.setdefault(job.folder, []).append(job)
+        return [group for group in groups.values() if any(job.job_id not in done for job in group)]
+
+    def _group_inputs(self, group: List[BellhopJob]) -> Tuple[List[float], List[Tuple], int, str]:
+        """
+        读取一组任务的频率、反射系数表，并选出参考任务（最低频率）
+
+        Returns:
+            (各任务频率, 各任务的(.trc表, .brc表), 参考任务在组中的位置, 参考任务的.env内容)
+        """
+        env_set = group[0].virtual
+        if env_set is not None:
+            trc_texts, brc_texts = env_set.reflection_texts()
+            freqs = [env_set.frequencies[job.index - 1] for job in group]
+            texts = [(trc_texts[job.index - 1], brc_texts[job.index - 1]) for job in group]
+        else:
+            freqs, texts = [], []
+            for job in group:
+                base = job.folder / job.name
+                with open(base.with_suffix('.env'), 'r', encoding='utf-8') as f:
+                    f.readline()
+                    freqs.append(float(f.readline().split()[0]))
+                texts.append(tuple(base.with_suffix(ext).read_text() if base.with_suffix(ext).exists() else None
+                                   for ext in ('.trc', '.brc')))
+        tables = [tuple(parse_reflection_table(t) if t is not None else None for t in pair) for pair in texts]
+
+        ref_pos = min(range(len(group)), key=freqs.__getitem__)
+        ref_job = group[ref_pos]
+        if env_set is not None:
+            ref_env = env_set.env_text(ref_job.index)
+        else:
+            ref_env = (ref_job.folder / f"{ref_job.name}.env").read_text(encoding='utf-8')
+        return freqs, tables, ref_pos, ref_env
+
+    def _run_group(self, group: List[BellhopJob], done: Set[str]) -> List[JobResult]:
+        """
+        到达结构复用：计算一组（同一文件夹）中最低频率的任务，由其结果推出其余任务
+
+        Returns:
+            本组中未完成任务的结果
+        """
+        results = []
+        try:
+            freqs, tables, ref_pos, ref_env = self._group_inputs(group)
+        except Exception as e:
+            return [JobResult(job.job_id, 'failed', 0.0, error=f"cannot read inputs: {e}")
+                    for job in group if job.job_id not in done]
+
+        ref_job = group[ref_pos]
+        if ref_job.job_id not in done:
+            result = self._run_job(ref_job)
+            results.append(result)
+            if result.status != 'ok':
+                return results + [JobResult(job.job_id, 'failed', 0.0, error=f"reference job {result.status}")
+                                  for job in group if job is not ref_job and job.job_id not in done]
+
+        start = time.time()
+        try:
+            ref = read_arrivals(ref_job.folder / f"{ref_job.name}{self.output_ext}")
+            medium = read_env_medium(ref_env)
+        except Exception as e:
+            return results + [JobResult(job.job_id, 'failed', time.time() - start,
+                                        error=f"cannot read reference arrivals: {e}")
+                              for job in group if job is not ref_job and job.job_id not in done]
+
+        for job, freq, job_tables in zip(group, freqs, tables):
+            if job is ref_job or job.job_id in done:
+                continue
+            start = time.time()
+            try:
+                derived = derive_arrivals(ref, freq, medium, tables[ref_pos], job_tables)
+                write_arrivals_asc(job.folder / f"{job.name}{self.output_ext}", derived)
+                results.append(JobResult(job.job_id, 'ok', time.time() - start, method='reuse'))
+            except Exception as e:
+                results.append(JobResult(job.job_id, 'failed', time.time() - start, error=str(e)))
+        return results
+
+    def _image_geometry(self, group: List[BellhopJob]) -> Optional[Dict[str, Any]]:
+        """
+        判断一组任务是否适用镜像法（以组内第一个任务的.env和文件夹的.bty为准）
+
+        Returns:
+            flat_isovelocity_environment的几何参数，不适用或读取失败时为None
+        """
+        job = group[0]
+        try:
+            if job.virtual is not None:
+                env_text = job.virtual.env_text(job.index)
+                bty_text = job.virtual.aux_text('.bty')
+            else:
+                base = job.folder / job.name
+                env_text = base.with_suffix('.env').read_text(encoding='utf-8')
+                bty_text = base.with_suffix('.bty').read_text() if base.with_suffix('.bty').exists() else None
+            return flat_isovelocity_environment(env_text, bty_text, self.image_max_depth_variation,
+                                                self.image_max_speed_variation)
+        except Exception as e:
+            self.logger.warning(f"Cannot check image engine for {job.folder}: {e}")
+            return None
+
+    def _image_group(self, group: List[BellhopJob], done: Set[str], geometry: Dict[str, Any]) -> List[JobResult]:
+        """
+        镜像法：一次计算一组（同一文件夹）中所有未完成任务的到达结构
+
+        Returns:
+            本组中未完成任务的结果
+        """
+        start = time.time()
+        pending = [k for k, job in enumerate(group) if job.job_id not in done]
+        try:
+            freqs, tables, _, _ = self._group_inputs(group)
+            arrivals = image_arrivals(
+                [freqs[k] for k in pending], geometry['source_depths'], geometry['receiver_depths'],
+                geometry['receiver_ranges'], geometry['water_depth'], geometry['sound_speed'],
+                [tables[k][0] for k in pending], [tables[k][1] for k in pending],
+                n_orders=self.image_orders, thorp=geometry['thorp']
+            )
+        except Exception as e:
+            return [JobResult(group[k].job_id, 'failed', time.time() - start, error=f"image engine: {e}")
+                    for k in pending]
+        # 计算时间由本组任务均摊
+        shared = (time.time() - start) / len(pending)
+
+        results = []
+        ensure_dir(group[0].folder)
+        for k, data in zip(pending, arrivals):
+            job = group[k]
+            start = time.time()
+            try:
+                write_arrivals_asc(job.folder / f"{job.name}{self.output_ext}", data)
+                results.append(JobResult(job.job_id, 'ok', shared + time.time() - start, method='image'))
+            except Exception as e:
+                results.append(JobResult(job.job_id, 'failed', shared + time.time() - start, error=str(e)))
+        return results
+
+    def _open_journal(self):
+        """以追加方式打开完成日志；上次被中断留下的不完整行先补上换行"""
+        ensure_dir(self.journal_file.parent)
+        if self.journal_file.exists() and self.journal_file.stat().st_size > 0:
+            with open(self.journal_file, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                incomplete = f.read(1) != b'\n'
+            if incomplete:
+                with open(self.journal_file, 'a', encoding='utf-8') as f:
+                    f.write('\n')
+        return open(self.journal_file, 'a', encoding='utf-8')
+
+    def _load_journal(self) -> Set[str]:
+        """
+        读取完成日志
+
+        Returns:
+            已完成（无需再计算）的任务标识集合；同一任务以最后一条记录为准
+        """
+        if not self.journal_file.exists():
+            return set()
+        last_status: Dict[str, str] = {}
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 被中断时可能留下不完整的最后一行
+                    continue
+                last_status[entry['job']] = entry['status']
+        if self.retry_failed:
+            return {job for job, status in last_status.items() if status == 'ok'}
+        return set(last_status)
+
+    def _run_job(self, job: BellhopJob) -> JobResult:
+        """执行单个任务（异常被捕获并记录为失败）"""
+        start = time.time()
+        try:
+            if job.virtual is None:
+                return self._execute(job, job.folder, start)
+            # 虚拟复制/已打包：在任务独占的临时目录中渲染或从归档取出输入，
+            # 计算后将输出移回环境文件文件夹（已打包时为归档旁的同名文件夹）
+            scratch = self.scratch_dir / job.job_id.replace('/', '__')
+            try:
+                with job.virtual.materialized(job.index, scratch):
+                    result = self._execute(job, scratch, start)
+                # 渲染的输入已删除，剩下的都是计算输出
+                if result.status == 'ok':
+                    ensure_dir(job.folder)
+                    for p in scratch.iterdir():
+                        os.replace(p, job.folder / p.name)
+                return result
+            finally:
+                shutil.rmtree(scratch, ignore_errors=True)
+        except Exception as e:
+            return JobResult(job.job_id, 'failed', time.time() - start, error=str(e))
+
+    def _execute(self, job: BellhopJob, cwd: Path, start: float) -> JobResult:
+        """在cwd中运行计算程序并判定结果"""
+        output = cwd / f"{job.name}{self.output_ext}"
+        output.unlink(missing_ok=True)
+        try:
+            proc = subprocess.run(
+                self.command + [job.name], cwd=cwd, timeout=self.timeout,
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+        except subprocess.TimeoutExpired:
+            return JobResult(job.job_id, 'timeout', time.time() - start,
+                             error=f"exceeded {self.timeout}s")
+
+        elapsed = time.time() - start
+        if proc.returncode != 0:
+            return JobResult(job.job_id, 'failed', elapsed, proc.returncode,
+                             error=proc.stderr.decode(errors='replace').strip()[-500:])
+        if not output.exists():
+            return JobResult(job.job_id, 'failed', elapsed, proc.returncode,
+                             error=f"no output {output.name}")
+        return JobResult(job.job_id, 'ok', elapsed, proc.returncode)
+
+
+# 便捷函数
+def run_bellhop_jobs(env_root: str, executable: Union[str, List[str]], **kwargs) -> Dict[str, Any]:
+    """
+    便捷函数：执行环境文件根目录下的所有BELLHOP任务
+
+    Args:
+        env_root: 环境文件根目录
+        executable: 声场计算程序路径或命令列表
+        **kwargs: 其他配置参数（workers, timeout, journal_file, ...）
+
+    Returns:
+        统计信息字典
+    """
+    runner = BellhopRunner({'env_root': env_root, 'executable': executable, **kwargs})
+    return runner.process()
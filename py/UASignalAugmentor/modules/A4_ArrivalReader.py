@@ -0,0 +1,169 @@
+"""
+到达结构处理模块
+
+对应MATLAB: A4ArrProcessor.m / ArrReader.m
+
+功能：
+- 发现环境文件根目录下的所有envfilefolder（env_files_list.txt、复制模式打包的归档，以及虚拟复制清单/归档）
+- 读取每个频率的到达结构文件(.arr，ASCII或二进制)，超过最大处理频率的跳过
+- 对所有频率、所有接收深度一次性应用幅值门限（AMP_THRESHOLD_RATIO），按时延排序
+- 每个文件夹保存一个到达结构存储（扁平数组 + 偏移表，可内存映射，见utils.arrival_store），
+  替代 ENV_ARR_less.mat / ENV_ARR_less.json
+"""
+# 自带包
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+# 第三方包
+from tqdm import tqdm
+# 本地包
+from utils.arrivals import ArrivalData, read_arrivals
+from utils.arrival_store import STORE_NAME, ArrivalStore, write_arrival_store
+from utils.env_manifest import (ENV_LIST_NAME, PackedEnvSet, VirtualEnvSet,
+                                find_packed_folders, find_virtual_folders)
+
+
+class ArrivalReader:
+    """
+    到达结构处理器
+
+    与ArrReader.m相同，每个envfilefolder的结果保存到其上一级目录（Rr*）
+
+    Attributes:
+        config: 配置字典
+        logger: 日志记录器
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        初始化处理器
+
+        Args:
+            config: 配置字典，应包含：
+                - env_root: 环境文件根目录（.arr与环境文件在同一文件夹）
+                - max_freq_limit: 最大处理频率 (Hz)，默认5000
+                - amp_threshold_ratio: 幅值门限比例，默认0.05
+                - store_name: 存储目录名，默认 'ENV_ARR_less.arrstore'
+                - arr_ext: 到达结构文件扩展名，默认'.arr'
+        """
+        self.config = config
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.env_root = Path(config['env_root'])
+        self.max_freq_limit = config.get('max_freq_limit', 5000)
+        self.amp_threshold_ratio = config.get('amp_threshold_ratio', 0.05)
+        self.store_name = config.get('store_name', STORE_NAME)
+        self.arr_ext = config.get('arr_ext', '.arr')
+
+        self.logger.info(f"ArrivalReader initialized with config: {config}")
+
+    def process(self) -> Dict[str, Any]:
+        """
+        处理根目录下的所有envfilefolder
+
+        Returns:
+            统计信息字典：
+            {
+                'total_folders': int,
+                'success': int,             # 写出存储的文件夹数
+                'failed': int,              # 没有任何可读.arr文件的文件夹数
+                'missing_files': int,       # 缺失或读取失败的.arr文件数
+                'arrivals_read': int,
+                'arrivals_kept': int,       # 通过幅值门限的到达数
+                'elapsed_time': float
+            }
+        """
+        start_time = time.time()
+        folders = self.discover_folders()
+        stats = {
+            'total_folders': len(folders),
+            'success': 0,
+            'failed': 0,
+            'missing_files': 0,
+            'arrivals_read': 0,
+            'arrivals_kept': 0,
+        }
+        self.logger.info(f"Found {len(folders)} env folders under {self.env_root}")
+
+        for folder, names in tqdm(folders, desc="Arrival folders"):
+            arrivals, missing = self._read_folder(folder, names)
+            stats['missing_files'] += missing
+            if all(a is None for a in arrivals):
+                self.logger.warning(f"No readable {self.arr_ext} files in {folder}")
+                stats['failed'] += 1
+                continue
+            store_dir = write_arrival_store(
+                folder.parent / self.store_name, names, arrivals,
+                self.amp_threshold_ratio, self.max_freq_limit
+            )
+            stats['success'] += 1
+            stats['arrivals_read'] += sum(int(a.counts.sum()) for a in arrivals if a is not None)
+            stats['arrivals_kept'] += int(ArrivalStore(store_dir).cell_offsets[-1])
+
+        stats['elapsed_time'] = time.time() - start_time
+        self.logger.info(
+            f"Processed {stats['success']}/{len(folders)} folders in {stats['elapsed_time']:.2f}s, "
+            f"kept {stats['arrivals_kept']}/{stats['arrivals_read']} arrivals"
+        )
+        return stats
+
+    def discover_folders(self) -> List[Tuple[Path, List[str]]]:
+        """
+        发现根目录下的所有envfilefolder
+
+        Returns:
+            [(文件夹, 各频率的文件名列表)]，按文件夹路径排列
+        """
+        folders = []
+        for list_file in sorted(self.env_root.rglob(ENV_LIST_NAME)):
+            with open(list_file, 'r', encoding='utf-8') as f:
+                folders.append((list_file.parent, [line.strip() for line in f if line.strip()]))
+        for path in find_virtual_folders(self.env_root):
+            env_set = VirtualEnvSet(path)
+            folders.append((env_set.folder, env_set.names()))
+        for path in find_packed_folders(self.env_root):
+            env_set = PackedEnvSet(path)
+            folders.append((env_set.folder, env_set.names()))
+        return sorted(folders)
+
+    def _read_folder(self, folder: Path, names: List[str]) -> Tuple[List[Optional[ArrivalData]], int]:
+        """
+        读取一个文件夹的所有频率
+
+        Returns:
+            (各频率的到达结构，缺失/读取失败/超过频率上限的为None, 缺失或读取失败的文件数)
+        """
+        arrivals: List[Optional[ArrivalData]] = []
+        missing = 0
+        for name in names:
+            arr_file = folder / f"{name}{self.arr_ext}"
+            if not arr_file.exists():
+                arrivals.append(None)
+                missing += 1
+                continue
+            try:
+                data = read_arrivals(arr_file)
+            except Exception as e:
+                self.logger.warning(f"Failed to read {arr_file}: {e}")
+                arrivals.append(None)
+                missing += 1
+                continue
+            arrivals.append(data if data.freq <= self.max_freq_limit else None)
+        return arrivals, missing
+
+
+# 便捷函数
+def process_arrivals(env_root: str, **kwargs) -> Dict[str, Any]:
+    """
+    便捷函数：处理环境文件根目录下的所有到达结构
+
+    Args:
+        env_root: 环境文件根目录
+        **kwargs: 其他配置参数（max_freq_limit, amp_threshold_ratio, ...）
+
+    Returns:
+        统计信息字典
+    """
+    reader = ArrivalReader({'env_root': env_root, **kwargs})
+    return reader.process()
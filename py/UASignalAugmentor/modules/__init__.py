@@ -8,11 +8,13 @@ __version__ = '0.1.0'
 
 # 只导入已实现的模块
 from .A1_SignalAnalyzer import FrequencyAnalyzer
+from .A1_FrequencyReducer import FrequencyReducer
+from .A3_BellhopRunner import BellhopRunner
+from .A4_ArrivalReader import ArrivalReader
 
 # TODO: 待其他模块实现后取消注释
 # from .frequency_filter import FrequencyFilter
 # from .env_generator import EnvGenerator
-# from .arrival_reader import ArrivalReader
 # from .signal_reconstructor import SignalReconstructor
 # from .spectrogram_builder import SpectrogramBuilder
 # from .validation import Validator
@@ -21,9 +23,11 @@ from .A1_SignalAnalyzer import FrequencyAnalyzer
 
 __all__ = [
     'FrequencyAnalyzer',
+    'FrequencyReducer',
+    'BellhopRunner',
+    'ArrivalReader',
     # 'FrequencyFilter',
     # 'EnvGenerator',
-    # 'ArrivalReader',
     # 'SignalReconstructor',
     # 'SpectrogramBuilder',
     # 'Validator',
@@ -0,0 +1,21 @@
+"""
+测试公共配置
+
+测试以 py/UASignalAugmentor 为根目录导入 utils / modules（与各模块自身的导入方式一致）
+"""
+# 自带包
+import sys
+from pathlib import Path
+# 第三方包
+import numpy as np
+import pytest
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+if str(PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(PACKAGE_ROOT))
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    """固定种子的随机数发生器"""
+    return np.random.default_rng(20240521)
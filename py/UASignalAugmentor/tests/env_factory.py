@@ -0,0 +1,67 @@
+"""
+测试用的小型环境文件夹
+
+按A2/A3的格式写出一个envfilefolder：逐频率的 test_i.env 及其 .trc/.brc/.bty 和 env_files_list.txt
+"""
+# 自带包
+from pathlib import Path
+from typing import List, Optional, Sequence
+# 第三方包
+import numpy as np
+# 本地包
+from utils.bellhop_writer import write_bty, write_env, write_reflection_files
+from utils.env_manifest import ENV_LIST_NAME, env_name
+
+BEAM = {
+    'RunType': 'AB', 'Nbeams': 0, 'alpha': [-90, 90], 'deltas': 0, 'Box': {'z': 600, 'r': 11},
+    'epmult': 0.3, 'rLoop': 1.0, 'Nimage': 1, 'Ibwin': 4, 'Type': 'CS',
+}
+
+
+def write_env_folder(folder: Path, freqs: Sequence[float], water_depth: float = 100.0,
+                     speeds: Sequence[float] = (1500.0, 1500.0), top_option: str = 'CFFT',
+                     sea_state_level: int = 2, base_type: str = 'D40', source_depth: float = 10.0,
+                     receiver_depths: Sequence[float] = (20.0, 50.0, 80.0), receiver_range: float = 1.0,
+                     bty_depths: Optional[Sequence[float]] = None) -> List[str]:
+    """
+    写出一个环境文件夹
+
+    Args:
+        folder: 文件夹（不存在时创建）
+        freqs: 各频率 (Hz)，依次写为 test_1, test_2, ...
+        water_depth: 海深 (m)，声速剖面的最大深度
+        speeds: 声速剖面在 0..water_depth 上等间隔各点的声速 (m/s)
+        top_option: 顶部边界选项（第4位为'T'时计入Thorp衰减）
+        sea_state_level: 海况等级（.trc）
+        base_type: 海底类型（.brc）
+        source_depth: 声源深度 (m)
+        receiver_depths: 接收深度 (m)
+        receiver_range: 接收距离 (km)
+        bty_depths: .bty中等间隔各点的海深 (m)，默认处处为water_depth
+
+    Returns:
+        各频率的环境文件名（不含扩展名）
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    z = np.linspace(0.0, water_depth, len(speeds))
+    n = len(z)
+    ssp = {
+        'NMedia': 1, 'N': [0], 'sigma': [0], 'depth': [0, water_depth],
+        'raw': [{'z': z, 'alphaR': np.asarray(speeds, dtype=float), 'betaR': np.zeros(n),
+                 'rho': np.ones(n), 'alphaI': np.zeros(n), 'betaI': np.zeros(n)}],
+    }
+    bdry = {'Top': {'Opt': top_option},
+            'Bot': {'Opt': 'F*', 'HS': {'alphaR': 1500, 'betaR': 0, 'rho': 1, 'alphaI': 0, 'betaI': 0}}}
+    pos = {'s': {'z': [source_depth]}, 'r': {'z': list(receiver_depths), 'range': [receiver_range]}}
+    depths = [water_depth] * 2 if bty_depths is None else list(bty_depths)
+    bathm = {'r': np.linspace(0.0, receiver_range + 1, len(depths)), 'd': np.asarray(depths, dtype=float)}
+
+    names = [env_name(i) for i in range(1, len(freqs) + 1)]
+    for name, freq in zip(names, freqs):
+        base = str(folder / name)
+        write_env(base, 'BELLHOP', name, freq, ssp, bdry, pos, BEAM, receiver_range + 1)
+        write_bty(base, "'LS'", bathm)
+    write_reflection_files([str(folder / name) for name in names], list(freqs), speeds[0],
+                           sea_state_level, base_type, speeds[-1])
+    (folder / ENV_LIST_NAME).write_text('\n'.join(names) + '\n')
+    return names
@@ -0,0 +1,48 @@
+"""
+测试用的假声场计算程序
+
+用法与BELLHOP相同：在环境文件所在目录执行 `python fake_bellhop.py test_i`，
+读取 test_i.env 第2行的频率，写出确定性的ASCII格式 test_i.arr
+（1个声源深度 × 2个接收深度 × 1个接收距离，分别有2、3个到达）。
+
+通过环境变量控制异常行为：
+- FAKE_BELLHOP_FAIL: 逗号分隔的环境文件名，这些任务以返回码1退出且不写输出
+- FAKE_BELLHOP_SLEEP: 写出前等待的秒数（用于超时测试）
+"""
+# 自带包
+import os
+import sys
+import time
+
+COUNTS = (2, 3)
+
+
+def arrivals_text(freq: float) -> str:
+    """与频率相关的确定性到达结构（BELLHOP的2D ASCII格式）"""
+    lines = ["'2D'", f"{freq:.8f}", "1 10.0", "2 20.0 40.0", "1 1000.0", f"{max(COUNTS):12d}"]
+    k = 0
+    for n in COUNTS:
+        lines.append(f"{n:12d}")
+        for _ in range(n):
+            lines.append(f"{1e-3 / (k + 1):17.8E} {180.0 * (k % 2):14.6f} {0.67 + 0.01 * k:16.8f} "
+                         f"{-1e-9 * freq:17.8E} {5.0 * k:14.7f} {-5.0 * k:14.7f} {k // 2:11d} {(k + 1) // 2:11d}")
+            k += 1
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    name = sys.argv[1]
+    if name in os.environ.get('FAKE_BELLHOP_FAIL', '').split(','):
+        print(f"fake failure: {name}", file=sys.stderr)
+        return 1
+    time.sleep(float(os.environ.get('FAKE_BELLHOP_SLEEP', 0)))
+    with open(f'{name}.env', 'r') as f:
+        f.readline()
+        freq = float(f.readline().split()[0])
+    with open(f'{name}.arr', 'w') as f:
+        f.write(arrivals_text(freq))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+测试用的假声场计算程序（镜像声线）
+
+用法与BELLHOP相同：在环境文件所在目录执行 `python fake_ray_model.py test_i`，写出ASCII格式 test_i.arr。
+
+声线几何按等声速镜像法（声速取剖面各点的平均），每阶4个镜像，共 N_ORDERS 阶；
+边界掠射角由出射角按Snell定律（cosθ / c 守恒）换算到剖面首、末点声速；
+幅值为 Π|R(掠射角)| / 距离，相位为各次反射相位之和，
+顶部选项第4位为'T'时Thorp体积衰减计入时延虚部（Im τ = -α·L / ω）。
+这些与到达结构复用（utils.arrival_reuse）的假设一致：由参考频率推出的结果应与逐频率直接计算相同。
+"""
+# 自带包
+import sys
+from pathlib import Path
+# 第三方包
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+# 本地包
+from utils.arrivals import ArrivalData, write_arrivals_asc
+
+N_ORDERS = 4
+
+
+def _vector(lines, tag):
+    """读取 "N ! tag" 行及其下一行的数组（两个值时等间隔展开）"""
+    i = next(k for k, line in enumerate(lines) if f'! {tag}' in line)
+    n = int(lines[i].split()[0])
+    values = [float(v) for v in lines[i + 1].split('/')[0].split()]
+    return np.linspace(values[0], values[-1], n) if len(values) == 2 and n > 2 else np.array(values[:n])
+
+
+def _table(path):
+    return np.loadtxt(path, skiprows=1, ndmin=2) if path.exists() else None
+
+
+def _reflect(table, angle, n):
+    """n次反射的 (幅值因子, 相位和)"""
+    if table is None or n == 0:
+        return 1.0, 0.0
+    return np.interp(angle, table[:, 0], table[:, 1]) ** n, n * np.interp(angle, table[:, 0], table[:, 2])
+
+
+def compute(name: str) -> ArrivalData:
+    lines = Path(f'{name}.env').read_text().splitlines()
+    freq = float(lines[1].split()[0])
+    top_option = lines[3].split("'")[1]
+    start = lines.index(next(line for line in lines if '! N sigma depth' in line))
+    profile = []
+    for line in lines[start + 1:]:
+        if line.lstrip().startswith("'"):
+            break
+        profile.append([float(v) for v in line.split('/')[0].split()[:2]])
+    z, c = np.array(profile).T
+    depth, c0 = z[-1], c.mean()
+    sz, rz, rr = _vector(lines, 'NSz'), _vector(lines, 'NRz'), _vector(lines, 'NRr') * 1000.0
+    trc, brc = _table(Path(f'{name}.trc')), _table(Path(f'{name}.brc'))
+    alpha = 0.0
+    if top_option[3:4] == 'T':
+        f2 = (freq / 1000.0) ** 2
+        alpha = (3.3e-3 + 0.11 * f2 / (1 + f2) + 44.0 * f2 / (4100 + f2) + 3.0e-4 * f2) / 8.6858896 / 1000.0
+
+    counts = np.zeros((len(sz), len(rz), len(rr)), dtype=int)
+    rows = []
+    for a, zs in enumerate(sz):
+        for b, zr in enumerate(rz):
+            for k, r in enumerate(rr):
+                for m in range(N_ORDERS):
+                    for nt, nb, dz, up_first, up_last in (
+                            (m, m, 2 * m * depth + zr - zs, zr < zs and m == 0, zr < zs and m == 0),
+                            (m + 1, m, 2 * m * depth + zr + zs, True, False),
+                            (m, m + 1, 2 * (m + 1) * depth - zr - zs, False, True),
+                            (m + 1, m + 1, 2 * (m + 1) * depth - zr + zs, True, True)):
+                        length = np.hypot(r, dz)
+                        graze = np.degrees(np.arctan2(abs(dz), r))
+                        cos_src = np.cos(np.radians(graze)) / np.interp(zs, z, c)
+                        top_angle = np.degrees(np.arccos(min(cos_src * c[0], 1.0)))
+                        bot_angle = np.degrees(np.arccos(min(cos_src * c[-1], 1.0)))
+                        top_mag, top_phase = _reflect(trc, top_angle, nt)
+                        bot_mag, bot_phase = _reflect(brc, bot_angle, nb)
+                        phase = 180.0 - np.mod(180.0 - (top_phase + bot_phase), 360.0)
+                        rows.append([top_mag * bot_mag / length, phase, length / c0,
+                                     -alpha * length / (2 * np.pi * freq),
+                                     -graze if up_first else graze, -graze if up_last else graze, nt, nb])
+                        counts[a, b, k] += 1
+    t = np.array(rows).T
+    return ArrivalData(freq, sz, rz, rr, counts, t[0], t[1], t[2] + 1j * t[3], t[4], t[5],
+                       t[6].astype(np.int16), t[7].astype(np.int16))
+
+
+if __name__ == '__main__':
+    name = sys.argv[1]
+    write_arrivals_asc(f'{name}.arr', compute(name))
@@ -0,0 +1,165 @@
+"""
+合成ETOPO/WOA23数据集及A2配置，用于环境文件生成的等价性测试
+
+数据集为小范围规则网格（.mat格式与真实数据一致），包含：
+- 随经纬度变化的海深（约60-260 m）
+- 月度文件层数少于季度/全年文件（月度数据用全年数据填充深层）
+- 网格一角的陆地（所有层均为NaN，均值填充），在测试坐标组的裁剪范围之外
+- 100 m以下的层只有中间一行有值：在完整网格上NaN比例超过0.9而跳过，
+  该行落在测试坐标组的裁剪范围内，只按裁剪后的数据判断时不会跳过
+"""
+
+# 自带包
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 第三方包
+import numpy as np
+from scipy.io import savemat
+
+# 本地包
+from utils.env_archive import ARCHIVE_SUFFIX, EnvArchive
+from utils.env_data import WOA23_FILE_IDS
+
+LAT = np.arange(20.0, 24.001, 0.25)
+LON = np.arange(110.0, 114.001, 0.25)
+MONTH_DEPTHS = np.array([0, 5, 10, 20, 30, 50, 75, 100, 125, 150, 200, 250, 300], dtype=float)
+ANNUAL_DEPTHS = np.concatenate([MONTH_DEPTHS, [400, 500, 600, 700, 800]])
+
+COORDINATE_GROUPS = [
+    {'group_id': 'ENV1', 'lat': 21.0, 'lon': 112.0, 'zone_type': 'Shallow',
+     'receive_ranges': [5, 12], 'receive_depths': [10, 30]},
+    {'group_id': 'ENV2', 'lat': 21.6, 'lon': 111.4, 'zone_type': 'Transition',
+     'receive_ranges': [8], 'receive_depths': [20]},
+    {'group_id': 'ENV3', 'lat': 20.6, 'lon': 112.8, 'zone_type': 'Shallow',
+     'receive_ranges': [3, 6], 'receive_depths': [15]},
+]
+
+BELLHOP_PARAMS = {
+    'run_type': 'AB',
+    'top_option': 'CFFT',
+    'sea_state_level': 0,
+    'freq': 500,
+    'bottom_option': 'F*',
+    'base_type': 'IMG',
+    'alpha_b': 0.05,
+    'beam_option': {'type': 'CS', 'epmult': 0.3, 'rLoop': 1, 'Nimage': 1, 'Ibwin': 1},
+}
+
+
+def _grid_field(lat: np.ndarray, lon: np.ndarray, depths: np.ndarray, time_slot: int):
+    """温盐场 (Nlat, Nlon, Ndepth)"""
+    la = (lat[:, None, None] - LAT[0]) / (LAT[-1] - LAT[0])
+    lo = (lon[None, :, None] - LON[0]) / (LON[-1] - LON[0])
+    z = depths[None, None, :]
+    temp = 28 - 2 * la + lo + 0.3 * np.sin(time_slot) - 18 * (1 - np.exp(-z / 150))
+    sal = 34.2 + 0.4 * lo - 0.2 * la + 0.002 * z + 0.05 * np.cos(time_slot)
+    return temp, sal
+
+
+def write_env_dataset(root: Path, lat: np.ndarray = LAT, lon: np.ndarray = LON) -> Dict:
+    """
+    写出合成数据集
+
+    Args:
+        root: 输出目录
+        lat: 纬度轴
+        lon: 经度轴（可用于构造跨±180°的数据）
+
+    Returns:
+        env_data_config（延迟加载、不裁剪、不持久化剖面缓存）
+    """
+    root = Path(root)
+    woa_dir = root / 'woa23'
+    woa_dir.mkdir(parents=True, exist_ok=True)
+
+    la = (lat[:, None] - lat[0]) / (lat[-1] - lat[0])
+    lo = (lon[None, :] - lon[0]) / (lon[-1] - lon[0])
+    altitude = -(60 + 160 * lo + 40 * np.sin(3 * la) * lo)
+    # 网格一角为陆地
+    land = (la > 0.9) & (lo < 0.1)
+    altitude[land] = 20.0
+    savemat(root / 'etopo.mat', {'Lat': lat.reshape(-1, 1), 'Lon': lon.reshape(-1, 1), 'Altitude': altitude})
+
+    for slot, file_id in enumerate(WOA23_FILE_IDS):
+        depths = MONTH_DEPTHS if file_id in range(1, 13) else ANNUAL_DEPTHS
+        temp, sal = _grid_field(lat, lon, depths, slot)
+        temp[land] = np.nan
+        sal[land] = np.nan
+        # 100 m以下几乎全为NaN（只有中间一行有值）
+        deep = depths > 100
+        mid = len(lat) // 2
+        for arr in (temp, sal):
+            keep = arr[mid][:, deep].copy()
+            arr[:, :, deep] = np.nan
+            arr[mid][:, deep] = keep
+        savemat(woa_dir / f'woa23_{file_id:02d}.mat', {
+            'Lat': lat.reshape(-1, 1), 'Lon': lon.reshape(-1, 1),
+            'Depth': depths.reshape(-1, 1), 'Temp': temp, 'Sal': sal,
+        })
+
+    return {
+        'etopo': {'file_path': str(root / 'etopo.mat')},
+        'woa23': {'folder_path': str(woa_dir), 'time_index': 1},
+        'lazy_load': True,
+        'crop_margin': None,
+        'section_cache_dir': None,
+    }
+
+
+def acoustic_config(output_path: Path, **overrides) -> Dict:
+    """A2声场配置（单方位角、串行、逐文件输出）"""
+    config = {
+        'output_path': str(output_path),
+        'source': {'depth': 10, 'range': 0},
+        'azimuth': 45,
+        'workers': 1,
+        'bellhop_params': BELLHOP_PARAMS,
+    }
+    config.update(overrides)
+    return config
+
+
+def env_config(base: Dict, **overrides) -> Dict:
+    """在数据集配置上修改部分键（woa23.time_index用time_index传入）"""
+    config = {**base, 'woa23': dict(base['woa23'])}
+    if 'time_index' in overrides:
+        config['woa23']['time_index'] = overrides.pop('time_index')
+    config.update(overrides)
+    return config
+
+
+def tree_files(root: Path, exclude: Optional[List[str]] = None) -> Dict[str, bytes]:
+    """
+    目录树中全部文件的内容（相对路径 → 字节）
+
+    envfilefolder归档按成员展开为 归档相对路径/成员名（zip中记录了文件修改时间，
+    不同时间打包的同样内容字节不同）
+
+    Args:
+        root: 根目录
+        exclude: 忽略的顶层目录名（如内容寻址存储目录）
+    """
+    root = Path(root)
+    exclude = set(exclude or [])
+    files = {}
+    for p in sorted(root.rglob('*')):
+        relpath = p.relative_to(root)
+        if not p.is_file() or relpath.parts[0] in exclude:
+            continue
+        if p.name.endswith(ARCHIVE_SUFFIX):
+            with EnvArchive(p) as archive:
+                files.update({f'{relpath.as_posix()}/{name}': archive.read(name) for name in archive.names()})
+        else:
+            files[relpath.as_posix()] = p.read_bytes()
+    return files
+
+
+def assert_same_tree(root: Path, expected_root: Path, exclude: Optional[List[str]] = None) -> None:
+    """两棵目录树的文件名和内容完全相同"""
+    files = tree_files(root, exclude)
+    expected = tree_files(expected_root, exclude)
+    assert sorted(files) == sorted(expected)
+    assert len(files) > 0
+    for name, data in expected.items():
+        assert files[name] == data, name
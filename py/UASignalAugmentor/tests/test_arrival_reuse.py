@@ -0,0 +1,93 @@
+"""到达结构复用：由参考频率推出的.arr与逐频率直接计算一致"""
+# 自带包
+import json
+import shutil
+import sys
+from pathlib import Path
+# 第三方包
+import numpy as np
+import pytest
+# 本地包
+from modules.A3_BellhopRunner import BellhopRunner, JOURNAL_NAME
+from utils.arrival_reuse import thorp_attenuation
+from utils.arrivals import read_arrivals
+from .env_factory import write_env_folder
+
+# 多层海底在全反射角以下按MATLAB的做法产生NaN后置为1，计算中的RuntimeWarning属预期
+pytestmark = pytest.mark.filterwarnings('ignore::RuntimeWarning')
+
+FAKE_MODEL = Path(__file__).with_name('fake_ray_model.py')
+# 参考频率（最低频率）不在第一个
+FREQS = (400.0, 100.0, 1600.0)
+REL = 'Shallow/ENV1/Rr1/envfilefolder'
+# 声源深度10 m处的声速（剖面 0/50/100 m 处为 1500/1512/1521 m/s）
+SOURCE_SPEED = 1502.4
+
+
+def _run(env_root: Path, **kwargs) -> dict:
+    config = {'env_root': str(env_root), 'executable': [sys.executable, str(FAKE_MODEL)], 'workers': 1}
+    config.update(kwargs)
+    return BellhopRunner(config).process()
+
+
+@pytest.fixture(params=['CFFT', 'CFF'], ids=['thorp', 'no-thorp'])
+def trees(tmp_path, request):
+    """同一环境文件夹的两份：分别以复用模式和逐频率直接计算"""
+    write_env_folder(tmp_path / 'reuse' / REL, FREQS, speeds=(1500.0, 1512.0, 1521.0),
+                     top_option=request.param, sea_state_level=2, base_type='D40')
+    shutil.copytree(tmp_path / 'reuse', tmp_path / 'direct')
+    return tmp_path / 'reuse', tmp_path / 'direct', request.param.endswith('T')
+
+
+def test_derived_arrivals_match_direct(trees):
+    reuse_root, direct_root, thorp = trees
+    stats = _run(reuse_root, arrival_reuse=True)
+    assert (stats['success'], stats['derived']) == (3, 2)
+    with open(reuse_root / JOURNAL_NAME, 'r', encoding='utf-8') as f:
+        methods = {json.loads(line)['job'].rsplit('/', 1)[1]: json.loads(line).get('method', 'bellhop')
+                   for line in f}
+    assert methods == {'test_1': 'reuse', 'test_2': 'bellhop', 'test_3': 'reuse'}
+    assert _run(direct_root)['success'] == 3
+
+    ref = read_arrivals(reuse_root / REL / 'test_2.arr')
+    for name, freq in (('test_1', 400.0), ('test_3', 1600.0)):
+        derived = read_arrivals(reuse_root / REL / f'{name}.arr')
+        direct = read_arrivals(direct_root / REL / f'{name}.arr')
+        assert derived.freq == direct.freq == freq
+        np.testing.assert_array_equal(derived.counts, direct.counts)
+        np.testing.assert_array_equal(derived.top_bounces, direct.top_bounces)
+        np.testing.assert_array_equal(derived.bot_bounces, direct.bot_bounces)
+        np.testing.assert_allclose(derived.src_angle, direct.src_angle, atol=1e-5)
+        np.testing.assert_allclose(derived.rcv_angle, direct.rcv_angle, atol=1e-5)
+        np.testing.assert_allclose(derived.amp, direct.amp, rtol=1e-5, atol=1e-12)
+        np.testing.assert_allclose(np.exp(1j * np.deg2rad(derived.phase)),
+                                   np.exp(1j * np.deg2rad(direct.phase)), atol=1e-5)
+        np.testing.assert_allclose(derived.delay.real, direct.delay.real, atol=1e-8)
+        np.testing.assert_allclose(derived.delay.imag, direct.delay.imag, rtol=1e-6, atol=1e-15)
+
+        # 时延虚部：Thorp衰减下为负，按 α(f)/f 缩放；无衰减时为0
+        if thorp:
+            assert np.all(derived.delay.imag < 0)
+            scale = (thorp_attenuation(freq) / freq) / (thorp_attenuation(ref.freq) / ref.freq)
+            np.testing.assert_allclose(derived.delay.imag, ref.delay.imag * scale, rtol=1e-6)
+        else:
+            assert np.all(derived.delay.imag == 0)
+
+        # 幅值比按反射次数累乘：每次海面/海底反射乘一次该掠射角处的反射系数比
+        folder = reuse_root / REL
+        top = _table_ratio(folder / 'test_2.trc', folder / f'{name}.trc', ref.src_angle, 1500.0)
+        bottom = _table_ratio(folder / 'test_2.brc', folder / f'{name}.brc', ref.src_angle, 1521.0)
+        expected = top ** ref.top_bounces * bottom ** ref.bot_bounces
+        ratio = derived.amp / ref.amp
+        np.testing.assert_allclose(ratio, expected, rtol=1e-4)
+        bounces = ref.top_bounces + ref.bot_bounces
+        np.testing.assert_allclose(ratio[bounces == 0], 1.0, rtol=1e-6)
+        assert bounces.max() >= 6 and ratio[bounces > 0].min() < 0.9
+
+
+def _table_ratio(ref_file: Path, file: Path, src_angle: np.ndarray, c_boundary: float) -> np.ndarray:
+    """出射角按Snell定律（声源处声速1503 m/s）换算到边界后，两个反射系数表的幅值比"""
+    ref_table, table = (np.loadtxt(p, skiprows=1) for p in (ref_file, file))
+    cos_src = np.cos(np.deg2rad(np.abs(src_angle))) / SOURCE_SPEED
+    angle = np.rad2deg(np.arccos(np.minimum(cos_src * c_boundary, 1.0)))
+    return np.interp(angle, table[:, 0], table[:, 1]) / np.interp(angle, ref_table[:, 0], ref_table[:, 1])
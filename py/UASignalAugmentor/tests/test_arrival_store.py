@@ -0,0 +1,85 @@
+"""到达结构存储：gate_arrivals 与逐格点移植的 ArrReader.m 一致"""
+# 第三方包
+import numpy as np
+import pytest
+# 本地包
+from utils.arrival_store import ArrivalStore, gate_arrivals, write_arrival_store
+from .test_arrivals import random_arrivals
+
+
+def arr_reader_cell(data, k: int, amp_threshold_ratio: float):
+    """
+    ArrReader.m 中单个接收点的处理（逐格点移植）
+
+    A = Amp·exp(iφ)（单精度复数）；按|时延|排序后保留幅值不低于门限×最大幅值的到达
+    """
+    sl = slice(data.offsets[k], data.offsets[k + 1])
+    A = (data.amp[sl] * np.exp(1j * np.deg2rad(data.phase[sl]))).astype(np.complex64)
+    raw_amp = np.abs(A)
+    raw_delay = np.abs(data.delay[sl])
+    raw_phase = np.angle(A)
+
+    sort_idx = np.argsort(raw_delay, kind='stable')
+    amp_sorted, delay_sorted, phase_sorted = raw_amp[sort_idx], raw_delay[sort_idx], raw_phase[sort_idx]
+    if amp_sorted.size == 0:
+        return amp_sorted, delay_sorted, phase_sorted
+    mask = amp_sorted >= amp_threshold_ratio * amp_sorted.max()
+    return amp_sorted[mask], delay_sorted[mask], phase_sorted[mask]
+
+
+def assert_cell_matches(amp, delay, phase, expected):
+    exp_amp, exp_delay, exp_phase = expected
+    assert len(amp) == len(exp_amp)
+    np.testing.assert_allclose(amp, exp_amp, rtol=1e-6)
+    np.testing.assert_allclose(delay, exp_delay, rtol=1e-12)
+    # 相位在±π处可能落在不同的一侧，按单位复数比较
+    np.testing.assert_allclose(np.exp(1j * phase), np.exp(1j * exp_phase), atol=1e-5)
+
+
+@pytest.fixture
+def arrivals(rng):
+    """4个频率的到达，其中一个缺失"""
+    data = [random_arrivals(rng, shape=(1, 6, 1), freq=f) for f in (50.0, 100.0, 200.0, 400.0)]
+    data[2] = None
+    return data
+
+
+@pytest.mark.parametrize('ratio', [0.0, 0.1, 0.5, 1.0])
+def test_gate_arrivals_matches_arr_reader(arrivals, ratio):
+    amp, delay, phase, offsets = gate_arrivals(arrivals, ratio)
+    n_recv = 6
+    assert len(offsets) == len(arrivals) * n_recv + 1
+
+    for m, data in enumerate(arrivals):
+        for n in range(n_recv):
+            k = m * n_recv + n
+            sl = slice(offsets[k], offsets[k + 1])
+            if data is None:
+                assert sl.start == sl.stop
+                continue
+            assert_cell_matches(amp[sl], delay[sl], phase[sl], arr_reader_cell(data, n, ratio))
+
+
+def test_gate_arrivals_all_missing():
+    amp, delay, phase, offsets = gate_arrivals([None, None], 0.1)
+    assert len(amp) == len(delay) == len(phase) == 0
+    np.testing.assert_array_equal(offsets, [0])
+
+
+def test_store_cells_match_arr_reader(tmp_path, arrivals):
+    names = [f'test_{i}' for i in range(1, len(arrivals) + 1)]
+    write_arrival_store(tmp_path / 'store', names, arrivals, 0.2)
+
+    store = ArrivalStore(tmp_path / 'store')
+    assert len(store) == len(arrivals) and store.num_receivers == 6
+    np.testing.assert_array_equal(store.receiver_depths, arrivals[0].receiver_depths)
+    assert np.isnan(store.freq[2]) and store.freq[3] == 400.0
+    for m, data in enumerate(arrivals):
+        for n in range(6):
+            amp, delay, phase = store.cell(m, n)
+            if data is None:
+                assert len(amp) == 0
+                continue
+            assert_cell_matches(amp, delay, phase, arr_reader_cell(data, n, 0.2))
+    with pytest.raises(IndexError):
+        store.cell(len(arrivals), 0)
@@ -0,0 +1,167 @@
+"""到达结构文件(.arr)的ASCII/二进制读写往返"""
+# 自带包
+from pathlib import Path
+# 第三方包
+import numpy as np
+import pytest
+# 本地包
+from utils.arrivals import (ArrivalData, read_arrivals, read_arrivals_asc, read_arrivals_bin,
+                            write_arrivals_asc)
+
+
+def random_arrivals(rng: np.random.Generator, shape=(2, 3, 4), freq: float = 315.5) -> ArrivalData:
+    """随机到达结构，含没有到达的格点"""
+    counts = rng.integers(0, 5, size=shape)
+    counts.flat[0] = 0
+    n = int(counts.sum())
+    return ArrivalData(
+        freq=freq,
+        source_depths=np.arange(1, shape[0] + 1) * 12.5,
+        receiver_depths=np.arange(1, shape[1] + 1) * 25.0,
+        receiver_ranges=np.arange(1, shape[2] + 1) * 1500.0,
+        counts=counts,
+        amp=(10 ** rng.uniform(-6, -2, n)).astype(np.float32),
+        phase=rng.uniform(-180, 180, n).round(4).astype(np.float32),
+        delay=rng.uniform(0.5, 5.0, n) - 1j * 10 ** rng.uniform(-8, -5, n),
+        src_angle=rng.uniform(-60, 60, n).round(4).astype(np.float32),
+        rcv_angle=rng.uniform(-60, 60, n).round(4).astype(np.float32),
+        top_bounces=rng.integers(0, 10, n).astype(np.int16),
+        bot_bounces=rng.integers(0, 10, n).astype(np.int16),
+    )
+
+
+def write_arrivals_bin(file_path: Path, data: ArrivalData, marker_len: int = 1) -> None:
+    """按BELLHOP的2D二进制格式写出（FORTRAN无格式顺序文件，每条记录前后各有一个长度标记）"""
+    marker_dtype = '<i4' if marker_len == 1 else '<i8'
+    chunks = []
+
+    def record(*parts: np.ndarray) -> None:
+        payload = b''.join(np.ascontiguousarray(p).tobytes() for p in parts)
+        marker = np.array([len(payload)], dtype=marker_dtype).tobytes()
+        chunks.extend([marker, payload, marker])
+
+    record(np.frombuffer(b"'2D'", dtype=np.uint8))
+    record(np.array([data.freq], '<f4'))
+    record(np.array([len(data.source_depths)], '<i4'), np.asarray(data.source_depths, '<f4'))
+    record(np.array([len(data.receiver_depths)], '<i4'), np.asarray(data.receiver_depths, '<f4'))
+    record(np.array([len(data.receiver_ranges)], '<i4'), np.asarray(data.receiver_ranges, '<f8'))
+
+    table = np.column_stack([
+        data.amp, data.phase, data.delay.real, data.delay.imag,
+        data.src_angle, data.rcv_angle, data.top_bounces, data.bot_bounces,
+    ]).astype('<f4')
+    counts = data.counts.reshape(len(data.source_depths), -1)
+    j = 0
+    for source_counts in counts:
+        record(np.array([source_counts.max(initial=0)], '<i4'))
+        for n in source_counts:
+            record(np.array([n], '<i4'))
+            for row in table[j:j + n]:
+                record(row)
+            j += n
+    Path(file_path).write_bytes(b''.join(chunks))
+
+
+def assert_arrivals_close(actual: ArrivalData, expected: ArrivalData, rtol: float, atol: float) -> None:
+    assert actual.freq == pytest.approx(expected.freq, rel=1e-6)
+    for name in ('source_depths', 'receiver_depths', 'receiver_ranges'):
+        np.testing.assert_allclose(getattr(actual, name), getattr(expected, name), rtol=1e-7)
+    np.testing.assert_array_equal(actual.counts, expected.counts)
+    np.testing.assert_allclose(actual.amp, expected.amp, rtol=rtol)
+    np.testing.assert_allclose(actual.delay.real, expected.delay.real, rtol=rtol)
+    np.testing.assert_allclose(actual.delay.imag, expected.delay.imag, rtol=rtol)
+    for name in ('phase', 'src_angle', 'rcv_angle'):
+        np.testing.assert_allclose(getattr(actual, name), getattr(expected, name), atol=atol)
+    np.testing.assert_array_equal(actual.top_bounces, expected.top_bounces)
+    np.testing.assert_array_equal(actual.bot_bounces, expected.bot_bounces)
+
+
+def test_ascii_round_trip(tmp_path, rng):
+    data = random_arrivals(rng)
+    path = tmp_path / 'test_1.arr'
+    write_arrivals_asc(path, data)
+
+    assert_arrivals_close(read_arrivals_asc(path), data, rtol=1e-7, atol=1e-5)
+    assert_arrivals_close(read_arrivals(path), data, rtol=1e-7, atol=1e-5)
+
+
+def test_ascii_rewrite_is_stable(tmp_path, rng):
+    path = tmp_path / 'a.arr'
+    write_arrivals_asc(path, random_arrivals(rng))
+    write_arrivals_asc(tmp_path / 'b.arr', read_arrivals_asc(path))
+    assert (tmp_path / 'b.arr').read_text() == path.read_text()
+
+
+@pytest.mark.parametrize('marker_len', [1, 2])
+def test_binary_round_trip(tmp_path, rng, marker_len):
+    data = random_arrivals(rng)
+    path = tmp_path / 'test_1.arr'
+    write_arrivals_bin(path, data, marker_len)
+
+    # 二进制文件中除接收距离外都是单精度
+    assert_arrivals_close(read_arrivals_bin(path, marker_len), data, rtol=1e-6, atol=1e-4)
+    if marker_len == 1:
+        assert_arrivals_close(read_arrivals(path), data, rtol=1e-6, atol=1e-4)
+
+
+def test_ascii_and_binary_agree(tmp_path, rng):
+    data = random_arrivals(rng, shape=(1, 5, 1))
+    write_arrivals_asc(tmp_path / 'asc.arr', data)
+    write_arrivals_bin(tmp_path / 'bin.arr', data)
+
+    asc = read_arrivals(tmp_path / 'asc.arr')
+    binary = read_arrivals(tmp_path / 'bin.arr')
+    assert_arrivals_close(binary, asc, rtol=1e-6, atol=1e-4)
+    for irz in range(5):
+        cell = asc.cell(0, irz, 0)
+        np.testing.assert_allclose(binary.amp[binary.cell(0, irz, 0)], data.amp[cell], rtol=1e-6)
+
+
+def test_all_cells_empty(tmp_path, rng):
+    data = random_arrivals(rng, shape=(1, 2, 2))
+    empty = ArrivalData(data.freq, data.source_depths, data.receiver_depths, data.receiver_ranges,
+                        np.zeros_like(data.counts), *(getattr(data, name)[:0] for name in (
+                            'amp', 'phase', 'delay', 'src_angle', 'rcv_angle', 'top_bounces', 'bot_bounces')))
+    write_arrivals_asc(tmp_path / 'asc.arr', empty)
+    write_arrivals_bin(tmp_path / 'bin.arr', empty)
+
+    for name in ('asc.arr', 'bin.arr'):
+        result = read_arrivals(tmp_path / name)
+        assert result.counts.shape == (1, 2, 2)
+        assert result.counts.sum() == 0 and len(result.amp) == 0
+
+
+def test_truncated_files_rejected(tmp_path, rng):
+    data = random_arrivals(rng)
+    write_arrivals_asc(tmp_path / 'asc.arr', data)
+    write_arrivals_bin(tmp_path / 'bin.arr', data)
+    text = (tmp_path / 'asc.arr').read_text().splitlines()
+    (tmp_path / 'asc.arr').write_text('\n'.join(text[:len(text) // 2]) + '\n')
+    raw = (tmp_path / 'bin.arr').read_bytes()
+    (tmp_path / 'bin.arr').write_bytes(raw[:len(raw) // 8 * 4])    # 截断在4字节字边界
+
+    with pytest.raises(ValueError):
+        read_arrivals_asc(tmp_path / 'asc.arr')
+    with pytest.raises(ValueError):
+        read_arrivals_bin(tmp_path / 'bin.arr')
+
+
+@pytest.mark.parametrize('corrupt', ['token', 'count', 'extra'])
+def test_malformed_ascii_rejected(tmp_path, rng, corrupt):
+    data = random_arrivals(rng)
+    path = tmp_path / 'test_1.arr'
+    write_arrivals_asc(path, data)
+    lines = path.read_text().splitlines()
+    # 第一个有到达的格点：到达数所在行及其后的第一个到达
+    row = next(i for i, line in enumerate(lines[6:], start=6)
+               if len(line.split()) == 1 and int(line) > 0)
+    if corrupt == 'token':
+        lines[row + 1] = lines[row + 1].replace('E', 'X', 1)
+    elif corrupt == 'count':
+        lines[row] = f"{int(lines[row]) + 1:12d}"
+    else:
+        lines.append(lines[-1])
+    path.write_text('\n'.join(lines) + '\n')
+
+    with pytest.raises(ValueError):
+        read_arrivals_asc(path)
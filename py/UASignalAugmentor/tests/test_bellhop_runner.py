@@ -0,0 +1,135 @@
+"""A3 BellhopRunner：用假计算程序验证批量执行、完成日志与断点续算"""
+# 自带包
+import json
+import sys
+import zipfile
+from pathlib import Path
+# 第三方包
+import pytest
+# 本地包
+from modules.A3_BellhopRunner import BellhopRunner, JOURNAL_NAME
+from modules.A4_ArrivalReader import ArrivalReader
+from utils.env_archive import pack_folder
+from utils.env_manifest import ENV_LIST_NAME
+
+FAKE_BELLHOP = Path(__file__).with_name('fake_bellhop.py')
+FOLDERS = ('Shallow/ENV1/Rr1/envfilefolder', 'Shallow/ENV2/Rr1/envfilefolder')
+FREQS = (100.0, 250.0, 1000.0)
+
+
+def _make_env_folder(folder: Path, freqs) -> None:
+    """写出只含标题行和频率行的环境文件及其列表（假计算程序只读取频率）"""
+    folder.mkdir(parents=True)
+    names = [f'test_{i}' for i in range(1, len(freqs) + 1)]
+    for name, freq in zip(names, freqs):
+        (folder / f'{name}.env').write_text(f"'{name}' ! Title \n{freq:8.2f}  \t \t \t ! Frequency (Hz) \n")
+    (folder / ENV_LIST_NAME).write_text('\n'.join(names) + '\n')
+
+
+@pytest.fixture
+def env_root(tmp_path: Path) -> Path:
+    root = tmp_path / 'env'
+    for rel in FOLDERS:
+        _make_env_folder(root / rel, FREQS)
+    return root
+
+
+def _runner(env_root: Path, **kwargs) -> BellhopRunner:
+    config = {'env_root': str(env_root), 'executable': [sys.executable, str(FAKE_BELLHOP)], 'workers': 2}
+    config.update(kwargs)
+    return BellhopRunner(config)
+
+
+def _journal(env_root: Path):
+    with open(env_root / JOURNAL_NAME, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_runs_all_jobs(env_root):
+    stats = _runner(env_root).process()
+
+    assert stats['total_jobs'] == 6
+    assert (stats['skipped'], stats['success'], stats['failed'], stats['timeout']) == (0, 6, 0, 0)
+    for rel in FOLDERS:
+        for i, freq in enumerate(FREQS, start=1):
+            lines = (env_root / rel / f'test_{i}.arr').read_text().splitlines()
+            assert lines[0] == "'2D'" and float(lines[1]) == pytest.approx(freq)
+    entries = _journal(env_root)
+    assert sorted(e['job'] for e in entries) == sorted(f'{rel}/test_{i}' for rel in FOLDERS for i in (1, 2, 3))
+    assert all(e['status'] == 'ok' for e in entries)
+
+
+def test_resume_after_failure(env_root, monkeypatch):
+    monkeypatch.setenv('FAKE_BELLHOP_FAIL', 'test_2')
+    stats = _runner(env_root).process()
+    assert (stats['success'], stats['failed']) == (4, 2)
+    assert not any((env_root / rel / 'test_2.arr').exists() for rel in FOLDERS)
+    failed = [e for e in _journal(env_root) if e['status'] == 'failed']
+    assert sorted(e['job'] for e in failed) == sorted(f'{rel}/test_2' for rel in FOLDERS)
+    assert all(e['returncode'] == 1 for e in failed)
+
+    # 已完成的任务不再执行：删掉其输出后续算也不会重新生成
+    (env_root / FOLDERS[0] / 'test_1.arr').unlink()
+    monkeypatch.delenv('FAKE_BELLHOP_FAIL')
+    stats = _runner(env_root).process()
+    assert (stats['skipped'], stats['success'], stats['failed']) == (4, 2, 0)
+    assert all((env_root / rel / 'test_2.arr').exists() for rel in FOLDERS)
+    assert not (env_root / FOLDERS[0] / 'test_1.arr').exists()
+
+    stats = _runner(env_root).process()
+    assert (stats['skipped'], stats['success']) == (6, 0)
+
+
+def test_failed_jobs_kept_without_retry(env_root, monkeypatch):
+    monkeypatch.setenv('FAKE_BELLHOP_FAIL', 'test_3')
+    _runner(env_root).process()
+    monkeypatch.delenv('FAKE_BELLHOP_FAIL')
+
+    stats = _runner(env_root, retry_failed=False).process()
+    assert (stats['skipped'], stats['success']) == (6, 0)
+    stats = _runner(env_root).process()
+    assert (stats['skipped'], stats['success']) == (4, 2)
+
+
+def test_resume_with_truncated_journal(env_root):
+    _runner(env_root).process()
+    # 模拟写日志时被中断：最后一行不完整
+    with open(env_root / JOURNAL_NAME, 'a', encoding='utf-8') as f:
+        f.write('{"job": "Shallow/ENV1/Rr1/envf')
+
+    stats = _runner(env_root).process()
+    assert (stats['skipped'], stats['success']) == (6, 0)
+    lines = (env_root / JOURNAL_NAME).read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 7
+
+
+def test_timeout(env_root, monkeypatch):
+    monkeypatch.setenv('FAKE_BELLHOP_SLEEP', '5')
+    stats = _runner(env_root, timeout=0.5).process()
+    assert (stats['success'], stats['timeout']) == (0, 6)
+    assert all(e['status'] == 'timeout' for e in _journal(env_root))
+
+
+def test_packed_folder(env_root):
+    # 复制模式打包：需要模板才能打包
+    folder = env_root / FOLDERS[1]
+    (folder / 'ENV_template.env').write_text((folder / 'test_1.env').read_text())
+    pack_folder(folder)
+
+    stats = _runner(env_root).process()
+    assert (stats['total_jobs'], stats['success']) == (6, 6)
+    # 输出写到归档旁的同名文件夹，临时目录已清理
+    assert sorted(p.name for p in folder.iterdir()) == [f'test_{i}.arr' for i in (1, 2, 3)]
+    assert not any((env_root / '.scratch').iterdir())
+
+
+def test_foreign_archives_skipped(env_root, caplog):
+    with zipfile.ZipFile(env_root / 'other.zip', 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('readme.txt', 'not an environment archive ' * 20)
+    (env_root / 'Shallow' / 'broken.zip').write_bytes(b'not a zip file')
+
+    stats = _runner(env_root).process()
+    assert (stats['total_jobs'], stats['success']) == (6, 6)
+    folders = ArrivalReader({'env_root': str(env_root)}).discover_folders()
+    assert [folder for folder, _ in folders] == [env_root / rel for rel in FOLDERS]
+    assert 'other.zip' in caplog.text and 'broken.zip' in caplog.text
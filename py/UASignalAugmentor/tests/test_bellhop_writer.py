@@ -0,0 +1,36 @@
+"""逐频率反射系数文件：write_reflection_files 与逐频率调用 write_trc/write_brc 一致"""
+# 第三方包
+import pytest
+# 本地包
+from utils.bellhop_writer import write_brc, write_reflection_files, write_trc
+
+# 多层海底在全反射角以下按MATLAB的做法产生NaN后置为1，计算中的RuntimeWarning属预期
+pytestmark = pytest.mark.filterwarnings('ignore::RuntimeWarning')
+
+FREQS = [25.0, 50.0, 100.0, 100.0, 315.5, 1000.0, 4000.0]
+
+
+@pytest.mark.parametrize('base_type', ['IMG', 'D05', 'D40', 'SCS-4'])
+@pytest.mark.parametrize('sea_state_level', [0, 3])
+def test_matches_per_frequency_writers(tmp_path, base_type, sea_state_level):
+    c_surface, ssp_end, alpha_b = 1520.3, 1490.7, 0.05
+    (tmp_path / 'batch').mkdir()
+    (tmp_path / 'single').mkdir()
+    names = [f'test_{i}' for i in range(1, len(FREQS) + 1)]
+
+    write_reflection_files([str(tmp_path / 'batch' / name) for name in names], FREQS,
+                           c_surface, sea_state_level, base_type, ssp_end, alpha_b)
+    for name, freq in zip(names, FREQS):
+        out = str(tmp_path / 'single' / name)
+        write_trc([freq], c_surface, sea_state_level, out)
+        write_brc(base_type, out, [freq], ssp_end, alpha_b)
+
+    for name in names:
+        for ext in ('.trc', '.brc'):
+            batch = (tmp_path / 'batch' / f'{name}{ext}').read_text()
+            assert batch == (tmp_path / 'single' / f'{name}{ext}').read_text(), f'{name}{ext}'
+
+
+def test_rejects_mismatched_names(tmp_path):
+    with pytest.raises(ValueError):
+        write_reflection_files([str(tmp_path / 'test_1')], FREQS[:2], 1520.0, 1, 'D40', 1490.0)
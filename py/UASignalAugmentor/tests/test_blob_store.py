@@ -0,0 +1,169 @@
+"""
+内容寻址存储测试：去重、链接方式及其退化、覆盖已有链接不写穿blob、计数汇总
+"""
+
+# 自带包
+import os
+import shutil
+
+# 第三方包
+import numpy as np
+import pytest
+
+# 本地包
+from utils.blob_store import BlobStore
+from utils.bellhop_writer import write_bty
+
+TEXTS = {'a.bty': b'same\n', 'b.bty': b'same\n', 'c.bty': b'same\n', 'd.trc': b'different\n'}
+
+
+def _fill(store, folder):
+    folder.mkdir(exist_ok=True)
+    for name, data in TEXTS.items():
+        store.write_bytes(folder / name, data)
+
+
+def _tmp_leftovers(folder):
+    return [p.name for p in folder.rglob('*.tmp')]
+
+
+def test_hardlink_dedup(tmp_path):
+    store = BlobStore(tmp_path / 'blobs')
+    _fill(store, tmp_path / 'out')
+    out = tmp_path / 'out'
+
+    # 相同内容只有一个blob，各文件名都是它的硬链接
+    blobs = sorted(p for p in (tmp_path / 'blobs').rglob('*') if p.is_file())
+    assert len(blobs) == 2
+    inode = os.stat(out / 'a.bty').st_ino
+    assert os.stat(out / 'b.bty').st_ino == os.stat(out / 'c.bty').st_ino == inode
+    assert os.stat(out / 'a.bty').st_nlink == 4
+    assert os.stat(out / 'd.trc').st_ino != inode
+    assert {p.name: p.read_bytes() for p in out.iterdir()} == TEXTS
+
+    report = store.report()
+    assert report['files'] == 4
+    assert report['unique_blobs'] == report['new_blobs'] == 2
+    assert report['logical_bytes'] == sum(len(d) for d in TEXTS.values())
+    assert report['bytes_saved'] == 2 * len(b'same\n')
+    assert report['inodes_saved'] == 2
+    assert report['copies'] == 0
+
+    # 再次运行时blob已存在，不重复写入
+    store = BlobStore(tmp_path / 'blobs')
+    _fill(store, tmp_path / 'out2')
+    assert store.report()['new_blobs'] == 0
+    assert os.stat(tmp_path / 'out2' / 'a.bty').st_ino == inode
+
+
+def test_symlink_mode(tmp_path):
+    tree = tmp_path / 'tree'
+    store = BlobStore(tree / 'blobs', link_mode='symlink')
+    _fill(store, tree / 'out')
+    for name, data in TEXTS.items():
+        path = tree / 'out' / name
+        assert path.is_symlink()
+        assert not os.path.isabs(os.readlink(path))
+        assert path.read_bytes() == data
+    # 相对链接随整个目录树移动仍然有效
+    shutil.move(tree, tmp_path / 'moved')
+    assert (tmp_path / 'moved' / 'out' / 'a.bty').read_bytes() == b'same\n'
+    report = store.report()
+    assert report['bytes_saved'] == 2 * len(b'same\n')
+    assert report['inodes_saved'] == 0
+
+
+@pytest.mark.parametrize('link_mode, link_func', [('hardlink', 'link'), ('symlink', 'symlink')])
+def test_link_failure_falls_back_to_copy(tmp_path, monkeypatch, link_mode, link_func):
+    def fail(*args, **kwargs):
+        raise OSError('Invalid cross-device link')
+    monkeypatch.setattr(os, link_func, fail)
+
+    store = BlobStore(tmp_path / 'blobs', link_mode=link_mode)
+    _fill(store, tmp_path / 'out')
+    for name, data in TEXTS.items():
+        path = tmp_path / 'out' / name
+        assert not path.is_symlink()
+        assert os.stat(path).st_nlink == 1
+        assert path.read_bytes() == data
+
+    report = store.report()
+    assert report['copies'] == 4
+    assert report['bytes_saved'] == 0
+    assert report['inodes_saved'] == 0
+    assert _tmp_leftovers(tmp_path) == []
+
+
+def test_copy_mode(tmp_path):
+    store = BlobStore(tmp_path / 'blobs', link_mode='copy')
+    _fill(store, tmp_path / 'out')
+    assert os.stat(tmp_path / 'out' / 'a.bty').st_nlink == 1
+    report = store.report()
+    assert report['copies'] == 4
+    assert report['bytes_saved'] == report['inodes_saved'] == 0
+
+
+def test_overwrite_existing_link_keeps_blob(tmp_path):
+    store = BlobStore(tmp_path / 'blobs')
+    _fill(store, tmp_path / 'out')
+    out = tmp_path / 'out'
+    blob = store.blob_path(store.put_bytes(b'same\n'))
+
+    # 在已有硬链接处物化其他内容：原子替换，不写穿共享的blob
+    store.write_bytes(out / 'a.bty', b'new\n')
+    assert (out / 'a.bty').read_bytes() == b'new\n'
+    assert blob.read_bytes() == b'same\n'
+    assert (out / 'b.bty').read_bytes() == b'same\n'
+
+    # 物化中途出错时目标文件保持原内容
+    def broken(src, dst):
+        open(dst, 'wb').close()
+        raise OSError('disk full')
+    store = BlobStore(tmp_path / 'blobs', link_mode='copy')
+    digest = store.put_bytes(b'other\n')
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(shutil, 'copyfile', broken)
+        with pytest.raises(OSError):
+            store.materialize(digest, out / 'b.bty')
+    assert (out / 'b.bty').read_bytes() == b'same\n'
+    assert _tmp_leftovers(tmp_path) == []
+    assert blob.read_bytes() == b'same\n'
+
+
+@pytest.mark.parametrize('link_mode', ['hardlink', 'symlink'])
+def test_direct_write_over_link_keeps_blob(tmp_path, link_mode):
+    # 不经存储直接写出时（bellhop_writer._save_text），先删除已有链接再写
+    store = BlobStore(tmp_path / 'blobs', link_mode=link_mode)
+    out = tmp_path / 'out'
+    bathm = {'r': np.array([0.0, 10.0]), 'd': np.array([100.0, 100.0])}
+    out.mkdir()
+    write_bty(str(out / 'test_1'), "'LS'", bathm, store)
+    write_bty(str(out / 'test_2'), "'LS'", bathm, store)
+    shared = (out / 'test_2.bty').read_bytes()
+
+    write_bty(str(out / 'test_1'), "'LS'", {'r': bathm['r'], 'd': np.array([50.0, 50.0])})
+    assert not (out / 'test_1.bty').is_symlink()
+    assert os.stat(out / 'test_1.bty').st_nlink == 1
+    assert b'50.000000' in (out / 'test_1.bty').read_bytes()
+    assert (out / 'test_2.bty').read_bytes() == shared
+    assert store.blob_path(store.put_bytes(shared)).read_bytes() == shared
+
+
+def test_merge_counts(tmp_path):
+    # 工作进程各自计数，主进程汇总后与单实例的报告一致
+    single = BlobStore(tmp_path / 'blobs')
+    for folder in ('w1', 'w2'):
+        _fill(single, tmp_path / f'single_{folder}')
+
+    main = BlobStore(tmp_path / 'blobs2')
+    for folder in ('w1', 'w2'):
+        worker = BlobStore(tmp_path / 'blobs2')
+        _fill(worker, tmp_path / folder)
+        counts = worker.take_counts()
+        assert worker.report()['files'] == 0
+        main.merge_counts(counts)
+
+    merged, expected = main.report(), single.report()
+    assert merged == expected
+    assert merged['files'] == 8
+    assert merged['unique_blobs'] == 2
@@ -0,0 +1,107 @@
+"""
+环境文件打包测试：打包 → EnvArchive读取 → unpack_archive还原，相同内容只存一份
+"""
+
+# 自带包
+import os
+import zipfile
+
+# 第三方包
+import pytest
+
+# 本地包
+from utils.blob_store import BlobStore
+from utils.env_archive import EnvArchive, archive_path, pack_folder, unpack_archive
+
+AUX_TEXT = "2\n0.0 1.0 180.0\n90.0 1.0 180.0\n"
+
+
+def _make_folder(tmp_path):
+    """envfilefolder：模板、清单、BlobStore硬链接的辅助文件、内容各异的逐频率文件"""
+    folder = tmp_path / 'Shallow' / 'ENV1' / 'Rr1' / 'envfilefolder'
+    folder.mkdir(parents=True)
+    store = BlobStore(tmp_path / 'blobs', link_mode='hardlink')
+    files = {'ENV_template.env': "'template'\n", 'env_files_list.txt': "test_1\ntest_2\ntest_3\n"}
+    for i in (1, 2, 3):
+        files[f'test_{i}.env'] = f"'test_{i}'\n{100 * i:.1f}\n"
+        for ext in ('.bty', '.trc', '.brc'):
+            files[f'test_{i}{ext}'] = AUX_TEXT
+            store.write_bytes(folder / f'test_{i}{ext}', AUX_TEXT.encode())
+    for name, text in files.items():
+        if not (folder / name).exists():
+            (folder / name).write_bytes(text.encode())
+    return folder, {name: text.encode() for name, text in files.items()}
+
+
+def test_pack_read_unpack_round_trip(tmp_path):
+    folder, files = _make_folder(tmp_path)
+    assert os.stat(folder / 'test_1.trc').st_nlink > 1
+
+    archive = pack_folder(folder)
+    assert archive == archive_path(folder)
+    assert not folder.exists()
+
+    # 9个内容相同的辅助文件只存一份
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.testzip() is None
+        stored = [name for name in zf.namelist() if not name.startswith('.')]
+    assert len(stored) == len(files) - 8
+    assert archive.stat().st_size < sum(len(data) for data in files.values()) + 2048
+
+    with EnvArchive(archive) as env_archive:
+        assert env_archive.names() == sorted(files)
+        assert len(env_archive) == len(files)
+        for name, data in files.items():
+            assert env_archive.read(name) == data
+        assert 'test_4.env' not in env_archive
+        with pytest.raises(KeyError):
+            env_archive.read('test_4.env')
+
+    restored = unpack_archive(archive)
+    assert restored == folder
+    assert not archive.exists()
+    assert {p.name: p.read_bytes() for p in folder.iterdir()} == files
+    # 还原的文件各自独立，修改一个不影响其他
+    (folder / 'test_1.trc').write_text('changed\n')
+    assert (folder / 'test_2.trc').read_bytes() == files['test_2.trc']
+
+
+@pytest.mark.parametrize('overwrite', [False, True])
+def test_unpack_merges_into_existing_folder(tmp_path, overwrite):
+    folder, files = _make_folder(tmp_path)
+    archive = pack_folder(folder)
+
+    # 模板重新生成后文件夹与归档同时存在
+    folder.mkdir()
+    (folder / 'ENV_template.env').write_text("'regenerated'\n")
+    unpack_archive(archive, remove=False, overwrite=overwrite)
+    assert archive.exists()
+
+    expected = dict(files)
+    if not overwrite:
+        expected['ENV_template.env'] = b"'regenerated'\n"
+    assert {p.name: p.read_bytes() for p in folder.iterdir()} == expected
+
+
+def test_repack_after_merge_keeps_replicated_files(tmp_path):
+    folder, files = _make_folder(tmp_path)
+    archive = pack_folder(folder)
+    folder.mkdir()
+    (folder / 'ENV_template.env').write_text("'regenerated'\n")
+
+    # A2 replicate()的顺序：合并还原 → 复制 → 重新打包
+    unpack_archive(archive, overwrite=False)
+    pack_folder(folder)
+    with EnvArchive(archive) as env_archive:
+        assert env_archive.read('ENV_template.env') == b"'regenerated'\n"
+        assert env_archive.read('test_3.brc') == files['test_3.brc']
+        assert env_archive.names() == sorted(files)
+
+
+def test_pack_refuses_folder_without_template(tmp_path):
+    folder, _ = _make_folder(tmp_path)
+    (folder / 'ENV_template.env').unlink()
+    with pytest.raises(ValueError, match='template'):
+        pack_folder(folder)
+    assert folder.exists()
+    assert not archive_path(folder).exists()
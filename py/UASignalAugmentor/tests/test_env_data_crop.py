@@ -0,0 +1,100 @@
+"""
+环境数据裁剪测试：按坐标组范围裁剪的延迟加载与一次性读取完整数据的输出逐字节一致，
+经度越过±180°时保留完整经度轴，裁剪范围的计算
+"""
+
+# 自带包
+import logging
+
+# 第三方包
+import numpy as np
+import pytest
+
+# 本地包
+from modules.A2_EnvGenerator import EnvGenerator
+from utils.env_data import _crop_slices, region_bbox
+from .synthetic_env import (
+    COORDINATE_GROUPS, LAT, acoustic_config, assert_same_tree, env_config, write_env_dataset)
+
+DATELINE_GROUPS = [
+    {'group_id': 'ENV1', 'lat': 21.0, 'lon': 179.95, 'zone_type': 'Shallow',
+     'receive_ranges': [5, 12], 'receive_depths': [10]},
+    {'group_id': 'ENV2', 'lat': 21.5, 'lon': -179.9, 'zone_type': 'Deep',
+     'receive_ranges': [6], 'receive_depths': [10]},
+]
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    return write_env_dataset(tmp_path_factory.mktemp('env_data'))
+
+
+@pytest.fixture(scope='module')
+def global_dataset(tmp_path_factory):
+    """经度轴为完整的 [-180, 180]"""
+    return write_env_dataset(tmp_path_factory.mktemp('global_data'), lon=np.arange(-180.0, 180.001, 0.5))
+
+
+def _generate(dataset, out, groups, env_overrides, **acoustic_overrides):
+    generator = EnvGenerator(env_config(dataset, **env_overrides), groups,
+                             acoustic_config(out, **acoustic_overrides))
+    stats = generator.generate_template_envs()
+    assert stats['failed'] == 0
+    return generator
+
+
+@pytest.mark.parametrize('time_index', [1, 14, [3, 17]])
+def test_cropped_matches_full(dataset, tmp_path, time_index):
+    _generate(dataset, tmp_path / 'full', COORDINATE_GROUPS, {'lazy_load': False, 'time_index': time_index})
+    generator = _generate(dataset, tmp_path / 'cropped', COORDINATE_GROUPS,
+                          {'crop_margin': 0.3, 'time_index': time_index})
+
+    # 确实裁剪了（含完整网格上NaN比例不同的深层），输出与完整数据一致
+    assert generator.woa23['Lat'].size < LAT.size
+    assert generator.etopo['Altitude'].size < LAT.size ** 2
+    assert_same_tree(tmp_path / 'cropped', tmp_path / 'full')
+
+
+@pytest.mark.parametrize('groups', [DATELINE_GROUPS[:1], DATELINE_GROUPS], ids=['east', 'both_sides'])
+def test_dateline_keeps_full_longitude(global_dataset, tmp_path, caplog, groups):
+    _generate(global_dataset, tmp_path / 'full', groups, {'lazy_load': False}, azimuth=[90, 270])
+    with caplog.at_level(logging.INFO, logger='utils.env_data'):
+        generator = _generate(global_dataset, tmp_path / 'cropped', groups, {'crop_margin': 0.3},
+                              azimuth=[90, 270])
+
+    # 测线越过180°：纬度照常裁剪，经度轴不裁剪
+    assert generator.woa23['Lat'].size < LAT.size
+    assert generator.woa23['Lon'].size == generator.etopo['Lon'].size == 721
+    if len(groups) == 1:
+        assert 'exceeds data axis' in caplog.text
+    assert_same_tree(tmp_path / 'cropped', tmp_path / 'full')
+
+
+def test_region_bbox():
+    lat_min, lat_max, lon_min, lon_max = region_bbox([(21.0, 112.0, 12.0), (20.6, 112.8, 6.0)], 0.5)
+    # 测线在任意方位角上的端点都在范围内
+    for azimuth in np.radians(np.arange(0, 360, 15)):
+        lat = 21.0 + 12.0 / 111 * np.cos(azimuth)
+        lon = 112.0 + 12.0 / (111 * np.cos(np.radians(21.0))) * np.sin(azimuth)
+        assert lat_min + 0.5 <= lat + 1e-9 and lat - 1e-9 <= lat_max - 0.5
+        assert lon_min + 0.5 <= lon + 1e-9 and lon - 1e-9 <= lon_max - 0.5
+    assert lat_min == pytest.approx(20.6 - 6.0 / 111 - 0.5)
+
+    # 越过极点或覆盖一整圈时不限制经度
+    assert region_bbox([(89.95, 10.0, 20.0)], 0.1)[2:] == (-np.inf, np.inf)
+    assert region_bbox([(0.0, -179.9, 1.0), (0.0, 179.9, 1.0)], 180.0)[2:] == (-np.inf, np.inf)
+    with pytest.raises(ValueError):
+        region_bbox([], 0.5)
+
+
+def test_crop_slices():
+    lat = np.arange(20.0, 24.001, 0.25)
+    lon = np.arange(-180.0, 180.001, 0.5)
+    lat_sl, lon_sl = _crop_slices(lat, lon, (21.1, 21.6, 100.2, 100.7))
+    # 两侧各多保留一个格点
+    assert (lat[lat_sl][0], lat[lat_sl][-1]) == (21.0, 21.75)
+    assert (lon[lon_sl][0], lon[lon_sl][-1]) == (100.0, 101.0)
+
+    for bbox in [(21.1, 21.6, 179.5, 180.3), (21.1, 21.6, -180.2, -179.0), (21.1, 21.6, -np.inf, np.inf)]:
+        assert _crop_slices(lat, lon, bbox)[1] == slice(None)
+    assert _crop_slices(lat, lon, None) == (slice(None), slice(None))
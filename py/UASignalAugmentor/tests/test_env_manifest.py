@@ -0,0 +1,116 @@
+"""
+虚拟复制测试：VirtualEnvSet/PackedEnvSet渲染出的文件与复制模式逐频率写出的文件逐字节一致
+（文件夹与归档两种输出方式，沿用模板或逐频率生成反射系数文件），公共基类为抽象类
+"""
+
+# 第三方包
+import numpy as np
+import pytest
+
+# 本地包
+from modules.A2_EnvGenerator import EnvGenerator
+from utils.env_manifest import (
+    ENV_LIST_NAME, AUX_EXTS, PackedEnvSet, VirtualEnvSet, _EnvSetBase, find_packed_folders,
+    find_virtual_folders)
+from utils.io_utils import save_pickle
+from .synthetic_env import COORDINATE_GROUPS, acoustic_config, env_config, write_env_dataset
+
+FREQUENCIES = np.array([63.5, 125.0, 500.0, 1234.5])
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    return write_env_dataset(tmp_path_factory.mktemp('env_data'))
+
+
+@pytest.fixture(scope='module')
+def freq_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('freq') / 'Analy_freq_all.pkl'
+    save_pickle({'frequencies': FREQUENCIES}, path)
+    return path
+
+
+def _replicate(dataset, freq_file, out, **overrides):
+    """生成模板并按频率复制，返回生成器"""
+    generator = EnvGenerator(env_config(dataset), COORDINATE_GROUPS, acoustic_config(out, **overrides))
+    assert generator.generate_template_envs()['failed'] == 0
+    stats = generator.replicate_by_frequencies(str(freq_file))
+    assert stats['failed'] == 0
+    assert stats['total_files'] == len(FREQUENCIES) * stats['total_folders']
+    return generator
+
+
+def _copy_mode_files(folder, i):
+    """复制模式第i个频率的.env及辅助文件 {扩展名: 内容}"""
+    base = f'test_{i}'
+    return {ext: (folder / f'{base}{ext}').read_bytes()
+            for ext in ('.env', *AUX_EXTS) if (folder / f'{base}{ext}').exists()}
+
+
+def _assert_renders_copy_mode(env_set, copy_folder, tmp_path):
+    names = (copy_folder / ENV_LIST_NAME).read_text().split()
+    assert env_set.names() == names
+    assert len(env_set) == len(FREQUENCIES)
+    for i in range(1, len(FREQUENCIES) + 1):
+        expected = _copy_mode_files(copy_folder, i)
+        assert set(expected) == {'.env', *AUX_EXTS}
+        scratch = tmp_path / 'scratch'
+        with env_set.materialized(i, scratch) as base:
+            assert base.name == names[i - 1]
+            rendered = {p.suffix: p.read_bytes() for p in scratch.iterdir()}
+            assert rendered == expected
+        assert list(scratch.iterdir()) == []
+    with pytest.raises(IndexError):
+        env_set.render(len(FREQUENCIES) + 1, tmp_path / 'scratch')
+
+
+@pytest.mark.parametrize('reflection_per_frequency', [False, True])
+@pytest.mark.parametrize('output_backend', ['files', 'archive'])
+def test_virtual_render_matches_copy(dataset, freq_file, tmp_path, reflection_per_frequency, output_backend):
+    options = {'reflection_per_frequency': reflection_per_frequency}
+    copy = _replicate(dataset, freq_file, tmp_path / 'copy', **options)
+    _replicate(dataset, freq_file, tmp_path / 'virtual', replicate_mode='virtual',
+               output_backend=output_backend, **options)
+
+    found = find_virtual_folders(tmp_path / 'virtual')
+    folders = copy._replicate_folders()
+    assert len(found) == len(folders) == 5
+    assert all(p.suffix == ('.zip' if output_backend == 'archive' else '') for p in found)
+    for path in found:
+        env_set = VirtualEnvSet(path)
+        copy_folder = tmp_path / 'copy' / env_set.folder.relative_to(tmp_path / 'virtual')
+        assert env_set.frequencies == FREQUENCIES.tolist()
+        _assert_renders_copy_mode(env_set, copy_folder, tmp_path)
+
+        # 逐频率反射系数与复制模式的.trc/.brc一致
+        trc, brc = env_set.reflection_texts()
+        assert [t.encode() for t in trc] == [(copy_folder / f'{n}.trc').read_bytes() for n in env_set.names()]
+        assert [t.encode() for t in brc] == [(copy_folder / f'{n}.brc').read_bytes() for n in env_set.names()]
+
+
+@pytest.mark.parametrize('reflection_per_frequency', [False, True])
+def test_packed_render_matches_copy(dataset, freq_file, tmp_path, reflection_per_frequency):
+    options = {'reflection_per_frequency': reflection_per_frequency}
+    _replicate(dataset, freq_file, tmp_path / 'copy', **options)
+    _replicate(dataset, freq_file, tmp_path / 'packed', output_backend='archive', **options)
+
+    found = find_packed_folders(tmp_path / 'packed')
+    assert len(found) == 5
+    assert find_virtual_folders(tmp_path / 'packed') == []
+    for path in found:
+        env_set = PackedEnvSet(path)
+        copy_folder = tmp_path / 'copy' / env_set.folder.relative_to(tmp_path / 'packed')
+        assert env_set.frequencies == FREQUENCIES.tolist()
+        _assert_renders_copy_mode(env_set, copy_folder, tmp_path)
+
+
+def test_env_set_base_is_abstract():
+    # 子类必须实现render/release，未实现时实例化即报错，而不是在派发任务时才失败
+    class Incomplete(_EnvSetBase):
+        def render(self, i, scratch_dir):
+            return scratch_dir
+
+    with pytest.raises(TypeError):
+        _EnvSetBase()
+    with pytest.raises(TypeError):
+        Incomplete()
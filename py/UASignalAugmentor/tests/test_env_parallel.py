@@ -0,0 +1,76 @@
+"""
+A2并行生成测试：共享内存中嵌套数据的往返，进程池输出与串行生成逐字节一致
+"""
+
+# 自带包
+from multiprocessing import shared_memory
+
+# 第三方包
+import numpy as np
+import pytest
+
+# 本地包
+from modules.A2_EnvGenerator import EnvGenerator
+from utils.shared_data import attach_nested, release_shared, share_nested
+from .synthetic_env import (
+    COORDINATE_GROUPS, acoustic_config, assert_same_tree, env_config, write_env_dataset)
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    return write_env_dataset(tmp_path_factory.mktemp('env_data'))
+
+
+def test_share_attach_round_trip(rng):
+    grid = rng.standard_normal((4, 5, 3))
+    data = {
+        'Lat': np.arange(4.0).reshape(-1, 1),
+        'Altitude': np.asfortranarray(rng.standard_normal((4, 5))),
+        'Data': [{'Temp': grid, 'Sal': grid.astype(np.float32), 'Depth': np.arange(3)}, None, (grid, 'annual')],
+        'empty': np.empty(0),
+        'name': 'woa23',
+    }
+    block, spec = share_nested(data)
+    try:
+        shared, handle = attach_nested(spec)
+        np.testing.assert_array_equal(shared['Lat'], data['Lat'])
+        np.testing.assert_array_equal(shared['Altitude'], data['Altitude'])
+        assert shared['Altitude'].flags.f_contiguous
+        assert shared['Data'][0]['Sal'].dtype == np.float32
+        assert shared['Data'][0]['Depth'].dtype == data['Data'][0]['Depth'].dtype
+        np.testing.assert_array_equal(shared['Data'][2][0], grid)
+        assert shared['Data'][1] is None and shared['Data'][2][1] == 'annual'
+        assert shared['empty'].size == 0 and shared['name'] == 'woa23'
+
+        # 同一数组只存一份，工作进程得到只读视图
+        assert spec['data']['Data'][0]['Temp'][1] == spec['data']['Data'][2][0][1]
+        with pytest.raises(ValueError):
+            shared['Lat'][0, 0] = 1.0
+        del shared
+        handle.close()
+    finally:
+        release_shared(block)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=spec['name'])
+
+
+def _generate(dataset, out, workers, env_overrides, acoustic_overrides):
+    generator = EnvGenerator(env_config(dataset, **env_overrides), COORDINATE_GROUPS,
+                             acoustic_config(out, workers=workers, **acoustic_overrides))
+    stats = generator.generate_template_envs()
+    stats['section_cache'] = (generator.section_cache.hits, generator.section_cache.misses)
+    return stats
+
+
+@pytest.mark.parametrize('env_overrides, acoustic_overrides', [
+    ({'lazy_load': False}, {}),
+    ({'crop_margin': 0.3, 'time_index': [1, 14]}, {'azimuth': [0, 120]}),
+    ({'crop_margin': 0.3}, {'aux_store': 'hardlink'}),
+])
+def test_parallel_matches_serial(dataset, tmp_path, env_overrides, acoustic_overrides):
+    serial = _generate(dataset, tmp_path / 'serial', 1, env_overrides, acoustic_overrides)
+    parallel = _generate(dataset, tmp_path / 'parallel', 2, env_overrides, acoustic_overrides)
+    assert serial['failed'] == 0
+    # 统计信息（含工作进程汇总的缓存与辅助文件存储计数）与串行一致
+    assert parallel == serial
+    assert_same_tree(tmp_path / 'parallel', tmp_path / 'serial', exclude=['.aux_store'])
@@ -0,0 +1,71 @@
+"""
+A3并行复制测试：线程池复制与串行复制的输出和统计信息一致
+"""
+
+# 自带包
+import os
+
+# 第三方包
+import numpy as np
+import pytest
+
+# 本地包
+from modules.A2_EnvGenerator import EnvGenerator
+from utils.io_utils import save_pickle
+from .synthetic_env import (
+    BELLHOP_PARAMS, COORDINATE_GROUPS, acoustic_config, assert_same_tree, env_config, write_env_dataset)
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    return write_env_dataset(tmp_path_factory.mktemp('env_data'))
+
+
+@pytest.fixture(scope='module')
+def freq_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('freq') / 'Analy_freq_reduced.pkl'
+    save_pickle({'frequencies': np.round(np.geomspace(20.0, 4000.0, 25), 1)}, path)
+    return path
+
+
+def _replicate(dataset, freq_file, out, workers, overrides):
+    config = acoustic_config(out, azimuth=[0, 180], replicate_workers=workers, **overrides)
+    generator = EnvGenerator(env_config(dataset), COORDINATE_GROUPS, config)
+    generator.generate_template_envs()
+    return generator.replicate_by_frequencies(str(freq_file))
+
+
+@pytest.mark.parametrize('overrides', [
+    {},
+    {'reflection_per_frequency': True},
+    {'aux_store': 'hardlink'},
+    {'aux_store': 'symlink', 'output_backend': 'archive'},
+    {'replicate_mode': 'virtual', 'reflection_per_frequency': True},
+], ids=['copy', 'reflection', 'aux_store', 'archive', 'virtual'])
+def test_threaded_matches_serial(dataset, freq_file, tmp_path, overrides):
+    serial = _replicate(dataset, freq_file, tmp_path / 'serial', 1, overrides)
+    threaded = _replicate(dataset, freq_file, tmp_path / 'threaded', 4, overrides)
+    assert serial['failed'] == 0
+    assert serial['total_folders'] == 10
+    assert threaded == serial
+    assert_same_tree(tmp_path / 'threaded', tmp_path / 'serial', exclude=['.aux_store'])
+
+    if overrides.get('aux_store') == 'hardlink':
+        # 各线程物化的辅助文件都链接到同一份blob
+        folder = next((tmp_path / 'threaded').rglob('envfilefolder'))
+        inodes = {os.stat(p).st_ino for p in folder.glob('test_*.bty')}
+        assert len(inodes) == 1
+
+
+@pytest.mark.parametrize('overrides, copied', [({}, True), ({'reflection_per_frequency': True}, False)])
+def test_reflection_files_default_to_template(dataset, freq_file, tmp_path, overrides, copied):
+    # 默认沿用模板频率下的.trc/.brc，与未引入逐频率反射系数之前的输出一致
+    # （海况和海底类型取反射系数随频率变化的值）
+    bellhop_params = {**BELLHOP_PARAMS, 'sea_state_level': 2, 'base_type': 'D40'}
+    _replicate(dataset, freq_file, tmp_path / 'out', 1, {'bellhop_params': bellhop_params, **overrides})
+    folder = next((tmp_path / 'out').rglob('envfilefolder'))
+    template = next(folder.glob('ENV_*.env')).with_suffix('')
+    for ext in ('.trc', '.brc'):
+        expected = template.with_name(template.name + ext).read_bytes()
+        same = [(folder / f'test_{i}{ext}').read_bytes() == expected for i in (1, 25)]
+        assert same == [copied, copied]
@@ -0,0 +1,123 @@
+"""
+环境剖面缓存测试：跨运行复用的输出与不使用缓存时一致，并发写入互不覆盖，
+损坏条目重新计算，数据源/裁剪范围变化时不复用
+"""
+
+# 自带包
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 第三方包
+import numpy as np
+import pytest
+
+# 本地包
+from modules.A2_EnvGenerator import EnvGenerator
+from utils.env_cache import EnvSectionCache, data_source_signature
+from .synthetic_env import (
+    COORDINATE_GROUPS, acoustic_config, assert_same_tree, env_config, write_env_dataset)
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    return write_env_dataset(tmp_path_factory.mktemp('env_data'))
+
+
+@pytest.fixture(scope='module')
+def baseline(dataset, tmp_path_factory):
+    """不使用磁盘缓存、一次性读取完整数据的输出"""
+    out = tmp_path_factory.mktemp('baseline')
+    EnvGenerator(env_config(dataset, lazy_load=False), COORDINATE_GROUPS,
+                 acoustic_config(out)).generate_template_envs()
+    return out
+
+
+def _generate(dataset, out, cache_dir, **overrides):
+    generator = EnvGenerator(env_config(dataset, section_cache_dir=str(cache_dir), **overrides),
+                             COORDINATE_GROUPS, acoustic_config(out))
+    stats = generator.generate_template_envs()
+    assert stats['failed'] == 0
+    return generator.section_cache
+
+
+def _entries(cache_dir):
+    return sorted(cache_dir.glob('*/*.pkl'))
+
+
+def test_reuse_across_runs(dataset, baseline, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    first = _generate(dataset, tmp_path / 'run1', cache_dir)
+    assert (first.hits, first.misses) == (0, len(COORDINATE_GROUPS))
+    assert len(_entries(cache_dir)) == len(COORDINATE_GROUPS)
+    assert_same_tree(tmp_path / 'run1', baseline)
+
+    # 第二次运行全部命中磁盘缓存，输出逐字节相同
+    second = _generate(dataset, tmp_path / 'run2', cache_dir)
+    assert (second.hits, second.misses) == (len(COORDINATE_GROUPS), 0)
+    assert_same_tree(tmp_path / 'run2', baseline)
+
+
+def test_corrupt_entry_is_recomputed(dataset, baseline, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    _generate(dataset, tmp_path / 'run1', cache_dir)
+    _entries(cache_dir)[0].write_bytes(b'truncated')
+
+    cache = _generate(dataset, tmp_path / 'run2', cache_dir)
+    assert (cache.hits, cache.misses) == (len(COORDINATE_GROUPS) - 1, 1)
+    assert len(_entries(cache_dir)) == len(COORDINATE_GROUPS)
+    assert_same_tree(tmp_path / 'run2', baseline)
+
+
+def test_source_change_invalidates(dataset, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    _generate(dataset, tmp_path / 'run1', cache_dir)
+
+    # 裁剪范围计入签名：开启裁剪后不复用未裁剪时的剖面
+    cache = _generate(dataset, tmp_path / 'run2', cache_dir, crop_margin=0.3)
+    assert cache.hits == 0
+    cache = _generate(dataset, tmp_path / 'run3', cache_dir, crop_margin=0.3)
+    assert cache.misses == 0
+    cache = _generate(dataset, tmp_path / 'run4', cache_dir, crop_margin=0.5)
+    assert cache.hits == 0
+
+
+def test_data_file_change_invalidates(tmp_path):
+    dataset = write_env_dataset(tmp_path / 'data')
+    cache_dir = tmp_path / 'cache'
+    _generate(dataset, tmp_path / 'run1', cache_dir)
+    signature = data_source_signature(dataset)
+
+    # WOA23文件修改后签名变化，不复用旧剖面
+    woa_file = tmp_path / 'data' / 'woa23' / 'woa23_01.mat'
+    st = os.stat(woa_file)
+    os.utime(woa_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert data_source_signature(dataset) != signature
+    cache = _generate(dataset, tmp_path / 'run2', cache_dir)
+    assert cache.hits == 0
+
+
+def test_concurrent_put_same_key(dataset, tmp_path):
+    # 多个线程（如A2并行生成与其他运行共用缓存目录）同时写同一条目
+    cache_dir = tmp_path / 'cache'
+    source = data_source_signature(dataset)
+    caches = [EnvSectionCache(cache_dir, source) for _ in range(8)]
+    key = caches[0].key(21.0, 112.0, 45.0, 12.0, 13, 1)
+    section = (np.linspace(50, 120, 13), np.array([[0.0, 1540.0], [114.0, 1518.0]]),
+               {'z': np.array([0.0, 114.0]), 'c': np.full((2, 13), 1530.0)})
+    barrier = threading.Barrier(len(caches))
+
+    def put(cache):
+        barrier.wait()
+        for _ in range(20):
+            cache.put(key, *section)
+
+    with ThreadPoolExecutor(max_workers=len(caches)) as executor:
+        list(executor.map(put, caches))
+
+    assert [p.name for p in cache_dir.rglob('*.tmp')] == []
+    assert len(_entries(cache_dir)) == 1
+    sea_depth, ssp_raw, SSProf = EnvSectionCache(cache_dir, source).get(key)
+    np.testing.assert_array_equal(sea_depth, section[0])
+    np.testing.assert_array_equal(ssp_raw, section[1])
+    np.testing.assert_array_equal(SSProf['c'], section[2]['c'])
@@ -0,0 +1,98 @@
+"""
+方位角扫描与多季节生成测试：配置解析，每棵目录树与单方位角/单时间索引的运行逐字节一致，
+季节间共用的.bty硬链接，目录树的发现
+"""
+
+# 自带包
+import os
+
+# 第三方包
+import pytest
+
+# 本地包
+from modules.A2_EnvGenerator import EnvGenerator, _parse_azimuths
+from .synthetic_env import (
+    COORDINATE_GROUPS, acoustic_config, assert_same_tree, env_config, write_env_dataset)
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    return write_env_dataset(tmp_path_factory.mktemp('env_data'))
+
+
+def _generate(dataset, out, env_overrides=None, **acoustic_overrides):
+    generator = EnvGenerator(env_config(dataset, **(env_overrides or {})), COORDINATE_GROUPS,
+                             acoustic_config(out, **acoustic_overrides))
+    stats = generator.generate_template_envs()
+    assert stats['failed'] == 0
+    return generator, stats
+
+
+@pytest.mark.parametrize('azimuth, expected', [
+    (45, [45]),
+    (12.5, [12.5]),
+    ([0, 90, 270], [0, 90, 270]),
+    ({'start': 0, 'stop': 360, 'step': 90}, [0.0, 90.0, 180.0, 270.0]),
+    ({'start': 0, 'stop': 1, 'step': 0.1}, [round(0.1 * k, 1) for k in range(10)]),
+    ({'start': 10, 'stop': 13}, [10.0, 11.0, 12.0]),
+])
+def test_parse_azimuths(azimuth, expected):
+    # 范围不含stop，浮点步长不因舍入多出或少一个方位角
+    assert _parse_azimuths(azimuth) == expected
+
+
+@pytest.mark.parametrize('azimuth', [
+    {'start': 0, 'stop': 10, 'step': 0}, {'start': 0, 'stop': 10, 'step': -1}, {'start': 5, 'stop': 5}, []])
+def test_parse_azimuths_rejects(azimuth):
+    with pytest.raises(ValueError):
+        _parse_azimuths(azimuth)
+
+
+def test_azimuth_sweep_matches_single_runs(dataset, tmp_path):
+    generator, stats = _generate(dataset, tmp_path / 'sweep', azimuth={'start': 0, 'stop': 360, 'step': 120})
+    assert generator.azimuths == [0.0, 120.0, 240.0]
+    assert stats['total_files'] == 3 * sum(len(g['receive_ranges']) for g in COORDINATE_GROUPS)
+    assert sorted(p.name for p in (tmp_path / 'sweep').iterdir()) == ['Az0', 'Az120', 'Az240']
+
+    for azimuth in generator.azimuths:
+        _generate(dataset, tmp_path / f'single_{azimuth:g}', azimuth=azimuth)
+        assert_same_tree(tmp_path / 'sweep' / f'Az{azimuth:g}', tmp_path / f'single_{azimuth:g}')
+
+    # 扫描结果的各目录树都参与A3复制
+    assert len(generator._replicate_folders()) == stats['total_files']
+
+
+def test_season_trees_match_single_runs(dataset, tmp_path):
+    generator, stats = _generate(dataset, tmp_path / 'seasons', {'time_index': [1, 13, 17]}, azimuth=[30, 200])
+    assert stats['total_files'] == 6 * sum(len(g['receive_ranges']) for g in COORDINATE_GROUPS)
+    assert sorted(p.name for p in (tmp_path / 'seasons').iterdir()) == ['T01', 'T13', 'T17']
+
+    for time_idx in (1, 13, 17):
+        for azimuth in (30, 200):
+            single = tmp_path / f'single_T{time_idx}_{azimuth}'
+            _generate(dataset, single, {'time_index': time_idx}, azimuth=azimuth)
+            assert_same_tree(tmp_path / 'seasons' / f'T{time_idx:02d}' / f'Az{azimuth}', single)
+
+    # 各季节的.bty是第一个季节写出的文件的硬链接
+    for bty in (tmp_path / 'seasons' / 'T01').rglob('*.bty'):
+        relpath = bty.relative_to(tmp_path / 'seasons' / 'T01')
+        linked = [tmp_path / 'seasons' / t / relpath for t in ('T13', 'T17')]
+        assert all(os.path.samefile(bty, p) for p in linked)
+        assert os.stat(bty).st_nlink == 3
+    # 季节变化的文件各自独立
+    env = next((tmp_path / 'seasons' / 'T01').rglob('*.env'))
+    assert not os.path.samefile(env, tmp_path / 'seasons' / 'T13' / env.relative_to(tmp_path / 'seasons' / 'T01'))
+
+
+def test_output_roots(dataset, tmp_path):
+    out = tmp_path / 'out'
+    generator, stats = _generate(dataset, out, {'time_index': [2, 5]}, azimuth=[0, 90])
+    # output_path下同时有zone目录Transition，不作为季节目录树
+    (out / 'Transition' / 'ENV9' / 'Rr1' / 'envfilefolder').mkdir(parents=True)
+    (out / 'Tmp').mkdir()
+
+    roots = [p.relative_to(out).as_posix() for p in generator._output_roots()]
+    assert roots == ['.', 'T02', 'T02/Az0', 'T02/Az90', 'T05', 'T05/Az0', 'T05/Az90']
+    folders = generator._replicate_folders()
+    assert len(folders) == stats['total_files'] + 1
+    assert sum(f.parts[-3] == 'ENV9' for f in folders) == 1
@@ -0,0 +1,105 @@
+"""
+频率倒排索引测试：分段写出 + 归并得到的索引与一次性排序一致，区间查询的端点精确
+"""
+
+# 自带包
+from pathlib import Path
+
+# 第三方包
+import numpy as np
+import pytest
+
+# 本地包
+from utils.freq_index import FreqIndexWriter, FrequencyIndex, build_postings
+
+PRECISION = 1
+
+
+def _random_segments(rng, n_segments):
+    """随机各段 (freq, amp)，频率已按精度取整，含空段"""
+    segments = []
+    for _ in range(n_segments):
+        n = int(rng.integers(0, 12))
+        freq = np.round(rng.uniform(99.0, 101.0, n), PRECISION)
+        segments.append((freq, rng.uniform(0.0, 1.0, n)))
+    return segments
+
+
+def _reference(corpus):
+    """全部记录在内存中拼接后稳定排序的结果"""
+    postings = [build_postings(segments, PRECISION) for segments in corpus]
+    bins = np.concatenate([p['bins'] for p in postings])
+    file_ids = np.repeat(np.arange(len(postings)), [len(p['bins']) for p in postings])
+    order = np.argsort(bins, kind='stable')
+    return {
+        'bins': bins[order],
+        'file_ids': file_ids[order],
+        'segments': np.concatenate([p['segments'] for p in postings])[order],
+        'amp': np.concatenate([p['amp'] for p in postings])[order],
+    }
+
+
+def _write_index(tmp_path: Path, corpus, **kwargs) -> FrequencyIndex:
+    writer = FreqIndexWriter(PRECISION, spill_dir=tmp_path / 'index', **kwargs)
+    for i, segments in enumerate(corpus):
+        writer.add(f'ship_{i}.wav', 'ClassA', 'ClassA.shard', build_postings(segments, PRECISION))
+    index_dir = writer.write(tmp_path / 'index')
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['index']
+    return FrequencyIndex(index_dir)
+
+
+@pytest.mark.parametrize('flush_every, merge_block', [(1000, 1 << 20), (3, 1 << 20), (3, 16), (1, 1)])
+def test_spilled_runs_merge_to_sorted_index(tmp_path, rng, flush_every, merge_block):
+    corpus = [_random_segments(rng, int(rng.integers(0, 5))) for _ in range(20)]
+    index = _write_index(tmp_path, corpus, flush_every=flush_every, merge_block=merge_block)
+    expected = _reference(corpus)
+    for name, arr in expected.items():
+        np.testing.assert_array_equal(getattr(index, name), arr)
+    assert len(index.files) == len(corpus)
+
+
+def test_empty_index(tmp_path):
+    index = _write_index(tmp_path, [[], [(np.zeros(0), np.zeros(0))]])
+    assert len(index) == 0
+    assert index.files_in_range(0.0, 1e6) == []
+
+
+@pytest.fixture
+def boundary_index(tmp_path):
+    """三个文件，频点恰好落在查询端点上（100.0 / 100.1 / 100.2 / 0.3）"""
+    corpus = [
+        [(np.array([100.0, 100.1]), np.array([1.0, 2.0]))],
+        [(np.array([100.1]), np.array([3.0])), (np.array([100.2]), np.array([4.0]))],
+        [(np.array([0.3]), np.array([5.0]))],
+    ]
+    return _write_index(tmp_path, corpus)
+
+
+@pytest.mark.parametrize('f_min, f_max, expected', [
+    (100.1, 100.1, [100.1, 100.1]),             # 退化区间，端点恰为频点
+    (100.0, 100.1, [100.0, 100.1, 100.1]),      # 两端均含
+    (100.04, 100.06, []),                       # 区间内没有频点，不应取整到相邻频点
+    (100.01, 100.19, [100.1, 100.1]),
+    (100.1 + 1e-4, 100.2, [100.2]),             # 刚过频点的下界不含该频点
+    (0.1 + 0.2, 0.3, [0.3]),                    # 0.1 + 0.2 的浮点误差不丢掉端点
+    (100.2, 100.0, []),                         # 反向区间
+])
+def test_query_bounds(boundary_index, f_min, f_max, expected):
+    result = boundary_index.query(f_min, f_max)
+    np.testing.assert_array_equal(result['freq'], expected)
+
+
+def test_files_in_range_bounds(boundary_index):
+    assert [r['file_id'] for r in boundary_index.files_in_range(100.04, 100.06)] == []
+
+    results = boundary_index.files_in_range(100.1, 100.2)
+    assert [r['file_id'] for r in results] == [0, 1]
+    assert results[0]['num_components'] == 1
+    assert results[0]['max_amp'] == 2.0
+    np.testing.assert_array_equal(results[1]['segments'], [0, 1])
+    assert results[1]['num_components'] == 2
+    assert results[1]['mean_amp'] == pytest.approx(3.5)
+    assert results[1]['source_file'] == 'ship_1.wav'
+
+    results = boundary_index.files_in_range(0.3, 0.3)
+    assert [r['file_id'] for r in results] == [2]
@@ -0,0 +1,111 @@
+"""
+频率预算缩减测试：数量预算、误差上界、代表频率取整，以及输出文件的读回
+"""
+
+# 第三方包
+import numpy as np
+import pytest
+
+# 本地包
+from modules.A1_FrequencyReducer import (
+    FrequencyReducer, load_frequency_reduction, _cover_starts, _to_scale, _width)
+from utils.io_utils import save_pickle
+
+
+def _frequencies(rng, n=400):
+    """A1输出形式的全局频率：0.1 Hz精度，10 Hz ~ 5 kHz对数均匀分布"""
+    return np.unique(np.round(np.exp(rng.uniform(np.log(10.0), np.log(5000.0), n)), 1))
+
+
+def _reducer(tmp_path, **config):
+    return FrequencyReducer({'input_file': str(tmp_path / 'Analy_freq_all.pkl'), **config})
+
+
+def _max_error(reduction, scale):
+    mapped = reduction.representatives[reduction.rep_index]
+    err = np.abs(mapped - reduction.original)
+    return err.max() if scale == 'abs' else (err / reduction.original).max()
+
+
+@pytest.mark.parametrize('scale', ['rel', 'abs'])
+@pytest.mark.parametrize('max_count', [1, 7, 50, -1])
+def test_count_mode_hits_budget(tmp_path, rng, scale, max_count):
+    frequencies = _frequencies(rng)
+    if max_count < 0:   # 比频率数少一个：只合并最近的一对
+        max_count += len(frequencies)
+    reducer = _reducer(tmp_path, mode='count', max_count=max_count, count_scale=scale, freq_precision=4)
+    reduction = reducer.reduce(frequencies)
+    # 取整精度足够细时代表频率不会合并，簇数恰为预算
+    assert len(reduction.representatives) == max_count
+    assert reduction.report['num_representatives'] == max_count
+
+    # 容差为满足预算的最小值：再小一点簇数就超出预算
+    tol = reduction.report['tolerance']
+    values = _to_scale(reduction.original, scale)
+    assert len(_cover_starts(values, _width(tol * (1 - 1e-6), scale))) > max_count
+
+
+def test_count_mode_fewer_frequencies_than_budget(tmp_path, rng):
+    frequencies = _frequencies(rng, 20)
+    reduction = _reducer(tmp_path, mode='count', max_count=100).reduce(frequencies)
+    assert reduction.report['tolerance'] == 0.0
+    np.testing.assert_array_equal(reduction.representatives, reduction.original)
+    assert reduction.report['max_abs_error'] == 0.0
+
+
+@pytest.mark.parametrize('max_count', [3, 6, 7, 9])
+def test_count_mode_equal_spacing(tmp_path, max_count):
+    # 等间隔频率：簇数随容差成批跳变（10 → 5 → 4 ...），拆分补足到预算且误差不超过容差
+    frequencies = np.arange(100.0, 110.0, 1.0)
+    reduction = _reducer(tmp_path, mode='count', max_count=max_count, count_scale='abs',
+                         freq_precision=2).reduce(frequencies)
+    assert len(reduction.representatives) == max_count
+    assert reduction.report['max_abs_error'] <= reduction.report['tolerance'] + 1e-9
+
+
+@pytest.mark.parametrize('mode, tol', [('abs', 0.5), ('abs', 12.0), ('rel', 0.001), ('rel', 0.05)])
+@pytest.mark.parametrize('precision', [0, 1, 3])
+def test_error_bound(tmp_path, rng, mode, tol, precision):
+    frequencies = _frequencies(rng)
+    reducer = _reducer(tmp_path, mode=mode, freq_precision=precision, **{f'{mode}_tol': tol})
+    reduction = reducer.reduce(frequencies)
+
+    # 容差之外，代表频率取整最多再引入半个精度步长
+    half_step = 0.5 * 10.0 ** -precision
+    mapped = reduction.representatives[reduction.rep_index]
+    err = np.abs(mapped - reduction.original)
+    if mode == 'abs':
+        assert np.all(err <= tol + half_step + 1e-9)
+    else:
+        assert np.all(err / reduction.original <= tol + half_step / reduction.original + 1e-12)
+    assert reduction.report['max_abs_error'] == pytest.approx(err.max())
+    assert reduction.report['max_rel_error'] == pytest.approx(_max_error(reduction, 'rel'))
+
+    # 代表频率按精度取整、升序且互不相同，映射保持频率顺序
+    np.testing.assert_array_equal(reduction.representatives, np.round(reduction.representatives, precision))
+    assert np.all(np.diff(reduction.representatives) > 0)
+    assert np.all(np.diff(reduction.rep_index) >= 0)
+
+
+def test_process_round_trip(tmp_path, rng):
+    frequencies = _frequencies(rng)
+    save_pickle({'frequencies': frequencies}, tmp_path / 'Analy_freq_all.pkl')
+    reducer = _reducer(tmp_path, mode='count', max_count=30, freq_precision=1)
+    summary = reducer.process()
+
+    assert summary['output_file'] == tmp_path / 'Analy_freq_reduced.pkl'
+    reduction = load_frequency_reduction(str(summary['output_file']))
+    expected = reducer.reduce(frequencies)
+    np.testing.assert_array_equal(reduction.representatives, expected.representatives)
+    np.testing.assert_array_equal(reduction.original, frequencies)
+    np.testing.assert_array_equal(reduction.rep_index, expected.rep_index)
+    assert reduction.freq_precision == 1
+    assert reduction.report == summary['report']
+    assert summary['num_representatives'] == len(reduction.representatives) <= 30
+
+    # 读回的结果可按原始频率查找代表频率（含浮点误差的查询值）
+    np.testing.assert_array_equal(reduction.lookup(frequencies),
+                                  reduction.representatives[reduction.rep_index])
+    assert reduction.lookup(frequencies[3] + 1e-12)[0] == reduction.representatives[reduction.rep_index[3]]
+    with pytest.raises(KeyError):
+        reduction.lookup(np.array([frequencies[-1], 5.0]))
@@ -0,0 +1,150 @@
+"""镜像法到达结构：解析解、适用性判断及调度时的回退"""
+# 自带包
+import json
+import sys
+from pathlib import Path
+# 第三方包
+import numpy as np
+import pytest
+# 本地包
+from modules.A3_BellhopRunner import BellhopRunner, JOURNAL_NAME
+from utils.arrival_reuse import thorp_attenuation
+from utils.arrivals import read_arrivals
+from utils.bellhop_writer import REFLECTION_ANGLES
+from utils.image_arrivals import flat_isovelocity_environment, image_arrivals
+from .env_factory import write_env_folder
+
+# 多层海底在全反射角以下按MATLAB的做法产生NaN后置为1，计算中的RuntimeWarning属预期
+pytestmark = pytest.mark.filterwarnings('ignore::RuntimeWarning')
+
+FAKE_MODEL = Path(__file__).with_name('fake_ray_model.py')
+D, C, RANGE, ZS = 100.0, 1500.0, 1000.0, 10.0
+
+
+def _table(mag, phase):
+    """掠射角线性变化的反射系数表，线性插值在任意角度都是精确的"""
+    return np.column_stack([REFLECTION_ANGLES, mag(REFLECTION_ANGLES), np.full(len(REFLECTION_ANGLES), phase)])
+
+
+def top_mag(angle):
+    return 1.0 - angle / 180.0
+
+
+def bot_mag(angle):
+    return 0.8 - angle / 300.0
+
+
+def expected_images(zr):
+    """
+    声源10 m、海深100 m时前两阶镜像的逐条解析解
+
+    Returns:
+        [(垂直距离, 海面反射次数, 海底反射次数, 出射方向, 到达方向)]，方向向下为+1
+    """
+    direct = 1.0 if zr > ZS else -1.0
+    return [
+        (zr - ZS, 0, 0, direct, direct),
+        (zr + ZS, 1, 0, -1, 1),
+        (2 * D - (zr + ZS), 0, 1, 1, -1),
+        (2 * D - (zr - ZS), 1, 1, -1, -1),
+        (2 * D + zr - ZS, 1, 1, 1, 1),
+        (2 * D + zr + ZS, 2, 1, -1, 1),
+        (4 * D - (zr + ZS), 1, 2, 1, -1),
+        (4 * D - (zr - ZS), 2, 2, -1, -1),
+    ]
+
+
+@pytest.mark.parametrize('thorp', [True, False])
+def test_closed_form_images(thorp):
+    freqs = [100.0, 800.0]
+    receiver_depths = [5.0, 30.0]      # 分别在声源上方和下方
+    trc, brc = _table(top_mag, 180.0), _table(bot_mag, 10.0)
+    results = image_arrivals(freqs, [ZS], receiver_depths, [RANGE], D, C,
+                             [trc, trc], [brc, brc], n_orders=2, thorp=thorp)
+
+    for data, freq in zip(results, freqs):
+        assert data.counts.shape == (1, 2, 1) and np.all(data.counts == 8)
+        for irz, zr in enumerate(receiver_depths):
+            cell = data.cell(0, irz, 0)
+            dz, n_top, n_bot, src_dir, rcv_dir = (np.array(v) for v in zip(*expected_images(zr)))
+            R = np.hypot(RANGE, dz)
+            graze = np.degrees(np.arctan(np.abs(dz) / RANGE))
+
+            np.testing.assert_array_equal(data.top_bounces[cell], n_top)
+            np.testing.assert_array_equal(data.bot_bounces[cell], n_bot)
+            np.testing.assert_allclose(data.delay[cell].real, R / C, rtol=1e-12)
+            np.testing.assert_allclose(data.amp[cell], top_mag(graze) ** n_top * bot_mag(graze) ** n_bot / R,
+                                       rtol=1e-6)
+            phase = 180.0 * n_top + 10.0 * n_bot
+            np.testing.assert_allclose(np.exp(1j * np.deg2rad(data.phase[cell])),
+                                       np.exp(1j * np.deg2rad(phase)), atol=1e-6)
+            assert np.all((data.phase[cell] > -180) & (data.phase[cell] <= 180))
+            np.testing.assert_allclose(data.src_angle[cell], src_dir * graze, atol=1e-5)
+            np.testing.assert_allclose(data.rcv_angle[cell], rcv_dir * graze, atol=1e-5)
+            if thorp:
+                alpha = thorp_attenuation(freq) / 8.6858896 / 1000.0
+                np.testing.assert_allclose(data.delay[cell].imag, -alpha * R / (2 * np.pi * freq), rtol=1e-12)
+            else:
+                assert np.all(data.delay[cell].imag == 0)
+
+
+def test_missing_tables_reflect_fully():
+    data, = image_arrivals([500.0], [ZS], [30.0], [RANGE], D, C, [None], [None], n_orders=2, thorp=False)
+    dz = np.array([image[0] for image in expected_images(30.0)])
+    np.testing.assert_allclose(data.amp, 1.0 / np.hypot(RANGE, dz), rtol=1e-6)
+    assert np.all(data.phase == 0)
+
+
+def _env(folder, **kwargs):
+    write_env_folder(folder, [200.0, 50.0], **kwargs)
+    return (folder / 'test_1.env').read_text(), (folder / 'test_1.bty').read_text()
+
+
+def test_environment_check(tmp_path):
+    geometry = flat_isovelocity_environment(*_env(tmp_path / 'flat', speeds=(1500.0, 1502.0, 1501.0)))
+    assert geometry is not None
+    np.testing.assert_allclose(geometry['source_depths'], [10.0])
+    np.testing.assert_allclose(geometry['receiver_depths'], [20.0, 50.0, 80.0])
+    np.testing.assert_allclose(geometry['receiver_ranges'], [1000.0])
+    assert geometry['water_depth'] == pytest.approx(100.0)
+    # 深度加权平均声速：梯形积分 (1500+1502)/2·50 + (1502+1501)/2·50 除以100 m
+    assert geometry['sound_speed'] == pytest.approx(1501.25)
+    assert geometry['thorp'] is True
+
+    assert flat_isovelocity_environment(*_env(tmp_path / 'slope', bty_depths=(100.0, 90.0))) is None
+    assert flat_isovelocity_environment(*_env(tmp_path / 'gradient', speeds=(1500.0, 1510.0))) is None
+    assert flat_isovelocity_environment(*_env(tmp_path / 'vacuum', top_option='CVFT')) is None
+    env_text, _ = _env(tmp_path / 'no-bty')
+    assert flat_isovelocity_environment(env_text, None)['water_depth'] == pytest.approx(100.0)
+
+
+def test_runner_uses_image_engine_only_where_applicable(tmp_path):
+    root = tmp_path / 'env'
+    for rel, kwargs in (('Flat/Rr1/envfilefolder', {}),
+                        ('Slope/Rr1/envfilefolder', {'bty_depths': (100.0, 80.0)}),
+                        ('Gradient/Rr1/envfilefolder', {'speeds': (1500.0, 1520.0)})):
+        write_env_folder(root / rel, [200.0, 50.0, 800.0], **kwargs)
+    direct = tmp_path / 'direct'
+    write_env_folder(direct / 'Flat/Rr1/envfilefolder', [200.0, 50.0, 800.0])
+
+    config = {'executable': [sys.executable, str(FAKE_MODEL)], 'workers': 1}
+    stats = BellhopRunner({**config, 'env_root': str(root), 'image_engine': True, 'image_orders': 4}).process()
+    assert (stats['success'], stats['image']) == (9, 3)
+    with open(root / JOURNAL_NAME, 'r', encoding='utf-8') as f:
+        methods = {json.loads(line)['job']: json.loads(line).get('method', 'bellhop') for line in f}
+    for job, method in methods.items():
+        assert method == ('image' if job.startswith('Flat/') else 'bellhop'), job
+
+    # 平坦等声速文件夹：镜像法结果与逐频率调用计算程序一致
+    assert BellhopRunner({**config, 'env_root': str(direct)}).process()['success'] == 3
+    for name in ('test_1', 'test_2', 'test_3'):
+        image = read_arrivals(root / 'Flat/Rr1/envfilefolder' / f'{name}.arr')
+        model = read_arrivals(direct / 'Flat/Rr1/envfilefolder' / f'{name}.arr')
+        np.testing.assert_array_equal(image.counts, model.counts)
+        np.testing.assert_array_equal(image.top_bounces, model.top_bounces)
+        np.testing.assert_array_equal(image.bot_bounces, model.bot_bounces)
+        np.testing.assert_allclose(image.amp, model.amp, rtol=1e-5)
+        np.testing.assert_allclose(image.delay.real, model.delay.real, atol=1e-8)
+        np.testing.assert_allclose(image.delay.imag, model.delay.imag, rtol=1e-6)
+        np.testing.assert_allclose(image.src_angle, model.src_angle, atol=1e-5)
+        np.testing.assert_allclose(image.rcv_angle, model.rcv_angle, atol=1e-5)
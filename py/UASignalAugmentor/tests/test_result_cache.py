@@ -0,0 +1,173 @@
+"""
+结果缓存测试：缓存键随内容/参数/路径变化，状态索引复用内容哈希，gc与clear，
+以及FrequencyAnalyzer重复运行时的命中
+"""
+
+# 自带包
+import os
+import shutil
+
+# 第三方包
+import numpy as np
+import pytest
+import soundfile as sf
+
+# 本地包
+import utils.result_cache as result_cache
+from utils.result_cache import ResultCache
+from modules.A1_SignalAnalyzer import FrequencyAnalyzer
+
+PARAMS = {'segment_length': 0.25, 'threshold': 0.05}
+FS = 8000
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / 'data' / 'a.wav'
+    path.parent.mkdir()
+    path.write_bytes(b'original content')
+    return path
+
+
+def _count_hashes(monkeypatch):
+    calls = []
+    original = result_cache.hash_file
+
+    def counting(path):
+        calls.append(path)
+        return original(path)
+    monkeypatch.setattr(result_cache, 'hash_file', counting)
+    return calls
+
+
+def test_key_follows_content_params_and_path(tmp_path, data_file):
+    cache = ResultCache(tmp_path / 'cache', PARAMS)
+    key = cache.file_key(data_file)
+    assert cache.file_key(data_file) == key
+    cache.put(key, {'value': 1})
+    assert cache.get(key) == {'value': 1}
+
+    # 参数变化
+    assert ResultCache(tmp_path / 'cache', {**PARAMS, 'threshold': 0.1}).file_key(data_file) != key
+    assert ResultCache(tmp_path / 'cache', dict(reversed(PARAMS.items()))).file_key(data_file) == key
+
+    # 内容相同的另一个文件（复制到其他类别目录下的同一录音）不共享条目
+    copy = tmp_path / 'other' / 'a.wav'
+    copy.parent.mkdir()
+    shutil.copy2(data_file, copy)
+    assert cache.file_key(copy) != key
+    assert cache.get(cache.file_key(copy)) is None
+
+    # 内容变化
+    data_file.write_bytes(b'modified content, longer')
+    new_key = cache.file_key(data_file)
+    assert new_key != key
+    assert cache.get(new_key) is None
+
+
+def test_stat_index_reuses_hash(tmp_path, data_file, monkeypatch):
+    calls = _count_hashes(monkeypatch)
+    cache = ResultCache(tmp_path / 'cache', PARAMS)
+    key = cache.file_key(data_file)
+    cache.file_key(data_file)
+    assert len(calls) == 1
+    cache.save()
+
+    # 新实例从状态索引读取内容哈希，不重新读取文件
+    cache = ResultCache(tmp_path / 'cache', PARAMS)
+    assert cache.file_key(data_file) == key
+    assert len(calls) == 1
+
+    # 修改时间变化（内容相同）时重新哈希，键不变
+    st = os.stat(data_file)
+    os.utime(data_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.file_key(data_file) == key
+    assert len(calls) == 2
+
+
+def test_unreadable_stat_index_and_corrupt_entry(tmp_path, data_file, caplog):
+    (tmp_path / 'cache').mkdir()
+    (tmp_path / 'cache' / 'stat_index.json').write_text('{not json')
+    cache = ResultCache(tmp_path / 'cache', PARAMS)
+    assert 'unreadable cache stat index' in caplog.text
+
+    key = cache.file_key(data_file)
+    cache.put(key, {'value': 1})
+    entry = next((tmp_path / 'cache' / 'entries').glob('*/*.pkl'))
+    entry.write_bytes(b'truncated')
+    assert cache.get(key) is None
+    assert not entry.exists()
+
+
+def test_gc_and_clear(tmp_path, data_file):
+    other = data_file.with_name('b.wav')
+    other.write_bytes(b'other content')
+    cache = ResultCache(tmp_path / 'cache', PARAMS)
+    live, stale = cache.file_key(data_file), cache.file_key(other)
+    cache.put(live, {'value': 'live'})
+    cache.put(stale, {'value': 'stale'})
+    cache.save()
+
+    # 下次运行只访问了data_file：other的条目和状态记录都被回收
+    cache = ResultCache(tmp_path / 'cache', PARAMS)
+    assert cache.file_key(data_file) == live
+    stats = cache.gc([live])
+    assert stats['removed_entries'] == 1
+    assert stats['freed_bytes'] > 0
+    assert stats['removed_paths'] == 1
+    assert cache.get(live) == {'value': 'live'}
+    assert cache.get(stale) is None
+    cache.save()
+    assert list(ResultCache(tmp_path / 'cache', PARAMS)._stat_index) == [str(data_file.resolve())]
+
+    cache.clear()
+    assert cache.get(live) is None
+    assert not (tmp_path / 'cache' / 'stat_index.json').exists()
+    assert list((tmp_path / 'cache' / 'entries').iterdir()) == []
+
+
+def _analyze(tmp_path, **config):
+    return FrequencyAnalyzer({
+        'input_path': str(tmp_path / 'input'), 'output_path': str(tmp_path / 'output'),
+        'ship_classes': ['Class A', 'Class B'], 'segment_length': 0.25, 'threshold': 0.05,
+        'freq_range': [10, 3000], 'cache_dir': str(tmp_path / 'cache'), **config}).process()
+
+
+def _write_wav(path, freq, rng):
+    t = np.arange(FS) / FS
+    path.parent.mkdir(parents=True, exist_ok=True)
+    sf.write(path, 0.5 * np.sin(2 * np.pi * freq * t) + 0.01 * rng.standard_normal(FS), FS, subtype='DOUBLE')
+
+
+@pytest.mark.parametrize('output_format', ['pickle', 'columnar'])
+def test_analyzer_cache_hits(tmp_path, rng, output_format):
+    _write_wav(tmp_path / 'input' / 'Class A' / 'ship_1.wav', 120.0, rng)
+    _write_wav(tmp_path / 'input' / 'Class A' / 'ship_2.wav', 250.0, rng)
+    # 同一录音复制到另一个类别
+    (tmp_path / 'input' / 'Class B').mkdir()
+    shutil.copy2(tmp_path / 'input' / 'Class A' / 'ship_1.wav', tmp_path / 'input' / 'Class B' / 'ship_1.wav')
+
+    first = _analyze(tmp_path, output_format=output_format)
+    assert first['cache_hits'] == 0
+    second = _analyze(tmp_path, output_format=output_format)
+    assert second['cache_hits'] == 3
+    np.testing.assert_array_equal(second['global_frequencies'], first['global_frequencies'])
+    assert sorted(map(str, second['output_files'])) == sorted(map(str, first['output_files']))
+    if output_format == 'pickle':
+        assert sorted(p.name for p in second['output_files']) == \
+            ['Class A_ship_1.pkl', 'Class A_ship_2.pkl', 'Class B_ship_1.pkl']
+
+    # 修改一个文件只重新分析该文件
+    _write_wav(tmp_path / 'input' / 'Class A' / 'ship_2.wav', 400.0, rng)
+    third = _analyze(tmp_path, output_format=output_format)
+    assert third['cache_hits'] == 2
+    assert 400.0 in third['global_frequencies']
+    assert 250.0 not in third['global_frequencies']
+
+    # 运行前清空缓存
+    assert _analyze(tmp_path, output_format=output_format, cache_invalidate=True)['cache_hits'] == 0
+
+    # 删除文件后gc回收其条目
+    (tmp_path / 'input' / 'Class B' / 'ship_1.wav').unlink()
+    _analyze(tmp_path, output_format=output_format, cache_gc=True)
+    assert len(list((tmp_path / 'cache' / 'entries').glob('*/*.pkl'))) == 2
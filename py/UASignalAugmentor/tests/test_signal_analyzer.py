@@ -0,0 +1,121 @@
+"""A1 FrequencyAnalyzer：批量FFT与逐段FFT的结果一致，进程池中工作进程崩溃不中断整批处理"""
+# 自带包
+import logging
+import os
+import shutil
+# 第三方包
+import numpy as np
+import pytest
+import soundfile as sf
+# 本地包
+import modules.A1_SignalAnalyzer as A1
+from modules.A1_SignalAnalyzer import FrequencyAnalyzer, _analyze_file_worker
+
+FS = 8000
+
+
+@pytest.fixture
+def audio_file(tmp_path, rng):
+    """若干谐波线谱叠加噪声，时长不是段长的整数倍"""
+    t = np.arange(int(5.3 * FS)) / FS
+    signal = sum(a * np.sin(2 * np.pi * f * t + p)
+                 for a, f, p in [(0.5, 120.0, 0.3), (0.3, 240.0, 1.1), (0.2, 360.0, 2.0), (0.1, 1375.5, -0.7)])
+    signal = signal + 0.02 * rng.standard_normal(len(t))
+    path = tmp_path / 'input' / 'Class A' / 'ship_001.wav'
+    path.parent.mkdir(parents=True)
+    sf.write(path, signal, FS, subtype='DOUBLE')
+    return path
+
+
+def analyze(tmp_path, audio_file, **config):
+    config = {'input_path': str(tmp_path / 'input'), 'output_path': str(tmp_path / 'output'),
+              'ship_classes': ['Class A'], 'segment_length': 0.5, 'threshold': 0.05,
+              'freq_range': [10, 3000], **config}
+    return FrequencyAnalyzer(config)._process_single_file(audio_file, 'Class A')
+
+
+def assert_same_analysis(result, expected):
+    np.testing.assert_array_equal(result.n_delay, expected.n_delay)
+    np.testing.assert_array_equal(result.analy_freq, expected.analy_freq)
+    assert len(expected.analy_freq) > 0
+    assert len(result.analyze_record) == len(expected.analyze_record) > 3
+    for seg, exp in zip(result.analyze_record, expected.analyze_record):
+        np.testing.assert_array_equal(seg.freq, exp.freq)
+        np.testing.assert_allclose(seg.amp, exp.amp, rtol=1e-9, atol=1e-12)
+        # 相位在±π处可能落在不同的一侧，按单位复数比较
+        np.testing.assert_allclose(np.exp(1j * seg.phase), np.exp(1j * exp.phase), atol=1e-7)
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'threshold': 0.0},
+    {'analysis_mode': 'peaks', 'peak_top_k': 3},
+    {'analysis_mode': 'peaks', 'harmonic_grouping': True},
+    {'frame_mode': 'stft', 'window': 'hann', 'hop_length': 0.2},
+    {'frame_mode': 'stft', 'window': 'blackman', 'analysis_mode': 'peaks'},
+], ids=['threshold', 'no-threshold', 'peaks-topk', 'harmonic', 'stft-hann', 'stft-peaks'])
+@pytest.mark.parametrize('fft_mode', ['batched', 'rfft'])
+def test_fft_modes_match_loop(tmp_path, audio_file, options, fft_mode):
+    # 批大小小于段数，覆盖跨批拼接
+    expected = analyze(tmp_path, audio_file, fft_mode='loop', **options)
+    result = analyze(tmp_path, audio_file, fft_mode=fft_mode, fft_batch_size=3, **options)
+    assert_same_analysis(result, expected)
+
+
+@pytest.mark.parametrize('options', [{}, {'analysis_mode': 'peaks'}], ids=['threshold', 'peaks'])
+def test_streaming_matches_loop(tmp_path, audio_file, options):
+    # 块大小小于段数，覆盖跨块的候选保留与清理
+    expected = analyze(tmp_path, audio_file, fft_mode='loop', **options)
+    result = analyze(tmp_path, audio_file, streaming=True, stream_block_segments=2, **options)
+    assert_same_analysis(result, expected)
+
+
+def _crash_on_marked(audio_path, ship_class):
+    """进程池任务：文件名含crash时工作进程直接退出（模拟解码库段错误）"""
+    if 'crash' in audio_path.name:
+        os._exit(1)
+    return _analyze_file_worker(audio_path, ship_class)
+
+
+def _write_corpus(root, rng, names):
+    for i, name in enumerate(names):
+        t = np.arange(FS) / FS
+        signal = 0.5 * np.sin(2 * np.pi * (100.0 + 50 * i) * t) + 0.01 * rng.standard_normal(FS)
+        path = root / 'Class A' / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        sf.write(path, signal, FS, subtype='DOUBLE')
+
+
+def _process(tmp_path, input_dir, output_dir, **config):
+    return FrequencyAnalyzer({
+        'input_path': str(tmp_path / input_dir), 'output_path': str(tmp_path / output_dir),
+        'ship_classes': ['Class A'], 'segment_length': 0.25, 'threshold': 0.05,
+        'freq_range': [10, 3000], **config}).process()
+
+
+@pytest.mark.parametrize('crash_names', [['b_crash.wav'], ['a_crash.wav', 'e_crash.wav']],
+                         ids=['one', 'first-and-last'])
+def test_worker_crash_reports_file(tmp_path, rng, monkeypatch, caplog, crash_names):
+    good = ['b_ship.wav', 'c_ship.wav', 'd_ship.wav']
+    _write_corpus(tmp_path / 'input', rng, good + crash_names)
+    shutil.copytree(tmp_path / 'input', tmp_path / 'expected_input')
+    for name in crash_names:
+        (tmp_path / 'expected_input' / 'Class A' / name).unlink()
+
+    # 工作进程由fork创建，继承替换后的任务函数
+    monkeypatch.setattr(A1, '_analyze_file_worker', _crash_on_marked)
+    with caplog.at_level(logging.WARNING):
+        summary = _process(tmp_path, 'input', 'output', workers=2)
+
+    # 整批完成，崩溃的文件记为失败，其余文件的结果与串行处理一致
+    assert summary['num_files_processed'] == len(good)
+    assert sorted(summary['results_by_class']['Class A']['files']) == good
+    errors = [r.getMessage() for r in caplog.records if r.levelno == logging.ERROR]
+    assert len(errors) == len(crash_names)
+    for name in crash_names:
+        assert any(name in e and 'worker process crashed' in e for e in errors)
+    assert 'Worker process crashed' in caplog.text
+
+    expected = _process(tmp_path, 'expected_input', 'expected_output')
+    np.testing.assert_array_equal(summary['global_frequencies'], expected['global_frequencies'])
+    assert sorted(p.name for p in summary['output_files']) == sorted(p.name for p in expected['output_files'])
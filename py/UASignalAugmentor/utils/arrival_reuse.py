@@ -0,0 +1,161 @@
+"""
+到达结构的频率复用工具
+
+射线模式（几何高斯波束）下，声线路径、时延实部、扩展损失和焦散相位只取决于声速剖面和地形，
+与频率无关；频率只通过边界反射系数（.trc/.brc）和体积衰减进入到达结构。
+因此同一envfilefolder只需以一个参考频率计算一次，其他频率的到达由参考结果解析推出：
+
+    幅值:     A(f) = A(f0) · Π_海面 |Rt(f, θt)| / |Rt(f0, θt)| · Π_海底 |Rb(f, θb)| / |Rb(f0, θb)|
+    相位:     φ(f) = φ(f0) + 海面次数 · (φt(f) - φt(f0)) + 海底次数 · (φb(f) - φb(f0))
+    时延虚部: Im τ(f) = Im τ(f0) · (α(f) / f) / (α(f0) / f0)     （仅Thorp体积衰减）
+
+.arr文件不记录声线在边界处的掠射角，这里由出射角按Snell定律（cosθ / c 守恒）
+换算到海面和海底（取剖面首、末点声速），与距离有关的地形/声速剖面下为近似。
+
+参考频率应取该文件夹的最低频率：海面粗糙度损失随频率增大，
+参考频率反射系数为0的声线在其他频率无法恢复。
+"""
+
+import io
+from typing import Dict, Optional, Tuple
+import numpy as np
+import logging
+
+from .arrivals import ArrivalData
+
+logger = logging.getLogger(__name__)
+
+# 反射系数表 (角度, 幅值, 相位)，None表示没有该文件（该边界不按表反射，比值为1）
+ReflectionTable = Optional[np.ndarray]
+
+
+def thorp_attenuation(freqs) -> np.ndarray:
+    """
+    Thorp体积衰减系数（BELLHOP顶部选项第4位为'T'时使用，JKPS Eq. 1.34）
+
+    Args:
+        freqs: 频率 (Hz)
+
+    Returns:
+        衰减系数 (dB/km)
+    """
+    f2 = (np.asarray(freqs, dtype=float) / 1000.0) ** 2
+    return 3.3e-3 + 0.11 * f2 / (1.0 + f2) + 44.0 * f2 / (4100.0 + f2) + 3.0e-4 * f2
+
+
+def read_env_medium(env_text: str) -> Dict:
+    """
+    从.env文件内容中读取顶部选项和（第一层媒质的）声速剖面
+
+    Args:
+        env_text: .env文件内容（write_env写出的格式）
+
+    Returns:
+        {'top_option': str, 'bottom_option': str, 'z': 深度数组 (m), 'c': 声速数组 (m/s)}
+    """
+    lines = env_text.splitlines()
+    top_option = lines[3].split("'")[1]
+    bottom_option = ''
+    start = 5 if len(top_option) > 1 and top_option[1] == 'A' else 4
+    z, c = [], []
+    # 第start行为 "N sigma depth"，其后为剖面点，直到底部选项行（以引号开头）
+    for line in lines[start + 1:]:
+        if line.lstrip().startswith("'"):
+            bottom_option = line.split("'")[1]
+            break
+        values = line.split('/')[0].split()
+        z.append(float(values[0]))
+        c.append(float(values[1]))
+    return {'top_option': top_option, 'bottom_option': bottom_option, 'z': np.array(z), 'c': np.array(c)}
+
+
+def parse_reflection_table(text: str) -> np.ndarray:
+    """
+    解析.trc/.brc文件内容
+
+    Args:
+        text: 文件内容（首行为行数，其后每行 角度 幅值 相位）
+
+    Returns:
+        反射系数表 (N × 3: 角度/幅值/相位)
+    """
+    return np.loadtxt(io.StringIO(text), skiprows=1, ndmin=2)
+
+
+def boundary_angles(src_angle: np.ndarray, source_depth: float,
+                    medium: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    由声源处出射角按Snell定律换算声线在海面、海底处的掠射角
+
+    Args:
+        src_angle: 出射角 (度)
+        source_depth: 声源深度 (m)
+        medium: read_env_medium的返回值
+
+    Returns:
+        (海面掠射角, 海底掠射角)，单位度
+    """
+    z, c = medium['z'], medium['c']
+    cos_src = np.cos(np.deg2rad(np.abs(src_angle))) / np.interp(source_depth, z, c)
+    top = np.rad2deg(np.arccos(np.minimum(cos_src * c[0], 1.0)))
+    bottom = np.rad2deg(np.arccos(np.minimum(cos_src * c[-1], 1.0)))
+    return top, bottom
+
+
+def _bounce_factor(table: ReflectionTable, ref_table: ReflectionTable, angle: np.ndarray,
+                   bounces: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """每条声线由参考频率换算到目标频率的 (幅值比, 相位差)"""
+    if table is None or ref_table is None:
+        return np.ones(len(angle)), np.zeros(len(angle))
+    mag = np.interp(angle, table[:, 0], table[:, 1])
+    ref_mag = np.interp(angle, ref_table[:, 0], ref_table[:, 1])
+    ratio = np.divide(mag, ref_mag, out=np.zeros_like(mag), where=ref_mag > 0)
+    dphase = np.interp(angle, table[:, 0], table[:, 2]) - np.interp(angle, ref_table[:, 0], ref_table[:, 2])
+    return ratio ** bounces, dphase * bounces
+
+
+def derive_arrivals(ref: ArrivalData, freq: float, medium: Dict,
+                    ref_tables: Tuple[ReflectionTable, ReflectionTable],
+                    tables: Tuple[ReflectionTable, ReflectionTable]) -> ArrivalData:
+    """
+    由参考频率的到达推出另一频率的到达
+
+    Args:
+        ref: 参考频率的到达结构
+        freq: 目标频率 (Hz)
+        medium: read_env_medium的返回值（决定Snell换算和是否有Thorp衰减）
+        ref_tables: 参考频率的 (.trc表, .brc表)
+        tables: 目标频率的 (.trc表, .brc表)
+
+    Returns:
+        目标频率的到达结构（声线几何与参考相同）
+    """
+    # 每条到达所属的声源深度
+    per_source = ref.counts.reshape(len(ref.source_depths), -1).sum(axis=1)
+    source_depth = np.repeat(ref.source_depths, per_source)
+    theta_top, theta_bot = boundary_angles(ref.src_angle, source_depth, medium)
+
+    top_ratio, top_dphase = _bounce_factor(tables[0], ref_tables[0], theta_top, ref.top_bounces)
+    bot_ratio, bot_dphase = _bounce_factor(tables[1], ref_tables[1], theta_bot, ref.bot_bounces)
+    phase = ref.phase + top_dphase + bot_dphase
+    phase = 180.0 - np.mod(180.0 - phase, 360.0)     # 与BELLHOP一致，取 (-180, 180]
+
+    delay = ref.delay
+    if len(medium['top_option']) > 3 and medium['top_option'][3] == 'T':
+        scale = (thorp_attenuation(freq) / freq) / (thorp_attenuation(ref.freq) / ref.freq)
+        delay = delay.real + 1j * delay.imag * scale
+
+    return ArrivalData(
+        freq=freq,
+        source_depths=ref.source_depths,
+        receiver_depths=ref.receiver_depths,
+        receiver_ranges=ref.receiver_ranges,
+        counts=ref.counts,
+        amp=ref.amp * top_ratio * bot_ratio,
+        phase=phase,
+        delay=delay,
+        src_angle=ref.src_angle,
+        rcv_angle=ref.rcv_angle,
+        top_bounces=ref.top_bounces,
+        bot_bounces=ref.bot_bounces,
+    )
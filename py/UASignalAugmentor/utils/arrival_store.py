@@ -0,0 +1,198 @@
+"""
+到达结构存储工具（ENV_ARR_less的替代）
+
+对应MATLAB: ArrReader.m（ARR(m,n).Amp / Delay / phase / freq / rd）
+
+一个envfilefolder所有频率的到达经幅值门限过滤后拼接为扁平的定型数组，
+用CSR风格的偏移表按 (频率序号m, 接收点序号n) 索引，可通过 np.load(mmap_mode='r') 零拷贝读取；
+任一格点的到达为一次偏移表查找加切片，O(1)。
+
+接收点序号n为 (声源深度, 接收深度, 接收距离) 的线性序号，与ArrReader.m中的Arr(n)一致；
+A2生成的环境文件只有一个声源深度和一个接收距离，n即接收深度序号。
+
+存储目录结构:
+    ENV_ARR_less.arrstore/
+    ├── amp.npy              # 幅值 (float32)
+    ├── delay.npy            # 时延 (float64, s)，每个格点内按时延升序
+    ├── phase.npy            # 相位 (float32, 弧度)
+    ├── cell_offsets.npy     # (m, n) → 到达区间，长度 = 频率数 × 接收点数 + 1
+    ├── freq.npy             # 各频率 (Hz)，未读取的文件为NaN
+    ├── receiver_depths.npy  # 各接收点的接收深度 (m)
+    └── meta.json            # 文件名、门限等元数据
+"""
+
+import shutil
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+import numpy as np
+import logging
+
+from .arrivals import ArrivalData
+from .io_utils import ensure_dir, save_json, load_json, load_array
+
+logger = logging.getLogger(__name__)
+
+STORE_NAME = 'ENV_ARR_less.arrstore'
+FORMAT_VERSION = 1
+
+
+def gate_arrivals(arrivals: Sequence[Optional[ArrivalData]], amp_threshold_ratio: float
+                  ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    对所有频率、所有接收点的到达一次性做幅值门限过滤并按时延排序
+
+    每个格点保留幅值不低于 amp_threshold_ratio × 该格点最大幅值 的到达
+
+    Args:
+        arrivals: 各频率的到达结构（None表示该频率没有数据），接收点数须一致
+        amp_threshold_ratio: 幅值门限比例
+
+    Returns:
+        (amp, delay, phase, cell_offsets)；delay为|时延|，phase为弧度
+    """
+    present = [a for a in arrivals if a is not None]
+    n_recv = present[0].counts.size if present else 0
+    counts = np.zeros((len(arrivals), n_recv), dtype=np.int64)
+    for m, a in enumerate(arrivals):
+        if a is not None:
+            counts[m] = a.counts.ravel()
+
+    amp = np.concatenate([a.amp for a in present]) if present else np.zeros(0, np.float32)
+    delay = np.abs(np.concatenate([a.delay for a in present])) if present else np.zeros(0)
+    phase = np.deg2rad(np.concatenate([a.phase for a in present])) if present else np.zeros(0)
+    phase = np.angle(np.exp(1j * phase))     # 与angle(A)一致，取 (-π, π]
+    cell = np.repeat(np.arange(counts.size), counts.ravel())
+
+    # 到达已按格点顺序拼接，各格点最大幅值用一次分段归约求得
+    offsets = np.zeros(counts.size + 1, dtype=np.int64)
+    np.cumsum(counts.ravel(), out=offsets[1:])
+    nonempty = np.flatnonzero(counts.ravel())
+    cell_max = np.zeros(counts.size, dtype=amp.dtype)
+    if nonempty.size:
+        cell_max[nonempty] = np.maximum.reduceat(amp, offsets[nonempty])
+
+    keep = np.flatnonzero(amp >= amp_threshold_ratio * cell_max[cell])
+    keep = keep[np.lexsort((delay[keep], cell[keep]))]
+    kept_offsets = np.zeros_like(offsets)
+    np.cumsum(np.bincount(cell[keep], minlength=counts.size), out=kept_offsets[1:])
+    return amp[keep], delay[keep], phase[keep], kept_offsets
+
+
+def write_arrival_store(store_dir: Union[str, Path], names: List[str],
+                        arrivals: Sequence[Optional[ArrivalData]], amp_threshold_ratio: float,
+                        max_freq_limit: Optional[float] = None) -> Path:
+    """
+    过滤并写出到达结构存储（覆盖已有存储）
+
+    Args:
+        store_dir: 存储目录
+        names: 各频率的文件名（m的顺序）
+        arrivals: 各频率的到达结构，None表示缺失或已被频率上限排除
+        amp_threshold_ratio: 幅值门限比例
+        max_freq_limit: 记录在元数据中的最大处理频率
+
+    Returns:
+        存储目录路径
+    """
+    store_dir = Path(store_dir)
+    arrivals = list(arrivals)
+    present = [a for a in arrivals if a is not None]
+    receiver_depths = np.zeros(0)
+    if present:
+        shape = present[0].counts.shape
+        # 接收点的线性序号 (声源深度, 接收深度, 接收距离) → 接收深度
+        receiver_depths = np.broadcast_to(present[0].receiver_depths[None, :, None], shape).ravel()
+        for m, a in enumerate(arrivals):
+            if a is not None and a.counts.shape != shape:
+                logger.warning(f"Skipping {names[m]}: receiver grid {a.counts.shape} differs from {shape}")
+                arrivals[m] = None
+
+    amp, delay, phase, cell_offsets = gate_arrivals(arrivals, amp_threshold_ratio)
+
+    if store_dir.exists():
+        shutil.rmtree(store_dir)
+    ensure_dir(store_dir)
+    arrays = {
+        'amp': amp.astype(np.float32),
+        'delay': delay.astype(np.float64),
+        'phase': phase.astype(np.float32),
+        'cell_offsets': cell_offsets,
+        'freq': np.array([np.nan if a is None else a.freq for a in arrivals], dtype=np.float64),
+        'receiver_depths': np.asarray(receiver_depths, dtype=np.float64),
+    }
+    for name, arr in arrays.items():
+        np.save(store_dir / f'{name}.npy', arr)
+    save_json({
+        'format_version': FORMAT_VERSION,
+        'names': list(names),
+        'num_receivers': len(receiver_depths),
+        'amp_threshold_ratio': amp_threshold_ratio,
+        'max_freq_limit': max_freq_limit,
+    }, store_dir / 'meta.json')
+
+    total = sum(int(a.counts.sum()) for a in arrivals if a is not None)
+    logger.info(f"Saved arrival store ({len(names)} frequencies, {len(amp)}/{total} arrivals kept) to: {store_dir}")
+    return store_dir
+
+
+class ArrivalStore:
+    """
+    到达结构存储读取器
+
+    所有数组通过内存映射加载，cell()返回的都是原数组的切片视图，不发生拷贝
+
+    Attributes:
+        names: 各频率的文件名
+        freq: 各频率 (Hz)，缺失的为NaN
+        receiver_depths: 各接收点的接收深度 (m)
+        amp_threshold_ratio: 写出时使用的幅值门限比例
+    """
+
+    ARRAY_NAMES = ('amp', 'delay', 'phase', 'cell_offsets', 'freq', 'receiver_depths')
+
+    def __init__(self, store_dir: Union[str, Path], mmap: bool = True):
+        """
+        打开存储
+
+        Args:
+            store_dir: 存储目录
+            mmap: 是否内存映射加载，默认True
+        """
+        self.store_dir = Path(store_dir)
+        if not self.store_dir.exists():
+            raise FileNotFoundError(f"Arrival store not found: {self.store_dir}")
+
+        meta = load_json(self.store_dir / 'meta.json')
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported arrival store format version: {meta.get('format_version')}")
+        self.names = meta['names']
+        self.num_receivers = meta['num_receivers']
+        self.amp_threshold_ratio = meta['amp_threshold_ratio']
+
+        for name in self.ARRAY_NAMES:
+            setattr(self, name, load_array(self.store_dir / f'{name}.npy', mmap))
+
+    def __len__(self) -> int:
+        """频率数"""
+        return len(self.names)
+
+    def cell(self, m: int, n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        获取单个 (频率, 接收点) 的到达视图，对应ARR(m,n)
+
+        Args:
+            m: 频率序号（从0开始）
+            n: 接收点序号（从0开始）
+
+        Returns:
+            (amp, delay, phase) 视图，按时延升序
+        """
+        if not (0 <= m < len(self) and 0 <= n < self.num_receivers):
+            raise IndexError(f"Cell ({m}, {n}) out of range ({len(self)}, {self.num_receivers})")
+        k = m * self.num_receivers + n
+        lo, hi = self.cell_offsets[k], self.cell_offsets[k + 1]
+        return self.amp[lo:hi], self.delay[lo:hi], self.phase[lo:hi]
+
+    def num_arrivals(self) -> np.ndarray:
+        """各格点的到达数 (频率数 × 接收点数)"""
+        return np.diff(self.cell_offsets).reshape(len(self), self.num_receivers)
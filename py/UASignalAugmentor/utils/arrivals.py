@@ -0,0 +1,286 @@
+"""
+BELLHOP到达结构文件(.arr)读写工具
+
+对应MATLAB: read_arrivals_asc.m, read_arrivals_bin.m
+
+ArrivalData以扁平数组存储全部到达，按 声源深度 → 接收深度 → 接收距离 的顺序拼接
+（与.arr文件中的顺序一致）；counts记录每个 (声源深度, 接收深度, 接收距离) 的到达数，
+offsets为其在扁平数组中的起始位置。
+
+读取不逐行解析：
+- ASCII格式一次将整个文件转换为数值数组（有无法解析的词时报错），只按格点（而非到达）循环定位各到达块，
+  再以一次花式索引取出全部到达；各格点声明的到达数须与数值总数一致
+- 二进制格式（FORTRAN无格式顺序文件）以内存映射按4字节字读取，定位方式相同
+
+只支持2D格式（BELLHOP）。
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple, Union
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 每个到达的字段数：幅值 相位 时延实部 时延虚部 出射角 到达角 海面反射次数 海底反射次数
+ARRIVAL_FIELDS = 8
+
+# FORTRAN无格式记录的记录标记长度（4字节字数），与read_arrivals_bin.m的marker_len一致
+MARKER_LEN = 1
+
+
+@dataclass
+class ArrivalData:
+    """
+    一个.arr文件的全部到达
+
+    Attributes:
+        freq: 频率 (Hz)
+        source_depths: 声源深度 (m)
+        receiver_depths: 接收深度 (m)
+        receiver_ranges: 接收距离 (m)
+        counts: 到达数 (Nsz × Nrz × Nrr)
+        amp: 幅值
+        phase: 相位 (度)
+        delay: 时延 (s)，复数，虚部为体积衰减
+        src_angle: 声源处出射角 (度，向下为正)
+        rcv_angle: 接收处到达角 (度)
+        top_bounces: 海面反射次数
+        bot_bounces: 海底反射次数
+    """
+    freq: float
+    source_depths: np.ndarray
+    receiver_depths: np.ndarray
+    receiver_ranges: np.ndarray
+    counts: np.ndarray
+    amp: np.ndarray
+    phase: np.ndarray
+    delay: np.ndarray
+    src_angle: np.ndarray
+    rcv_angle: np.ndarray
+    top_bounces: np.ndarray
+    bot_bounces: np.ndarray
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """各 (声源深度, 接收深度, 接收距离) 在扁平数组中的起始位置，长度为格点数+1"""
+        return np.concatenate(([0], np.cumsum(self.counts.ravel())))
+
+    def cell(self, isd: int, irz: int, irr: int) -> slice:
+        """
+        单个 (声源深度, 接收深度, 接收距离) 的到达在扁平数组中的区间
+
+        Args:
+            isd: 声源深度序号
+            irz: 接收深度序号
+            irr: 接收距离序号
+
+        Returns:
+            切片，如 data.amp[data.cell(0, irz, irr)]
+        """
+        k = np.ravel_multi_index((isd, irz, irr), self.counts.shape)
+        start = int(self.counts.ravel()[:k].sum())
+        return slice(start, start + int(self.counts.ravel()[k]))
+
+
+def _arrival_rows(starts: np.ndarray, counts: np.ndarray, stride: int) -> np.ndarray:
+    """
+    各到达首个字段的位置
+
+    Args:
+        starts: 每个格点第一个到达的位置
+        counts: 每个格点的到达数
+        stride: 相邻到达的间隔
+
+    Returns:
+        按文件顺序排列的全部到达的位置
+    """
+    first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.arange(int(counts.sum())) - np.repeat(first, counts)
+    return np.repeat(starts, counts) + stride * rank
+
+
+def _arrival_data(freq: float, axes: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                  counts: np.ndarray, table: np.ndarray) -> ArrivalData:
+    """由到达表 (到达数 × 8) 构造ArrivalData"""
+    return ArrivalData(
+        freq=float(freq),
+        source_depths=axes[0],
+        receiver_depths=axes[1],
+        receiver_ranges=axes[2],
+        counts=counts.reshape(len(axes[0]), len(axes[1]), len(axes[2])),
+        amp=table[:, 0].astype(np.float32),
+        phase=table[:, 1].astype(np.float32),
+        delay=table[:, 2].astype(np.float64) + 1j * table[:, 3],
+        src_angle=table[:, 4].astype(np.float32),
+        rcv_angle=table[:, 5].astype(np.float32),
+        top_bounces=table[:, 6].astype(np.int16),
+        bot_bounces=table[:, 7].astype(np.int16),
+    )
+
+
+def read_arrivals_asc(file_path: Union[str, Path]) -> ArrivalData:
+    """
+    读取ASCII格式的到达结构文件
+
+    对应MATLAB: read_arrivals_asc.m
+
+    Args:
+        file_path: .arr文件路径
+
+    Returns:
+        ArrivalData
+
+    Raises:
+        ValueError: 不是2D ASCII格式、含无法解析的数值、被截断或到达数与数值个数不符
+    """
+    with open(file_path, 'rb') as f:
+        flag = f.readline().strip()
+        body = f.read()
+    if flag != b"'2D'":
+        raise ValueError(f"Not a 2D ASCII arrivals file: {file_path}")
+    # 逐词转换：任何无法解析的词都报错，而不是像np.fromstring那样在此处静默截断
+    try:
+        values = np.array(body.split(), dtype=np.float64)
+    except ValueError as e:
+        raise ValueError(f"Malformed arrivals file {file_path}: {e}") from None
+
+    pos = 1
+    axes = []
+    k = 0
+    try:
+        for _ in range(3):
+            n = int(values[pos])
+            axes.append(values[pos + 1:pos + 1 + n])
+            pos += 1 + n
+
+        n_cells = len(axes[1]) * len(axes[2])
+        counts = np.zeros(len(axes[0]) * n_cells, dtype=np.int64)
+        starts = np.zeros_like(counts)
+        for _ in range(len(axes[0])):
+            pos += 1    # 该声源的最大到达数
+            for _ in range(n_cells):
+                n = int(values[pos])
+                if n < 0:
+                    raise ValueError(f"Negative arrival count at value {pos} in {file_path}")
+                counts[k] = n
+                starts[k] = pos + 1
+                pos += 1 + ARRIVAL_FIELDS * n
+                k += 1
+    except IndexError:
+        raise ValueError(f"Truncated arrivals file: {file_path}") from None
+    # 各格点声明的到达数须与文件中的数值个数恰好一致
+    if pos > len(values):
+        raise ValueError(f"Truncated arrivals file: {file_path}")
+    if pos < len(values):
+        raise ValueError(f"Arrivals file {file_path} has {len(values) - pos} values beyond the declared arrivals")
+
+    rows = _arrival_rows(starts, counts, ARRIVAL_FIELDS)
+    table = values[rows[:, None] + np.arange(ARRIVAL_FIELDS)]
+    return _arrival_data(values[0], axes, counts, table)
+
+
+def read_arrivals_bin(file_path: Union[str, Path], marker_len: int = MARKER_LEN) -> ArrivalData:
+    """
+    读取二进制格式的到达结构文件（FORTRAN无格式顺序文件，小端）
+
+    对应MATLAB: read_arrivals_bin.m
+
+    文件以内存映射方式打开，只读取用到的字
+
+    Args:
+        file_path: .arr文件路径
+        marker_len: 记录标记长度（4字节字数），多数编译器为1
+
+    Returns:
+        ArrivalData
+    """
+    words = np.memmap(file_path, dtype='<i4', mode='r')
+    floats = words.view('<f4')
+    m = marker_len
+    if words[m:m + 1].tobytes() != b"'2D'":
+        raise ValueError(f"Not a 2D binary arrivals file: {file_path}")
+
+    pos = 3 * m + 1                 # 跳过标志记录和频率记录的起始标记
+    freq = floats[pos]
+    pos += 1 + 2 * m
+    axes = []
+    for width in (1, 1, 2):         # 接收距离为float64
+        n = int(words[pos])
+        data = words[pos + 1:pos + 1 + width * n]
+        axes.append(np.array(data.view('<f8') if width == 2 else data.view('<f4'), dtype=np.float64))
+        pos += 1 + width * n + 2 * m
+
+    n_cells = len(axes[1]) * len(axes[2])
+    counts = np.zeros(len(axes[0]) * n_cells, dtype=np.int64)
+    starts = np.zeros_like(counts)
+    stride = ARRIVAL_FIELDS + 2 * m
+    k = 0
+    try:
+        for _ in range(len(axes[0])):
+            pos += 1 + 2 * m        # 该声源的最大到达数
+            for _ in range(n_cells):
+                n = int(words[pos])
+                counts[k] = n
+                starts[k] = pos + 1 + 2 * m
+                pos += 1 + 2 * m + stride * n
+                k += 1
+    except IndexError:
+        raise ValueError(f"Truncated arrivals file: {file_path}") from None
+    if pos - m > len(words):
+        raise ValueError(f"Truncated arrivals file: {file_path}")
+
+    rows = _arrival_rows(starts, counts, stride)
+    table = floats[rows[:, None] + np.arange(ARRIVAL_FIELDS)]
+    return _arrival_data(freq, axes, counts, table)
+
+
+def read_arrivals(file_path: Union[str, Path]) -> ArrivalData:
+    """
+    读取到达结构文件，自动识别ASCII/二进制格式
+
+    Args:
+        file_path: .arr文件路径
+
+    Returns:
+        ArrivalData
+
+    Raises:
+        ValueError: 不是2D ASCII格式、含无法解析的数值、被截断或到达数与数值个数不符
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(16)
+    if head.lstrip().startswith(b"'2D'"):
+        return read_arrivals_asc(file_path)
+    return read_arrivals_bin(file_path)
+
+
+def write_arrivals_asc(file_path: Union[str, Path], data: ArrivalData) -> None:
+    """
+    写出ASCII格式的到达结构文件（与BELLHOP写出的格式一致，可由read_arrivals_asc.m读取）
+
+    Args:
+        file_path: .arr文件路径
+        data: 到达数据
+    """
+    lines = ["'2D'", f"{data.freq:.8f}"]
+    for axis in (data.source_depths, data.receiver_depths, data.receiver_ranges):
+        lines.append(f"{len(axis):12d} " + " ".join(f"{v:.7f}" for v in axis))
+
+    offsets = data.offsets
+    counts = data.counts.reshape(len(data.source_depths), -1)
+    k = 0
+    for isd in range(counts.shape[0]):
+        lines.append(f"{int(counts[isd].max(initial=0)):12d}")
+        for n in counts[isd]:
+            lines.append(f"{int(n):12d}")
+            for j in range(offsets[k], offsets[k] + n):
+                lines.append(
+                    f"{data.amp[j]:17.8E} {data.phase[j]:14.6f} {data.delay[j].real:16.8f} "
+                    f"{data.delay[j].imag:17.8E} {data.src_angle[j]:14.7f} {data.rcv_angle[j]:14.7f} "
+                    f"{data.top_bounces[j]:11d} {data.bot_bounces[j]:11d}"
+                )
+            k += 1
+    with open(file_path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
@@ -7,6 +7,10 @@ BELLHOP文件写入工具
 - 生成 .ssp 文件（声速剖面集合）
 - 生成 .trc 文件（海面反射系数）
 - 生成 .brc 文件（海底反射系数）
+- 逐频率批量生成 .trc/.brc 文件（所有频率一次广播计算）
+
+辅助文件（.bty/.ssp/.trc/.brc）的写入函数可传入BlobStore，内容存入内容寻址存储，
+目标文件名以链接形式指向存储中的blob（见utils.blob_store）
 
 参考MATLAB函数：
 - write_env.m
@@ -17,15 +21,34 @@ BELLHOP文件写入工具
 - RefCoeBw.m
 """
 
+import io
+import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 import logging
 
+from .blob_store import BlobStore
+
 
 logger = logging.getLogger(__name__)
 
 
+def _save_text(file_path: str, text: str, store: Optional[BlobStore]) -> None:
+    """
+    写出文本文件；给定store时存入内容寻址存储并以链接物化
+    
+    直接写出时，已有的链接文件先删除，避免写穿硬链接修改存储中共享的blob
+    """
+    if store is not None:
+        store.write_text(file_path, text)
+        return
+    if os.path.islink(file_path) or (os.path.exists(file_path) and os.stat(file_path).st_nlink > 1):
+        os.unlink(file_path)
+    with open(file_path, 'w') as f:
+        f.write(text)
+
+
 # ==================== .env 文件写入 ====================
 
 def write_env(envfil: str, model: str, title: str, freq: float,
@@ -153,7 +176,8 @@ def _write_bell(f, beam: Dict) -> None:
 
 # ==================== .bty 文件写入 ====================
 
-def write_bty(envfil: str, interp_type: str, bathm: Dict) -> None:
+def write_bty(envfil: str, interp_type: str, bathm: Dict,
+              store: Optional[BlobStore] = None) -> None:
     """
     生成海底地形文件 (.bty)
     
@@ -163,24 +187,27 @@ def write_bty(envfil: str, interp_type: str, bathm: Dict) -> None:
         envfil: 文件名（不含.bty后缀）
         interp_type: 插值类型（如 "'LS'"）
         bathm: 海底地形字典 {'r': 距离数组, 'd': 深度数组}
+        store: 内容寻址存储，None表示直接写出文件
     """
     bty_file = envfil + '.bty' if not envfil.endswith('.bty') else envfil
     
-    with open(bty_file, 'w') as f:
-        f.write(f"{interp_type}\n")
-        
-        N = len(bathm['r'])
-        f.write(f"{N}\n")
-        
-        for i in range(N):
-            f.write(f"{bathm['r'][i]:f} {bathm['d'][i]:f}\n")
+    f = io.StringIO()
+    f.write(f"{interp_type}\n")
+    
+    N = len(bathm['r'])
+    f.write(f"{N}\n")
+    
+    for i in range(N):
+        f.write(f"{bathm['r'][i]:f} {bathm['d'][i]:f}\n")
+    _save_text(bty_file, f.getvalue(), store)
     
     logger.info(f"已生成 .bty 文件: {bty_file}")
 
 
 # ==================== .ssp 文件写入 ====================
 
-def write_ssp(filename: str, rkm: np.ndarray, ssp: np.ndarray) -> None:
+def write_ssp(filename: str, rkm: np.ndarray, ssp: np.ndarray,
+              store: Optional[BlobStore] = None) -> None:
     """
     生成声速剖面集合文件 (.ssp)
     
@@ -190,75 +217,85 @@ def write_ssp(filename: str, rkm: np.ndarray, ssp: np.ndarray) -> None:
         filename: 文件名（不含.ssp后缀）
         rkm: 距离数组 (km)
         ssp: 声速矩阵 (Ndepth × Nrange)
+        store: 内容寻址存储，None表示直接写出文件
     """
     ssp_file = filename + '.ssp' if not filename.endswith('.ssp') else filename
     
     Npts = len(rkm)
     
-    with open(ssp_file, 'w') as f:
-        # 第1行：距离点数
-        f.write(f"{Npts}\n")
-        
-        # 第2行：距离数组
-        for r in rkm:
-            f.write(f"{r:6.3f} ")
+    f = io.StringIO()
+    # 第1行：距离点数
+    f.write(f"{Npts}\n")
+    
+    # 第2行：距离数组
+    for r in rkm:
+        f.write(f"{r:6.3f} ")
+    f.write("\n")
+    
+    # 后续行：每个深度的声速
+    for i in range(ssp.shape[0]):
+        for j in range(ssp.shape[1]):
+            f.write(f"{ssp[i, j]:6.1f} ")
         f.write("\n")
-        
-        # 后续行：每个深度的声速
-        for i in range(ssp.shape[0]):
-            for j in range(ssp.shape[1]):
-                f.write(f"{ssp[i, j]:6.1f} ")
-            f.write("\n")
+    _save_text(ssp_file, f.getvalue(), store)
     
     logger.info(f"已生成 .ssp 文件: {ssp_file}")
 
 
 # ==================== .trc 文件写入（海面反射系数）====================
 
+# 海况等级(0-8)对应的波高 (m)
+WAVE_HEIGHT = [0, 0.1, 0.5, 1.25, 2.5, 4, 6, 9, 14]
+
+# 反射系数表的角度网格：0°到90°，步长1°
+REFLECTION_ANGLES = np.arange(0, 91)
+
+
+def surface_reflection(freqs: np.ndarray, c_surface: float, sea_state_level: int) -> np.ndarray:
+    """
+    各频率的海面反射系数幅值（Rayleigh粗糙度修正）
+    
+    所有频率在 (频率 × 角度) 网格上一次广播计算
+    
+    Args:
+        freqs: 频率数组 (Hz)
+        c_surface: 海面声速 (m/s)
+        sea_state_level: 海况等级 (0-8)
+        
+    Returns:
+        反射系数幅值 (len(freqs) × 91)
+    """
+    sigma = WAVE_HEIGHT[sea_state_level] * 0.707
+    k = 2 * np.pi * np.asarray(freqs, dtype=float)[:, None] / c_surface
+    tau = 2 * k * sigma * np.sin(np.deg2rad(REFLECTION_ANGLES))
+    Re_top = -np.exp(-0.5 * tau**2)
+    return np.abs(Re_top)
+
+
 def write_trc(freqvec: List[float], c_surface: float, 
-              sea_state_level: int, out_filename: str) -> np.ndarray:
+              sea_state_level: int, out_filename: str,
+              store: Optional[BlobStore] = None) -> np.ndarray:
     """
     生成海面反射系数文件 (.trc)
     
     对应MATLAB: TopReCoe.m
     
     Args:
-        freqvec: 频率数组 (Hz)
+        freqvec: 频率数组 (Hz)，多个频率时取幅值的平均
         c_surface: 海面声速 (m/s)
         sea_state_level: 海况等级 (0-8)
         out_filename: 输出文件名（不含.trc后缀）
+        store: 内容寻址存储，None表示直接写出文件
         
     Returns:
         result_R: 反射系数矩阵 (91 × 3: 角度/幅值/相位)
     """
-    # 海况等级对应的波高
-    wave_height = [0, 0.1, 0.5, 1.25, 2.5, 4, 6, 9, 14]
-    sigma = wave_height[sea_state_level] * 0.707
-    
-    theta = np.arange(0, 91)  # 0°到90°
-    Re_mean = np.zeros_like(theta, dtype=float)
-    
-    for freq in freqvec:
-        k = 2 * np.pi * freq / c_surface
-        tau = 2 * k * sigma * np.sin(np.deg2rad(theta))
-        Re_top = -np.exp(-0.5 * tau**2)
-        Re_mean += np.abs(Re_top)
-    
-    Re_mean /= len(freqvec)
-    
-    # 构造输出矩阵 (角度, 幅值, 相位)
-    result_R = np.zeros((len(theta), 3))
-    result_R[:, 0] = theta
-    result_R[:, 1] = Re_mean
-    result_R[:, 2] = 180  # 相位固定为180°
+    Re_mean = surface_reflection(freqvec, c_surface, sea_state_level).sum(axis=0) / len(freqvec)
+    result_R = _reflection_table(Re_mean, 180)  # 相位固定为180°
     
     # 写入文件
     trc_file = out_filename + '.trc' if not out_filename.endswith('.trc') else out_filename
-    
-    with open(trc_file, 'w') as f:
-        f.write(f"{len(result_R)} \n")
-        for row in result_R:
-            f.write(f"{row[0]:6.2f}  {row[1]:6.2f}  {row[2]:6.2f}\n")
+    _save_text(trc_file, _format_reflection(result_R), store)
     
     logger.info(f"已生成 .trc 文件: {trc_file}")
     return result_R
@@ -266,24 +303,8 @@ def write_trc(freqvec: List[float], c_surface: float,
 
 # ==================== .brc 文件写入（海底反射系数）====================
 
-def write_brc(base_type: str, envfil: str, freqvec: List[float],
-              ssp_end: float, alpha_b: float = 0.05) -> np.ndarray:
-    """
-    生成海底反射系数文件 (.brc)
-    
-    对应MATLAB: RefCoeBw.m
-    
-    Args:
-        base_type: 海底类型 ('IMG', 'D05', 'D40', 'SCS-4')
-        envfil: 输出文件名（不含.brc后缀）
-        freqvec: 频率数组 (Hz)
-        ssp_end: 海水最底层声速 (m/s)
-        alpha_b: 海底衰减系数 (dB/lambda), 默认0.05
-        
-    Returns:
-        result_R: 反射系数矩阵 (91 × 3: 掠射角/幅值/相位)
-    """
-    # 根据海底类型定义分层参数
+def _bottom_layers(base_type: str, ssp_end: float, alpha_b: float) -> Dict[str, List[float]]:
+    """海底类型对应的分层参数 {'speed', 'layer_depth', 'rho_D', 'alpha_p'}"""
     if base_type == 'IMG':
         # 镜面反射（理想海底）
         speed = [ssp_end, 1500]
@@ -308,43 +329,153 @@ def write_brc(base_type: str, envfil: str, freqvec: List[float],
         alpha_p = [0] + [alpha_b] * (len(rho_D) - 1)
     else:
         raise ValueError(f"未知的海底类型: {base_type}")
+    return {'speed': speed, 'layer_depth': layer_depth, 'rho_D': rho_D, 'alpha_p': alpha_p}
+
+
+def bottom_reflection(base_type: str, freqs: np.ndarray, ssp_end: float,
+                      alpha_b: float = 0.05) -> np.ndarray:
+    """
+    各频率的海底反射系数幅值（多层介质）
+    
+    所有频率在 (频率 × 掠射角) 网格上一次广播计算，逐层递推只循环层数次
     
-    angle_graze = np.arange(0, 91)  # 0°到90°掠射角
-    result_R1 = np.zeros_like(angle_graze, dtype=float)
+    Args:
+        base_type: 海底类型 ('IMG', 'D05', 'D40', 'SCS-4')
+        freqs: 频率数组 (Hz)
+        ssp_end: 海水最底层声速 (m/s)
+        alpha_b: 海底衰减系数 (dB/lambda)
+        
+    Returns:
+        反射系数幅值 (len(freqs) × 91)
+    """
+    layers = _bottom_layers(base_type, ssp_end, alpha_b)
+    freqs = np.asarray(freqs, dtype=float)
+    R_multilayer = _compute_multilayer_reflection(
+        freqs[:, None], layers['speed'], layers['layer_depth'],
+        layers['rho_D'], layers['alpha_p'], REFLECTION_ANGLES
+    )
+    # 两层介质（IMG）的反射系数与频率无关，广播到每个频率
+    R_multilayer = np.broadcast_to(R_multilayer, (len(freqs), len(REFLECTION_ANGLES))).copy()
+    R_multilayer[np.isnan(R_multilayer)] = 1
+    return np.abs(R_multilayer)
+
+
+def write_brc(base_type: str, envfil: str, freqvec: List[float],
+              ssp_end: float, alpha_b: float = 0.05,
+              store: Optional[BlobStore] = None) -> np.ndarray:
+    """
+    生成海底反射系数文件 (.brc)
     
-    # 对每个频率计算反射系数
-    for freq in freqvec:
-        R_multilayer = _compute_multilayer_reflection(
-            freq, speed, layer_depth, rho_D, alpha_p, angle_graze
-        )
-        R_multilayer[np.isnan(R_multilayer)] = 1
-        result_R1 += np.abs(R_multilayer)
+    对应MATLAB: RefCoeBw.m
     
-    # 构造输出矩阵
-    result_R = np.zeros((len(angle_graze), 3))
-    result_R[:, 0] = angle_graze
-    result_R[:, 1] = result_R1 / len(freqvec)
-    result_R[:, 2] = 0  # 相位
+    Args:
+        base_type: 海底类型 ('IMG', 'D05', 'D40', 'SCS-4')
+        envfil: 输出文件名（不含.brc后缀）
+        freqvec: 频率数组 (Hz)，多个频率时取幅值的平均
+        ssp_end: 海水最底层声速 (m/s)
+        alpha_b: 海底衰减系数 (dB/lambda), 默认0.05
+        store: 内容寻址存储，None表示直接写出文件
+        
+    Returns:
+        result_R: 反射系数矩阵 (91 × 3: 掠射角/幅值/相位)
+    """
+    result_R1 = bottom_reflection(base_type, freqvec, ssp_end, alpha_b).sum(axis=0)
+    result_R = _reflection_table(result_R1 / len(freqvec), 0)  # 相位
     
     # 写入文件
     brc_file = envfil + '.brc' if not envfil.endswith('.brc') else envfil
-    
-    with open(brc_file, 'w') as f:
-        f.write(f"{len(angle_graze)} \n")
-        for row in result_R:
-            f.write(f"{row[0]:6.2f}  {row[1]:6.2f}  {row[2]:6.2f}\n")
+    _save_text(brc_file, _format_reflection(result_R), store)
     
     logger.info(f"已生成 .brc 文件: {brc_file}")
     return result_R
 
 
-def _compute_multilayer_reflection(freq: float, speed: List[float], 
+# ==================== 逐频率反射系数表 ====================
+
+def reflection_texts(freqs: np.ndarray, c_surface: float, sea_state_level: int,
+                     base_type: str, ssp_end: float, alpha_b: float = 0.05) -> Tuple[List[str], List[str]]:
+    """
+    一次计算各频率的.trc/.brc文件内容
+    
+    与对每个频率单独调用 write_trc([freq], ...) / write_brc(..., [freq], ...) 写出的内容一致
+    
+    Args:
+        freqs: 频率数组 (Hz)
+        c_surface: 海面声速 (m/s)
+        sea_state_level: 海况等级 (0-8)
+        base_type: 海底类型 ('IMG', 'D05', 'D40', 'SCS-4')
+        ssp_end: 海水最底层声速 (m/s)
+        alpha_b: 海底衰减系数 (dB/lambda)
+        
+    Returns:
+        (trc_texts, brc_texts)，与freqs一一对应
+    """
+    top = surface_reflection(freqs, c_surface, sea_state_level)
+    bottom = bottom_reflection(base_type, freqs, ssp_end, alpha_b)
+    return _format_rows(top, 180), _format_rows(bottom, 0)
+
+
+def write_reflection_files(out_filenames: List[str], freqvec: List[float], c_surface: float,
+                           sea_state_level: int, base_type: str, ssp_end: float,
+                           alpha_b: float = 0.05, store: Optional[BlobStore] = None) -> None:
+    """
+    为每个频率写出各自的.trc/.brc文件
+    
+    反射系数在 (频率 × 角度) 网格上一次计算，结果与逐频率调用write_trc/write_brc一致
+    
+    Args:
+        out_filenames: 输出文件名列表（不含后缀），与freqvec一一对应
+        freqvec: 频率数组 (Hz)
+        c_surface: 海面声速 (m/s)
+        sea_state_level: 海况等级 (0-8)
+        base_type: 海底类型 ('IMG', 'D05', 'D40', 'SCS-4')
+        ssp_end: 海水最底层声速 (m/s)
+        alpha_b: 海底衰减系数 (dB/lambda)
+        store: 内容寻址存储，None表示直接写出文件
+    """
+    if len(out_filenames) != len(freqvec):
+        raise ValueError(f"Got {len(out_filenames)} file names for {len(freqvec)} frequencies")
+    trc_texts, brc_texts = reflection_texts(freqvec, c_surface, sea_state_level, base_type, ssp_end, alpha_b)
+    for name, trc_text, brc_text in zip(out_filenames, trc_texts, brc_texts):
+        _save_text(name + '.trc', trc_text, store)
+        _save_text(name + '.brc', brc_text, store)
+    
+    logger.info(f"已生成 {len(out_filenames)} 组逐频率 .trc/.brc 文件")
+
+
+def _format_rows(amplitude: np.ndarray, phase: float) -> List[str]:
+    """逐行格式化反射系数表；相同的行（如与频率无关的海底/平静海面）只格式化一次"""
+    if len(amplitude) == 0:
+        return []
+    unique, inverse = np.unique(amplitude, axis=0, return_inverse=True)
+    texts = [_format_reflection(_reflection_table(row, phase)) for row in unique]
+    return [texts[k] for k in inverse.ravel()]
+
+
+def _reflection_table(amplitude: np.ndarray, phase: float) -> np.ndarray:
+    """构造反射系数矩阵 (角度, 幅值, 相位)"""
+    result_R = np.zeros((len(REFLECTION_ANGLES), 3))
+    result_R[:, 0] = REFLECTION_ANGLES
+    result_R[:, 1] = amplitude
+    result_R[:, 2] = phase
+    return result_R
+
+
+def _format_reflection(result_R: np.ndarray) -> str:
+    """反射系数表 (角度, 幅值, 相位) 的.trc/.brc文本"""
+    return f"{len(result_R)} \n" + "".join(
+        f"{row[0]:6.2f}  {row[1]:6.2f}  {row[2]:6.2f}\n" for row in result_R.tolist()
+    )
+
+
+def _compute_multilayer_reflection(freq, speed: List[float], 
                                    layer_depth: List[float], rho_D: List[float],
                                    alpha_p: List[float], angle_graze: np.ndarray) -> np.ndarray:
     """
     计算多层介质的反射系数
     
-    使用递归算法从最底层向上计算
+    使用递归算法从最底层向上计算；freq可为标量或 (F, 1) 数组，
+    为数组时结果为 (F, len(angle_graze))
     """
     n_layers = len(speed)
     
@@ -0,0 +1,238 @@
+"""
+内容寻址文件存储工具
+
+BELLHOP辅助文件（.bty/.ssp/.trc/.brc）只取决于坐标组的测线，同一坐标组各Rr目录、
+以及按频率复制出的各test_i文件内容完全相同。本模块将文件内容按sha256存为一个blob，
+各处的文件名以硬链接或符号链接指向该blob，避免重复占用磁盘空间和inode。
+
+存储目录结构:
+    store_dir/
+    └── xx/<sha256>      # 文件内容（不可原地修改，所有链接共享）
+
+链接方式:
+    - hardlink: 硬链接，不占用额外inode和数据块（要求与存储目录在同一文件系统）
+    - symlink: 相对路径符号链接，每个链接占用一个inode，不占数据块
+    - copy: 直接复制（不去重，用于对照或不支持链接的文件系统）
+硬链接/符号链接失败时退化为复制，并计入报告。
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Set, Union
+import logging
+
+from .io_utils import ensure_dir
+
+logger = logging.getLogger(__name__)
+
+LINK_MODES = ('hardlink', 'symlink', 'copy')
+
+
+def _replace_with(dst: Path, create) -> None:
+    """
+    以临时名创建文件后原子替换dst
+
+    先unlink再写会在中途出错时丢失文件；直接写入已有路径则可能写穿硬链接修改共享的blob
+    """
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        create(tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class BlobStore:
+    """
+    内容寻址文件存储
+
+    Attributes:
+        root: 存储目录
+        link_mode: 链接方式 'hardlink' | 'symlink' | 'copy'
+        files: 本次运行物化的文件数
+        logical_bytes: 物化文件的总字节数（不去重时应占用的空间）
+        copies: 以复制方式物化的文件数
+        copied_bytes: 以复制方式物化的字节数
+    """
+
+    def __init__(self, root: Union[str, Path], link_mode: str = 'hardlink'):
+        """
+        初始化存储
+
+        Args:
+            root: 存储目录（硬链接方式下应与输出目录在同一文件系统）
+            link_mode: 链接方式 'hardlink' | 'symlink' | 'copy'
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link_mode: {link_mode}, expected one of {LINK_MODES}")
+        self.root = ensure_dir(root)
+        self.link_mode = link_mode
+        self.files = 0
+        self.logical_bytes = 0
+        self.copies = 0
+        self.copied_bytes = 0
+        self._blobs: Dict[str, int] = {}     # 本次运行引用的blob → 大小
+        self._written: Set[str] = set()      # 本次运行新写入的blob
+        self._lock = threading.Lock()        # 计数可由多个线程同时更新
+
+    def blob_path(self, digest: str) -> Path:
+        """blob在存储目录中的路径"""
+        return self.root / digest[:2] / digest
+
+    def put_bytes(self, data: bytes) -> str:
+        """
+        存入文件内容（已存在时不重复写入）
+
+        Args:
+            data: 文件内容
+
+        Returns:
+            内容摘要（sha256）
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in self._blobs:
+            path = self.blob_path(digest)
+            written = False
+            if not path.exists():
+                ensure_dir(path.parent)
+                _replace_with(path, lambda tmp: tmp.write_bytes(data))
+                written = True
+            with self._lock:
+                self._blobs[digest] = len(data)
+                if written:
+                    self._written.add(digest)
+        return digest
+
+    def put_file(self, src: Union[str, Path]) -> str:
+        """
+        存入已有文件的内容
+
+        Args:
+            src: 源文件路径
+
+        Returns:
+            内容摘要（sha256）
+        """
+        return self.put_bytes(Path(src).read_bytes())
+
+    def materialize(self, digest: str, dst: Union[str, Path]) -> Path:
+        """
+        在dst处创建指向blob的文件（已有文件被原子替换）
+
+        Args:
+            digest: put_bytes/put_file返回的内容摘要
+            dst: 目标文件路径
+
+        Returns:
+            目标文件路径
+        """
+        dst = Path(dst)
+        blob = self.blob_path(digest)
+
+        def create(tmp: Path) -> None:
+            if self.link_mode == 'hardlink':
+                try:
+                    os.link(blob, tmp)
+                    return
+                except OSError:
+                    pass
+            elif self.link_mode == 'symlink':
+                try:
+                    os.symlink(os.path.relpath(blob, tmp.parent), tmp)
+                    return
+                except OSError:
+                    pass
+            shutil.copyfile(blob, tmp)
+            with self._lock:
+                self.copies += 1
+                self.copied_bytes += self._blobs[digest]
+
+        _replace_with(dst, create)
+        with self._lock:
+            self.files += 1
+            self.logical_bytes += self._blobs[digest]
+        return dst
+
+    def write_bytes(self, dst: Union[str, Path], data: bytes) -> Path:
+        """存入内容并在dst处物化"""
+        return self.materialize(self.put_bytes(data), dst)
+
+    def write_text(self, dst: Union[str, Path], text: str) -> Path:
+        """
+        存入文本并在dst处物化
+
+        换行符按平台转换，与以文本模式open(dst, 'w')写出的字节一致
+        """
+        if os.linesep != '\n':
+            text = text.replace('\n', os.linesep)
+        return self.write_bytes(dst, text.encode())
+
+    def report(self) -> Dict[str, Any]:
+        """
+        本次运行的去重报告
+
+        Returns:
+            {
+                'link_mode': str,
+                'files': int,            # 物化的文件数
+                'unique_blobs': int,     # 引用的不同内容数
+                'new_blobs': int,        # 新写入存储的blob数
+                'logical_bytes': int,    # 不去重时的总字节数
+                'stored_bytes': int,     # 引用的blob总字节数
+                'bytes_saved': int,
+                'inodes_saved': int,     # 硬链接不占inode，符号链接和复制各占一个
+                'copies': int            # 以复制方式物化的文件数
+            }
+        """
+        stored = sum(self._blobs.values())
+        if self.link_mode == 'copy':
+            bytes_saved = inodes_saved = 0
+        else:
+            bytes_saved = max(self.logical_bytes - self.copied_bytes - stored, 0)
+            linked = self.files - self.copies
+            inodes_saved = max(linked - len(self._blobs), 0) if self.link_mode == 'hardlink' else 0
+        return {
+            'link_mode': self.link_mode,
+            'files': self.files,
+            'unique_blobs': len(self._blobs),
+            'new_blobs': len(self._written),
+            'logical_bytes': self.logical_bytes,
+            'stored_bytes': stored,
+            'bytes_saved': bytes_saved,
+            'inodes_saved': inodes_saved,
+            'copies': self.copies,
+        }
+
+    def take_counts(self) -> Dict[str, Any]:
+        """
+        取出并清零本实例的计数（用于由工作进程汇总到主进程，见merge_counts）
+        """
+        with self._lock:
+            counts = {'files': self.files, 'logical_bytes': self.logical_bytes,
+                      'copies': self.copies, 'copied_bytes': self.copied_bytes,
+                      'blobs': self._blobs, 'written': self._written}
+            self.files = self.logical_bytes = self.copies = self.copied_bytes = 0
+            self._blobs, self._written = {}, set()
+        return counts
+
+    def merge_counts(self, counts: Dict[str, Any]) -> None:
+        """并入take_counts取出的计数"""
+        with self._lock:
+            self.files += counts['files']
+            self.logical_bytes += counts['logical_bytes']
+            self.copies += counts['copies']
+            self.copied_bytes += counts['copied_bytes']
+            self._blobs.update(counts['blobs'])
+            self._written |= counts['written']
+
+
+def format_report(report: Dict[str, int]) -> str:
+    """去重报告的单行摘要"""
+    return (f"{report['files']} files -> {report['unique_blobs']} blobs ({report['link_mode']}), "
+            f"saved {report['bytes_saved'] / 2**20:.2f} MiB and {report['inodes_saved']} inodes"
+            + (f", {report['copies']} copied" if report['copies'] else ""))
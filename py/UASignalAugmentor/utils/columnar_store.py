@@ -0,0 +1,342 @@
+"""
+列式分析结果存储工具
+
+将一个船舶类别下所有文件的分段分析结果（amp/freq/phase）拼接为扁平的定型数组，
+并用CSR风格的偏移表索引，每个类别一个分片目录，可通过 np.load(mmap_mode='r') 零拷贝读取。
+
+分片目录结构:
+    <ship_class>.shard/
+    ├── amp.npy, freq.npy, phase.npy   # 所有段的分量拼接 (float64)
+    ├── seg_offsets.npy                # 段 → 分量区间，长度 = 总段数+1
+    ├── file_seg_offsets.npy           # 文件 → 段区间，长度 = 文件数+1
+    ├── n_delay.npy                    # 各段时延拼接
+    ├── file_delay_offsets.npy         # 文件 → 时延区间
+    ├── analy_freq.npy                 # 各文件频率并集拼接
+    ├── file_freq_offsets.npy          # 文件 → 频率并集区间
+    └── meta.json                      # 分片标识、采样率、源文件等元数据
+"""
+
+import os
+import shutil
+import struct
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+import numpy as np
+import logging
+
+from .io_utils import ensure_dir, save_json, load_json, load_array
+
+logger = logging.getLogger(__name__)
+
+SHARD_SUFFIX = '.shard'
+FORMAT_VERSION = 1
+
+
+def pack_record(fs: int, n_delay: np.ndarray, segments: List[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                analy_freq: np.ndarray, source_file: str) -> Dict[str, Any]:
+    """
+    将单个文件的分析结果打包为扁平数组
+
+    Args:
+        fs: 采样率
+        n_delay: 各段时延
+        segments: 各段 (amp, freq, phase)
+        analy_freq: 文件频率并集
+        source_file: 源文件路径
+
+    Returns:
+        打包后的记录字典
+    """
+    seg_lengths = np.array([len(amp) for amp, _, _ in segments], dtype=np.int64)
+
+    def concat(k: int) -> np.ndarray:
+        if not segments:
+            return np.zeros(0, dtype=np.float64)
+        return np.concatenate([np.asarray(seg[k], dtype=np.float64) for seg in segments])
+
+    return {
+        'fs': int(fs),
+        'source_file': source_file,
+        'n_delay': np.asarray(n_delay, dtype=np.float64),
+        'analy_freq': np.asarray(analy_freq, dtype=np.float64),
+        'seg_lengths': seg_lengths,
+        'amp': concat(0),
+        'freq': concat(1),
+        'phase': concat(2),
+    }
+
+
+def _concat(arrays: List[np.ndarray], dtype) -> np.ndarray:
+    if not arrays:
+        return np.zeros(0, dtype=dtype)
+    return np.concatenate(arrays).astype(dtype, copy=False)
+
+
+def _lengths(arrays: List[np.ndarray]) -> np.ndarray:
+    return np.array([len(a) for a in arrays], dtype=np.int64)
+
+
+class _NpyAppender:
+    """
+    逐块追加写出一维.npy数组
+
+    头部预留定长空间，关闭时按实际长度回填，写出过程中无需在内存中保留已写数据
+    """
+
+    HEADER_SIZE = 128
+
+    def __init__(self, path: Path, dtype):
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self._file = open(path, 'wb')
+        self._file.write(self._header())
+
+    def _header(self) -> bytes:
+        header = repr({
+            'descr': np.lib.format.dtype_to_descr(self.dtype),
+            'fortran_order': False,
+            'shape': (self.length,),
+        }).encode('latin1')
+        header_len = self.HEADER_SIZE - len(np.lib.format.MAGIC_PREFIX) - 4
+        return (np.lib.format.MAGIC_PREFIX + bytes([1, 0]) + struct.pack('<H', header_len)
+                + header.ljust(header_len - 1) + b'\n')
+
+    def append(self, arr: np.ndarray) -> None:
+        arr = np.ascontiguousarray(arr, dtype=self.dtype)
+        self._file.write(arr.tobytes())
+        self.length += len(arr)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(self._header())
+        self._file.close()
+
+
+class ColumnarShardWriter:
+    """
+    列式分片写入器
+
+    逐文件add()打包记录，每累积flush_every个文件追加写出一次，内存占用与文件总数无关。
+    数据先写入同级临时目录，close()时再替换已有分片：运行中断时旧分片保持不变，
+    运行期间也可继续从旧分片读取（结果缓存命中时即如此）。
+
+    Attributes:
+        shard_dir: 分片目录路径
+        ship_class: 船舶类别
+        shard_id: 本次写出的分片标识（写入meta.json，缓存条目据此判断行号是否仍然有效）
+    """
+
+    # 数据列及其类型，offsets列均以0开头
+    COLUMNS = {
+        'amp': np.float64, 'freq': np.float64, 'phase': np.float64, 'seg_offsets': np.int64,
+        'file_seg_offsets': np.int64, 'n_delay': np.float64, 'file_delay_offsets': np.int64,
+        'analy_freq': np.float64, 'file_freq_offsets': np.int64,
+    }
+
+    def __init__(self, shard_dir: Union[str, Path], ship_class: str, flush_every: int = 64):
+        """
+        初始化写入器
+
+        Args:
+            shard_dir: 分片目录路径（close()时覆盖已有分片）
+            ship_class: 船舶类别
+            flush_every: 每累积多少个文件的记录追加写出一次
+        """
+        self.shard_dir = Path(shard_dir)
+        self.ship_class = ship_class
+        self.flush_every = max(1, int(flush_every))
+        self.shard_id = uuid.uuid4().hex
+
+        self._tmp_dir = self.shard_dir.with_name(
+            f".{self.shard_dir.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        if self._tmp_dir.exists():
+            shutil.rmtree(self._tmp_dir)
+        ensure_dir(self._tmp_dir)
+        self._columns = {name: _NpyAppender(self._tmp_dir / f'{name}.npy', dtype)
+                         for name, dtype in self.COLUMNS.items()}
+        for name in ('seg_offsets', 'file_seg_offsets', 'file_delay_offsets', 'file_freq_offsets'):
+            self._columns[name].append(np.zeros(1, dtype=np.int64))
+
+        self._fs: List[int] = []
+        self._source_file: List[str] = []
+        self._pending: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._source_file)
+
+    def add(self, record: Dict[str, Any]) -> int:
+        """
+        追加一个文件的打包记录（由pack_record生成）
+
+        Returns:
+            该文件在分片中的行号
+        """
+        row = len(self)
+        self._fs.append(record['fs'])
+        self._source_file.append(record['source_file'])
+        self._pending.append(record)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+        return row
+
+    def flush(self) -> None:
+        """将缓冲的记录追加写出到临时目录"""
+        records, self._pending = self._pending, []
+        if not records:
+            return
+        cols = self._columns
+        seg_lengths = _concat([r['seg_lengths'] for r in records], np.int64)
+
+        # 偏移表接着已写出部分的总长度继续累加
+        num_segments = cols['seg_offsets'].length - 1
+        cols['seg_offsets'].append(cols['amp'].length + np.cumsum(seg_lengths))
+        cols['file_seg_offsets'].append(
+            num_segments + np.cumsum(_lengths([r['seg_lengths'] for r in records])))
+        cols['file_delay_offsets'].append(
+            cols['n_delay'].length + np.cumsum(_lengths([r['n_delay'] for r in records])))
+        cols['file_freq_offsets'].append(
+            cols['analy_freq'].length + np.cumsum(_lengths([r['analy_freq'] for r in records])))
+        for name in ('amp', 'freq', 'phase', 'n_delay', 'analy_freq'):
+            cols[name].append(_concat([r[name] for r in records], np.float64))
+
+    def close(self) -> Path:
+        """
+        写出剩余记录和元数据，并用临时目录替换已有分片
+
+        Returns:
+            分片目录路径
+        """
+        self.flush()
+        for column in self._columns.values():
+            column.close()
+
+        save_json({
+            'format_version': FORMAT_VERSION,
+            'shard_id': self.shard_id,
+            'ship_class': self.ship_class,
+            'fs': self._fs,
+            'source_file': self._source_file,
+        }, self._tmp_dir / 'meta.json')
+
+        if self.shard_dir.exists():
+            shutil.rmtree(self.shard_dir)
+        os.replace(self._tmp_dir, self.shard_dir)
+
+        num_segments = self._columns['seg_offsets'].length - 1
+        logger.info(f"Saved columnar shard ({len(self)} files, {num_segments} segments) to: {self.shard_dir}")
+        return self.shard_dir
+
+    def discard(self) -> None:
+        """放弃写出（中断时调用），删除临时目录，已有分片保持不变"""
+        for column in self._columns.values():
+            column.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+class ColumnarShard:
+    """
+    列式分片读取器
+
+    所有数组通过内存映射加载，segment()等方法返回的都是原数组的切片视图，不发生拷贝
+
+    Attributes:
+        ship_class: 船舶类别
+        shard_id: 分片标识（每次写出都不同）
+        fs: 各文件采样率列表
+        source_file: 各文件源路径列表
+    """
+
+    ARRAY_NAMES = ('amp', 'freq', 'phase', 'seg_offsets', 'file_seg_offsets',
+                   'n_delay', 'file_delay_offsets', 'analy_freq', 'file_freq_offsets')
+
+    def __init__(self, shard_dir: Union[str, Path], mmap: bool = True):
+        """
+        打开分片
+
+        Args:
+            shard_dir: 分片目录
+            mmap: 是否内存映射加载，默认True
+        """
+        self.shard_dir = Path(shard_dir)
+        if not self.shard_dir.exists():
+            raise FileNotFoundError(f"Columnar shard not found: {self.shard_dir}")
+
+        meta = load_json(self.shard_dir / 'meta.json')
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported shard format version: {meta.get('format_version')}")
+        self.ship_class = meta['ship_class']
+        self.shard_id = meta.get('shard_id')
+        self.fs = meta['fs']
+        self.source_file = meta['source_file']
+
+        for name in self.ARRAY_NAMES:
+            setattr(self, name, load_array(self.shard_dir / f'{name}.npy', mmap))
+
+    def __len__(self) -> int:
+        """文件数"""
+        return len(self.source_file)
+
+    def num_segments(self, file_idx: int) -> int:
+        """文件的段数"""
+        return int(self.file_seg_offsets[file_idx + 1] - self.file_seg_offsets[file_idx])
+
+    def segment(self, file_idx: int, seg_idx: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        获取单个段的分量视图
+
+        Args:
+            file_idx: 文件序号
+            seg_idx: 文件内段序号
+
+        Returns:
+            (amp, freq, phase) 视图
+        """
+        if not 0 <= seg_idx < self.num_segments(file_idx):
+            raise IndexError(f"Segment {seg_idx} out of range for file {file_idx}")
+        g = self.file_seg_offsets[file_idx] + seg_idx
+        lo, hi = self.seg_offsets[g], self.seg_offsets[g + 1]
+        return self.amp[lo:hi], self.freq[lo:hi], self.phase[lo:hi]
+
+    def segments(self, file_idx: int) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """获取文件所有段的分量视图"""
+        return [self.segment(file_idx, i) for i in range(self.num_segments(file_idx))]
+
+    def n_delay_of(self, file_idx: int) -> np.ndarray:
+        """文件各段时延视图"""
+        lo, hi = self.file_delay_offsets[file_idx], self.file_delay_offsets[file_idx + 1]
+        return self.n_delay[lo:hi]
+
+    def analy_freq_of(self, file_idx: int) -> np.ndarray:
+        """文件频率并集视图"""
+        lo, hi = self.file_freq_offsets[file_idx], self.file_freq_offsets[file_idx + 1]
+        return self.analy_freq[lo:hi]
+
+    def record(self, file_idx: int) -> Dict[str, Any]:
+        """
+        读取文件的打包记录（与pack_record的输出格式一致）
+
+        返回独立数组而非视图，分片被替换后记录仍然可用
+
+        Args:
+            file_idx: 文件序号
+
+        Returns:
+            打包后的记录字典
+        """
+        lo, hi = self.file_seg_offsets[file_idx], self.file_seg_offsets[file_idx + 1]
+        seg_offsets = np.asarray(self.seg_offsets[lo:hi + 1])
+        c_lo, c_hi = seg_offsets[0], seg_offsets[-1]
+        return {
+            'fs': int(self.fs[file_idx]),
+            'source_file': self.source_file[file_idx],
+            'n_delay': np.array(self.n_delay_of(file_idx)),
+            'analy_freq': np.array(self.analy_freq_of(file_idx)),
+            'seg_lengths': np.diff(seg_offsets),
+            'amp': np.array(self.amp[c_lo:c_hi]),
+            'freq': np.array(self.freq[c_lo:c_hi]),
+            'phase': np.array(self.phase[c_lo:c_hi]),
+        }
@@ -0,0 +1,257 @@
+"""
+环境文件打包工具
+
+每个envfilefolder（模板、辅助文件、清单/逐频率文件）打包为一个不压缩的zip文件，
+目录树中的小文件数从每文件夹数千个降为一个，便于列目录、同步和备份。
+
+偏移索引:
+    归档最后一个成员 .envidx.json 记录 {成员名: [数据偏移, 字节数]}，
+    zip注释记录该索引自身的偏移和长度。读取时只需读文件尾部和索引，
+    之后按名称读取任一成员都是一次seek + read，与成员数无关。
+    非本工具生成的zip（无索引注释）退化为读取zip中央目录建立索引。
+
+    归档仍是标准zip，可用任意zip工具解压。
+
+内容去重:
+    内容相同的文件（各频率相同的.trc/.brc、BlobStore以硬链接物化的辅助文件等）只存一份，
+    其余文件名在偏移索引中指向同一数据。EnvArchive和unpack_archive按索引读取，得到全部文件名；
+    通用zip工具解压时每组相同内容只得到第一个文件名。
+
+    （读回BlobStore的硬链接打包时不再保留链接关系，文件夹还原后各文件为独立副本。）
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import struct
+import threading
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIX = '.zip'
+INDEX_MEMBER = '.envidx.json'
+TEMPLATE_PATTERN = 'ENV_*.env'
+_COMMENT_PREFIX = b'envidx:'
+
+# zip本地文件头: 签名 + 26字节定长字段，其后为文件名和扩展字段
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+_EOCD = struct.Struct('<4s4H2LH')
+_EOCD_SIGNATURE = b'PK\x05\x06'
+
+
+def archive_path(folder: Union[str, Path]) -> Path:
+    """文件夹对应的归档路径（同级，加.zip后缀）"""
+    folder = Path(folder)
+    return folder.with_name(folder.name + ARCHIVE_SUFFIX)
+
+
+def _data_offset(f, header_offset: int) -> int:
+    """由本地文件头计算成员数据的起始偏移"""
+    f.seek(header_offset)
+    header = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+    if header[0] != _LOCAL_HEADER_SIGNATURE:
+        raise ValueError(f"Bad local file header at offset {header_offset}")
+    name_len, extra_len = header[-2], header[-1]
+    return header_offset + _LOCAL_HEADER.size + name_len + extra_len
+
+
+def _build_index(path: Path) -> Dict[str, Tuple[int, int]]:
+    """读取zip中央目录，建立 成员名 → (数据偏移, 字节数) 索引（只支持不压缩的成员）"""
+    index = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+        for info in zf.infolist():
+            if info.is_dir() or info.filename == INDEX_MEMBER:
+                continue
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"Compressed member not supported: {info.filename} in {path}")
+            index[info.filename] = (_data_offset(f, info.header_offset), info.file_size)
+    return index
+
+
+def pack_folder(folder: Union[str, Path], remove: bool = True) -> Path:
+    """
+    将文件夹内的所有文件打包为一个带偏移索引的不压缩zip
+
+    内容相同的文件只写入一个成员，其余文件名在偏移索引中指向该成员的数据。
+    先写临时文件再替换，打包成功后（remove=True时）删除原文件夹。
+    文件夹中没有ENV_*.env模板时拒绝打包：替换已有归档会丢失其中的模板，且删除文件夹后无法恢复
+
+    Args:
+        folder: 待打包的文件夹（只打包其中的文件，不含子目录）
+        remove: 打包后是否删除原文件夹
+
+    Returns:
+        归档路径
+
+    Raises:
+        ValueError: 文件夹中没有ENV_*.env模板
+    """
+    folder = Path(folder)
+    if not any(folder.glob(TEMPLATE_PATTERN)):
+        raise ValueError(f"No {TEMPLATE_PATTERN} template in {folder}, refusing to pack")
+    target = archive_path(folder)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    files = sorted(p for p in folder.iterdir() if p.is_file())
+
+    # 内容摘要 → 首个同内容文件名；其余同内容文件名 → 该文件名
+    members: Dict[str, str] = {}
+    aliases: Dict[str, str] = {}
+    with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for p in files:
+            digest = hashlib.sha256(p.read_bytes()).hexdigest()
+            if digest in members:
+                aliases[p.name] = members[digest]
+                continue
+            members[digest] = p.name
+            zf.write(p, p.name)
+    index = {name: list(loc) for name, loc in _build_index(tmp).items()}
+    for name, member in aliases.items():
+        index[name] = index[member]
+
+    # 索引作为最后一个成员追加，其位置写入zip注释
+    index_data = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    with zipfile.ZipFile(tmp, 'a', compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr(INDEX_MEMBER, index_data)
+        zf.fp.flush()
+        with open(tmp, 'rb') as f:
+            index_offset = _data_offset(f, zf.getinfo(INDEX_MEMBER).header_offset)
+        zf.comment = _COMMENT_PREFIX + f"{index_offset}:{len(index_data)}".encode('ascii')
+
+    os.replace(tmp, target)
+    if remove:
+        shutil.rmtree(folder)
+    logger.debug(f"Packed {len(files)} files ({len(members)} distinct) into {target}")
+    return target
+
+
+def unpack_archive(path: Union[str, Path], remove: bool = True, overwrite: bool = True) -> Path:
+    """
+    将pack_folder生成的归档还原为文件夹
+
+    文件夹已存在时合并还原：overwrite为False时保留文件夹中已有的同名文件（如重新生成的模板）
+
+    Args:
+        path: 归档路径
+        remove: 还原后是否删除归档
+        overwrite: 是否用归档中的成员覆盖文件夹中已有的同名文件
+
+    Returns:
+        还原的文件夹路径
+    """
+    path = Path(path)
+    folder = path.with_name(path.name[:-len(ARCHIVE_SUFFIX)])
+    folder.mkdir(parents=True, exist_ok=True)
+    with EnvArchive(path) as archive:
+        for name in archive.names():
+            dst = folder / name
+            if overwrite or not dst.exists():
+                archive.extract(name, dst)
+    if remove:
+        path.unlink()
+    return folder
+
+
+class EnvArchive:
+    """
+    环境文件归档读取器
+
+    打开时只读取文件尾部和偏移索引，按名称读取成员为O(1)；可在多个线程间共享
+
+    Attributes:
+        path: 归档路径
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        打开归档
+
+        Args:
+            path: 归档路径
+        """
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._lock = threading.Lock()
+        try:
+            self._index = self._read_index()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def _read_index(self) -> Dict[str, Tuple[int, int]]:
+        f = self._file
+        size = f.seek(0, os.SEEK_END)
+        tail_len = min(size, _EOCD.size + 0xFFFF)
+        f.seek(size - tail_len)
+        tail = f.read(tail_len)
+        pos = tail.rfind(_EOCD_SIGNATURE)
+        if pos >= 0:
+            comment_len = _EOCD.unpack(tail[pos:pos + _EOCD.size])[-1]
+            comment = tail[pos + _EOCD.size:pos + _EOCD.size + comment_len]
+            if comment.startswith(_COMMENT_PREFIX):
+                offset, length = map(int, comment[len(_COMMENT_PREFIX):].split(b':'))
+                f.seek(offset)
+                return {name: tuple(loc) for name, loc in json.loads(f.read(length)).items()}
+        logger.debug(f"No offset index in {self.path}, reading central directory")
+        return _build_index(self.path)
+
+    def names(self) -> List[str]:
+        """成员名列表（按名称排序）"""
+        return sorted(self._index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def read(self, name: str) -> bytes:
+        """
+        按名称读取成员内容
+
+        Args:
+            name: 成员名（文件名）
+
+        Returns:
+            成员内容
+
+        Raises:
+            KeyError: 成员不存在
+        """
+        offset, size = self._index[name]
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def read_text(self, name: str, encoding: str = 'utf-8') -> str:
+        """按名称读取文本成员（换行符按通用换行处理，与文本模式open一致）"""
+        return self.read(name).decode(encoding).replace('\r\n', '\n')
+
+    def extract(self, name: str, dst: Union[str, Path]) -> Path:
+        """
+        将成员写出到dst
+
+        Args:
+            name: 成员名
+            dst: 目标文件路径
+
+        Returns:
+            目标文件路径
+        """
+        dst = Path(dst)
+        dst.write_bytes(self.read(name))
+        return dst
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'EnvArchive':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
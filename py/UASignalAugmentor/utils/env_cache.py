@@ -0,0 +1,157 @@
+"""
+环境剖面缓存工具
+
+缓存get_env在一条测线上提取的海深与声速剖面（环境剖面），
+同一坐标组的各接收距离、以及重复的模板生成都可直接复用，跳过ETOPO/WOA23插值。
+
+缓存键 = sha256(起点经纬度, 方位角, 最大距离, 采样点数, 时间索引, 数据源签名)，
+数据源签名由ETOPO/WOA23文件的路径、大小和修改时间组成，数据文件变化后旧条目自动失效。
+
+缓存目录结构:
+    section_cache_dir/
+    └── xx/<key>.pkl     # {'sea_depth', 'ssp_raw', 'SSProf'}
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+import numpy as np
+import logging
+
+from .io_utils import ensure_dir, save_pickle, load_pickle
+
+logger = logging.getLogger(__name__)
+
+
+def _stat_signature(path: Path) -> Optional[list]:
+    """文件的 [大小, 修改时间ns]，文件不存在时返回None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def data_source_signature(env_config: Dict, bbox: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+    """
+    计算环境数据源签名（不读取数据内容）
+
+    数据按坐标组范围裁剪时，裁剪范围和外扩余量也计入签名：
+    裁剪范围变化时插值的边界格点可能不同，不复用其他范围下提取的剖面
+
+    Args:
+        env_config: 环境数据配置字典 (来自env_data_config.json)
+        bbox: 实际使用的裁剪范围 (lat_min, lat_max, lon_min, lon_max)，None表示不裁剪
+
+    Returns:
+        可JSON序列化的签名字典
+    """
+    etopo_path = Path(env_config['etopo']['file_path'])
+    woa_folder = Path(env_config['woa23']['folder_path'])
+    woa_files = sorted(woa_folder.glob('woa23_*.mat')) if woa_folder.exists() else []
+    return {
+        'etopo': [str(etopo_path), _stat_signature(etopo_path)],
+        'woa23': [str(woa_folder), [[p.name, _stat_signature(p)] for p in woa_files]],
+        'bbox': [float(v) for v in bbox] if bbox is not None else None,
+        'crop_margin': env_config.get('crop_margin') if bbox is not None else None,
+    }
+
+
+class EnvSectionCache:
+    """
+    环境剖面缓存
+
+    内存中缓存本次运行提取过的剖面；配置了cache_dir时同时持久化到磁盘，供后续运行复用。
+
+    Attributes:
+        cache_dir: 磁盘缓存目录（None表示只在内存中缓存）
+        hits: 命中次数
+        misses: 未命中次数
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]], source: Dict[str, Any]):
+        """
+        初始化环境剖面缓存
+
+        Args:
+            cache_dir: 磁盘缓存目录，None表示不持久化
+            source: 数据源签名（见data_source_signature）
+        """
+        self.cache_dir = ensure_dir(cache_dir) if cache_dir is not None else None
+        self.source_digest = hashlib.sha256(
+            json.dumps(source, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, lat: float, lon: float, azimuth: float, max_range: float,
+            n_points: int, time_idx: int) -> str:
+        """
+        计算环境剖面的缓存键
+
+        Args:
+            lat: 起点纬度
+            lon: 起点经度
+            azimuth: 方位角 (度)
+            max_range: 测线最大距离 (km)
+            n_points: 测线采样点数
+            time_idx: WOA23时间索引
+
+        Returns:
+            缓存键
+        """
+        params = [float(lat), float(lon), float(azimuth), float(max_range), int(n_points), int(time_idx)]
+        return hashlib.sha256(f"{json.dumps(params)}:{self.source_digest}".encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray, Dict]]:
+        """
+        读取环境剖面
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            (sea_depth, ssp_raw, SSProf)，未命中时返回None
+        """
+        entry = self._memory.get(key)
+        if entry is None and self.cache_dir is not None:
+            entry_path = self._entry_path(key)
+            if entry_path.exists():
+                try:
+                    entry = load_pickle(entry_path)
+                    self._memory[key] = entry
+                except Exception as e:
+                    logger.warning(f"Discarding corrupt env section cache entry {entry_path}: {e}")
+                    entry_path.unlink(missing_ok=True)
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry['sea_depth'], entry['ssp_raw'], entry['SSProf']
+
+    def put(self, key: str, sea_depth: np.ndarray, ssp_raw: np.ndarray, SSProf: Dict) -> None:
+        """
+        写入环境剖面（磁盘条目先写临时文件再替换）
+
+        Args:
+            key: 缓存键
+            sea_depth: 海深数组
+            ssp_raw: 区间平均声速剖面
+            SSProf: 区间多点声速剖面
+        """
+        entry = {'sea_depth': sea_depth, 'ssp_raw': ssp_raw, 'SSProf': SSProf}
+        self._memory[key] = entry
+        if self.cache_dir is not None:
+            entry_path = self._entry_path(key)
+            # 临时名带进程号和线程号：多个生成进程/线程共用缓存目录时互不覆盖半写的文件
+            tmp_path = entry_path.with_name(f".{entry_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            save_pickle(entry, tmp_path)
+            os.replace(tmp_path, entry_path)
@@ -0,0 +1,288 @@
+"""
+环境数据延迟加载工具
+
+提供与load_etopo/load_woa23返回的字典接口一致的延迟加载句柄：
+- 数据在第一次被访问时才读取（WOA23按时间索引逐个读取，只读用到的月份/季度）
+- 可按坐标组所需的经纬度范围（外加余量）裁剪，降低内存占用
+
+裁剪后的WOA23数据另带各深度层在完整网格上的统计量（layer_stats），
+get_profile_filled据此判断跳过哪些层、用什么值填充NaN，结果与不裁剪时一致。
+
+get_bathm/get_profile_filled/get_env 可直接使用这些句柄。
+"""
+
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from scipy.io import loadmat
+import logging
+
+logger = logging.getLogger(__name__)
+
+# WOA23时间索引1-17对应的文件编号：01-12月度, 13-16季度, 00全年
+WOA23_FILE_IDS = list(range(1, 13)) + [13, 14, 15, 16, 0]
+
+# 经纬度范围 (lat_min, lat_max, lon_min, lon_max)
+BBox = Tuple[float, float, float, float]
+
+
+def region_bbox(sites: Iterable[Tuple[float, float, float]], margin: float) -> BBox:
+    """
+    计算覆盖所有站点测线的经纬度范围
+
+    以每个站点为中心、测线最大距离为半径的圆（任意方位角）取外接矩形，再外扩margin度。
+    经度范围可能越过±180°（或数据的0-360°边界），此时由_crop_slices保留完整经度轴；
+    范围覆盖一整圈（或越过极点）时经度返回(-inf, inf)
+
+    Args:
+        sites: (纬度, 经度, 最大距离km) 序列
+        margin: 外扩余量（度）
+
+    Returns:
+        (lat_min, lat_max, lon_min, lon_max)
+    """
+    lat_min = lon_min = np.inf
+    lat_max = lon_max = -np.inf
+    for lat, lon, radius in sites:
+        dlat = radius / 111
+        dlon = radius / (111 * max(np.cos(np.radians(lat)), 1e-6))
+        lat_min, lat_max = min(lat_min, lat - dlat), max(lat_max, lat + dlat)
+        if abs(lat) + dlat >= 90:
+            # 圆越过极点，覆盖全部经度
+            dlon = np.inf
+        lon_min, lon_max = min(lon_min, lon - dlon), max(lon_max, lon + dlon)
+    if not np.isfinite(lat_min):
+        raise ValueError("region_bbox requires at least one site")
+    lon_min, lon_max = lon_min - margin, lon_max + margin
+    if lon_max - lon_min >= 360:
+        lon_min, lon_max = -np.inf, np.inf
+    return (lat_min - margin, lat_max + margin, lon_min, lon_max)
+
+
+def _crop_slice(axis: np.ndarray, lo: float, hi: float) -> slice:
+    """
+    单调坐标轴上覆盖 [lo, hi] 的下标区间
+
+    两侧各多保留一个格点（范围外最近的格点），保证边界处的线性插值与裁剪前一致
+    """
+    keep = list(np.flatnonzero((axis >= lo) & (axis <= hi)))
+    below = np.flatnonzero(axis < lo)
+    above = np.flatnonzero(axis > hi)
+    if below.size:
+        keep.append(int(below[np.argmax(axis[below])]))
+    if above.size:
+        keep.append(int(above[np.argmin(axis[above])]))
+    return slice(min(keep), max(keep) + 1)
+
+
+def _crop_slices(lat: np.ndarray, lon: np.ndarray, bbox: Optional[BBox]) -> Tuple[slice, slice]:
+    """
+    经纬度轴对应的裁剪区间（bbox为None时不裁剪）
+
+    经度范围不完全落在经度轴的取值范围内时（越过±180°或0-360°边界、
+    或与数据的经度约定不同），换算到另一约定也可能跨越轴的首尾，不裁剪经度
+    """
+    if bbox is None:
+        return slice(None), slice(None)
+    lon_sl = slice(None)
+    if lon.min() <= bbox[2] and bbox[3] <= lon.max():
+        lon_sl = _crop_slice(lon, bbox[2], bbox[3])
+    else:
+        logger.info(f"Longitude range [{bbox[2]:.2f}, {bbox[3]:.2f}] exceeds data axis "
+                    f"[{lon.min():.2f}, {lon.max():.2f}], keeping full longitude axis")
+    return _crop_slice(lat, bbox[0], bbox[1]), lon_sl
+
+
+def layer_stats(temp: np.ndarray, sal: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    计算各深度层在（完整）网格上的统计量，与get_profile_filled逐层的判断和填充方式一致
+
+    Args:
+        temp: 温度 (Nlat, Nlon, Ndepth)
+        sal: 盐度 (Nlat, Nlon, Ndepth)
+
+    Returns:
+        {'nan_ratio': 温度NaN比例, 'temp_fill': 温度NaN填充值, 'sal_fill': 盐度NaN填充值}，
+        长度均为Ndepth；不需要填充的层（无NaN或NaN比例 > 0.9）填充值为NaN
+    """
+    n_layers = temp.shape[2]
+    nan_ratio = np.zeros(n_layers)
+    temp_fill = np.full(n_layers, np.nan)
+    sal_fill = np.full(n_layers, np.nan)
+    for k in range(n_layers):
+        # 与get_profile_filled相同：按C序拷贝后的单层计算，保证nanmean逐位一致
+        temp_layer = np.ascontiguousarray(temp[:, :, k])
+        nan_mask = np.isnan(temp_layer)
+        nan_ratio[k] = nan_mask.sum() / temp_layer.size
+        if 0 < nan_ratio[k] <= 0.9:
+            temp_fill[k] = np.nanmean(temp_layer)
+            sal_fill[k] = np.nanmean(np.ascontiguousarray(sal[:, :, k]))
+    return {'nan_ratio': nan_ratio, 'temp_fill': temp_fill, 'sal_fill': sal_fill}
+
+
+class LazyEtopo(Mapping):
+    """
+    ETOPO地形数据的延迟加载句柄
+
+    提供 'Lat' / 'Lon' / 'Altitude' 三个键，第一次访问时读取.mat文件并按bbox裁剪
+    """
+
+    KEYS = ('Lat', 'Lon', 'Altitude')
+
+    def __init__(self, file_path: str, bbox: Optional[BBox] = None):
+        """
+        Args:
+            file_path: ETOPO .mat文件路径
+            bbox: 裁剪范围 (lat_min, lat_max, lon_min, lon_max)，None表示不裁剪
+        """
+        self.file_path = file_path
+        self.bbox = bbox
+        self._data: Optional[Dict[str, np.ndarray]] = None
+
+    def _load(self) -> Dict[str, np.ndarray]:
+        if self._data is None:
+            raw = loadmat(self.file_path, variable_names=list(self.KEYS))
+            lat, lon, alt = raw['Lat'], raw['Lon'], raw['Altitude']
+            lat_sl, lon_sl = _crop_slices(lat.flatten(), lon.flatten(), self.bbox)
+
+            # 与get_bathm相同的布局判断：Altitude可能为 (Nlon, Nlat)
+            if alt.shape[0] == lon.size and alt.shape[1] == lat.size:
+                alt = alt[lon_sl, lat_sl]
+            else:
+                alt = alt[lat_sl, lon_sl]
+            self._data = {
+                'Lat': lat.flatten()[lat_sl].reshape(-1, 1),
+                'Lon': lon.flatten()[lon_sl].reshape(-1, 1),
+                # 裁剪后拷贝，释放对完整数组的引用
+                'Altitude': alt if self.bbox is None else alt.copy(),
+            }
+            logger.info(f"Loaded ETOPO {self.file_path}: Altitude {raw['Altitude'].shape} -> {alt.shape}")
+        return self._data
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+
+class _LazyWOA23Series(Sequence):
+    """WOA23的17个时间索引数据，按需逐个读取"""
+
+    def __init__(self, owner: 'LazyWOA23'):
+        self._owner = owner
+        self._cache: Dict[int, Dict[str, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(WOA23_FILE_IDS)
+
+    def __getitem__(self, index: int) -> Dict[str, np.ndarray]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = range(len(self))[index]
+        if index not in self._cache:
+            self._cache[index] = self._owner._load_time(index)
+        return self._cache[index]
+
+    def loaded(self) -> List[int]:
+        """已读取的时间槽（0起）"""
+        return sorted(self._cache)
+
+
+class LazyWOA23(Mapping):
+    """
+    WOA23温盐数据的延迟加载句柄
+
+    提供 'Lat' / 'Lon' / 'Data' 三个键，与load_woa23的返回值结构一致；
+    woa23['Data'][k] 在第一次访问时才读取对应的 woa23_xx.mat 并按bbox裁剪；
+    裁剪时另带 'layer_stats'（完整网格上的逐层统计量，见layer_stats）
+    """
+
+    KEYS = ('Lat', 'Lon', 'Data')
+
+    def __init__(self, folder_path: str, bbox: Optional[BBox] = None):
+        """
+        Args:
+            folder_path: WOA23 .mat文件夹路径
+            bbox: 裁剪范围 (lat_min, lat_max, lon_min, lon_max)，None表示不裁剪
+        """
+        self.folder = Path(folder_path)
+        self.bbox = bbox
+        self._grid: Optional[Dict[str, Any]] = None
+        self._series = _LazyWOA23Series(self)
+
+    def _load_grid(self) -> Dict[str, Any]:
+        if self._grid is None:
+            raw = loadmat(self.folder / 'woa23_00.mat', variable_names=['Lat', 'Lon'])
+            lat_sl, lon_sl = _crop_slices(raw['Lat'].flatten(), raw['Lon'].flatten(), self.bbox)
+            self._grid = {
+                'Lat': raw['Lat'].flatten()[lat_sl].reshape(-1, 1),
+                'Lon': raw['Lon'].flatten()[lon_sl].reshape(-1, 1),
+                'slices': (lat_sl, lon_sl),
+            }
+        return self._grid
+
+    def _load_time(self, index: int) -> Dict[str, np.ndarray]:
+        lat_sl, lon_sl = self._load_grid()['slices']
+        filename = f'woa23_{WOA23_FILE_IDS[index]:02d}.mat'
+        raw = loadmat(self.folder / filename, variable_names=['Depth', 'Sal', 'Temp'])
+        logger.info(f"Loaded WOA23 {filename} (time slot {index + 1})")
+        if self.bbox is None:
+            return {'Depth': raw['Depth'], 'Sal': raw['Sal'], 'Temp': raw['Temp']}
+        return {
+            'Depth': raw['Depth'],
+            'Sal': raw['Sal'][lat_sl, lon_sl, :].copy(),
+            'Temp': raw['Temp'][lat_sl, lon_sl, :].copy(),
+            # 跳过/填充判断须基于完整网格，裁剪前计算
+            'layer_stats': layer_stats(raw['Temp'], raw['Sal']),
+        }
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'Data':
+            return self._series
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return self._load_grid()[key]
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+
+def woa23_time_slots(time_idx: int) -> List[int]:
+    """
+    get_profile_filled在给定时间索引下读取的WOA23数据槽（0起）
+
+    月度数据(1-12)需要同时读取全年数据(槽16)填充深层
+    """
+    if time_idx <= 12:
+        return [time_idx - 1, 16]
+    return [time_idx - 1]
+
+
+def materialize_woa23(woa23: Any, time_indices: Iterable[int]) -> Dict[str, Any]:
+    """
+    将WOA23数据（字典或延迟句柄）转为普通字典，只包含给定时间索引需要的数据槽
+
+    未用到的槽为None，可用于共享内存等需要普通嵌套结构的场合
+
+    Args:
+        woa23: load_woa23返回的字典或LazyWOA23
+        time_indices: 需要的时间索引 (1-17)
+
+    Returns:
+        {'Lat', 'Lon', 'Data'} 字典
+    """
+    slots = sorted({slot for t in time_indices for slot in woa23_time_slots(t)})
+    data = [None] * len(woa23['Data'])
+    for slot in slots:
+        data[slot] = woa23['Data'][slot]
+    return {'Lat': woa23['Lat'], 'Lon': woa23['Lon'], 'Data': data}
@@ -0,0 +1,377 @@
+"""
+虚拟频率复制工具
+
+A3按频率复制会为每个频率写出一份test_i.env及4个辅助文件，磁盘占用和耗时都随频率数线性增长。
+虚拟复制只在每个envfilefolder中记录一份清单（模板名 + 共享频率列表的位置），
+在对应频率的声场计算任务派发时才把test_i.env渲染到临时目录，计算完成后删除。
+
+目录结构:
+    output_path/
+    ├── env_frequencies.json              # 频率列表（全部文件夹共享，只存一份）
+    └── .../Rr*/envfilefolder/
+        ├── ENV_xxx.env / .bty / ...      # 模板
+        └── env_manifest.json             # 清单
+
+envfilefolder已打包为归档（见utils.env_archive）时，清单、模板和辅助文件从归档中按名称读取。
+复制模式的文件夹打包后（归档中为env_files_list.txt和逐频率文件）由PackedEnvSet提供相同的接口。
+
+用法:
+    env_set = VirtualEnvSet(folder)          # 或 VirtualEnvSet(归档路径)、PackedEnvSet(归档路径)
+    with env_set.materialized(i, scratch_dir) as envfil:   # i从1开始，envfil不含扩展名
+        run_bellhop(envfil)
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import cached_property
+import json
+import os
+import shutil
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import logging
+
+from .bellhop_writer import reflection_texts, write_reflection_files
+from .env_archive import ARCHIVE_SUFFIX, EnvArchive
+from .io_utils import ensure_dir, save_json, load_json
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'env_manifest.json'
+ENV_LIST_NAME = 'env_files_list.txt'
+FREQ_LIST_NAME = 'env_frequencies.json'
+FORMAT_VERSION = 1
+AUX_EXTS = ('.trc', '.bty', '.brc', '.ssp')
+
+
+def frequency_line(freq: float) -> str:
+    """.env文件第2行（频率行），与A3复制时写入的内容一致"""
+    return f"  {freq}  \t\t\t ! Frequency (Hz) \n"
+
+
+def env_name(i: int) -> str:
+    """第i个频率（从1开始）的环境文件名（不含扩展名）"""
+    return f'test_{i}'
+
+
+def save_freq_list(frequencies: Sequence[float], root: Union[str, Path]) -> Path:
+    """
+    保存共享频率列表
+
+    Args:
+        frequencies: 频率列表
+        root: 输出根目录
+
+    Returns:
+        频率列表文件路径
+    """
+    path = Path(root) / FREQ_LIST_NAME
+    freq = [f.item() if hasattr(f, 'item') else f for f in frequencies]
+    save_json({'format_version': FORMAT_VERSION, 'frequencies': freq}, path, indent=None)
+    return path
+
+
+def write_manifest(folder: Union[str, Path], template_base: str, freq_list_file: Union[str, Path],
+                   num_frequencies: int, reflection: Optional[Dict] = None) -> Path:
+    """
+    写出envfilefolder的虚拟复制清单
+
+    Args:
+        folder: 环境文件文件夹
+        template_base: 模板文件名（不含扩展名）
+        freq_list_file: 共享频率列表文件（清单中记录相对路径）
+        num_frequencies: 频率数
+        reflection: 逐频率反射系数参数（write_reflection_files的关键字参数），
+            None表示渲染时沿用模板的.trc/.brc
+
+    Returns:
+        清单文件路径
+    """
+    folder = Path(folder)
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'template': template_base,
+        'aux_exts': [ext for ext in AUX_EXTS if (folder / f'{template_base}{ext}').exists()],
+        'freq_list': os.path.relpath(freq_list_file, folder),
+        'num_frequencies': num_frequencies,
+        'reflection': reflection,
+    }
+    path = folder / MANIFEST_NAME
+    save_json(manifest, path)
+    return path
+
+
+class _EnvSetBase(ABC):
+    """环境文件集合的公共部分：子类实现render/release"""
+
+    @abstractmethod
+    def render(self, i: int, scratch_dir: Union[str, Path]) -> Path:
+        """将第i个文件（从1开始）写出到临时目录，返回环境文件路径（不含扩展名）"""
+
+    @abstractmethod
+    def release(self, i: int, scratch_dir: Union[str, Path]) -> None:
+        """删除render写出的文件"""
+
+    @contextmanager
+    def materialized(self, i: int, scratch_dir: Union[str, Path]) -> Iterator[Path]:
+        """
+        渲染第i个频率的环境文件，退出时删除
+
+        Yields:
+            环境文件路径（不含扩展名）
+        """
+        base = self.render(i, scratch_dir)
+        try:
+            yield base
+        finally:
+            self.release(i, scratch_dir)
+
+
+class VirtualEnvSet(_EnvSetBase):
+    """
+    一个envfilefolder的虚拟环境文件集合
+
+    Attributes:
+        folder: 环境文件文件夹（打包时为归档对应的文件夹路径，文件夹本身不存在）
+        archive: 打包后的归档，未打包时为None
+        template: 模板文件名（不含扩展名）
+        aux_exts: 模板具有的辅助文件扩展名
+        frequencies: 频率列表，第i个文件（从1开始）对应frequencies[i-1]
+        reflection: 逐频率反射系数参数，None表示沿用模板的.trc/.brc
+    """
+
+    def __init__(self, folder: Union[str, Path]):
+        """
+        读取清单
+
+        Args:
+            folder: 含env_manifest.json的环境文件文件夹，或其打包后的归档
+        """
+        folder = Path(folder)
+        self.archive = None
+        if folder.suffix == ARCHIVE_SUFFIX and folder.is_file():
+            self.archive = EnvArchive(folder)
+            folder = folder.with_name(folder.name[:-len(ARCHIVE_SUFFIX)])
+        self.folder = folder
+        manifest = json.loads(self._read_text(MANIFEST_NAME))
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported manifest format version: {manifest.get('format_version')}")
+        self.template = manifest['template']
+        self.aux_exts = manifest['aux_exts']
+        self.reflection = manifest.get('reflection')
+        # 按字面规范化相对路径（打包后文件夹本身不存在）
+        self.frequencies = load_json(os.path.normpath(self.folder / manifest['freq_list']))['frequencies']
+        if len(self.frequencies) != manifest['num_frequencies']:
+            raise ValueError(f"Frequency list changed since manifest was written: {self.folder}")
+
+        self._template_lines = self._read_text(f'{self.template}.env').splitlines(keepends=True)
+
+    def _read_text(self, name: str) -> str:
+        """读取文件夹或归档中的文本文件"""
+        if self.archive is not None:
+            return self.archive.read_text(name)
+        with open(self.folder / name, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def __len__(self) -> int:
+        return len(self.frequencies)
+
+    def names(self) -> List[str]:
+        """各频率的环境文件名，与复制模式的env_files_list.txt一致"""
+        return [env_name(i) for i in range(1, len(self) + 1)]
+
+    def env_text(self, i: int) -> str:
+        """第i个频率（从1开始）的.env文件内容"""
+        lines = self._template_lines.copy()
+        lines[1] = frequency_line(self.frequencies[i - 1])
+        return ''.join(lines)
+
+    def aux_text(self, ext: str) -> Optional[str]:
+        """模板辅助文件（如'.bty'）的内容，模板没有该文件时为None"""
+        return self._read_text(f'{self.template}{ext}') if ext in self.aux_exts else None
+
+    def reflection_texts(self) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        """
+        各频率的.trc/.brc文件内容（与render写出的一致）
+
+        Returns:
+            (trc_texts, brc_texts)，与frequencies一一对应；模板没有该文件时为None
+        """
+        if self.reflection is not None:
+            return reflection_texts(self.frequencies, **self.reflection)
+        texts = []
+        for ext in ('.trc', '.brc'):
+            texts.append([self.aux_text(ext)] * len(self))
+        return texts[0], texts[1]
+
+    def render(self, i: int, scratch_dir: Union[str, Path]) -> Path:
+        """
+        将第i个频率的环境文件渲染到临时目录
+
+        .env按模板替换频率行写出，辅助文件以符号链接指向模板（不支持时复制，打包时从归档取出）；
+        记录了反射系数参数时.trc/.brc按该频率计算
+
+        Args:
+            i: 频率序号（从1开始）
+            scratch_dir: 临时目录
+
+        Returns:
+            环境文件路径（不含扩展名）
+        """
+        if not 1 <= i <= len(self):
+            raise IndexError(f"Frequency index {i} out of range 1..{len(self)}")
+        scratch_dir = ensure_dir(scratch_dir)
+        base = scratch_dir / env_name(i)
+
+        with open(base.with_suffix('.env'), 'w', encoding='utf-8') as f:
+            f.write(self.env_text(i))
+
+        linked_exts = self.aux_exts
+        if self.reflection is not None:
+            write_reflection_files([str(base)], [self.frequencies[i - 1]], **self.reflection)
+            linked_exts = [ext for ext in self.aux_exts if ext not in ('.trc', '.brc')]
+
+        for ext in linked_exts:
+            dst = base.with_suffix(ext)
+            dst.unlink(missing_ok=True)
+            if self.archive is not None:
+                self.archive.extract(f'{self.template}{ext}', dst)
+                continue
+            src = (self.folder / f'{self.template}{ext}').resolve()
+            try:
+                os.symlink(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+        return base
+
+    def release(self, i: int, scratch_dir: Union[str, Path]) -> None:
+        """删除render写出的文件（计算输出由调用方处理）"""
+        base = Path(scratch_dir) / env_name(i)
+        exts = set(self.aux_exts) | ({'.trc', '.brc'} if self.reflection is not None else set())
+        for ext in ('.env', *exts):
+            base.with_suffix(ext).unlink(missing_ok=True)
+
+
+class PackedEnvSet(_EnvSetBase):
+    """
+    复制模式打包后的环境文件集合
+
+    归档中含env_files_list.txt和各频率的test_i.env及辅助文件，接口与VirtualEnvSet一致：
+    声场计算任务从归档中按名称取出对应频率的文件，不需要还原整个文件夹
+
+    Attributes:
+        folder: 归档对应的文件夹路径（文件夹本身可能不存在，计算输出写到这里）
+        archive: 归档
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        读取文件列表
+
+        Args:
+            path: 复制模式envfilefolder打包后的归档
+        """
+        path = Path(path)
+        self.archive = EnvArchive(path)
+        self.folder = path.with_name(path.name[:-len(ARCHIVE_SUFFIX)])
+        self._names = [line.strip() for line in self.archive.read_text(ENV_LIST_NAME).splitlines()
+                       if line.strip()]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def names(self) -> List[str]:
+        """各频率的环境文件名（env_files_list.txt的内容）"""
+        return list(self._names)
+
+    @cached_property
+    def frequencies(self) -> List[float]:
+        """各文件的频率（取自.env第2行，只在用到时读取）"""
+        return [float(self.env_text(i).splitlines()[1].split('!')[0])
+                for i in range(1, len(self) + 1)]
+
+    def _member(self, i: int, ext: str) -> str:
+        return f'{self._names[i - 1]}{ext}'
+
+    def env_text(self, i: int) -> str:
+        """第i个文件（从1开始）的.env文件内容"""
+        return self.archive.read_text(self._member(i, '.env'))
+
+    def aux_text(self, ext: str) -> Optional[str]:
+        """辅助文件（如'.bty'）的内容，取第一个文件的（各频率相同），没有该文件时为None"""
+        name = self._member(1, ext)
+        return self.archive.read_text(name) if name in self.archive else None
+
+    def reflection_texts(self) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        """
+        各文件的.trc/.brc文件内容
+
+        Returns:
+            (trc_texts, brc_texts)，与names()一一对应；没有该文件时为None
+        """
+        texts = []
+        for ext in ('.trc', '.brc'):
+            texts.append([self.archive.read_text(name) if name in self.archive else None
+                          for name in (self._member(i, ext) for i in range(1, len(self) + 1))])
+        return texts[0], texts[1]
+
+    def render(self, i: int, scratch_dir: Union[str, Path]) -> Path:
+        """
+        将第i个文件的.env及辅助文件从归档取出到临时目录
+
+        Args:
+            i: 文件序号（从1开始）
+            scratch_dir: 临时目录
+
+        Returns:
+            环境文件路径（不含扩展名）
+        """
+        if not 1 <= i <= len(self):
+            raise IndexError(f"File index {i} out of range 1..{len(self)}")
+        scratch_dir = ensure_dir(scratch_dir)
+        base = scratch_dir / self._names[i - 1]
+        for ext in ('.env', *AUX_EXTS):
+            name = self._member(i, ext)
+            if name in self.archive:
+                self.archive.extract(name, base.with_suffix(ext))
+        return base
+
+    def release(self, i: int, scratch_dir: Union[str, Path]) -> None:
+        """删除render取出的文件（计算输出由调用方处理）"""
+        base = Path(scratch_dir) / self._names[i - 1]
+        for ext in ('.env', *AUX_EXTS):
+            base.with_suffix(ext).unlink(missing_ok=True)
+
+
+def _env_archives(root: Union[str, Path]) -> Iterator[Tuple[Path, EnvArchive]]:
+    """
+    遍历根目录下的zip归档
+
+    无法作为环境文件归档读取的zip（如压缩过的外来归档、损坏的文件）记录警告后跳过，
+    不中断任务发现
+
+    Yields:
+        (归档路径, 已打开的EnvArchive)
+    """
+    for path in sorted(Path(root).rglob(f'*{ARCHIVE_SUFFIX}')):
+        try:
+            archive = EnvArchive(path)
+        except (ValueError, zipfile.BadZipFile, OSError) as e:
+            logger.warning(f"Skipping unreadable archive {path}: {e}")
+            continue
+        with archive:
+            yield path, archive
+
+
+def find_packed_folders(root: Union[str, Path]) -> List[Path]:
+    """查找根目录下复制模式打包的归档（含env_files_list.txt，可直接传给PackedEnvSet）"""
+    return [path for path, archive in _env_archives(root)
+            if ENV_LIST_NAME in archive and MANIFEST_NAME not in archive]
+
+
+def find_virtual_folders(root: Union[str, Path]) -> List[Path]:
+    """查找根目录下所有含虚拟复制清单的环境文件文件夹及归档（均可直接传给VirtualEnvSet）"""
+    found = [p.parent for p in Path(root).rglob(MANIFEST_NAME)]
+    found += [path for path, archive in _env_archives(root) if MANIFEST_NAME in archive]
+    return sorted(found)
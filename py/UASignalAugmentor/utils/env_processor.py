@@ -23,6 +23,8 @@ from scipy.io import loadmat
 from scipy.interpolate import interp1d
 import logging
 
+from .env_data import LazyEtopo, LazyWOA23, WOA23_FILE_IDS, BBox
+
 
 logger = logging.getLogger(__name__)
 
@@ -79,9 +81,7 @@ def load_woa23(folder_path: str, time_index: int = 1) -> Dict:
     }
     
     # 文件名映射: 索引1-17 对应文件名 01-12, 13-16, 00
-    file_ids = list(range(1, 13)) + [13, 14, 15, 16, 0]
-    
-    for file_id in file_ids:
+    for file_id in WOA23_FILE_IDS:
         filename = f'woa23_{file_id:02d}.mat'
         data = loadmat(folder / filename)
         woa23['Data'].append({
@@ -130,6 +130,51 @@ def coord_proc(coord_s: Dict[str, float], R: List[float], azi: float) -> Tuple[n
     return lat_end, lon_end
 
 
+def coord_proc_radials(coord_s: Dict[str, float], R: List[float],
+                       azimuths: List[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    多方位角坐标转换：起点 + 距离数组 + 方位角数组 → 各径向上的终点经纬度
+
+    与对每个方位角分别调用coord_proc的结果逐位一致
+
+    Args:
+        coord_s: 起点坐标 {'lat': 纬度, 'lon': 经度}
+        R: 距离数组 (km)
+        azimuths: 方位角数组 (度, 正北为0°, 顺时针)
+
+    Returns:
+        (lat_end, lon_end): 形状均为 (len(azimuths), len(R))
+    """
+    azi_rad = (np.asarray(azimuths, dtype=float) / 180 * np.pi)[:, np.newaxis]
+    lat_s_rad = coord_s['lat'] / 180 * np.pi
+    R_array = np.asarray(R)[np.newaxis, :]
+
+    lon_end = coord_s['lon'] + R_array * np.sin(azi_rad) / (111 * np.cos(lat_s_rad))
+    lat_end = coord_s['lat'] + R_array * np.cos(azi_rad) / 111
+
+    return lat_end, lon_end
+
+
+def radial_tracks(coord_s: Dict[str, float], max_range: float, azimuths: List[float],
+                  N: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    构造各方位角测线上的采样点经纬度（起点到max_range处终点的等间距N点）
+
+    Args:
+        coord_s: 起点坐标 {'lat': 纬度, 'lon': 经度}
+        max_range: 测线长度 (km)
+        azimuths: 方位角数组 (度)
+        N: 每条测线的采样点数
+
+    Returns:
+        (lat, lon): 形状均为 (len(azimuths), N)
+    """
+    lat_end, lon_end = coord_proc_radials(coord_s, [max_range], azimuths)
+    lat = np.linspace(coord_s['lat'], lat_end[:, 0], N, axis=1)
+    lon = np.linspace(coord_s['lon'], lon_end[:, 0], N, axis=1)
+    return lat, lon
+
+
 # ==================== 声速计算 ====================
 
 def sound_speed(temp: np.ndarray, sal: np.ndarray, depth: np.ndarray) -> np.ndarray:
@@ -276,6 +321,13 @@ def get_profile_filled(woa23: Dict, lat: np.ndarray, lon: np.ndarray,
         TEMP[:, :, :Nd_month] = month_temp
         SAL[:, :, :Nd_month] = month_sal
         
+        # 裁剪数据带有完整网格上的逐层统计量，按同样方式拼接
+        stats = None
+        if 'layer_stats' in annual_data and 'layer_stats' in month_data:
+            stats = {k: v.copy() for k, v in annual_data['layer_stats'].items()}
+            for k, v in month_data['layer_stats'].items():
+                stats[k][:Nd_month] = v
+        
         logger.info(f"月度数据填充: 月度层数={Nd_month}, 全年层数={len(Depth)}")
     else:
         # 季度或全年数据
@@ -283,25 +335,22 @@ def get_profile_filled(woa23: Dict, lat: np.ndarray, lon: np.ndarray,
         TEMP = data['Temp']  # (Nlat, Nlon, Ndepth)
         SAL = data['Sal']
         Depth = data['Depth'].flatten()
+        stats = data.get('layer_stats')
     
     # 对每个深度层进行插值
     Nd = len(Depth)
     
     # 如果指定了max_depth，只处理不超过该深度的层
     if max_depth is not None:
-        # 找到不超过max_depth的最大索引
-        valid_depth_mask = Depth <= max_depth
-        if not valid_depth_mask.any():
-            logger.warning(f"所有深度层都超过max_depth={max_depth}m，使用第一层")
-            Nd_use = 1
-        else:
-            Nd_use = np.where(valid_depth_mask)[0][-1] + 1  # +1因为是索引转长度
+        Nd_use = _depth_layer_count(Depth, max_depth)
         
         # 截断数据
         TEMP = TEMP[:, :, :Nd_use]
         SAL = SAL[:, :, :Nd_use]
         Depth = Depth[:Nd_use]
         Nd = Nd_use
+        if stats is not None:
+            stats = {k: v[:Nd_use] for k, v in stats.items()}
         
         logger.info(f"根据max_depth={max_depth:.1f}m截断: 使用{Nd}层 (最大深度{Depth[-1]:.1f}m)")
     
@@ -333,8 +382,11 @@ def get_profile_filled(woa23: Dict, lat: np.ndarray, lon: np.ndarray,
         # 所以: x=Lat (Nlat,), y=Lon (Nlon,)
         
         try:
-            # 检查NaN比例
-            nan_ratio = np.isnan(temp_slice).sum() / temp_slice.size
+            # 检查NaN比例（数据已裁剪时用完整网格上的统计量，与不裁剪时一致）
+            if stats is not None:
+                nan_ratio = stats['nan_ratio'][id]
+            else:
+                nan_ratio = np.isnan(temp_slice).sum() / temp_slice.size
             if nan_ratio > 0.9:
                 logger.warning(f"深度 {Depth[id]:.1f}m 数据大部分为NaN ({nan_ratio*100:.1f}%)，跳过")
                 Temp[id, :] = np.nan
@@ -344,15 +396,19 @@ def get_profile_filled(woa23: Dict, lat: np.ndarray, lon: np.ndarray,
             # 创建插值函数
             # 注意：RectBivariateSpline不能处理NaN，需要用griddata或者填充NaN
             # 简化方案：如果有NaN，暂时用最近邻填充
-            if np.any(np.isnan(temp_slice)):
+            if nan_ratio > 0:
                 # 使用最近邻填充NaN（简单方案）
                 from scipy.ndimage import generic_filter
                 temp_filled = temp_slice.copy()
                 sal_filled = sal_slice.copy()
                 
-                # 用均值填充NaN
-                temp_filled[np.isnan(temp_filled)] = np.nanmean(temp_filled)
-                sal_filled[np.isnan(sal_filled)] = np.nanmean(sal_filled)
+                # 用均值填充NaN（数据已裁剪时用完整网格上的均值）
+                if stats is not None:
+                    temp_mean, sal_mean = stats['temp_fill'][id], stats['sal_fill'][id]
+                else:
+                    temp_mean, sal_mean = np.nanmean(temp_filled), np.nanmean(sal_filled)
+                temp_filled[np.isnan(temp_filled)] = temp_mean
+                sal_filled[np.isnan(sal_filled)] = sal_mean
             else:
                 temp_filled = temp_slice
                 sal_filled = sal_slice
@@ -382,6 +438,21 @@ def get_profile_filled(woa23: Dict, lat: np.ndarray, lon: np.ndarray,
     return Temp, Sal, Depth
 
 
+def _depth_layer_count(Depth: np.ndarray, max_depth: float) -> int:
+    """不超过max_depth的深度层数（所有层都超过时取第一层）"""
+    # 找到不超过max_depth的最大索引
+    valid_depth_mask = Depth <= max_depth
+    if not valid_depth_mask.any():
+        logger.warning(f"所有深度层都超过max_depth={max_depth}m，使用第一层")
+        return 1
+    return np.where(valid_depth_mask)[0][-1] + 1  # +1因为是索引转长度
+
+
+def _profile_depth_limit(sea_depth: np.ndarray) -> float:
+    """温盐剖面的提取深度：区间最大海深向上取整百米再留100m余量"""
+    return np.ceil(np.max(sea_depth) / 100) * 100 + 100
+
+
 # ==================== 环境数据提取 ====================
 
 def get_env(etopo: Dict, woa23: Dict, lat: np.ndarray, lon: np.ndarray, 
@@ -413,21 +484,80 @@ def get_env(etopo: Dict, woa23: Dict, lat: np.ndarray, lon: np.ndarray,
     
     # 2. 获取温盐剖面数据（只提取到最大海深）
     # 留一些余量，取整百米
-    max_depth_query = np.ceil(max_sea_depth / 100) * 100 + 100  # 向上取整+100m余量
+    max_depth_query = _profile_depth_limit(sea_depth)  # 向上取整+100m余量
     Temp, Sal, TSDepth = get_profile_filled(woa23, lat, lon, time_idx, max_depth=max_depth_query)
     
+    ssp_raw, SSProf = _section_profiles(sea_depth, Temp, Sal, TSDepth)
+    return sea_depth, ssp_raw, SSProf
+
+
+def get_env_batch(etopo: Dict, woa23: Dict, lat: np.ndarray, lon: np.ndarray,
+                  time_idx: int = 1,
+                  sea_depth: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray, Dict]]:
+    """
+    批量提取多条测线（如同一起点的多个方位角）上的海深和声速剖面
+
+    所有测线的采样点合并为一次ETOPO插值和一次WOA23逐层插值，
+    再按测线截取深度层并计算平均剖面。每条测线的结果与单独调用get_env逐位一致。
+
+    Args:
+        etopo: ETOPO地形数据
+        woa23: WOA23声速剖面数据
+        lat: 纬度数组 (Nlines, Npoints)
+        lon: 经度数组 (Nlines, Npoints)
+        time_idx: 声速剖面月份选择 (1-17)
+        sea_depth: 已提取的海深 (Nlines, Npoints)，为None时从ETOPO插值（多个时间索引共用同一测线时可复用）
+
+    Returns:
+        各测线的 (seaDepth, ssp_raw, SSProf) 列表，同get_env
+    """
+    n_lines, n_points = lat.shape
+
+    # 1. 一次性获取所有采样点的海深
+    if sea_depth is None:
+        sea_depth_all = get_bathm(etopo, lat.ravel(), lon.ravel()).reshape(n_lines, n_points)
+    else:
+        sea_depth_all = np.asarray(sea_depth).reshape(n_lines, n_points)
+
+    # 2. 按所有测线中最深的提取深度一次性插值温盐剖面
+    depth_limits = [_profile_depth_limit(sea_depth_all[i]) for i in range(n_lines)]
+    Temp_all, Sal_all, TSDepth_all = get_profile_filled(
+        woa23, lat.ravel(), lon.ravel(), time_idx, max_depth=max(depth_limits)
+    )
+    Temp_all = Temp_all.reshape(len(TSDepth_all), n_lines, n_points)
+    Sal_all = Sal_all.reshape(len(TSDepth_all), n_lines, n_points)
+
+    # 3. 逐测线截取深度层（逐层插值与查询点无关，截取结果与单独提取一致）
+    sections = []
+    for i in range(n_lines):
+        Nd = _depth_layer_count(TSDepth_all, depth_limits[i])
+        ssp_raw, SSProf = _section_profiles(
+            sea_depth_all[i], Temp_all[:Nd, i, :], Sal_all[:Nd, i, :], TSDepth_all[:Nd]
+        )
+        sections.append((sea_depth_all[i], ssp_raw, SSProf))
+    return sections
+
+
+def _section_profiles(sea_depth: np.ndarray, Temp: np.ndarray, Sal: np.ndarray,
+                      TSDepth: np.ndarray) -> Tuple[np.ndarray, Dict]:
+    """
+    由测线上的海深和温盐剖面计算区间平均声速剖面和多点声速剖面（get_env第3-7步）
+
+    Args:
+        sea_depth: 海深数组 (Npoints,)
+        Temp: 温度矩阵 (Ndepth, Npoints)
+        Sal: 盐度矩阵 (Ndepth, Npoints)
+        TSDepth: 深度数组 (Ndepth,)
+
+    Returns:
+        (ssp_raw, SSProf)，同get_env
+    """
     Nd = len(TSDepth)
-    N_lon = len(lat)
+    N_lon = Temp.shape[1]
     
     # 3. 计算每个深度的平均温盐（处理NaN）
-    TempMean = np.zeros(Nd)
-    SalMean = np.zeros(Nd)
-    
-    for iz in range(Nd):
-        temp_row = Temp[iz, :]
-        sal_row = Sal[iz, :]
-        TempMean[iz] = np.nanmean(temp_row)
-        SalMean[iz] = np.nanmean(sal_row)
+    TempMean = np.nanmean(Temp, axis=1)
+    SalMean = np.nanmean(Sal, axis=1)
     
     # 4. 找到有效数据的最大深度索引
     valid_mask = ~(np.isnan(TempMean) | np.isnan(SalMean))
@@ -476,11 +606,8 @@ def get_env(etopo: Dict, woa23: Dict, lat: np.ndarray, lon: np.ndarray,
                 C_all[iz, :] = sound_speed(Temp[idx, :], Sal[idx, :], ssp_z[iz])
             else:
                 # 需要插值温盐
-                temp_interp = np.zeros(N_lon)
-                sal_interp = np.zeros(N_lon)
-                for j in range(N_lon):
-                    temp_interp[j] = np.interp(ssp_z[iz], TSDepth[:idxD+1], Temp[:idxD+1, j])
-                    sal_interp[j] = np.interp(ssp_z[iz], TSDepth[:idxD+1], Sal[:idxD+1, j])
+                temp_interp = _interp_columns(ssp_z[iz], TSDepth[:idxD+1], Temp[:idxD+1, :])
+                sal_interp = _interp_columns(ssp_z[iz], TSDepth[:idxD+1], Sal[:idxD+1, :])
                 C_all[iz, :] = sound_speed(temp_interp, sal_interp, ssp_z[iz])
         else:
             # 超出原始深度范围，使用延伸值
@@ -500,21 +627,62 @@ def get_env(etopo: Dict, woa23: Dict, lat: np.ndarray, lon: np.ndarray,
         'c': c_matrix
     }
     
-    return sea_depth, ssp_raw, SSProf
+    return ssp_raw, SSProf
+
+
+def _interp_columns(x: float, xp: np.ndarray, fp: np.ndarray) -> np.ndarray:
+    """
+    在标量x处对fp的每一列做线性插值（与逐列调用np.interp(x, xp, fp[:, j])逐位一致）
+
+    Args:
+        x: 插值点
+        xp: 升序节点 (Nxp,)
+        fp: 节点值 (Nxp, Ncols)
+
+    Returns:
+        插值结果 (Ncols,)
+    """
+    if x <= xp[0]:
+        return fp[0, :].copy()
+    if x >= xp[-1]:
+        return fp[-1, :].copy()
+    j = int(np.searchsorted(xp, x, side='right')) - 1
+    if x == xp[j]:
+        return fp[j, :].copy()
+
+    # 与np.interp相同的计算顺序及NaN回退规则
+    with np.errstate(invalid='ignore'):
+        slope = (fp[j + 1, :] - fp[j, :]) / (xp[j + 1] - xp[j])
+        res = slope * (x - xp[j]) + fp[j, :]
+        nan = np.isnan(res)
+        if nan.any():
+            res[nan] = slope[nan] * (x - xp[j + 1]) + fp[j + 1, nan]
+            still = np.isnan(res) & (fp[j, :] == fp[j + 1, :])
+            res[still] = fp[j, still]
+    return res
 
 
 # ==================== 便捷函数 ====================
 
-def load_env_data(env_config: Dict) -> Tuple[Dict, Dict]:
+def load_env_data(env_config: Dict, bbox: Optional[BBox] = None) -> Tuple[Dict, Dict]:
     """
     根据配置加载环境数据
     
+    env_config['lazy_load']为True（默认）时返回延迟加载句柄：数据在第一次访问时才读取，
+    WOA23只读取实际用到的时间索引，并按bbox裁剪经纬度范围
+    
     Args:
         env_config: 环境数据配置字典 (来自env_data_config.json)
+        bbox: 裁剪范围 (lat_min, lat_max, lon_min, lon_max)，仅延迟加载时有效，None表示不裁剪
         
     Returns:
-        (etopo, woa23): ETOPO和WOA23数据
+        (etopo, woa23): ETOPO和WOA23数据（字典或具有相同接口的延迟加载句柄）
     """
+    if env_config.get('lazy_load', True):
+        etopo = LazyEtopo(env_config['etopo']['file_path'], bbox=bbox)
+        woa23 = LazyWOA23(env_config['woa23']['folder_path'], bbox=bbox)
+        return etopo, woa23
+    
     etopo = load_etopo(env_config['etopo']['file_path'])
     woa23 = load_woa23(
         env_config['woa23']['folder_path'],
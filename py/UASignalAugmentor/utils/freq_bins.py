@@ -0,0 +1,115 @@
+"""
+频率量化工具
+
+将按 freq_precision 取整后的频率映射为整数频点索引，用整数数组完成去重与并集运算，
+避免大量Python float对象的开销。
+
+对任意 np.round(f, precision) 得到的频率值 v，有
+    bins_to_freq(freq_to_bins(v, precision), precision) == v   (逐位相等)
+"""
+
+from typing import Optional, Tuple
+import numpy as np
+
+# 位图并集允许的最大频点数（超出时退化为有序数组并集）
+MAX_BITMAP_BINS = 1 << 24
+
+
+def freq_to_bins(freq: np.ndarray, precision: int) -> np.ndarray:
+    """
+    频率 → 整数频点索引
+
+    Args:
+        freq: 频率数组 (Hz)，应已按precision取整
+        precision: 频率精度（小数位数），与np.round的decimals含义相同
+
+    Returns:
+        int64频点索引数组
+    """
+    freq = np.asarray(freq, dtype=np.float64)
+    if precision >= 0:
+        return np.rint(freq * (10.0 ** precision)).astype(np.int64)
+    return np.rint(freq / (10.0 ** -precision)).astype(np.int64)
+
+
+def freq_range_to_bins(f_min: float, f_max: float, precision: int) -> Tuple[int, int]:
+    """
+    频率闭区间 [f_min, f_max] → 区间内的频点索引范围 [lo, hi]
+
+    下界向上取整、上界向下取整，区间端点不落在频点上时不会把区间外的频点算进来；
+    端点与频点只差浮点误差时（如 0.3 * 10 = 3.0000000000000004）按该频点处理
+
+    Args:
+        f_min: 最小频率 (Hz)
+        f_max: 最大频率 (Hz)
+        precision: 频率精度（小数位数）
+
+    Returns:
+        (lo, hi)，区间内没有频点时 lo > hi
+    """
+    scale = 10.0 ** precision if precision >= 0 else 1.0 / (10.0 ** -precision)
+    scaled = np.array([f_min, f_max], dtype=np.float64) * scale
+    nearest = np.rint(scaled)
+    snapped = np.where(np.abs(scaled - nearest) <= 1e-9 * np.maximum(1.0, np.abs(scaled)), nearest, scaled)
+    return int(np.ceil(snapped[0])), int(np.floor(snapped[1]))
+
+
+def bins_to_freq(bins: np.ndarray, precision: int) -> np.ndarray:
+    """
+    整数频点索引 → 频率（与np.round(f, precision)的结果逐位一致）
+
+    Args:
+        bins: 频点索引数组
+        precision: 频率精度（小数位数）
+
+    Returns:
+        float64频率数组
+    """
+    bins = np.asarray(bins, dtype=np.int64)
+    if precision >= 0:
+        return bins / (10.0 ** precision)
+    return bins * (10.0 ** -precision)
+
+
+class BinUnion:
+    """
+    整数频点的增量并集
+
+    频点范围已知且不太大时使用布尔位图（add为O(n)的散列写入），
+    范围外的频点或范围过大时使用有序数组并集。
+    """
+
+    def __init__(self, lo: Optional[int] = None, hi: Optional[int] = None):
+        """
+        Args:
+            lo: 位图覆盖的最小频点索引
+            hi: 位图覆盖的最大频点索引
+        """
+        self._lo = lo
+        self._bitmap = None
+        if lo is not None and hi is not None and 0 <= hi - lo < MAX_BITMAP_BINS:
+            self._bitmap = np.zeros(hi - lo + 1, dtype=bool)
+        self._extra = np.zeros(0, dtype=np.int64)
+
+    def add(self, bins: np.ndarray) -> None:
+        """并入一组频点索引（可含重复）"""
+        bins = np.asarray(bins, dtype=np.int64)
+        if bins.size == 0:
+            return
+        if self._bitmap is not None:
+            idx = bins - self._lo
+            inside = (idx >= 0) & (idx < self._bitmap.size)
+            self._bitmap[idx[inside]] = True
+            bins = bins[~inside]
+            if bins.size == 0:
+                return
+        self._extra = np.union1d(self._extra, bins)
+
+    def bins(self) -> np.ndarray:
+        """返回排序去重后的全部频点索引"""
+        if self._bitmap is None:
+            return self._extra.copy()
+        in_map = np.flatnonzero(self._bitmap).astype(np.int64) + self._lo
+        if self._extra.size == 0:
+            return in_map
+        return np.union1d(in_map, self._extra)
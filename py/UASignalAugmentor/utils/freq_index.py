@@ -0,0 +1,304 @@
+"""
+频率倒排索引工具
+
+将A1输出语料中每个量化频点映射到包含它的 (文件, 段) 及对应幅值，
+以按频点排序的扁平数组存储，频率范围查询只需两次二分查找加一次切片。
+
+索引目录结构:
+    Analy_freq_index/
+    ├── bins.npy        # 量化频点索引（升序，int64）
+    ├── file_ids.npy    # 对应的文件序号（int32）
+    ├── segments.npy    # 对应的文件内段序号，即analyze_record下标（int32）
+    ├── amp.npy         # 对应的幅值（float64）
+    └── meta.json       # 频率精度、文件列表等元数据
+
+同一频点内的记录按 (文件序号, 段序号) 升序排列。
+
+构建时倒排记录每累积flush_every个文件即按频点排序后写出到临时目录（一个有序段），
+write()时对各有序段按频点区间分块归并，内存占用与语料规模无关。
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import logging
+
+from .io_utils import ensure_dir, save_json, load_json, load_array
+from .columnar_store import _NpyAppender
+from .freq_bins import freq_to_bins, freq_range_to_bins, bins_to_freq
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIRNAME = 'Analy_freq_index'
+FORMAT_VERSION = 1
+
+
+def build_postings(segments: Sequence[Tuple[np.ndarray, np.ndarray]], precision: int) -> Dict[str, np.ndarray]:
+    """
+    由单个文件的各段 (freq, amp) 构造倒排记录
+
+    Args:
+        segments: 各段的 (freq, amp)，顺序即段序号
+        precision: 频率精度（小数位数）
+
+    Returns:
+        {'bins': int64, 'segments': int32, 'amp': float64}，按段序号排列
+    """
+    lengths = [len(freq) for freq, _ in segments]
+    if sum(lengths) == 0:
+        return {'bins': np.zeros(0, dtype=np.int64),
+                'segments': np.zeros(0, dtype=np.int32),
+                'amp': np.zeros(0, dtype=np.float64)}
+    return {
+        'bins': freq_to_bins(np.concatenate([freq for freq, _ in segments]), precision),
+        'segments': np.repeat(np.arange(len(segments), dtype=np.int32), lengths),
+        'amp': np.concatenate([np.asarray(amp, dtype=np.float64) for _, amp in segments]),
+    }
+
+
+class FreqIndexWriter:
+    """
+    倒排索引写入器
+
+    逐文件add()倒排记录，每累积flush_every个文件按频点排序后写出为临时目录中的一个有序段；
+    write()时分块归并各有序段并写出索引目录
+    """
+
+    # 索引数组及其类型
+    ARRAYS = {'bins': np.int64, 'file_ids': np.int32, 'segments': np.int32, 'amp': np.float64}
+
+    def __init__(self, freq_precision: int, spill_dir: Optional[Union[str, Path]] = None,
+                 flush_every: int = 64, merge_block: int = 1 << 20):
+        """
+        初始化写入器
+
+        Args:
+            freq_precision: 频率精度（小数位数）
+            spill_dir: 有序段的临时目录（write()/discard()时删除），None时在系统临时目录下创建
+            flush_every: 每累积多少个文件的倒排记录写出一个有序段
+            merge_block: 归并时每块的目标记录数
+        """
+        self.freq_precision = freq_precision
+        self.flush_every = max(1, int(flush_every))
+        self.merge_block = max(1, int(merge_block))
+        if spill_dir is None:
+            self._spill_dir = Path(tempfile.mkdtemp(prefix='freq_index_'))
+        else:
+            self._spill_dir = Path(spill_dir).with_name(
+                f".{Path(spill_dir).name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            if self._spill_dir.exists():
+                shutil.rmtree(self._spill_dir)
+            ensure_dir(self._spill_dir)
+        self._files: List[Dict[str, str]] = []
+        self._pending: List[Dict[str, np.ndarray]] = []
+        self._runs: List[Path] = []
+        self._num_postings = 0
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def add(self, source_file: str, ship_class: str, output: str, postings: Dict[str, np.ndarray]) -> None:
+        """
+        追加一个文件的倒排记录
+
+        Args:
+            source_file: 源音频路径
+            ship_class: 船舶类别
+            output: 该文件分析结果所在位置（pickle文件名或列式分片目录名）
+            postings: build_postings的返回值
+        """
+        self._files.append({'source_file': source_file, 'ship_class': ship_class, 'output': output})
+        self._pending.append(postings)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """将缓冲的倒排记录按频点排序后写出为一个有序段"""
+        pending, self._pending = self._pending, []
+        lengths = [len(p['bins']) for p in pending]
+        if sum(lengths) == 0:
+            return
+        first_id = len(self._files) - len(pending)
+        arrays = {
+            'bins': np.concatenate([p['bins'] for p in pending]).astype(np.int64, copy=False),
+            'file_ids': np.repeat(np.arange(first_id, len(self._files), dtype=np.int32), lengths),
+            'segments': np.concatenate([p['segments'] for p in pending]).astype(np.int32, copy=False),
+            'amp': np.concatenate([p['amp'] for p in pending]).astype(np.float64, copy=False),
+        }
+        # 追加顺序已按 (文件, 段) 升序，稳定排序后同一频点内保持该顺序
+        order = np.argsort(arrays['bins'], kind='stable')
+        run_dir = ensure_dir(self._spill_dir / f'run_{len(self._runs):05d}')
+        for name, arr in arrays.items():
+            np.save(run_dir / f'{name}.npy', arr[order])
+        self._runs.append(run_dir)
+        self._num_postings += len(order)
+
+    def _block_bounds(self, runs: List[Dict[str, np.ndarray]]) -> np.ndarray:
+        """归并分块的频点分界（升序），各块记录数约为merge_block"""
+        n_blocks = -(-self._num_postings // self.merge_block)
+        if n_blocks <= 1:
+            return np.zeros(0, dtype=np.int64)
+        # 各有序段等间隔抽样的频点近似总体分布，取其分位数作为分界
+        stride = max(1, self.merge_block // 64)
+        sample = np.sort(np.concatenate([np.asarray(run['bins'][::stride]) for run in runs]))
+        bounds = sample[np.linspace(0, len(sample), n_blocks, endpoint=False).astype(np.int64)[1:]]
+        return np.unique(bounds)
+
+    def write(self, index_dir: Union[str, Path]) -> Path:
+        """
+        归并各有序段，写出索引目录（覆盖已有索引）
+
+        Args:
+            index_dir: 索引目录路径
+
+        Returns:
+            索引目录路径
+        """
+        self.flush()
+        index_dir = ensure_dir(index_dir)
+        runs = [{name: load_array(run_dir / f'{name}.npy') for name in self.ARRAYS} for run_dir in self._runs]
+        outputs = {name: _NpyAppender(index_dir / f'{name}.npy', dtype) for name, dtype in self.ARRAYS.items()}
+        try:
+            bounds = self._block_bounds(runs)
+            cuts = [np.concatenate([[0], np.searchsorted(run['bins'], bounds, side='left'), [len(run['bins'])]])
+                    for run in runs]
+            for b in range(len(bounds) + 1):
+                # 各有序段在本块内的切片按段序（即文件序号）拼接，稳定排序后同一频点内仍按 (文件, 段) 升序
+                parts = {name: [np.asarray(run[name][cut[b]:cut[b + 1]]) for run, cut in zip(runs, cuts)]
+                         for name in self.ARRAYS}
+                if not any(len(p) for p in parts['bins']):
+                    continue
+                bins = np.concatenate(parts['bins'])
+                order = np.argsort(bins, kind='stable')
+                for name in self.ARRAYS:
+                    outputs[name].append(np.concatenate(parts[name])[order])
+        finally:
+            for output in outputs.values():
+                output.close()
+            self.discard()
+
+        save_json({
+            'format_version': FORMAT_VERSION,
+            'freq_precision': self.freq_precision,
+            'files': self._files,
+        }, index_dir / 'meta.json')
+
+        logger.info(f"Saved frequency index ({len(self._files)} files, {self._num_postings} postings) to: {index_dir}")
+        return index_dir
+
+    def discard(self) -> None:
+        """删除临时目录中的有序段（中断时调用）"""
+        self._pending = []
+        self._runs = []
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+
+class FrequencyIndex:
+    """
+    频率倒排索引读取器
+
+    Attributes:
+        freq_precision: 频率精度（小数位数）
+        files: 文件元数据列表，下标即文件序号
+    """
+
+    ARRAY_NAMES = ('bins', 'file_ids', 'segments', 'amp')
+
+    def __init__(self, index_dir: Union[str, Path], mmap: bool = True):
+        """
+        打开索引
+
+        Args:
+            index_dir: 索引目录
+            mmap: 是否内存映射加载，默认True
+        """
+        self.index_dir = Path(index_dir)
+        if not self.index_dir.exists():
+            raise FileNotFoundError(f"Frequency index not found: {self.index_dir}")
+
+        meta = load_json(self.index_dir / 'meta.json')
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format version: {meta.get('format_version')}")
+        self.freq_precision = meta['freq_precision']
+        self.files = meta['files']
+
+        for name in self.ARRAY_NAMES:
+            setattr(self, name, load_array(self.index_dir / f'{name}.npy', mmap))
+
+    def __len__(self) -> int:
+        """倒排记录数"""
+        return len(self.bins)
+
+    def _range(self, f_min: float, f_max: float) -> slice:
+        """频率闭区间 [f_min, f_max] 对应的记录区间"""
+        lo_bin, hi_bin = freq_range_to_bins(f_min, f_max, self.freq_precision)
+        lo = int(np.searchsorted(self.bins, lo_bin, side='left'))
+        hi = int(np.searchsorted(self.bins, hi_bin, side='right'))
+        return slice(lo, hi)
+
+    def query(self, f_min: float, f_max: float) -> Dict[str, np.ndarray]:
+        """
+        查询频率范围内的全部倒排记录
+
+        Args:
+            f_min: 最小频率 (Hz)，含
+            f_max: 最大频率 (Hz)，含
+
+        Returns:
+            {'freq', 'file_ids', 'segments', 'amp'}，按频率升序（内存映射时为视图）
+        """
+        sel = self._range(f_min, f_max)
+        return {
+            'freq': bins_to_freq(self.bins[sel], self.freq_precision),
+            'file_ids': self.file_ids[sel],
+            'segments': self.segments[sel],
+            'amp': self.amp[sel],
+        }
+
+    def files_in_range(self, f_min: float, f_max: float) -> List[Dict[str, Any]]:
+        """
+        查询包含频率范围内分量的文件及幅值统计
+
+        Args:
+            f_min: 最小频率 (Hz)，含
+            f_max: 最大频率 (Hz)，含
+
+        Returns:
+            按文件序号排列的字典列表：
+            {
+                'file_id': int,
+                'source_file': str, 'ship_class': str, 'output': str,
+                'segments': np.ndarray,     # 涉及的段序号（升序去重）
+                'num_components': int,      # 范围内的分量数
+                'max_amp': float, 'mean_amp': float
+            }
+        """
+        sel = self._range(f_min, f_max)
+        file_ids = np.asarray(self.file_ids[sel])
+        segments = np.asarray(self.segments[sel])
+        amp = np.asarray(self.amp[sel])
+        if file_ids.size == 0:
+            return []
+
+        order = np.lexsort((segments, file_ids))
+        file_ids, segments, amp = file_ids[order], segments[order], amp[order]
+        ids, starts, counts = np.unique(file_ids, return_index=True, return_counts=True)
+        max_amp = np.maximum.reduceat(amp, starts)
+        sum_amp = np.add.reduceat(amp, starts)
+
+        results = []
+        for k, file_id in enumerate(ids):
+            lo, hi = starts[k], starts[k] + counts[k]
+            results.append({
+                'file_id': int(file_id),
+                **self.files[file_id],
+                'segments': np.unique(segments[lo:hi]),
+                'num_components': int(counts[k]),
+                'max_amp': float(max_amp[k]),
+                'mean_amp': float(sum_amp[k] / counts[k]),
+            })
+        return results
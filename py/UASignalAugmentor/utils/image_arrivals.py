@@ -0,0 +1,222 @@
+"""
+镜像法到达结构计算工具
+
+平坦海底、近似等声速的浅海波导中，声源在海面和海底之间的逐次镜像给出全部本征声线，
+到达结构可以解析计算，无需调用外部射线程序。第m阶（m = 0, 1, ...）有4个镜像
+（见Jensen等《Computational Ocean Acoustics》点源镜像解）：
+
+    垂直距离                     海面反射次数   海底反射次数
+    z - zs + 2mD                 m              m
+    z + zs + 2mD                 m+1            m
+    2(m+1)D - (z + zs)           m              m+1
+    2(m+1)D - (z - zs)           m+1            m+1
+
+每条声线的幅值为 1/R（参考距离1 m），乘以各次边界反射系数（在掠射角处对该频率的.trc/.brc表线性插值）；
+相位为各次反射相位之和；时延为 R/c，Thorp体积衰减计入时延虚部（与BELLHOP的.arr一致）。
+
+所有 (频率, 声源深度, 接收深度, 接收距离, 镜像) 组合一次广播计算，
+结果为与utils.arrivals读取的.arr相同的ArrivalData（每个频率一个）。
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import logging
+
+from .arrivals import ArrivalData
+from .arrival_reuse import ReflectionTable, read_env_medium, thorp_attenuation
+from .bellhop_writer import REFLECTION_ANGLES
+
+logger = logging.getLogger(__name__)
+
+
+# dB → Np
+_DB_PER_NEPER = 8.6858896
+
+# NumPy 2.0将trapz更名为trapezoid（旧名已弃用）
+_trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+
+
+def _stack_tables(tables: Sequence[ReflectionTable]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将各频率的反射系数表重采样到REFLECTION_ANGLES并堆叠
+
+    Args:
+        tables: 各频率的 (角度, 幅值, 相位) 表，None表示没有该文件（全反射，相位0）
+
+    Returns:
+        (幅值, 相位)，均为 (F × 角度数)
+    """
+    mag = np.ones((len(tables), len(REFLECTION_ANGLES)))
+    phase = np.zeros_like(mag)
+    for i, table in enumerate(tables):
+        if table is not None:
+            mag[i] = np.interp(REFLECTION_ANGLES, table[:, 0], table[:, 1])
+            phase[i] = np.interp(REFLECTION_ANGLES, table[:, 0], table[:, 2])
+    return mag, phase
+
+
+def _interp_table(table: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    """
+    在掠射角处对各频率的反射系数表线性插值
+
+    Args:
+        table: (F × 角度数)，角度网格为REFLECTION_ANGLES（步长1°）
+        angle: 掠射角 (度)，任意形状
+
+    Returns:
+        (F, *angle.shape)
+    """
+    pos = np.clip(angle, REFLECTION_ANGLES[0], REFLECTION_ANGLES[-1]) - REFLECTION_ANGLES[0]
+    lo = np.minimum(pos.astype(np.int64), len(REFLECTION_ANGLES) - 2)
+    w = pos - lo
+    return table[:, lo] * (1 - w) + table[:, lo + 1] * w
+
+
+def image_arrivals(freqs: Sequence[float], source_depths: Sequence[float],
+                   receiver_depths: Sequence[float], receiver_ranges: Sequence[float],
+                   water_depth: float, sound_speed: float,
+                   top_tables: Sequence[ReflectionTable], bottom_tables: Sequence[ReflectionTable],
+                   n_orders: int = 30, thorp: bool = True) -> List[ArrivalData]:
+    """
+    镜像法计算各频率的到达结构
+
+    Args:
+        freqs: 频率数组 (Hz)
+        source_depths: 声源深度 (m)
+        receiver_depths: 接收深度 (m)
+        receiver_ranges: 接收距离 (m)
+        water_depth: 海深 (m)
+        sound_speed: 声速 (m/s)
+        top_tables: 各频率的.trc表（parse_reflection_table的返回值，None为全反射），与freqs一一对应
+        bottom_tables: 各频率的.brc表
+        n_orders: 镜像阶数，每阶4条声线
+        thorp: 是否计入Thorp体积衰减
+
+    Returns:
+        ArrivalData列表，与freqs一一对应；每个 (声源深度, 接收深度, 接收距离) 有 4 × n_orders 个到达
+    """
+    freqs = np.asarray(freqs, dtype=float)
+    zs = np.asarray(source_depths, dtype=float)[:, None, None, None]
+    zr = np.asarray(receiver_depths, dtype=float)[None, :, None, None]
+    r = np.asarray(receiver_ranges, dtype=float)[None, None, :, None]
+    D = float(water_depth)
+
+    # 镜像按 (阶数, 4种) 展开
+    m = np.repeat(np.arange(n_orders), 4)
+    kind = np.tile(np.arange(4), n_orders)
+    n_top = (m + (kind % 2 == 1)).astype(np.int16)
+    n_bot = (m + (kind >= 2)).astype(np.int16)
+    dz = np.where(kind == 0, zr - zs + 2 * m * D,
+         np.where(kind == 1, zr + zs + 2 * m * D,
+         np.where(kind == 2, 2 * (m + 1) * D - (zr + zs),
+                  2 * (m + 1) * D - (zr - zs))))
+    dz = np.broadcast_to(dz, np.broadcast_shapes(dz.shape, r.shape))
+
+    R = np.hypot(r, dz)
+    graze = np.degrees(np.arctan2(np.abs(dz), r))
+    # 出射角/到达角（向下为正）：先触海面的声线向上出射，最后触海底的声线向上到达
+    src_sign = np.where(kind % 2 == 1, -1.0, np.where(m + kind == 0, np.sign(dz), 1.0))
+    rcv_sign = np.where(kind >= 2, -1.0, np.where(m + kind == 0, np.sign(dz), 1.0))
+
+    top_mag, top_phase = _stack_tables(top_tables)
+    bot_mag, bot_phase = _stack_tables(bottom_tables)
+    top = _interp_table(top_mag, graze)
+    bottom = _interp_table(bot_mag, graze)
+
+    amp = top ** n_top * bottom ** n_bot / R
+    phase = n_top * _interp_table(top_phase, graze) + n_bot * _interp_table(bot_phase, graze)
+    phase = 180.0 - np.mod(180.0 - phase, 360.0)     # 与BELLHOP一致，取 (-180, 180]
+    delay_re = R / sound_speed
+    if thorp:
+        alpha = thorp_attenuation(freqs) / _DB_PER_NEPER / 1000.0     # Np/m
+        delay_im = -(alpha / (2 * np.pi * freqs))[:, None, None, None, None] * R
+    else:
+        delay_im = np.zeros((len(freqs),) + R.shape)
+
+    shape = R.shape[:3]
+    counts = np.full(shape, R.shape[3], dtype=np.int32)
+    src_angle = (src_sign * graze).ravel().astype(np.float32)
+    rcv_angle = (rcv_sign * graze).ravel().astype(np.float32)
+    top_bounces = np.broadcast_to(n_top, R.shape).ravel()
+    bot_bounces = np.broadcast_to(n_bot, R.shape).ravel()
+    return [
+        ArrivalData(
+            freq=float(f),
+            source_depths=np.asarray(source_depths, dtype=float),
+            receiver_depths=np.asarray(receiver_depths, dtype=float),
+            receiver_ranges=np.asarray(receiver_ranges, dtype=float),
+            counts=counts,
+            amp=amp[i].ravel().astype(np.float32),
+            phase=phase[i].ravel().astype(np.float32),
+            delay=(delay_re + 1j * delay_im[i]).ravel(),
+            src_angle=src_angle,
+            rcv_angle=rcv_angle,
+            top_bounces=top_bounces,
+            bot_bounces=bot_bounces,
+        )
+        for i, f in enumerate(freqs)
+    ]
+
+
+def _read_vector(lines: List[str], tag: str) -> np.ndarray:
+    """读取.env中 "N ! tag" 行及其下一行的数组；只给出首末两个值时按等间隔展开（与BELLHOP一致）"""
+    for i, line in enumerate(lines):
+        if f'! {tag}' in line:
+            n = int(line.split()[0])
+            values = [float(v) for v in lines[i + 1].split('/')[0].split()]
+            if len(values) < n and len(values) == 2:
+                return np.linspace(values[0], values[1], n)
+            return np.array(values[:n])
+    raise ValueError(f"{tag} not found in env file")
+
+
+def flat_isovelocity_environment(env_text: str, bty_text: Optional[str],
+                                 max_depth_variation: float = 0.02,
+                                 max_speed_variation: float = 5.0) -> Optional[Dict]:
+    """
+    判断环境是否适用镜像法（平坦海底、近似等声速、按表反射的单层媒质）
+
+    Args:
+        env_text: .env文件内容
+        bty_text: .bty文件内容，None表示没有地形文件（海深取声速剖面最大深度）
+        max_depth_variation: 允许的海深相对变化 (max - min) / mean
+        max_speed_variation: 允许的声速变化 max - min (m/s)
+
+    Returns:
+        适用时为image_arrivals的几何参数
+        {'source_depths', 'receiver_depths', 'receiver_ranges' (m), 'water_depth', 'sound_speed', 'thorp'}，
+        不适用时为None
+    """
+    lines = env_text.splitlines()
+    if int(lines[2].split()[0]) != 1:
+        return None
+    medium = read_env_medium(env_text)
+    top_option, bottom_option = medium['top_option'], medium['bottom_option']
+    # 声速剖面须来自.env（非.ssp距离相关），两个边界均按反射系数文件反射
+    if top_option[0] == 'Q' or top_option[1:2] != 'F' or bottom_option[:1] != 'F':
+        return None
+
+    water_depth = medium['z'][-1]
+    if bty_text is not None:
+        bty_lines = bty_text.split('\n')
+        n = int(bty_lines[1].split()[0])
+        depths = np.array([float(line.split()[1]) for line in bty_lines[2:2 + n]])
+        water_depth = float(depths.mean())
+        if np.ptp(depths) > max_depth_variation * water_depth:
+            return None
+
+    z, c = medium['z'], medium['c']
+    in_water = z <= water_depth
+    if np.ptp(c[in_water]) > max_speed_variation:
+        return None
+    sound_speed = float(_trapezoid(c[in_water], z[in_water]) / (z[in_water][-1] - z[in_water][0])) \
+        if in_water.sum() > 1 else float(c[0])
+
+    return {
+        'source_depths': _read_vector(lines, 'NSz'),
+        'receiver_depths': _read_vector(lines, 'NRz'),
+        'receiver_ranges': _read_vector(lines, 'NRr') * 1000.0,
+        'water_depth': water_depth,
+        'sound_speed': sound_speed,
+        'thorp': len(top_option) > 3 and top_option[3] == 'T',
+    }
@@ -8,6 +8,7 @@ import pickle
 import json
 from pathlib import Path
 from typing import Any, Dict, Union
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
@@ -105,3 +106,24 @@ def load_json(file_path: Union[str, Path]) -> Any:
     
     logger.debug(f"Loaded JSON from: {file_path}")
     return data
+
+
+def load_array(file_path: Union[str, Path], mmap: bool = True) -> np.ndarray:
+    """
+    加载.npy数组（列式分片、倒排索引、到达结构存储共用）
+    
+    空数组无法内存映射，此时直接读取
+    
+    Args:
+        file_path: 文件路径
+        mmap: 是否以只读内存映射方式加载
+        
+    Returns:
+        数组（mmap时为np.memmap）
+    """
+    if mmap:
+        try:
+            return np.load(file_path, mmap_mode='r')
+        except ValueError:
+            pass
+    return np.load(file_path)
@@ -0,0 +1,191 @@
+"""
+分析结果缓存工具
+
+提供按文件内容哈希 + 分析参数寻址的持久化结果缓存，
+使重复运行时可跳过未变化的文件。
+
+缓存目录结构:
+    cache_dir/
+    ├── stat_index.json          # 路径 → [文件大小, 修改时间ns, 内容哈希]，避免重复哈希
+    └── entries/xx/<key>.pkl     # 缓存条目，key = sha256(内容哈希 + 文件路径 + 参数)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+import logging
+
+from .io_utils import ensure_dir, save_pickle, load_pickle, save_json, load_json
+
+logger = logging.getLogger(__name__)
+
+# 内容哈希的读块大小
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def hash_file(file_path: Union[str, Path]) -> str:
+    """
+    计算文件内容的sha256哈希
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        十六进制哈希字符串
+    """
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    内容寻址的结果缓存
+
+    缓存键由文件内容哈希、文件路径和分析参数共同决定：文件内容或任一参数变化都会得到新的键，
+    旧条目不再被命中，可通过gc()回收。结果中记录了源文件路径，内容相同的不同文件
+    （如复制到多个类别目录下的同一录音）因此各占一个条目，不会互相命中。
+
+    Attributes:
+        cache_dir: 缓存根目录
+        params_digest: 分析参数的摘要
+        hits: 本次运行的命中次数（由调用方累计）
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], params: Dict[str, Any]):
+        """
+        初始化结果缓存
+
+        Args:
+            cache_dir: 缓存根目录
+            params: 参与缓存键计算的分析参数（需可JSON序列化）
+        """
+        self.cache_dir = ensure_dir(cache_dir)
+        self.entries_dir = ensure_dir(self.cache_dir / 'entries')
+        self.stat_index_file = self.cache_dir / 'stat_index.json'
+        self.params_digest = hashlib.sha256(
+            json.dumps(params, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+        self._stat_index: Dict[str, list] = {}
+        if self.stat_index_file.exists():
+            try:
+                self._stat_index = load_json(self.stat_index_file)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable cache stat index {self.stat_index_file}: {e}")
+        self._touched_paths = set()
+        self.hits = 0
+
+    def file_key(self, file_path: Union[str, Path]) -> str:
+        """
+        计算文件的缓存键
+
+        文件大小和修改时间未变时复用已记录的内容哈希，避免重新读取整个文件
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            缓存键
+        """
+        path = str(Path(file_path).resolve())
+        st = os.stat(path)
+        record = self._stat_index.get(path)
+
+        if record is not None and record[0] == st.st_size and record[1] == st.st_mtime_ns:
+            content_hash = record[2]
+        else:
+            content_hash = hash_file(path)
+            self._stat_index[path] = [st.st_size, st.st_mtime_ns, content_hash]
+
+        self._touched_paths.add(path)
+        return hashlib.sha256(f"{content_hash}:{path}:{self.params_digest}".encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.entries_dir / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存条目
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存条目，未命中或条目损坏时返回None
+        """
+        entry_path = self._entry_path(key)
+        if not entry_path.exists():
+            return None
+        try:
+            return load_pickle(entry_path)
+        except Exception as e:
+            logger.warning(f"Discarding corrupt cache entry {entry_path}: {e}")
+            entry_path.unlink(missing_ok=True)
+            return None
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        写入缓存条目（先写临时文件再替换，避免中断时留下半个条目）
+
+        Args:
+            key: 缓存键
+            entry: 条目内容
+        """
+        entry_path = self._entry_path(key)
+        tmp_path = entry_path.with_suffix('.tmp')
+        save_pickle(entry, tmp_path)
+        os.replace(tmp_path, entry_path)
+
+    def save(self) -> None:
+        """保存文件状态索引"""
+        save_json(self._stat_index, self.stat_index_file, indent=None)
+
+    def clear(self) -> None:
+        """清空全部缓存条目和文件状态索引"""
+        shutil.rmtree(self.entries_dir, ignore_errors=True)
+        ensure_dir(self.entries_dir)
+        self._stat_index = {}
+        self.stat_index_file.unlink(missing_ok=True)
+        logger.info(f"Cleared result cache: {self.cache_dir}")
+
+    def gc(self, live_keys: Iterable[str]) -> Dict[str, int]:
+        """
+        回收不再被引用的缓存条目
+
+        本次运行未用到的条目（文件已修改/删除，或分析参数已变化）以及
+        本次未访问路径的文件状态记录都会被删除。
+
+        Args:
+            live_keys: 本次运行仍有效的缓存键
+
+        Returns:
+            {'removed_entries': int, 'freed_bytes': int, 'removed_paths': int}
+        """
+        live = set(live_keys)
+        removed_entries = 0
+        freed_bytes = 0
+
+        for entry_path in self.entries_dir.glob('*/*'):
+            if entry_path.stem in live and entry_path.suffix == '.pkl':
+                continue
+            freed_bytes += entry_path.stat().st_size
+            entry_path.unlink()
+            removed_entries += 1
+
+        stale_paths = [p for p in self._stat_index if p not in self._touched_paths]
+        for p in stale_paths:
+            del self._stat_index[p]
+
+        stats = {
+            'removed_entries': removed_entries,
+            'freed_bytes': freed_bytes,
+            'removed_paths': len(stale_paths)
+        }
+        logger.info(f"Result cache gc: {stats}")
+        return stats
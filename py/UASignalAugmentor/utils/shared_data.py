@@ -0,0 +1,121 @@
+"""
+共享内存数据工具
+
+将嵌套的 dict/list 数据（如ETOPO/WOA23环境数据）中的数值数组一次性拷贝到一块共享内存，
+工作进程只需接收一个很小的描述结构即可零拷贝地重建同样的嵌套数据，避免为每个进程pickle整份数据集。
+
+用法:
+    block, spec = share_nested(data)          # 主进程
+    data, shm = attach_nested(spec)           # 工作进程（需持有shm直到不再使用数据）
+    release_shared(block)                     # 主进程在进程池结束后释放
+"""
+
+from multiprocessing import shared_memory
+from typing import Any, List, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 各数组在共享内存块内的对齐字节数
+_ALIGN = 64
+
+
+def _is_shareable(value: Any) -> bool:
+    """是否为可放入共享内存的数值数组"""
+    return isinstance(value, np.ndarray) and value.dtype.kind in 'biufc' and value.size > 0
+
+
+def _collect_arrays(value: Any, out: List[np.ndarray]) -> None:
+    if _is_shareable(value):
+        out.append(value)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _collect_arrays(v, out)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _collect_arrays(v, out)
+
+
+def share_nested(data: Any) -> Tuple[shared_memory.SharedMemory, Any]:
+    """
+    将嵌套数据中的数值数组拷贝到一块共享内存
+
+    Args:
+        data: 由dict/list/tuple嵌套的数据，叶子为数组或其他可pickle对象
+
+    Returns:
+        (block, spec):
+        - block: 共享内存块（调用方负责在使用结束后release_shared）
+        - spec: 可pickle的描述结构，数组被替换为其在共享内存中的位置
+    """
+    arrays: List[np.ndarray] = []
+    _collect_arrays(data, arrays)
+
+    offsets = {}
+    total = 0
+    for arr in arrays:
+        if id(arr) in offsets:
+            continue
+        offsets[id(arr)] = total
+        total += -(-arr.nbytes // _ALIGN) * _ALIGN
+
+    block = shared_memory.SharedMemory(create=True, size=max(total, 1))
+
+    def build(value: Any) -> Any:
+        if _is_shareable(value):
+            order = 'F' if value.flags.f_contiguous and not value.flags.c_contiguous else 'C'
+            offset = offsets[id(value)]
+            view = np.ndarray(value.shape, dtype=value.dtype, buffer=block.buf, offset=offset, order=order)
+            view[...] = value
+            return ('__shared_array__', offset, value.shape, value.dtype.str, order)
+        if isinstance(value, dict):
+            return {k: build(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [build(v) for v in value]
+        if isinstance(value, tuple):
+            return tuple(build(v) for v in value)
+        return value
+
+    spec = {'name': block.name, 'data': build(data)}
+    logger.info(f"Shared {len(offsets)} arrays ({total / 2**20:.1f} MiB) in shared memory block {block.name}")
+    return block, spec
+
+
+def _is_array_spec(value: Any) -> bool:
+    return isinstance(value, tuple) and len(value) == 5 and value[0] == '__shared_array__'
+
+
+def attach_nested(spec: Any) -> Tuple[Any, shared_memory.SharedMemory]:
+    """
+    在工作进程中由描述结构重建嵌套数据（数组为共享内存上的只读视图）
+
+    Args:
+        spec: share_nested返回的描述结构
+
+    Returns:
+        (data, block): 重建的数据，以及必须保持引用的共享内存块
+    """
+    block = shared_memory.SharedMemory(name=spec['name'])
+
+    def build(value: Any) -> Any:
+        if _is_array_spec(value):
+            _, offset, shape, dtype, order = value
+            arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset, order=order)
+            arr.flags.writeable = False
+            return arr
+        if isinstance(value, dict):
+            return {k: build(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [build(v) for v in value]
+        if isinstance(value, tuple):
+            return tuple(build(v) for v in value)
+        return value
+
+    return build(spec['data']), block
+
+
+def release_shared(block: shared_memory.SharedMemory) -> None:
+    """关闭并释放共享内存块（由创建方调用）"""
+    block.close()
+    block.unlink()